@@ -0,0 +1,40 @@
+"""Crear tabla contador_documentos
+
+Revision ID: f837844d0007
+Revises: f837844d0006
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f837844d0007'
+down_revision: Union[str, None] = 'f837844d0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Crear tabla contador_documentos para la numeración de documentos.
+    Una fila por serie (VENTA, MPT, MOV, PROD, OC) y periodo; el número se asigna
+    con UPDATE ... RETURNING en lugar de buscar el último con LIKE/MAX/COUNT.
+    Los contadores se crean bajo demanda continuando la numeración existente.
+    """
+    op.create_table(
+        'contador_documentos',
+        sa.Column('serie', sa.VARCHAR(20), nullable=False),
+        sa.Column('periodo', sa.VARCHAR(8), nullable=False, comment='YYYYMM o YYYYMMDD según la serie'),
+        sa.Column('ultimo_numero', sa.BIGINT, nullable=False, server_default='0'),
+        sa.Column('fecha_actualizacion', sa.TIMESTAMP, nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('serie', 'periodo')
+    )
+
+
+def downgrade() -> None:
+    """Eliminar tabla contador_documentos."""
+    op.drop_table('contador_documentos')
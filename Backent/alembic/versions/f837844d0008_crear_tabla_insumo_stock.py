@@ -0,0 +1,64 @@
+"""Crear tabla insumo_stock
+
+Revision ID: f837844d0008
+Revises: f837844d0007
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f837844d0008'
+down_revision: Union[str, None] = 'f837844d0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Crear tabla insumo_stock: resumen por insumo de los lotes con stock
+    (stock total, stock valorizado, vencimiento más próximo y cantidad de lotes).
+    Los listados y alertas la leen por clave primaria en lugar de sumar
+    cantidad_restante de todos los lotes. Se carga con el estado actual de los lotes.
+    """
+    op.create_table(
+        'insumo_stock',
+        sa.Column('id_insumo', sa.BigInteger, sa.ForeignKey('insumo.id_insumo'), primary_key=True),
+        sa.Column('stock_actual', sa.DECIMAL(14, 4), nullable=False, server_default='0'),
+        sa.Column('valor_stock', sa.DECIMAL(14, 4), nullable=False, server_default='0',
+                  comment='SUM(cantidad_restante * precio_unitario) de los lotes con stock'),
+        sa.Column('fecha_vencimiento_proxima', sa.TIMESTAMP, nullable=True),
+        sa.Column('cantidad_lotes', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('fecha_actualizacion', sa.TIMESTAMP, nullable=False, server_default=sa.func.now())
+    )
+
+    op.execute("""
+        INSERT INTO insumo_stock (
+            id_insumo, stock_actual, valor_stock, fecha_vencimiento_proxima, cantidad_lotes
+        )
+        SELECT
+            ins.id_insumo,
+            COALESCE(SUM(l.cantidad_restante), 0),
+            COALESCE(SUM(l.cantidad_restante * l.precio_unitario), 0),
+            MIN(l.fecha_vencimiento),
+            COUNT(l.id_ingreso_detalle)
+        FROM insumo ins
+        LEFT JOIN (
+            SELECT d.id_ingreso_detalle, d.id_insumo, d.cantidad_restante,
+                   d.precio_unitario, d.fecha_vencimiento
+            FROM ingresos_insumos_detalle d
+            INNER JOIN ingresos_insumos i ON d.id_ingreso = i.id_ingreso
+            WHERE d.cantidad_restante > 0
+              AND i.anulado = false
+        ) l ON l.id_insumo = ins.id_insumo
+        GROUP BY ins.id_insumo
+    """)
+
+
+def downgrade() -> None:
+    """Eliminar tabla insumo_stock."""
+    op.drop_table('insumo_stock')
@@ -0,0 +1,85 @@
+"""Crear índices parciales y de cobertura para consultas frecuentes
+
+Revision ID: f837844d0009
+Revises: f837844d0008
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f837844d0009'
+down_revision: Union[str, None] = 'f837844d0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Índices diseñados a partir del SQL de los repositorios.
+    Los mismos índices están declarados en __table_args__ de cada modelo.
+
+    - Lotes con stock (cantidad_restante > 0): la mayoría de lotes históricos
+      están agotados, así que el índice parcial solo contiene los vigentes.
+    - Movimientos por documento origen (trazabilidad) y por lote.
+    - Ventas vigentes por fecha, cubriendo total y método de pago.
+    - Notificaciones activas por insumo y tipo (deduplicación de alertas).
+    """
+    op.create_index(
+        'idx_iid_fefo_con_stock',
+        'ingresos_insumos_detalle',
+        ['id_insumo', 'fecha_vencimiento', 'id_ingreso_detalle'],
+        postgresql_include=['cantidad_restante', 'id_ingreso'],
+        postgresql_where=sa.text('cantidad_restante > 0')
+    )
+    op.create_index(
+        'idx_iid_vencimiento_con_stock',
+        'ingresos_insumos_detalle',
+        ['fecha_vencimiento'],
+        postgresql_where=sa.text('cantidad_restante > 0 AND fecha_vencimiento IS NOT NULL')
+    )
+    op.create_index('idx_iid_ingreso', 'ingresos_insumos_detalle', ['id_ingreso'])
+
+    op.create_index(
+        'idx_mov_insumos_documento',
+        'movimiento_insumos',
+        ['id_documento_origen', 'tipo_documento_origen', 'tipo_movimiento']
+    )
+    op.create_index('idx_mov_insumos_lote', 'movimiento_insumos', ['id_lote'])
+
+    op.create_index(
+        'idx_mov_productos_documento',
+        'movimiento_productos_terminados',
+        ['id_documento_origen', 'tipo_documento_origen', 'tipo_movimiento']
+    )
+
+    op.create_index(
+        'idx_ventas_fecha_activas',
+        'ventas',
+        ['fecha_venta'],
+        postgresql_include=['total', 'metodo_pago'],
+        postgresql_where=sa.text('anulado = false')
+    )
+
+    op.create_index(
+        'idx_notificaciones_insumo_tipo_activas',
+        'notificaciones',
+        ['id_insumo', 'tipo', 'fecha_creacion'],
+        postgresql_where=sa.text('activa = true')
+    )
+
+
+def downgrade() -> None:
+    """Eliminar los índices de consultas frecuentes."""
+    op.drop_index('idx_notificaciones_insumo_tipo_activas', table_name='notificaciones')
+    op.drop_index('idx_ventas_fecha_activas', table_name='ventas')
+    op.drop_index('idx_mov_productos_documento', table_name='movimiento_productos_terminados')
+    op.drop_index('idx_mov_insumos_lote', table_name='movimiento_insumos')
+    op.drop_index('idx_mov_insumos_documento', table_name='movimiento_insumos')
+    op.drop_index('idx_iid_ingreso', table_name='ingresos_insumos_detalle')
+    op.drop_index('idx_iid_vencimiento_con_stock', table_name='ingresos_insumos_detalle')
+    op.drop_index('idx_iid_fefo_con_stock', table_name='ingresos_insumos_detalle')
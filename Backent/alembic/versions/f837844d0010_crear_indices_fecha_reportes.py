@@ -0,0 +1,35 @@
+"""Crear índices por fecha para reportes con rango semiabierto
+
+Revision ID: f837844d0010
+Revises: f837844d0009
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f837844d0010'
+down_revision: Union[str, None] = 'f837844d0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Los reportes filtran ahora con `columna >= desde AND columna < hasta`
+    (utils.rango_fechas) en lugar de DATE(columna), por lo que un índice simple
+    sobre la fecha basta para leer solo las filas del período.
+
+    ventas.fecha_venta y produccion.fecha_produccion ya tenían índice.
+    """
+    op.create_index('idx_mov_insumos_fecha', 'movimiento_insumos', ['fecha_movimiento'])
+    op.create_index('idx_merma_fecha_caso', 'calidad_desperdicio_merma', ['fecha_caso'])
+
+
+def downgrade() -> None:
+    """Eliminar los índices por fecha."""
+    op.drop_index('idx_merma_fecha_caso', table_name='calidad_desperdicio_merma')
+    op.drop_index('idx_mov_insumos_fecha', table_name='movimiento_insumos')
@@ -0,0 +1,79 @@
+"""Crear tablas de resúmenes diarios para reportes
+
+Revision ID: f837844d0011
+Revises: f837844d0010
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f837844d0011'
+down_revision: Union[str, None] = 'f837844d0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Crear las tablas resumen_*_dia (ventas por producto y por método de pago,
+    movimientos por insumo y mermas por tipo) y resumen_dia_cierre.
+
+    No se cargan datos aquí: en su primera ejecución el job de sellado
+    (jobs/resumen_diario_job.py) calcula y sella todos los días desde el primer
+    día con datos. Mientras tanto los reportes siguen leyendo las tablas de origen.
+    """
+    op.create_table(
+        'resumen_dia_cierre',
+        sa.Column('fecha', sa.Date, primary_key=True),
+        sa.Column('sellado_en', sa.TIMESTAMP, nullable=True),
+        sa.Column('fecha_actualizacion', sa.TIMESTAMP, nullable=False, server_default=sa.func.now())
+    )
+
+    op.create_table(
+        'resumen_ventas_producto_dia',
+        sa.Column('fecha', sa.Date, primary_key=True),
+        sa.Column('id_producto', sa.BigInteger, sa.ForeignKey('productos_terminados.id_producto'), primary_key=True),
+        sa.Column('cantidad_vendida', sa.DECIMAL(14, 4), nullable=False, server_default='0'),
+        sa.Column('monto_total', sa.DECIMAL(14, 2), nullable=False, server_default='0'),
+        sa.Column('num_ventas', sa.Integer, nullable=False, server_default='0')
+    )
+
+    op.create_table(
+        'resumen_ventas_metodo_dia',
+        sa.Column('fecha', sa.Date, primary_key=True),
+        sa.Column('metodo_pago', sa.VARCHAR(20), primary_key=True),
+        sa.Column('total_ventas', sa.DECIMAL(14, 2), nullable=False, server_default='0'),
+        sa.Column('cantidad_transacciones', sa.Integer, nullable=False, server_default='0')
+    )
+
+    op.create_table(
+        'resumen_insumos_dia',
+        sa.Column('fecha', sa.Date, primary_key=True),
+        sa.Column('id_insumo', sa.BigInteger, sa.ForeignKey('insumo.id_insumo'), primary_key=True),
+        sa.Column('cantidad_entrada', sa.DECIMAL(14, 4), nullable=False, server_default='0'),
+        sa.Column('cantidad_salida', sa.DECIMAL(14, 4), nullable=False, server_default='0'),
+        sa.Column('cantidad_total', sa.DECIMAL(14, 4), nullable=False, server_default='0')
+    )
+
+    op.create_table(
+        'resumen_mermas_dia',
+        sa.Column('fecha', sa.Date, primary_key=True),
+        sa.Column('tipo', sa.VARCHAR(50), primary_key=True),
+        sa.Column('cantidad_casos', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('cantidad_total', sa.DECIMAL(14, 4), nullable=False, server_default='0'),
+        sa.Column('costo_total', sa.DECIMAL(14, 2), nullable=False, server_default='0')
+    )
+
+
+def downgrade() -> None:
+    """Eliminar las tablas de resúmenes diarios."""
+    op.drop_table('resumen_mermas_dia')
+    op.drop_table('resumen_insumos_dia')
+    op.drop_table('resumen_ventas_metodo_dia')
+    op.drop_table('resumen_ventas_producto_dia')
+    op.drop_table('resumen_dia_cierre')
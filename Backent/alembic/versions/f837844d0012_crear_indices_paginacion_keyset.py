@@ -0,0 +1,97 @@
+"""Crear índices (fecha, id) para paginación por cursor
+
+Revision ID: f837844d0012
+Revises: f837844d0011
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f837844d0012'
+down_revision: Union[str, None] = 'f837844d0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Los listados (kardex, ingresos, historial de producción, ventas,
+    notificaciones) se paginan con `WHERE (fecha, id) < (:fecha, :id)
+    ORDER BY fecha DESC, id DESC LIMIT n` (utils.paginacion). Un índice sobre
+    (fecha, id) resuelve cada página como un único rango del índice.
+
+    Los índices simples por fecha de movimiento_insumos, produccion y ventas se
+    reemplazan: el índice compuesto empieza por la fecha y sirve igual para los
+    filtros por rango de los reportes.
+
+    movimiento_productos_terminados.fecha_movimiento pasa a NOT NULL (todas
+    las inserciones ya la informan): una fila con fecha NULL quedaría fuera
+    de la comparación de filas. Las filas antiguas sin fecha toman la del
+    movimiento anterior (por id) o, si no hay, la del primero con fecha.
+    """
+    op.execute("""
+        UPDATE movimiento_productos_terminados m
+        SET fecha_movimiento = COALESCE(
+            (SELECT MAX(a.fecha_movimiento)
+             FROM movimiento_productos_terminados a
+             WHERE a.id_movimiento < m.id_movimiento),
+            (SELECT MIN(a.fecha_movimiento) FROM movimiento_productos_terminados a),
+            now()
+        )
+        WHERE m.fecha_movimiento IS NULL
+    """)
+    op.alter_column(
+        'movimiento_productos_terminados', 'fecha_movimiento',
+        existing_type=sa.TIMESTAMP(), nullable=False
+    )
+
+    op.create_index(
+        'idx_mov_insumos_fecha_id', 'movimiento_insumos', ['fecha_movimiento', 'id_movimiento']
+    )
+    op.drop_index('idx_mov_insumos_fecha', table_name='movimiento_insumos')
+
+    op.create_index(
+        'idx_mov_productos_fecha_id', 'movimiento_productos_terminados', ['fecha_movimiento', 'id_movimiento']
+    )
+
+    op.create_index('idx_ingresos_fecha_id', 'ingresos_insumos', ['fecha_ingreso', 'id_ingreso'])
+
+    op.create_index('idx_produccion_fecha_id', 'produccion', ['fecha_produccion', 'id_produccion'])
+    op.drop_index('idx_produccion_fecha', table_name='produccion')
+
+    op.create_index('idx_venta_fecha_id', 'ventas', ['fecha_venta', 'id_venta'])
+    op.drop_index('idx_venta_fecha', table_name='ventas')
+
+    op.create_index(
+        'idx_notificaciones_activas_fecha_id',
+        'notificaciones',
+        ['fecha_creacion', 'id_notificacion'],
+        postgresql_where=sa.text('activa = true')
+    )
+
+
+def downgrade() -> None:
+    """Restaurar los índices simples por fecha."""
+    op.drop_index('idx_notificaciones_activas_fecha_id', table_name='notificaciones')
+
+    op.create_index('idx_venta_fecha', 'ventas', ['fecha_venta'])
+    op.drop_index('idx_venta_fecha_id', table_name='ventas')
+
+    op.create_index('idx_produccion_fecha', 'produccion', ['fecha_produccion'])
+    op.drop_index('idx_produccion_fecha_id', table_name='produccion')
+
+    op.drop_index('idx_ingresos_fecha_id', table_name='ingresos_insumos')
+
+    op.drop_index('idx_mov_productos_fecha_id', table_name='movimiento_productos_terminados')
+    op.alter_column(
+        'movimiento_productos_terminados', 'fecha_movimiento',
+        existing_type=sa.TIMESTAMP(), nullable=True
+    )
+
+    op.create_index('idx_mov_insumos_fecha', 'movimiento_insumos', ['fecha_movimiento'])
+    op.drop_index('idx_mov_insumos_fecha_id', table_name='movimiento_insumos')
@@ -0,0 +1,48 @@
+"""Crear índices por ítem para el kardex
+
+Revision ID: f837844d0013
+Revises: f837844d0012
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f837844d0013'
+down_revision: Union[str, None] = 'f837844d0012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    El kardex (modules/kardex) calcula el saldo de cada ítem con la suma de
+    sus movimientos anteriores y un SUM() OVER (PARTITION BY ítem ORDER BY
+    fecha, id). Con (ítem, fecha, id) INCLUDE (tipo, cantidad) y solo los
+    movimientos no anulados, ambas partes se resuelven con un index-only scan
+    del rango del ítem, sin leer la tabla.
+    """
+    op.create_index(
+        'idx_mov_insumos_kardex',
+        'movimiento_insumos',
+        ['id_insumo', 'fecha_movimiento', 'id_movimiento'],
+        postgresql_include=['tipo_movimiento', 'cantidad'],
+        postgresql_where=sa.text('anulado = false')
+    )
+    op.create_index(
+        'idx_mov_productos_kardex',
+        'movimiento_productos_terminados',
+        ['id_producto', 'fecha_movimiento', 'id_movimiento'],
+        postgresql_include=['tipo_movimiento', 'cantidad'],
+        postgresql_where=sa.text('anulado = false')
+    )
+
+
+def downgrade() -> None:
+    """Eliminar los índices del kardex."""
+    op.drop_index('idx_mov_productos_kardex', table_name='movimiento_productos_terminados')
+    op.drop_index('idx_mov_insumos_kardex', table_name='movimiento_insumos')
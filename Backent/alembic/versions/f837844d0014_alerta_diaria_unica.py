@@ -0,0 +1,43 @@
+"""Alerta diaria única por insumo, tipo y lote
+
+Revision ID: f837844d0014
+Revises: f837844d0013
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f837844d0014'
+down_revision: Union[str, None] = 'f837844d0013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    El job de alertas (jobs/alertas_job.py) inserta las alertas del día con un
+    INSERT ... SELECT ... ON CONFLICT DO NOTHING. fecha_alerta guarda el día
+    del negocio de la alerta y el índice único parcial garantiza una sola
+    alerta activa por (insumo, tipo, lote, día), aunque dos ejecuciones del job
+    se crucen. Las notificaciones existentes y las que no son del job quedan
+    con fecha_alerta NULL, fuera del índice.
+    """
+    op.add_column('notificaciones', sa.Column('fecha_alerta', sa.Date(), nullable=True))
+    op.create_index(
+        'uq_notificaciones_alerta_diaria',
+        'notificaciones',
+        ['id_insumo', 'tipo', sa.text('COALESCE(id_ingreso_detalle, 0)'), 'fecha_alerta'],
+        unique=True,
+        postgresql_where=sa.text('activa = true AND fecha_alerta IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    """Eliminar el índice y la columna fecha_alerta."""
+    op.drop_index('uq_notificaciones_alerta_diaria', table_name='notificaciones')
+    op.drop_column('notificaciones', 'fecha_alerta')
@@ -19,7 +19,7 @@ scheduler = BackgroundScheduler(
         'max_instances': 1,          # Evitar ejecuciones paralelas del mismo job
         'misfire_grace_time': 3600   # 1 hora de gracia si se perdió la ejecución
     },
-    timezone='America/Lima'  # Ajustar a tu zona horaria
+    timezone=settings.SCHEDULER_TIMEZONE
 )
 
 
@@ -43,6 +43,7 @@ def init_scheduler():
     from jobs.alertas_job import ejecutar_alertas_diarias_wrapper
     from jobs.backup_job import ejecutar_backup_diario_wrapper
     from jobs.logs_maintenance_job import ejecutar_mantenimiento_logs_wrapper
+    from jobs.resumen_diario_job import ejecutar_sellado_diario_wrapper
     
     # Agregar listener para logging de eventos
     scheduler.add_listener(job_listener, EVENT_JOB_ERROR | EVENT_JOB_EXECUTED)
@@ -100,6 +101,25 @@ def init_scheduler():
         )
     else:
         logger.warning("⚠️ Job de mantenimiento de logs deshabilitado (LOGS_COMPRESSION_ENABLED=false)")
+    
+    # Job de sellado de resúmenes diarios para reportes (00:15 por defecto)
+    resumen_enabled = getattr(settings, 'RESUMEN_DIARIO_ENABLED', True)
+    resumen_hora = getattr(settings, 'RESUMEN_DIARIO_HORA', 0)
+    resumen_minuto = getattr(settings, 'RESUMEN_DIARIO_MINUTO', 15)
+    
+    if resumen_enabled:
+        scheduler.add_job(
+            ejecutar_sellado_diario_wrapper,
+            trigger=CronTrigger(hour=resumen_hora, minute=resumen_minuto),
+            id="resumen_diario",
+            name="Sellar resúmenes diarios de reportes (día anterior)",
+            replace_existing=True
+        )
+        logger.info(
+            f"📅 Scheduler configurado: Job 'resumen_diario' programado para las {resumen_hora:02d}:{resumen_minuto:02d}"
+        )
+    else:
+        logger.warning("⚠️ Job de resúmenes diarios deshabilitado (RESUMEN_DIARIO_ENABLED=false)")
 
 
 def start_scheduler():
@@ -1,11 +1,55 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from typing import Any, Callable, Optional, TypeVar
+
+from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from config import settings
+from utils.metricas_db import (
+    LECTURAS,
+    REPLICA_LAG,
+    PoolAsyncInstrumentado,
+    PoolAsyncReplicaInstrumentado,
+    PoolInstrumentado,
+    PoolReplicaInstrumentado,
+    instrumentar_engine
+)
+
+T = TypeVar("T")
 
 SQLALCHEMY_DATABASE_URL = f"postgresql://{settings.POST_USER}:{settings.POST_PASS}@{settings.HOST_DB}:{settings.POST_PORT}/{settings.POST_DB}"
+SQLALCHEMY_ASYNC_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+# Configuración de pool común a los dos engines (ver config.py)
+OPCIONES_POOL = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+# Timeouts de Postgres aplicados a cada conexión nueva
+TIMEOUTS_SESION = {
+    "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS),
+    "idle_in_transaction_session_timeout": str(settings.DB_IDLE_IN_TRANSACTION_TIMEOUT_MS),
+}
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+OPCIONES_LIBPQ = " ".join(f"-c {k}={v}" for k, v in TIMEOUTS_SESION.items())
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    poolclass=PoolInstrumentado,
+    connect_args={"options": OPCIONES_LIBPQ},
+    **OPCIONES_POOL
+)
+instrumentar_engine(engine, "sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -16,3 +60,251 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ==================== MODO ASYNC (asyncpg) ====================
+#
+# Con DB_MODO="async" los endpoints de lectura frecuentes (ver get_db_ejecutor)
+# corren en el event loop sobre asyncpg en lugar de ocupar un hilo del
+# threadpool de Starlette (40 por defecto) mientras esperan a Postgres.
+# El engine async se crea recién al primer uso: en modo sync no hace falta asyncpg.
+
+_async_engine: Optional[AsyncEngine] = None
+_AsyncSessionLocal: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """Engine async (asyncpg), creado al primer uso."""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            SQLALCHEMY_ASYNC_DATABASE_URL,
+            poolclass=PoolAsyncInstrumentado,
+            connect_args={"server_settings": TIMEOUTS_SESION},
+            **OPCIONES_POOL
+        )
+        instrumentar_engine(_async_engine.sync_engine, "async")
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    """Cierra las conexiones de los engines async, primaria y réplica (shutdown de la aplicación)."""
+    global _async_engine, _AsyncSessionLocal, _async_replica_engine, _AsyncReplicaSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _AsyncSessionLocal = None
+    if _async_replica_engine is not None:
+        await _async_replica_engine.dispose()
+        _async_replica_engine = None
+        _AsyncReplicaSessionLocal = None
+
+
+async def get_async_db():
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
+
+
+class EjecutorDB:
+    """
+    Ejecuta código de servicios/repositorios síncronos desde un endpoint async.
+
+    `await db(fn, *args)` llama a `fn(session, *args)` con una Session síncrona:
+    - modo sync: la sesión de get_db, en el threadpool (igual que un endpoint `def`)
+    - modo async: AsyncSession.run_sync, sobre asyncpg y sin ocupar hilos
+
+    Así los endpoints portados reutilizan los mismos servicios en ambos modos.
+    """
+
+    def __init__(self, db: Session = None, async_db: AsyncSession = None):
+        self.db = db
+        self.async_db = async_db
+
+    async def __call__(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if self.async_db is not None:
+            return await self.async_db.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.db, *args, **kwargs)
+
+
+def _get_ejecutor_sync(db: Session = Depends(get_db)) -> EjecutorDB:
+    return EjecutorDB(db=db)
+
+
+async def _get_ejecutor_async(db: AsyncSession = Depends(get_async_db)) -> EjecutorDB:
+    return EjecutorDB(async_db=db)
+
+
+# Dependency de los endpoints de lectura portados a async (según DB_MODO)
+get_db_ejecutor = _get_ejecutor_async if settings.DB_MODO == "async" else _get_ejecutor_sync
+
+
+# ==================== RÉPLICA DE LECTURA ====================
+#
+# Con DB_REPLICA_URL, las lecturas que toleran unos segundos de retraso
+# (reportes, consultas de alertas, backups) abren su sesión con
+# get_read_db / crear_sesion_lectura. GuardiaReplica mide el retraso cada
+# DB_REPLICA_VERIFICACION_SEGUNDOS; si supera DB_REPLICA_MAX_LAG_SEGUNDOS o la
+# réplica no responde, esas sesiones van a la primaria hasta la próxima medición.
+# Sin DB_REPLICA_URL, get_read_db equivale a get_db.
+
+# Retraso en segundos. 0 si ya aplicó todo lo recibido (una réplica al día no
+# "envejece" mientras la primaria no escribe) o si no es una réplica (otra
+# instancia usada como réplica en local); NULL si todavía no aplicó nada.
+CONSULTA_LAG_REPLICA = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+
+class GuardiaReplica:
+    """Decide si las lecturas pueden ir a la réplica según su último retraso medido."""
+
+    def __init__(self, engine: Engine, max_lag_segundos: float, intervalo_segundos: float):
+        self.engine = engine
+        self.max_lag_segundos = max_lag_segundos
+        self.intervalo_segundos = intervalo_segundos
+        self._utilizable = False
+        self._proxima_verificacion = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def verificacion_pendiente(self) -> bool:
+        return time.monotonic() >= self._proxima_verificacion
+
+    def utilizable(self, verificar: bool = True) -> bool:
+        """Último resultado; con `verificar`, antes vuelve a medir si venció el intervalo."""
+        if verificar and self.verificacion_pendiente:
+            self.verificar()
+        return self._utilizable
+
+    def verificar(self) -> None:
+        """Mide el retraso. Si otro hilo ya está midiendo, no espera: queda el resultado anterior."""
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            utilizable = self._medir()
+            if utilizable != self._utilizable:
+                if utilizable:
+                    logger.info("Réplica de lectura activa")
+                else:
+                    logger.warning("Réplica de lectura descartada, las lecturas van a la primaria")
+            self._utilizable = utilizable
+            self._proxima_verificacion = time.monotonic() + self.intervalo_segundos
+        finally:
+            self._lock.release()
+
+    def _medir(self) -> bool:
+        try:
+            with self.engine.connect() as conn:
+                lag = conn.execute(CONSULTA_LAG_REPLICA).scalar()
+        except Exception as e:
+            logger.warning(f"Réplica de lectura no responde: {e}")
+            REPLICA_LAG.set(-1)
+            return False
+
+        if lag is None:
+            REPLICA_LAG.set(-1)
+            return False
+        REPLICA_LAG.set(float(lag))
+        if float(lag) > self.max_lag_segundos:
+            logger.warning(
+                f"Réplica de lectura atrasada {float(lag):.1f}s "
+                f"(máximo {self.max_lag_segundos}s)"
+            )
+            return False
+        return True
+
+
+replica_engine: Optional[Engine] = None
+ReplicaSessionLocal: Optional[sessionmaker] = None
+guardia_replica: Optional[GuardiaReplica] = None
+
+if settings.DB_REPLICA_URL:
+    replica_engine = create_engine(
+        settings.DB_REPLICA_URL,
+        poolclass=PoolReplicaInstrumentado,
+        connect_args={"options": OPCIONES_LIBPQ},
+        **OPCIONES_POOL
+    )
+    instrumentar_engine(replica_engine, "replica")
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    guardia_replica = GuardiaReplica(
+        replica_engine,
+        max_lag_segundos=settings.DB_REPLICA_MAX_LAG_SEGUNDOS,
+        intervalo_segundos=settings.DB_REPLICA_VERIFICACION_SEGUNDOS
+    )
+
+
+def crear_sesion_lectura() -> Session:
+    """Sesión de solo lectura: la réplica si está configurada y al día, si no la primaria."""
+    if guardia_replica is not None and guardia_replica.utilizable():
+        LECTURAS.labels(destino="replica").inc()
+        return ReplicaSessionLocal()
+    LECTURAS.labels(destino="primaria").inc()
+    return SessionLocal()
+
+
+def get_read_db():
+    db = crear_sesion_lectura()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+_async_replica_engine: Optional[AsyncEngine] = None
+_AsyncReplicaSessionLocal: Optional[async_sessionmaker] = None
+
+
+def _get_async_replica_sesiones() -> async_sessionmaker:
+    """Sessionmaker async de la réplica, creado al primer uso."""
+    global _async_replica_engine, _AsyncReplicaSessionLocal
+    if _async_replica_engine is None:
+        _async_replica_engine = create_async_engine(
+            make_url(settings.DB_REPLICA_URL).set(drivername="postgresql+asyncpg"),
+            poolclass=PoolAsyncReplicaInstrumentado,
+            connect_args={"server_settings": TIMEOUTS_SESION},
+            **OPCIONES_POOL
+        )
+        instrumentar_engine(_async_replica_engine.sync_engine, "async_replica")
+        _AsyncReplicaSessionLocal = async_sessionmaker(
+            _async_replica_engine, autoflush=False, expire_on_commit=False
+        )
+    return _AsyncReplicaSessionLocal
+
+
+async def get_async_read_db():
+    usar_replica = False
+    if guardia_replica is not None:
+        # La medición es síncrona (engine de la réplica): fuera del event loop
+        if guardia_replica.verificacion_pendiente:
+            await run_in_threadpool(guardia_replica.verificar)
+        usar_replica = guardia_replica.utilizable(verificar=False)
+
+    if usar_replica:
+        LECTURAS.labels(destino="replica").inc()
+        sesiones = _get_async_replica_sesiones()
+    else:
+        LECTURAS.labels(destino="primaria").inc()
+        get_async_engine()
+        sesiones = _AsyncSessionLocal
+
+    async with sesiones() as db:
+        yield db
+
+
+def _get_ejecutor_lectura_sync(db: Session = Depends(get_read_db)) -> EjecutorDB:
+    return EjecutorDB(db=db)
+
+
+async def _get_ejecutor_lectura_async(db: AsyncSession = Depends(get_async_read_db)) -> EjecutorDB:
+    return EjecutorDB(async_db=db)
+
+
+# Como get_db_ejecutor, para los endpoints que pueden leer de la réplica
+get_read_db_ejecutor = _get_ejecutor_lectura_async if settings.DB_MODO == "async" else _get_ejecutor_lectura_sync
@@ -0,0 +1,5 @@
+import enum
+
+class ModoEjecucionLoteEnum(str, enum.Enum):
+    TODO_O_NADA = "TODO_O_NADA"
+    MEJOR_ESFUERZO = "MEJOR_ESFUERZO"
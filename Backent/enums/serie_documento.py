@@ -0,0 +1,8 @@
+import enum
+
+class SerieDocumentoEnum(str, enum.Enum):
+    VENTA = "VENTA"
+    MOVIMIENTO_PRODUCTO = "MPT"
+    MOVIMIENTO_INSUMO = "MOV"
+    PRODUCCION = "PROD"
+    ORDEN_COMPRA = "OC"
@@ -6,64 +6,200 @@ Este job se ejecuta diariamente (configurado en scheduler.py) y realiza:
 2. Verificar insumos con stock crítico
 3. Crear notificaciones en la tabla `notificaciones`
 4. Encolar emails si está configurado
+5. Publicar las alertas creadas y resueltas a los dashboards conectados
+   (modules/alertas/stream.py)
+
+Cada fase es una sola sentencia por conjunto: los candidatos se calculan en
+SQL, se descartan los que ya tienen alerta activa del día (anti-join) y se
+insertan con INSERT ... SELECT ... ON CONFLICT DO NOTHING sobre el índice
+único parcial uq_notificaciones_alerta_diaria. El tiempo de cada fase queda
+en el log y en resultado["tiempos_ms"].
+
+El scheduler procesa todas las empresas activas, cada una con su
+configuracion_alertas, en un pool de ALERTAS_MAX_WORKERS hilos: cada empresa
+tiene su propia sesión y transacción, y si una falla las demás confirman igual.
+El inventario es compartido (insumo y notificaciones no tienen id_empresa), así
+que las alertas que dos empresas coinciden en generar se insertan una sola vez.
+
+Las mismas fases, filtradas por id_insumo, se usan en evaluar_alertas_insumos()
+para reevaluar solo los insumos que tocó una transacción confirmada
+(modules/alertas/incremental.py). El job diario queda como red de seguridad:
+alertas que dependen solo del paso del tiempo y lo que la evaluación
+incremental no haya alcanzado a procesar.
 """
 
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from datetime import date, datetime
-from typing import Optional
+from datetime import timedelta
+from typing import Callable, Iterable, List, Optional, Tuple
 from loguru import logger
 
+from config import settings
 from database import SessionLocal
-from modules.alertas.model import Notificacion
 from enums.tipo_alerta import TipoAlertaEnum
 from enums.semaforo_estado import SemaforoEstadoEnum
+from modules.alertas.stream import publicar_cambios
 from modules.empresa.model import Empresa, DEFAULT_CONFIGURACION_ALERTAS
 from modules.email_service.model import ColaEmail
+from utils.rango_fechas import hoy_negocio, inicio_dia, rango_dia
 
 
 def ejecutar_alertas_diarias_wrapper():
     """
-    Wrapper para ejecutar el job desde el scheduler.
-    Crea su propia sesión de BD y maneja el ciclo de vida.
+    Wrapper para ejecutar el job desde el scheduler, para todas las empresas activas.
+    Si alguna empresa falla, las demás quedan confirmadas y el job termina con error.
     """
     logger.info("=" * 60)
     logger.info("🔄 [JOB] Iniciando job de alertas diarias")
-    logger.info(f"📅 Fecha: {date.today()}")
+    logger.info(f"📅 Fecha: {hoy_negocio()}")
     logger.info("=" * 60)
     
-    db: Session = SessionLocal()
+    resultado = ejecutar_alertas_todas_las_empresas()
     
-    try:
-        resultado = ejecutar_alertas_diarias(db, id_empresa=1)
-        
-        logger.info("=" * 60)
-        logger.info("✅ [JOB] Resumen de ejecución:")
-        logger.info(f"   🔄 Alertas resueltas: {resultado['alertas_resueltas']}")
-        logger.info(f"   📊 Alertas vencimiento: {resultado['alertas_vencimiento']}")
-        logger.info(f"   📊 Alertas stock: {resultado['alertas_stock']}")
-        logger.info(f"   📧 Emails encolados: {resultado['emails_encolados']}")
-        logger.info("=" * 60)
+    logger.info("=" * 60)
+    logger.info("✅ [JOB] Resumen de ejecución:")
+    logger.info(f"   🔄 Alertas resueltas: {resultado['alertas_resueltas']}")
+    for empresa in resultado["empresas"]:
+        if empresa["ok"]:
+            logger.info(
+                f"   🏢 [{empresa['id_empresa']}] {empresa['empresa']}: "
+                f"{empresa['alertas_vencimiento']} vencimiento, {empresa['alertas_stock']} stock, "
+                f"{empresa['emails_encolados']} emails en {empresa['duracion_ms']} ms"
+            )
+        else:
+            logger.error(
+                f"   ❌ [{empresa['id_empresa']}] {empresa['empresa']}: "
+                f"{empresa['error']} ({empresa['duracion_ms']} ms)"
+            )
+    logger.info(f"   ⏱️ Duración total: {resultado['duracion_ms']} ms")
+    logger.info("=" * 60)
+    
+    fallidas = [empresa["id_empresa"] for empresa in resultado["empresas"] if not empresa["ok"]]
+    if fallidas:
+        raise RuntimeError(f"Job de alertas falló para las empresas {fallidas}")
+
+
+def ejecutar_alertas_todas_las_empresas(
+    crear_sesion: Callable[[], Session] = SessionLocal,
+    max_workers: int = 0
+) -> dict:
+    """
+    Ejecuta el job para cada empresa activa en un pool de hilos acotado.
+    
+    La resolución de alertas que ya no aplican no depende de la configuración
+    de la empresa: se hace una sola vez, antes de repartir las empresas.
+    
+    Args:
+        crear_sesion: Fábrica de sesiones (una por empresa)
+        max_workers: Hilos del pool (0 = settings.ALERTAS_MAX_WORKERS)
         
-    except Exception as e:
-        logger.error(f"❌ [JOB] Error crítico en job de alertas: {e}")
-        logger.exception(e)  # Esto loguea el stack trace completo
+    Returns:
+        alertas_resueltas, duracion_ms y el resumen de cada empresa en "empresas"
+    """
+    inicio = time.perf_counter()
+    
+    db = crear_sesion()
+    try:
+        empresas = _empresas_activas(db)
+        resueltas = _resolver_alertas(db)
+        db.commit()
+        publicar_cambios(db, resueltas=resueltas)
+    except Exception:
         db.rollback()
         raise
     finally:
         db.close()
+    
+    max_workers = min(max_workers or settings.ALERTAS_MAX_WORKERS, len(empresas))
+    logger.info(f"🏢 {len(empresas)} empresas activas, {max_workers} en paralelo")
+    
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="alertas") as pool:
+        resumenes = list(pool.map(
+            lambda empresa: _ejecutar_empresa(crear_sesion, *empresa),
+            empresas
+        ))
+    
+    return {
+        "alertas_resueltas": len(resueltas),
+        "empresas": resumenes,
+        "duracion_ms": round((time.perf_counter() - inicio) * 1000, 1)
+    }
+
 
+def _empresas_activas(db: Session) -> List[Tuple[int, str]]:
+    """(id_empresa, nombre) de las empresas activas; sin empresas, la 1 con la configuración por defecto."""
+    empresas = db.query(Empresa.id_empresa, Empresa.nombre_empresa).filter(
+        Empresa.estado == True
+    ).order_by(Empresa.id_empresa).all()
+    
+    if not empresas:
+        logger.warning("⚠️ No hay empresas activas, se usa la configuración por defecto")
+        return [(1, "Configuración por defecto")]
+    
+    return [(empresa.id_empresa, empresa.nombre_empresa) for empresa in empresas]
 
-def ejecutar_alertas_diarias(db: Session, id_empresa: int = 1) -> dict:
+
+def _ejecutar_empresa(crear_sesion: Callable[[], Session], id_empresa: int, nombre: str) -> dict:
+    """Ejecuta el job de una empresa en su propia sesión; un error queda en su resumen."""
+    inicio = time.perf_counter()
+    resumen = {
+        "id_empresa": id_empresa,
+        "empresa": nombre,
+        "ok": False,
+        "alertas_vencimiento": 0,
+        "alertas_stock": 0,
+        "emails_encolados": 0,
+        "duracion_ms": 0.0,
+        "error": None
+    }
+    
+    db = crear_sesion()
+    try:
+        with logger.contextualize(id_empresa=id_empresa):
+            resultado = ejecutar_alertas_diarias(db, id_empresa, resolver=False)
+        resumen.update(
+            ok=True,
+            alertas_vencimiento=resultado["alertas_vencimiento"],
+            alertas_stock=resultado["alertas_stock"],
+            emails_encolados=resultado["emails_encolados"]
+        )
+    except Exception as e:
+        # ejecutar_alertas_diarias ya hizo rollback; las demás empresas siguen
+        logger.exception(f"❌ [JOB] Error en alertas de la empresa {id_empresa}: {e}")
+        resumen["error"] = str(e)
+    finally:
+        db.close()
+        resumen["duracion_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+    
+    return resumen
+
+
+@contextmanager
+def _fase(tiempos: dict, nombre: str):
+    """Registra en `tiempos` la duración (ms) de la fase `nombre`."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tiempos[nombre] = round((time.perf_counter() - inicio) * 1000, 1)
+        logger.info(f"⏱️ Fase {nombre}: {tiempos[nombre]} ms")
+
+
+def ejecutar_alertas_diarias(db: Session, id_empresa: int = 1, resolver: bool = True) -> dict:
     """
-    Ejecuta la generación de alertas diarias.
+    Ejecuta la generación de alertas diarias de una empresa.
     
     Args:
         db: Sesión de base de datos
         id_empresa: ID de la empresa para obtener configuración
+        resolver: Resolver antes las alertas que ya no aplican
+            (False cuando ya se resolvieron para todas las empresas)
         
     Returns:
-        Diccionario con estadísticas de ejecución
+        Diccionario con estadísticas de ejecución y tiempos_ms por fase
         
     Raises:
         Exception: Si ocurre un error, hace rollback y propaga la excepción
@@ -72,39 +208,53 @@ def ejecutar_alertas_diarias(db: Session, id_empresa: int = 1) -> dict:
         "alertas_vencimiento": 0,
         "alertas_stock": 0,
         "alertas_resueltas": 0,
-        "emails_encolados": 0
+        "emails_encolados": 0,
+        "tiempos_ms": {}
     }
+    tiempos = resultado["tiempos_ms"]
+    inicio = time.perf_counter()
     
     try:
         # Obtener configuración de la empresa
-        config = _obtener_configuracion(db, id_empresa)
+        with _fase(tiempos, "configuracion"):
+            config = _obtener_configuracion(db, id_empresa)
         logger.info(f"📋 Configuración cargada: {config}")
         
-        # 0. NUEVO: Resolver alertas de stock que ya no aplican
-        alertas_resueltas = _resolver_alertas_stock_normalizados(db)
-        resultado["alertas_resueltas"] = alertas_resueltas
+        # 0. Resolver alertas que ya no aplican (stock normalizado, lotes agotados)
+        resueltas = []
+        if resolver:
+            with _fase(tiempos, "resolver"):
+                resueltas = _resolver_alertas(db)
+        resultado["alertas_resueltas"] = len(resueltas)
         
         # 1. Generar alertas de vencimiento
-        alertas_venc = _generar_alertas_vencimiento(db, config)
-        resultado["alertas_vencimiento"] = alertas_venc
+        with _fase(tiempos, "vencimiento"):
+            creadas_venc = _generar_alertas_vencimiento(db, config)
+        alertas_venc = resultado["alertas_vencimiento"] = len(creadas_venc)
         
         # 2. Generar alertas de stock crítico
-        alertas_stock = _generar_alertas_stock_critico(db, config)
-        resultado["alertas_stock"] = alertas_stock
+        with _fase(tiempos, "stock_critico"):
+            creadas_stock = _generar_alertas_stock_critico(db, config)
+        alertas_stock = resultado["alertas_stock"] = len(creadas_stock)
         
         # 3. Encolar email si está configurado
         if config.get("email_alertas"):
-            emails = _encolar_email_resumen(
-                db,
-                email_destino=config["email_alertas"],
-                alertas_vencimiento=alertas_venc,
-                alertas_stock=alertas_stock
-            )
-            resultado["emails_encolados"] = emails
+            with _fase(tiempos, "email"):
+                resultado["emails_encolados"] = _encolar_email_resumen(
+                    db,
+                    email_destino=config["email_alertas"],
+                    alertas_vencimiento=alertas_venc,
+                    alertas_stock=alertas_stock
+                )
         
         # Commit de toda la transacción
-        db.commit()
-        logger.info("💾 Transacción completada exitosamente")
+        with _fase(tiempos, "commit"):
+            db.commit()
+        tiempos["total"] = round((time.perf_counter() - inicio) * 1000, 1)
+        logger.info(f"💾 Transacción completada exitosamente en {tiempos['total']} ms")
+        
+        # 4. Avisar a los dashboards conectados (fuera de la transacción)
+        publicar_cambios(db, creadas=creadas_venc + creadas_stock, resueltas=resueltas)
         
         return resultado
         
@@ -114,54 +264,122 @@ def ejecutar_alertas_diarias(db: Session, id_empresa: int = 1) -> dict:
         raise
 
 
-def _resolver_alertas_stock_normalizados(db: Session) -> int:
+def evaluar_alertas_insumos(db: Session, ids_insumo: Iterable[int]) -> dict:
+    """
+    Reevalúa las alertas de los insumos indicados, sin esperar al job diario.
+    
+    Resuelve sus alertas que ya no aplican y genera las de stock y de
+    vencimiento de sus lotes (estas últimas con la configuración de cada
+    empresa activa). Son las mismas sentencias del job, filtradas por
+    id_insumo, así que las alertas del día no se duplican.
+    
+    IMPORTANTE: no hace commit.
+    
+    Returns:
+        IDs de las alertas "creadas" y "resueltas"
+    """
+    ids = sorted(set(ids_insumo))
+    resultado = {"creadas": [], "resueltas": []}
+    if not ids:
+        return resultado
+    
+    resultado["resueltas"] = _resolver_alertas(db, ids)
+    resultado["creadas"] = _generar_alertas_stock_critico(db, {}, ids)
+    for id_empresa, _ in _empresas_activas(db):
+        config = _obtener_configuracion(db, id_empresa)
+        resultado["creadas"] += _generar_alertas_vencimiento(db, config, ids)
+    
+    return resultado
+
+
+def _filtro_insumos(columna: str, ids_insumo: Optional[List[int]]) -> str:
+    """Condición SQL que limita una fase a `ids_insumo` (vacía para todos los insumos)."""
+    if ids_insumo is None:
+        return ""
+    return f"AND {columna} = ANY(:ids_insumo)"
+
+
+def _log_fase(ids_insumo: Optional[List[int]]):
+    """La evaluación incremental corre en cada commit: su detalle va a DEBUG."""
+    return logger.info if ids_insumo is None else logger.debug
+
+
+def _resolver_alertas(db: Session, ids_insumo: Optional[List[int]] = None) -> List[int]:
+    """Resuelve las alertas de stock y de lotes que ya no aplican; retorna sus ids."""
+    return (
+        _resolver_alertas_stock_normalizados(db, ids_insumo)
+        + _resolver_alertas_lotes_agotados(db, ids_insumo)
+    )
+
+
+def _resolver_alertas_stock_normalizados(db: Session, ids_insumo: Optional[List[int]] = None) -> List[int]:
     """
     Resuelve (desactiva) alertas de STOCK_CRITICO para insumos que 
-    ya tienen stock suficiente (>= stock_minimo).
+    ya tienen stock suficiente (>= stock_minimo), en un solo UPDATE.
     
     Returns:
-        Número de alertas resueltas/desactivadas
+        IDs de las alertas resueltas/desactivadas
     """
-    logger.info("🔍 Verificando alertas de stock que ya no aplican...")
-    
-    # SQL: Obtener insumos que YA tienen stock suficiente
-    sql_stock_ok = text("""
-        SELECT 
-            ins.id_insumo,
-            ins.nombre,
-            ins.stock_minimo,
-            COALESCE(SUM(d.cantidad_restante), 0) AS stock_actual
+    log = _log_fase(ids_insumo)
+    log("🔍 Verificando alertas de stock que ya no aplican...")
+    
+    # Stock desde el resumen insumo_stock (sin stock registrado = 0)
+    sql = text(f"""
+        UPDATE notificaciones n
+        SET activa = false
         FROM insumo ins
-        LEFT JOIN ingresos_insumos_detalle d ON ins.id_insumo = d.id_insumo
-        LEFT JOIN ingresos_insumos i ON d.id_ingreso = i.id_ingreso AND i.anulado = false
-        WHERE ins.anulado = false
-        GROUP BY ins.id_insumo, ins.nombre, ins.stock_minimo
-        HAVING COALESCE(SUM(d.cantidad_restante), 0) >= ins.stock_minimo
+        LEFT JOIN insumo_stock st ON st.id_insumo = ins.id_insumo
+        WHERE n.id_insumo = ins.id_insumo
+          AND n.tipo = :tipo
+          AND n.activa = true
+          AND ins.anulado = false
+          AND COALESCE(st.stock_actual, 0) >= ins.stock_minimo
+          {_filtro_insumos("ins.id_insumo", ids_insumo)}
+        RETURNING n.id_notificacion
     """)
     
-    insumos_ok = db.execute(sql_stock_ok).fetchall()
-    ids_insumos_ok = [row.id_insumo for row in insumos_ok]
+    alertas_resueltas = db.execute(sql, {
+        "tipo": TipoAlertaEnum.STOCK_CRITICO.value,
+        "ids_insumo": ids_insumo
+    }).scalars().all()
     
-    if not ids_insumos_ok:
-        logger.info("📦 No hay insumos con stock normalizado")
-        return 0
+    log(f"🔄 {len(alertas_resueltas)} alertas de stock resueltas automáticamente")
     
-    # Desactivar alertas de STOCK_CRITICO para estos insumos
-    alertas_resueltas = db.query(Notificacion).filter(
-        Notificacion.id_insumo.in_(ids_insumos_ok),
-        Notificacion.tipo == TipoAlertaEnum.STOCK_CRITICO,
-        Notificacion.activa == True
-    ).update({"activa": False}, synchronize_session=False)
+    return alertas_resueltas
+
+
+def _resolver_alertas_lotes_agotados(db: Session, ids_insumo: Optional[List[int]] = None) -> List[int]:
+    """
+    Resuelve (desactiva) alertas de vencimiento de lotes que ya no tienen
+    cantidad restante o cuyo ingreso fue anulado, en un solo UPDATE.
     
-    if alertas_resueltas > 0:
-        for row in insumos_ok:
-            # Solo loguear los que tenían alertas
-            logger.info(
-                f"✅ Alerta resuelta: {row.nombre} - "
-                f"Stock actual: {row.stock_actual} >= Mínimo: {row.stock_minimo}"
-            )
+    Returns:
+        IDs de las alertas resueltas/desactivadas
+    """
+    log = _log_fase(ids_insumo)
+    log("🔍 Verificando alertas de lotes agotados o anulados...")
     
-    logger.info(f"🔄 {alertas_resueltas} alertas de stock resueltas automáticamente")
+    sql = text(f"""
+        UPDATE notificaciones n
+        SET activa = false
+        FROM ingresos_insumos_detalle d
+        INNER JOIN ingresos_insumos i ON d.id_ingreso = i.id_ingreso
+        WHERE n.id_ingreso_detalle = d.id_ingreso_detalle
+          AND n.tipo IN (:vencido, :usar_hoy, :proximo)
+          AND n.activa = true
+          AND (d.cantidad_restante <= 0 OR i.anulado = true)
+          {_filtro_insumos("d.id_insumo", ids_insumo)}
+        RETURNING n.id_notificacion
+    """)
+    
+    alertas_resueltas = db.execute(sql, {
+        "vencido": TipoAlertaEnum.VENCIDO.value,
+        "usar_hoy": TipoAlertaEnum.USAR_HOY.value,
+        "proximo": TipoAlertaEnum.VENCIMIENTO_PROXIMO.value,
+        "ids_insumo": ids_insumo
+    }).scalars().all()
+    
+    log(f"🔄 {len(alertas_resueltas)} alertas de lotes resueltas automáticamente")
     
     return alertas_resueltas
 
@@ -180,238 +398,215 @@ def _obtener_configuracion(db: Session, id_empresa: int) -> dict:
     return DEFAULT_CONFIGURACION_ALERTAS.copy()
 
 
-def _generar_alertas_vencimiento(db: Session, config: dict) -> int:
+def _parametros_dia() -> dict:
+    """Día del negocio de las alertas y su rango (fecha_creacion es TIMESTAMPTZ)."""
+    hoy = hoy_negocio()
+    desde, hasta = rango_dia(hoy, con_zona=True)
+    return {"hoy": hoy, "desde": desde, "hasta": hasta}
+
+
+def _generar_alertas_vencimiento(db: Session, config: dict, ids_insumo: Optional[List[int]] = None) -> List[int]:
     """
-    Genera alertas para lotes próximos a vencer.
+    Genera alertas para lotes próximos a vencer con un único INSERT ... SELECT.
     
-    Usa SQL puro para la consulta con múltiples joins.
+    - dias_restantes < 0: VENCIDO (rojo)
+    - dias_restantes <= dias_rojo: USAR_HOY (rojo)
+    - resto hasta dias_amarillo: VENCIMIENTO_PROXIMO (amarillo)
+    
+    Un lote que ya tiene alerta activa del mismo tipo creada hoy se omite. Las
+    filas se insertan en orden de lote: dos empresas en paralelo esperan por la
+    misma entrada del índice único en el mismo orden, sin deadlocks.
+    Con `ids_insumo` solo se evalúan los lotes de esos insumos. Retorna los
+    ids de las alertas creadas.
     """
     dias_rojo = config["dias_rojo"]
     dias_amarillo = config["dias_amarillo"]
+    log = _log_fase(ids_insumo)
     
-    logger.info(f"🔍 Buscando lotes que vencen en <= {dias_amarillo} días...")
-    
-    # SQL puro: consulta lotes por vencer (3+ tablas involucradas)
-    sql = text("""
-        SELECT 
-            d.id_ingreso_detalle,
-            d.id_insumo,
-            d.cantidad_restante,
-            d.fecha_vencimiento,
-            ins.codigo AS codigo_insumo,
-            ins.nombre AS nombre_insumo,
-            ins.unidad_medida,
-            i.numero_ingreso,
-            (d.fecha_vencimiento::date - CURRENT_DATE) AS dias_restantes
-        FROM ingresos_insumos_detalle d
-        INNER JOIN ingresos_insumos i ON d.id_ingreso = i.id_ingreso
-        INNER JOIN insumo ins ON d.id_insumo = ins.id_insumo
-        WHERE 
-            d.cantidad_restante > 0
-            AND d.fecha_vencimiento IS NOT NULL
-            AND ins.anulado = false
-            AND i.anulado = false
-            AND ins.perecible = true
-            AND (d.fecha_vencimiento::date - CURRENT_DATE) <= :dias_amarillo
-        ORDER BY d.fecha_vencimiento ASC
-    """)
-    
-    lotes = db.execute(sql, {"dias_amarillo": dias_amarillo}).fetchall()
-    
-    logger.info(f"📦 Encontrados {len(lotes)} lotes próximos a vencer")
+    log(f"🔍 Generando alertas de lotes que vencen en <= {dias_amarillo} días...")
     
-    alertas_creadas = 0
-    
-    for lote in lotes:
-        dias_restantes = lote.dias_restantes
-        
-        # Determinar tipo de alerta y semáforo
-        if dias_restantes < 0:
-            tipo = TipoAlertaEnum.VENCIDO
-            semaforo = SemaforoEstadoEnum.ROJO
-            titulo = f"🔴 VENCIDO: {lote.nombre_insumo}"
-            mensaje = (
-                f"El insumo '{lote.nombre_insumo}' (Lote: {lote.numero_ingreso}) "
-                f"venció hace {abs(dias_restantes)} día(s). "
-                f"Cantidad afectada: {lote.cantidad_restante} {lote.unidad_medida}. "
-                f"Acción requerida: Retirar del inventario."
-            )
-        elif dias_restantes <= dias_rojo:
-            tipo = TipoAlertaEnum.USAR_HOY
-            semaforo = SemaforoEstadoEnum.ROJO
-            titulo = f"🔴 USAR HOY: {lote.nombre_insumo}"
-            mensaje = (
-                f"El insumo '{lote.nombre_insumo}' (Lote: {lote.numero_ingreso}) "
-                f"vence en {dias_restantes} día(s). "
-                f"Cantidad disponible: {lote.cantidad_restante} {lote.unidad_medida}. "
-                f"Acción requerida: Priorizar uso inmediato."
-            )
-        else:
-            tipo = TipoAlertaEnum.VENCIMIENTO_PROXIMO
-            semaforo = SemaforoEstadoEnum.AMARILLO
-            titulo = f"🟡 Vence pronto: {lote.nombre_insumo}"
-            mensaje = (
-                f"El insumo '{lote.nombre_insumo}' (Lote: {lote.numero_ingreso}) "
-                f"vence en {dias_restantes} días. "
-                f"Cantidad disponible: {lote.cantidad_restante} {lote.unidad_medida}. "
-                f"Sugerencia: Usar esta semana."
-            )
-        
-        # Verificar si ya existe alerta para este lote hoy
-        existe = _verificar_alerta_existente(
-            db,
-            id_insumo=lote.id_insumo,
-            tipo=tipo,
-            id_ingreso_detalle=lote.id_ingreso_detalle
-        )
-        
-        if existe:
-            logger.debug(f"⏭️ Alerta ya existe para lote {lote.id_ingreso_detalle}")
-            continue
-        
-        # Crear notificación
-        notificacion = Notificacion(
-            tipo=tipo,
-            titulo=titulo,
-            mensaje=mensaje,
-            id_insumo=lote.id_insumo,
-            id_ingreso_detalle=lote.id_ingreso_detalle,
-            semaforo=semaforo,
-            dias_restantes=dias_restantes,
-            cantidad_afectada=f"{lote.cantidad_restante} {lote.unidad_medida}"
+    sql = text(f"""
+        INSERT INTO notificaciones (
+            tipo, titulo, mensaje, id_insumo, id_ingreso_detalle, semaforo,
+            dias_restantes, cantidad_afectada, leida, activa, fecha_alerta
         )
-        db.add(notificacion)
-        alertas_creadas += 1
-        
-        logger.info(
-            f"📝 Alerta creada: [{tipo.value}] {lote.nombre_insumo} - "
-            f"{dias_restantes} días restantes"
+        SELECT
+            c.tipo,
+            CASE c.tipo
+                WHEN :vencido THEN '🔴 VENCIDO: ' || c.nombre_insumo
+                WHEN :usar_hoy THEN '🔴 USAR HOY: ' || c.nombre_insumo
+                ELSE '🟡 Vence pronto: ' || c.nombre_insumo
+            END,
+            CASE c.tipo
+                WHEN :vencido THEN format(
+                    'El insumo ''%s'' (Lote: %s) venció hace %s día(s). '
+                    'Cantidad afectada: %s %s. Acción requerida: Retirar del inventario.',
+                    c.nombre_insumo, c.numero_ingreso, abs(c.dias_restantes),
+                    c.cantidad_restante, c.unidad_medida
+                )
+                WHEN :usar_hoy THEN format(
+                    'El insumo ''%s'' (Lote: %s) vence en %s día(s). '
+                    'Cantidad disponible: %s %s. Acción requerida: Priorizar uso inmediato.',
+                    c.nombre_insumo, c.numero_ingreso, c.dias_restantes,
+                    c.cantidad_restante, c.unidad_medida
+                )
+                ELSE format(
+                    'El insumo ''%s'' (Lote: %s) vence en %s días. '
+                    'Cantidad disponible: %s %s. Sugerencia: Usar esta semana.',
+                    c.nombre_insumo, c.numero_ingreso, c.dias_restantes,
+                    c.cantidad_restante, c.unidad_medida
+                )
+            END,
+            c.id_insumo,
+            c.id_ingreso_detalle,
+            CASE WHEN c.tipo = :proximo THEN :amarillo ELSE :rojo END,
+            c.dias_restantes,
+            format('%s %s', c.cantidad_restante, c.unidad_medida),
+            false,
+            true,
+            CAST(:hoy AS DATE)
+        FROM (
+            SELECT
+                lote.*,
+                CASE
+                    WHEN lote.dias_restantes < 0 THEN :vencido
+                    WHEN lote.dias_restantes <= :dias_rojo THEN :usar_hoy
+                    ELSE :proximo
+                END AS tipo
+            FROM (
+                SELECT 
+                    d.id_ingreso_detalle,
+                    d.id_insumo,
+                    d.cantidad_restante,
+                    ins.nombre AS nombre_insumo,
+                    ins.unidad_medida,
+                    i.numero_ingreso,
+                    (d.fecha_vencimiento::date - CAST(:hoy AS DATE)) AS dias_restantes
+                FROM ingresos_insumos_detalle d
+                INNER JOIN ingresos_insumos i ON d.id_ingreso = i.id_ingreso
+                INNER JOIN insumo ins ON d.id_insumo = ins.id_insumo
+                WHERE 
+                    d.cantidad_restante > 0
+                    AND d.fecha_vencimiento IS NOT NULL
+                    AND ins.anulado = false
+                    AND i.anulado = false
+                    AND ins.perecible = true
+                    AND d.fecha_vencimiento < :limite
+                    {_filtro_insumos("d.id_insumo", ids_insumo)}
+            ) lote
+        ) c
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM notificaciones n
+            WHERE n.id_insumo = c.id_insumo
+              AND n.tipo = c.tipo
+              AND n.id_ingreso_detalle = c.id_ingreso_detalle
+              AND n.activa = true
+              AND n.fecha_creacion >= :desde
+              AND n.fecha_creacion < :hasta
         )
+        ORDER BY c.id_ingreso_detalle
+        ON CONFLICT DO NOTHING
+        RETURNING id_notificacion
+    """)
     
-    db.flush()
-    logger.info(f"✅ {alertas_creadas} alertas de vencimiento creadas")
+    parametros = _parametros_dia()
+    alertas_creadas = db.execute(sql, {
+        **parametros,
+        "limite": inicio_dia(parametros["hoy"] + timedelta(days=dias_amarillo + 1)),
+        "dias_rojo": dias_rojo,
+        "vencido": TipoAlertaEnum.VENCIDO.value,
+        "usar_hoy": TipoAlertaEnum.USAR_HOY.value,
+        "proximo": TipoAlertaEnum.VENCIMIENTO_PROXIMO.value,
+        "rojo": SemaforoEstadoEnum.ROJO.value,
+        "amarillo": SemaforoEstadoEnum.AMARILLO.value,
+        "ids_insumo": ids_insumo
+    }).scalars().all()
+    
+    log(f"✅ {len(alertas_creadas)} alertas de vencimiento creadas")
     
     return alertas_creadas
 
 
-def _generar_alertas_stock_critico(db: Session, config: dict) -> int:
+def _generar_alertas_stock_critico(db: Session, config: dict, ids_insumo: Optional[List[int]] = None) -> List[int]:
     """
-    Genera alertas para insumos con stock bajo.
+    Genera alertas para insumos con stock bajo con un único INSERT ... SELECT.
     
-    Usa SQL puro para agregación con múltiples joins.
+    El stock se lee del resumen insumo_stock. Un insumo que ya tiene alerta
+    de stock activa creada hoy se omite. Con `ids_insumo` solo se evalúan
+    esos insumos. Retorna los ids de las alertas creadas.
     """
-    logger.info("🔍 Buscando insumos con stock bajo mínimo...")
-    
-    # SQL puro: stock actual vs stock mínimo (agregación + joins)
-    sql = text("""
-        SELECT 
-            ins.id_insumo,
-            ins.codigo,
-            ins.nombre,
-            ins.unidad_medida,
-            ins.stock_minimo,
-            COALESCE(SUM(d.cantidad_restante), 0) AS stock_actual
-        FROM insumo ins
-        LEFT JOIN ingresos_insumos_detalle d ON ins.id_insumo = d.id_insumo
-        LEFT JOIN ingresos_insumos i ON d.id_ingreso = i.id_ingreso AND i.anulado = false
-        WHERE 
-            ins.anulado = false
-        GROUP BY 
-            ins.id_insumo, 
-            ins.codigo, 
-            ins.nombre, 
-            ins.unidad_medida, 
-            ins.stock_minimo
-        HAVING 
-            COALESCE(SUM(d.cantidad_restante), 0) < ins.stock_minimo
-            AND ins.stock_minimo > 0
-        ORDER BY 
-            (COALESCE(SUM(d.cantidad_restante), 0) / ins.stock_minimo) ASC
-    """)
-    
-    insumos = db.execute(sql).fetchall()
+    log = _log_fase(ids_insumo)
+    log("🔍 Generando alertas de insumos con stock bajo mínimo...")
     
-    logger.info(f"📦 Encontrados {len(insumos)} insumos con stock bajo")
-    
-    alertas_creadas = 0
-    
-    for insumo in insumos:
-        stock_actual = float(insumo.stock_actual)
-        stock_minimo = float(insumo.stock_minimo)
-        deficit = stock_minimo - stock_actual
-        es_critico = stock_actual == 0
-        
-        # Título y mensaje según criticidad
-        if es_critico:
-            titulo = f"🔴 SIN STOCK: {insumo.nombre}"
-            mensaje = (
-                f"El insumo '{insumo.nombre}' ({insumo.codigo}) NO tiene stock disponible. "
-                f"Stock mínimo requerido: {stock_minimo} {insumo.unidad_medida}. "
-                f"Acción requerida: Realizar compra urgente."
-            )
-        else:
-            porcentaje = round((stock_actual / stock_minimo) * 100, 1)
-            titulo = f"🟡 Stock bajo: {insumo.nombre}"
-            mensaje = (
-                f"El insumo '{insumo.nombre}' ({insumo.codigo}) tiene stock bajo. "
-                f"Stock actual: {stock_actual} {insumo.unidad_medida} ({porcentaje}%). "
-                f"Stock mínimo: {stock_minimo} {insumo.unidad_medida}. "
-                f"Déficit: {deficit} {insumo.unidad_medida}."
-            )
-        
-        # Verificar si ya existe alerta para este insumo hoy
-        existe = _verificar_alerta_existente(
-            db,
-            id_insumo=insumo.id_insumo,
-            tipo=TipoAlertaEnum.STOCK_CRITICO
-        )
-        
-        if existe:
-            logger.debug(f"⏭️ Alerta de stock ya existe para insumo {insumo.id_insumo}")
-            continue
-        
-        # Crear notificación
-        notificacion = Notificacion(
-            tipo=TipoAlertaEnum.STOCK_CRITICO,
-            titulo=titulo,
-            mensaje=mensaje,
-            id_insumo=insumo.id_insumo,
-            cantidad_afectada=f"Déficit: {deficit} {insumo.unidad_medida}"
+    sql = text(f"""
+        INSERT INTO notificaciones (
+            tipo, titulo, mensaje, id_insumo, cantidad_afectada, leida, activa, fecha_alerta
         )
-        db.add(notificacion)
-        alertas_creadas += 1
-        
-        logger.info(
-            f"📝 Alerta creada: [STOCK_CRITICO] {insumo.nombre} - "
-            f"Stock: {stock_actual}/{stock_minimo}"
+        SELECT
+            :tipo,
+            CASE WHEN c.stock_actual = 0
+                THEN '🔴 SIN STOCK: ' || c.nombre
+                ELSE '🟡 Stock bajo: ' || c.nombre
+            END,
+            CASE WHEN c.stock_actual = 0
+                THEN format(
+                    'El insumo ''%s'' (%s) NO tiene stock disponible. '
+                    'Stock mínimo requerido: %s %s. Acción requerida: Realizar compra urgente.',
+                    c.nombre, c.codigo, c.stock_minimo, c.unidad_medida
+                )
+                ELSE format(
+                    'El insumo ''%s'' (%s) tiene stock bajo. Stock actual: %s %s (%s%%). '
+                    'Stock mínimo: %s %s. Déficit: %s %s.',
+                    c.nombre, c.codigo, c.stock_actual, c.unidad_medida,
+                    round((c.stock_actual / c.stock_minimo * 100)::numeric, 1),
+                    c.stock_minimo, c.unidad_medida, c.stock_minimo - c.stock_actual, c.unidad_medida
+                )
+            END,
+            c.id_insumo,
+            format('Déficit: %s %s', c.stock_minimo - c.stock_actual, c.unidad_medida),
+            false,
+            true,
+            CAST(:hoy AS DATE)
+        FROM (
+            SELECT 
+                ins.id_insumo,
+                ins.codigo,
+                ins.nombre,
+                ins.unidad_medida,
+                ins.stock_minimo::float8 AS stock_minimo,
+                COALESCE(st.stock_actual, 0)::float8 AS stock_actual
+            FROM insumo ins
+            LEFT JOIN insumo_stock st ON st.id_insumo = ins.id_insumo
+            WHERE 
+                ins.anulado = false
+                AND ins.stock_minimo > 0
+                AND COALESCE(st.stock_actual, 0) < ins.stock_minimo
+                {_filtro_insumos("ins.id_insumo", ids_insumo)}
+        ) c
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM notificaciones n
+            WHERE n.id_insumo = c.id_insumo
+              AND n.tipo = :tipo
+              AND n.activa = true
+              AND n.fecha_creacion >= :desde
+              AND n.fecha_creacion < :hasta
         )
+        ORDER BY c.id_insumo
+        ON CONFLICT DO NOTHING
+        RETURNING id_notificacion
+    """)
     
-    db.flush()
-    logger.info(f"✅ {alertas_creadas} alertas de stock creadas")
-    
-    return alertas_creadas
-
-
-def _verificar_alerta_existente(
-    db: Session,
-    id_insumo: int,
-    tipo: TipoAlertaEnum,
-    id_ingreso_detalle: Optional[int] = None
-) -> bool:
-    """Verifica si ya existe una alerta activa para evitar duplicados."""
-    from sqlalchemy import func
-    
-    query = db.query(Notificacion).filter(
-        Notificacion.id_insumo == id_insumo,
-        Notificacion.tipo == tipo,
-        Notificacion.activa == True,
-        func.date(Notificacion.fecha_creacion) == date.today()
-    )
+    alertas_creadas = db.execute(sql, {
+        **_parametros_dia(),
+        "tipo": TipoAlertaEnum.STOCK_CRITICO.value,
+        "ids_insumo": ids_insumo
+    }).scalars().all()
     
-    if id_ingreso_detalle:
-        query = query.filter(Notificacion.id_ingreso_detalle == id_ingreso_detalle)
+    log(f"✅ {len(alertas_creadas)} alertas de stock creadas")
     
-    return query.first() is not None
+    return alertas_creadas
 
 
 def _encolar_email_resumen(
@@ -451,7 +646,7 @@ def _encolar_email_resumen(
     <body>
         <div class="header">
             <h1>📊 Resumen de Alertas - Sistema de Inventario</h1>
-            <p>Fecha: {date.today().strftime('%d/%m/%Y')}</p>
+            <p>Fecha: {hoy_negocio().strftime('%d/%m/%Y')}</p>
         </div>
         
         <div class="content">
@@ -483,7 +678,7 @@ def _encolar_email_resumen(
     # Crear entrada en cola de emails
     email = ColaEmail(
         destinatario=email_destino,
-        asunto=f"📊 Alertas de Inventario - {date.today().strftime('%d/%m/%Y')} ({alertas_vencimiento + alertas_stock} nuevas)",
+        asunto=f"📊 Alertas de Inventario - {hoy_negocio().strftime('%d/%m/%Y')} ({alertas_vencimiento + alertas_stock} nuevas)",
         cuerpo_html=cuerpo_html,
         estado='PENDIENTE'
     )
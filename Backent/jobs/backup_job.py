@@ -16,7 +16,7 @@ Configuración en config.py:
 from datetime import date, datetime
 from loguru import logger
 
-from database import SessionLocal
+from database import SessionLocal, crear_sesion_lectura
 from modules.backup.service import BackupService
 from config import settings
 
@@ -32,11 +32,13 @@ def ejecutar_backup_completo_wrapper():
     logger.info("=" * 60)
     
     db = SessionLocal()
+    db_lectura = crear_sesion_lectura()
     backup_service = BackupService()
     
     try:
         resultado = backup_service.backup_completo(
             db,
+            db_lectura=db_lectura,
             ejecutado_por="SCHEDULER_SEMANAL"
         )
         
@@ -56,6 +58,7 @@ def ejecutar_backup_completo_wrapper():
         logger.exception(e)
         db.rollback()
     finally:
+        db_lectura.close()
         db.close()
 
 
@@ -78,11 +81,13 @@ def ejecutar_backup_diferencial_wrapper():
     logger.info("=" * 60)
     
     db = SessionLocal()
+    db_lectura = crear_sesion_lectura()
     backup_service = BackupService()
     
     try:
         resultado = backup_service.backup_diferencial(
             db,
+            db_lectura=db_lectura,
             ejecutado_por="SCHEDULER_DIARIO"
         )
         
@@ -102,6 +107,7 @@ def ejecutar_backup_diferencial_wrapper():
         logger.exception(e)
         db.rollback()
     finally:
+        db_lectura.close()
         db.close()
 
 
@@ -0,0 +1,64 @@
+"""
+Job de Sellado de Resúmenes Diarios.
+
+Este job se ejecuta diariamente poco después de medianoche y:
+1. Calcula los resúmenes (ventas por producto y método de pago, movimientos
+   por insumo y mermas por tipo) de cada día pendiente hasta ayer
+2. Sella esos días: desde entonces los reportes los leen de los resúmenes
+
+Si el job no corrió algún día, la siguiente ejecución sella todos los días
+pendientes en orden. La primera ejecución carga el histórico completo.
+
+Configuración en config.py:
+- RESUMEN_DIARIO_ENABLED: Habilitar/deshabilitar
+- RESUMEN_DIARIO_HORA / RESUMEN_DIARIO_MINUTO: Hora de ejecución
+"""
+
+from datetime import datetime
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from modules.resumen_diario.service import ResumenDiarioService
+
+
+def ejecutar_sellado_diario_wrapper():
+    """
+    Wrapper para ejecutar el sellado de resúmenes desde el scheduler.
+    Crea su propia sesión de base de datos.
+    """
+    logger.info("=" * 60)
+    logger.info("🔄 [JOB] Iniciando sellado de resúmenes diarios")
+    logger.info(f"📅 Fecha: {datetime.now()}")
+    logger.info("=" * 60)
+
+    db = SessionLocal()
+    try:
+        resultado = ejecutar_sellado_diario(db)
+
+        logger.info("=" * 60)
+        if resultado["dias_sellados"]:
+            logger.info(
+                f"✅ [JOB] {resultado['dias_sellados']} día(s) sellado(s): "
+                f"{resultado['desde']} a {resultado['hasta']}"
+            )
+        else:
+            logger.info("✅ [JOB] Sin días pendientes de sellar")
+        logger.info("=" * 60)
+
+    except Exception as e:
+        logger.error(f"❌ [JOB] Error en sellado de resúmenes diarios: {e}")
+        logger.exception(e)
+        db.rollback()
+    finally:
+        db.close()
+
+
+def ejecutar_sellado_diario(db: Session) -> dict:
+    """
+    Sella los días pendientes hasta ayer.
+
+    Returns:
+        dict con dias_sellados, desde y hasta (ver ResumenDiarioService.sellar_pendientes).
+    """
+    return ResumenDiarioService().sellar_pendientes(db)
@@ -8,6 +8,7 @@ from loguru import logger
 from config import settings
 from utils.logging_config import setup_logging
 from middleware.request_id import RequestIDMiddleware
+from middleware.db_timing import DBTimingMiddleware
 
 # Módulos de la aplicación
 from modules.empresa import router as empresa_router
@@ -31,6 +32,7 @@ from modules.email_service.service import EmailService
 from modules.promociones import promocion_router
 from modules.reportes import router as reportes_router
 from modules.alertas import router as alertas_router
+from modules.kardex import router as kardex_router
 from modules.health import router as health_router
 from modules.backup import router as backup_router
 from database import SessionLocal
@@ -72,7 +74,7 @@ async def lifespan(app: FastAPI):
     
     logger.info(
         f"✅ Aplicación iniciada - Version: {settings.APP_VERSION}, "
-        f"Environment: {settings.ENVIRONMENT}"
+        f"Environment: {settings.ENVIRONMENT}, DB: {settings.DB_MODO}"
     )
     
     yield  # La aplicación está corriendo
@@ -88,6 +90,10 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Error deteniendo scheduler: {e}")
     
+    # Cerrar el pool de asyncpg (solo existe en DB_MODO=async)
+    from database import dispose_async_engine
+    await dispose_async_engine()
+    
     logger.info("👋 Aplicación detenida")
 
 
@@ -127,6 +133,9 @@ app.add_middleware(
     expose_headers=["X-Request-ID"],  # Exponer header de request ID
 )
 
+# Tiempos de base de datos por request (queda dentro de RequestID para loguear con su X-Request-ID)
+app.add_middleware(DBTimingMiddleware)
+
 # Middleware de Request ID para trazabilidad
 app.add_middleware(RequestIDMiddleware)
 
@@ -181,6 +190,7 @@ app.include_router(produccion_router.router, prefix="/api/v1/produccion", tags=[
 app.include_router(ventas_router.router, prefix="/api/v1/ventas", tags=["Ventas"])
 app.include_router(reportes_router.router, prefix="/api/v1/reportes", tags=["Reportes"])
 app.include_router(alertas_router.router, prefix="/api/v1/alertas", tags=["Alertas"])
+app.include_router(kardex_router.router, prefix="/api/v1/kardex", tags=["Kardex"])
 app.include_router(promocion_router, prefix="/api/v1/promociones", tags=["Promociones"])
 
 # Router de Backup y Mantenimiento
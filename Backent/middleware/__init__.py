@@ -3,13 +3,15 @@ Middleware de la aplicación.
 
 Incluye middlewares personalizados para:
 - Request ID (trazabilidad)
-- Timing (métricas de rendimiento)
+- Timing de base de datos (sentencias, tiempo SQL y espera de pool)
 """
 
 from .request_id import RequestIDMiddleware, get_request_id, request_id_ctx
+from .db_timing import DBTimingMiddleware
 
 __all__ = [
     "RequestIDMiddleware",
+    "DBTimingMiddleware",
     "get_request_id",
     "request_id_ctx"
 ]
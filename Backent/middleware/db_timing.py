@@ -0,0 +1,74 @@
+"""
+Middleware de tiempos de base de datos por request.
+
+Abre las EstadisticasSQL del request (utils.metricas_db), y al terminar
+publica la cantidad de sentencias y el tiempo SQL por endpoint y los deja en
+el log del request (con su X-Request-ID). Una espera de pool mayor a
+DB_POOL_ESPERA_WARNING_MS se registra como WARNING: es la señal directa de
+que el pool se quedó corto.
+
+Las respuestas en streaming siguen consultando después de que call_next
+retorna; sus sentencias posteriores no se cuentan en el request.
+"""
+
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.requests import Request
+from starlette.responses import Response
+from loguru import logger
+
+from config import settings
+from utils.metricas_db import (
+    EstadisticasSQL,
+    SENTENCIAS_POR_REQUEST,
+    TIEMPO_SQL_POR_REQUEST,
+    estadisticas_sql_ctx
+)
+
+
+class DBTimingMiddleware(BaseHTTPMiddleware):
+    """
+    Middleware que mide el uso de la base de datos de cada request.
+
+    - Sentencias SQL y tiempo SQL por endpoint (Prometheus)
+    - Espera del pool de conexiones en el log del request
+    """
+
+    async def dispatch(
+        self,
+        request: Request,
+        call_next: RequestResponseEndpoint
+    ) -> Response:
+        estadisticas = EstadisticasSQL()
+        token = estadisticas_sql_ctx.set(estadisticas)
+
+        try:
+            return await call_next(request)
+        finally:
+            estadisticas_sql_ctx.reset(token)
+            self._registrar(request, estadisticas)
+
+    @staticmethod
+    def _registrar(request: Request, estadisticas: EstadisticasSQL) -> None:
+        if estadisticas.sentencias == 0 and estadisticas.espera_pool == 0:
+            return
+
+        # Ruta con plantilla (/ventas/{id_venta}): una serie por endpoint, no por URL
+        ruta = request.scope.get("route")
+        endpoint = getattr(ruta, "path", "sin_ruta")
+        SENTENCIAS_POR_REQUEST.labels(endpoint=endpoint).observe(estadisticas.sentencias)
+        TIEMPO_SQL_POR_REQUEST.labels(endpoint=endpoint).observe(estadisticas.tiempo_sql)
+
+        espera_ms = estadisticas.espera_pool * 1000
+        mensaje = (
+            f"DB {request.method} {endpoint}: {estadisticas.sentencias} sentencias, "
+            f"{estadisticas.tiempo_sql * 1000:.1f} ms SQL, {espera_ms:.1f} ms espera de pool"
+        )
+        contexto = logger.bind(
+            db_sentencias=estadisticas.sentencias,
+            db_tiempo_sql_ms=round(estadisticas.tiempo_sql * 1000, 1),
+            db_espera_pool_ms=round(espera_ms, 1)
+        )
+        if espera_ms > settings.DB_POOL_ESPERA_WARNING_MS:
+            contexto.warning(mensaje)
+        else:
+            contexto.debug(mensaje)
@@ -0,0 +1,70 @@
+"""
+Evaluación incremental de alertas.
+
+Las operaciones que modifican lotes (ingresos, producción, anulaciones) pasan
+por InsumoStockService.refrescar(), que marca los insumos afectados en la
+sesión con marcar_insumos(). Cuando la transacción se confirma, el evento
+after_commit reevalúa solo esos insumos con jobs.alertas_job.evaluar_alertas_insumos,
+en una sesión propia, y los cambios se publican a los dashboards conectados
+(modules/alertas/stream.py). Antes se invalidan los reportes de hoy de la
+caché (semáforo y lista FEFO incluidos), aun con la evaluación desactivada.
+Si la transacción se revierte, las marcas se descartan.
+
+La evaluación corre después del commit de la operación: un error se registra
+en el log y no afecta a la operación ya confirmada. El job diario sigue siendo
+la red de seguridad para lo que no se haya evaluado aquí.
+"""
+
+from typing import Iterable
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config import settings
+from jobs.alertas_job import evaluar_alertas_insumos
+from modules.alertas.stream import publicar_cambios
+from modules.reportes.cache import invalidar_reportes
+
+CLAVE_PENDIENTES = "alertas_insumos_pendientes"
+
+
+def marcar_insumos(db: Session, ids_insumo: Iterable[int]) -> None:
+    """Agrega los insumos a reevaluar cuando la transacción de `db` se confirme."""
+    db.info.setdefault(CLAVE_PENDIENTES, set()).update(ids_insumo)
+
+
+@event.listens_for(Session, "after_commit")
+def _evaluar_al_confirmar(session: Session) -> None:
+    ids = session.info.pop(CLAVE_PENDIENTES, None)
+    if not ids:
+        return
+
+    # Los lotes cambiaron: el semáforo y la lista FEFO de hoy cacheados ya no valen
+    invalidar_reportes()
+    if not settings.ALERTAS_INCREMENTALES_ENABLED:
+        return
+
+    db = Session(bind=session.get_bind())
+    try:
+        resultado = evaluar_alertas_insumos(db, ids)
+        db.commit()
+        if resultado["creadas"] or resultado["resueltas"]:
+            logger.info(
+                f"🔔 Alertas reevaluadas para los insumos {sorted(ids)}: "
+                f"{len(resultado['creadas'])} creadas, {len(resultado['resueltas'])} resueltas"
+            )
+        # Aunque no cambien las alertas, los lotes cambiaron: el semáforo puede moverse
+        publicar_cambios(db, **resultado)
+    except Exception as e:
+        db.rollback()
+        logger.exception(f"❌ Error al reevaluar alertas de los insumos {sorted(ids)}: {e}")
+    finally:
+        db.close()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_al_revertir(session: Session, previous_transaction) -> None:
+    # Solo el rollback de la transacción externa descarta las marcas
+    if not session.in_transaction():
+        session.info.pop(CLAVE_PENDIENTES, None)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, String, Text, TIMESTAMP, Boolean, ForeignKey
+from sqlalchemy import Column, BigInteger, String, Text, TIMESTAMP, Boolean, Date, ForeignKey, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database import Base
@@ -22,6 +22,28 @@ class Notificacion(Base):
     con enums de Python (TipoAlertaEnum, SemaforoEstadoEnum).
     """
     __tablename__ = "notificaciones"
+    __table_args__ = (
+        # Notificación activa de un insumo/tipo (deduplicación del job y resolución de alertas)
+        Index(
+            'idx_notificaciones_insumo_tipo_activas',
+            'id_insumo', 'tipo', 'fecha_creacion',
+            postgresql_where=text('activa = true')
+        ),
+        # Listado de notificaciones activas paginado por cursor (fecha_creacion, id_notificacion)
+        Index(
+            'idx_notificaciones_activas_fecha_id',
+            'fecha_creacion', 'id_notificacion',
+            postgresql_where=text('activa = true')
+        ),
+        # Una alerta activa del job por insumo/tipo/lote y día: el INSERT ... SELECT
+        # del job usa ON CONFLICT DO NOTHING sobre este índice
+        Index(
+            'uq_notificaciones_alerta_diaria',
+            'id_insumo', 'tipo', text('COALESCE(id_ingreso_detalle, 0)'), 'fecha_alerta',
+            unique=True,
+            postgresql_where=text('activa = true AND fecha_alerta IS NOT NULL')
+        ),
+    )
 
     id_notificacion = Column(BigInteger, primary_key=True, autoincrement=True)
     
@@ -43,6 +65,9 @@ class Notificacion(Base):
     leida = Column(Boolean, default=False, index=True)
     activa = Column(Boolean, default=True, index=True)
     
+    # Día del negocio de la alerta (solo las del job diario; NULL en las demás)
+    fecha_alerta = Column(Date, nullable=True)
+    
     # Auditoría
     fecha_creacion = Column(TIMESTAMP(timezone=True), server_default=func.now(), index=True)
     fecha_lectura = Column(TIMESTAMP(timezone=True), nullable=True)
@@ -1,9 +1,12 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import text, func
 from typing import List, Optional, Tuple
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 
+from utils.paginacion import Cursor, filtro_despues_de, total_aproximado
+from utils.rango_fechas import filtro_dia, hoy_negocio, inicio_dia
+
 from .model import Notificacion, TipoAlerta, SemaforoEstado
 from .repository_interface import AlertasRepositoryInterface
 
@@ -14,6 +17,17 @@ class AlertasRepository(AlertasRepositoryInterface):
     def __init__(self, db: Session):
         self.db = db
     
+    @staticmethod
+    def _limite_vencimiento(dias: int) -> datetime:
+        """
+        Primer instante posterior a "vence en <= dias días".
+
+        `fecha_vencimiento < limite` equivale a
+        `fecha_vencimiento::date - hoy <= dias` pero sin transformar la columna,
+        así Postgres usa el índice parcial de vencimientos.
+        """
+        return inicio_dia(hoy_negocio() + timedelta(days=dias + 1))
+    
     # ==================== NOTIFICACIONES CRUD ====================
     
     def crear_notificacion(self, notificacion: Notificacion) -> Notificacion:
@@ -34,30 +48,54 @@ class AlertasRepository(AlertasRepositoryInterface):
             Notificacion.id_notificacion == id_notificacion
         ).first()
     
+    @staticmethod
+    def _filtrar_notificaciones(query, tipo: Optional[TipoAlerta], solo_no_leidas: bool):
+        """Filtros del listado de notificaciones activas."""
+        query = query.filter(Notificacion.activa == True)
+        
+        if tipo:
+            query = query.filter(Notificacion.tipo == tipo)
+        
+        if solo_no_leidas:
+            query = query.filter(Notificacion.leida == False)
+        
+        return query
+    
     def obtener_notificaciones_activas(
         self,
         tipo: Optional[TipoAlerta] = None,
         solo_no_leidas: bool = False,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[Cursor] = None
     ) -> List[Notificacion]:
-        """Obtiene notificaciones activas con filtros opcionales."""
+        """
+        Obtiene notificaciones activas con filtros opcionales, de la más reciente
+        a la más antigua. Con `cursor` (fecha_creacion, id_notificacion)
+        continúa después de esa notificación.
+        """
         from modules.insumo.model import Insumo
         
-        query = self.db.query(
-            Notificacion,
-            Insumo.nombre.label('nombre_insumo'),
-            Insumo.codigo.label('codigo_insumo')
-        ).outerjoin(
-            Insumo, Notificacion.id_insumo == Insumo.id_insumo
-        ).filter(Notificacion.activa == True)
-        
-        if tipo:
-            query = query.filter(Notificacion.tipo == tipo)
+        query = self._filtrar_notificaciones(
+            self.db.query(
+                Notificacion,
+                Insumo.nombre.label('nombre_insumo'),
+                Insumo.codigo.label('codigo_insumo')
+            ).outerjoin(
+                Insumo, Notificacion.id_insumo == Insumo.id_insumo
+            ),
+            tipo,
+            solo_no_leidas
+        )
         
-        if solo_no_leidas:
-            query = query.filter(Notificacion.leida == False)
+        if cursor is not None:
+            query = query.filter(
+                filtro_despues_de(Notificacion.fecha_creacion, Notificacion.id_notificacion, cursor)
+            )
         
-        results = query.order_by(Notificacion.fecha_creacion.desc()).limit(limit).all()
+        results = query.order_by(
+            Notificacion.fecha_creacion.desc(),
+            Notificacion.id_notificacion.desc()
+        ).limit(limit).all()
         
         # Attach the joined data to the Notificacion objects
         for notif, nombre_insumo, codigo_insumo in results:
@@ -66,6 +104,17 @@ class AlertasRepository(AlertasRepositoryInterface):
         
         return [notif for notif, _, _ in results]
     
+    def estimar_notificaciones_activas(
+        self,
+        tipo: Optional[TipoAlerta] = None,
+        solo_no_leidas: bool = False
+    ) -> int:
+        """Total aproximado (estimación del planificador) del listado de notificaciones."""
+        query = self._filtrar_notificaciones(
+            self.db.query(Notificacion.id_notificacion), tipo, solo_no_leidas
+        )
+        return total_aproximado(self.db, query)
+    
     def marcar_como_leida(self, id_notificacion: int) -> bool:
         """Marca una notificación como leída."""
         result = self.db.query(Notificacion).filter(
@@ -138,7 +187,7 @@ class AlertasRepository(AlertasRepositoryInterface):
                 ins.nombre AS nombre_insumo,
                 ins.unidad_medida,
                 ins.perecible,
-                (d.fecha_vencimiento::date - CURRENT_DATE) AS dias_restantes
+                (d.fecha_vencimiento::date - CAST(:hoy AS DATE)) AS dias_restantes
             FROM ingresos_insumos_detalle d
             INNER JOIN ingresos_insumos i ON d.id_ingreso = i.id_ingreso
             INNER JOIN insumo ins ON d.id_insumo = ins.id_insumo
@@ -147,18 +196,21 @@ class AlertasRepository(AlertasRepositoryInterface):
                 AND d.fecha_vencimiento IS NOT NULL
                 AND ins.anulado = false
                 AND i.anulado = false
-                AND (d.fecha_vencimiento::date - CURRENT_DATE) <= :dias_limite
+                AND d.fecha_vencimiento < :limite
             ORDER BY d.fecha_vencimiento ASC, d.cantidad_restante DESC
         """)
         
-        result = self.db.execute(sql, {"dias_limite": dias_limite})
+        result = self.db.execute(sql, {
+            "hoy": hoy_negocio(),
+            "limite": self._limite_vencimiento(dias_limite)
+        })
         
         return [dict(row._mapping) for row in result]
     
     def obtener_stock_por_insumo(self) -> List[dict]:
         """
-        Obtiene el stock actual de cada insumo (suma de cantidad_restante de todos los lotes).
-        Usa SQL puro para agregación con múltiples joins.
+        Obtiene los insumos con stock actual por debajo del mínimo.
+        El stock se lee del resumen insumo_stock (sin agregar los lotes).
         
         Returns:
             Lista de diccionarios con id_insumo, stock_actual, stock_minimo.
@@ -170,22 +222,14 @@ class AlertasRepository(AlertasRepositoryInterface):
                 ins.nombre,
                 ins.unidad_medida,
                 ins.stock_minimo,
-                COALESCE(SUM(d.cantidad_restante), 0) AS stock_actual
+                COALESCE(st.stock_actual, 0) AS stock_actual
             FROM insumo ins
-            LEFT JOIN ingresos_insumos_detalle d ON ins.id_insumo = d.id_insumo
-            LEFT JOIN ingresos_insumos i ON d.id_ingreso = i.id_ingreso AND i.anulado = false
+            LEFT JOIN insumo_stock st ON st.id_insumo = ins.id_insumo
             WHERE 
                 ins.anulado = false
-            GROUP BY 
-                ins.id_insumo, 
-                ins.codigo, 
-                ins.nombre, 
-                ins.unidad_medida, 
-                ins.stock_minimo
-            HAVING 
-                COALESCE(SUM(d.cantidad_restante), 0) < ins.stock_minimo
+                AND COALESCE(st.stock_actual, 0) < ins.stock_minimo
             ORDER BY 
-                (COALESCE(SUM(d.cantidad_restante), 0) / NULLIF(ins.stock_minimo, 0)) ASC
+                (COALESCE(st.stock_actual, 0) / NULLIF(ins.stock_minimo, 0)) ASC
         """)
         
         result = self.db.execute(sql)
@@ -210,7 +254,7 @@ class AlertasRepository(AlertasRepositoryInterface):
                 ins.codigo AS codigo_insumo,
                 ins.nombre AS nombre_insumo,
                 ins.unidad_medida,
-                (d.fecha_vencimiento::date - CURRENT_DATE) AS dias_restantes,
+                (d.fecha_vencimiento::date - CAST(:hoy AS DATE)) AS dias_restantes,
                 ROW_NUMBER() OVER (ORDER BY d.fecha_vencimiento ASC) AS prioridad
             FROM ingresos_insumos_detalle d
             INNER JOIN ingresos_insumos i ON d.id_ingreso = i.id_ingreso
@@ -221,11 +265,14 @@ class AlertasRepository(AlertasRepositoryInterface):
                 AND ins.anulado = false
                 AND i.anulado = false
                 AND ins.perecible = true
-                AND (d.fecha_vencimiento::date - CURRENT_DATE) <= :dias_rojo
+                AND d.fecha_vencimiento < :limite
             ORDER BY d.fecha_vencimiento ASC
         """)
         
-        result = self.db.execute(sql, {"dias_rojo": dias_rojo})
+        result = self.db.execute(sql, {
+            "hoy": hoy_negocio(),
+            "limite": self._limite_vencimiento(dias_rojo)
+        })
         
         return [dict(row._mapping) for row in result]
     
@@ -244,9 +291,9 @@ class AlertasRepository(AlertasRepositoryInterface):
         sql = text("""
             SELECT 
                 CASE 
-                    WHEN (d.fecha_vencimiento::date - CURRENT_DATE) < 0 THEN 'VENCIDO'
-                    WHEN (d.fecha_vencimiento::date - CURRENT_DATE) <= :dias_rojo THEN 'ROJO'
-                    WHEN (d.fecha_vencimiento::date - CURRENT_DATE) <= :dias_amarillo THEN 'AMARILLO'
+                    WHEN d.fecha_vencimiento < :inicio_hoy THEN 'VENCIDO'
+                    WHEN d.fecha_vencimiento < :limite_rojo THEN 'ROJO'
+                    WHEN d.fecha_vencimiento < :limite_amarillo THEN 'AMARILLO'
                     ELSE 'VERDE'
                 END AS semaforo,
                 COUNT(*) AS cantidad
@@ -261,17 +308,17 @@ class AlertasRepository(AlertasRepositoryInterface):
                 AND ins.perecible = true
             GROUP BY 
                 CASE 
-                    WHEN (d.fecha_vencimiento::date - CURRENT_DATE) < 0 THEN 'VENCIDO'
-                    WHEN (d.fecha_vencimiento::date - CURRENT_DATE) <= :dias_rojo THEN 'ROJO'
-                    WHEN (d.fecha_vencimiento::date - CURRENT_DATE) <= :dias_amarillo THEN 'AMARILLO'
+                    WHEN d.fecha_vencimiento < :inicio_hoy THEN 'VENCIDO'
+                    WHEN d.fecha_vencimiento < :limite_rojo THEN 'ROJO'
+                    WHEN d.fecha_vencimiento < :limite_amarillo THEN 'AMARILLO'
                     ELSE 'VERDE'
                 END
         """)
         
         result = self.db.execute(sql, {
-            "dias_verde": dias_verde,
-            "dias_amarillo": dias_amarillo,
-            "dias_rojo": dias_rojo
+            "inicio_hoy": inicio_dia(hoy_negocio()),
+            "limite_amarillo": self._limite_vencimiento(dias_amarillo),
+            "limite_rojo": self._limite_vencimiento(dias_rojo)
         })
         
         conteos = {"VERDE": 0, "AMARILLO": 0, "ROJO": 0, "VENCIDO": 0}
@@ -293,7 +340,7 @@ class AlertasRepository(AlertasRepositoryInterface):
             Notificacion.id_insumo == id_insumo,
             Notificacion.tipo == tipo,
             Notificacion.activa == True,
-            func.date(Notificacion.fecha_creacion) == date.today()
+            filtro_dia(Notificacion.fecha_creacion, hoy_negocio())
         )
         
         if id_ingreso_detalle:
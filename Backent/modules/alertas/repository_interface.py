@@ -7,6 +7,8 @@ from abc import ABC, abstractmethod
 from typing import List, Optional
 from sqlalchemy.orm import Session
 
+from utils.paginacion import Cursor
+
 from .model import Notificacion, TipoAlerta
 
 
@@ -35,11 +37,21 @@ class AlertasRepositoryInterface(ABC):
         self,
         tipo: Optional[TipoAlerta] = None,
         solo_no_leidas: bool = False,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[Cursor] = None
     ) -> List[Notificacion]:
         """Obtiene notificaciones activas con filtros opcionales."""
         pass
 
+    @abstractmethod
+    def estimar_notificaciones_activas(
+        self,
+        tipo: Optional[TipoAlerta] = None,
+        solo_no_leidas: bool = False
+    ) -> int:
+        """Total aproximado del listado de notificaciones activas."""
+        pass
+
     @abstractmethod
     def marcar_como_leida(self, id_notificacion: int) -> bool:
         """Marca una notificación como leída."""
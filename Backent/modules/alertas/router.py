@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from loguru import logger
 import time
 
-from database import get_db
+from database import EjecutorDB, get_db, get_read_db_ejecutor
 from .service import AlertasService
+from .stream import canal_alertas, estado_alertas, eventos_sse
 from .schemas import (
     NotificacionResponse,
     ResumenSemaforo,
@@ -17,6 +19,9 @@ from .schemas import (
     ConfiguracionAlertasResponse,
     JobEjecutarResponse
 )
+from modules.reportes.cache import cache_reportes
+from utils.paginacion import LIMITE_DEFECTO, LIMITE_MAXIMO, PaginaKeyset
+from utils.rango_fechas import hoy_negocio
 from utils.standard_responses import api_response_ok
 
 router = APIRouter()
@@ -89,24 +94,61 @@ def actualizar_configuracion(
     response_model=List[NotificacionResponse],
     summary="Listar notificaciones"
 )
-def listar_notificaciones(
+async def listar_notificaciones(
     tipo: Optional[str] = Query(
         default=None,
         description="Filtrar por tipo: STOCK_CRITICO, VENCIMIENTO_PROXIMO, USAR_HOY, VENCIDO"
     ),
     solo_no_leidas: bool = Query(default=False, description="Solo mostrar no leídas"),
     limit: int = Query(default=100, le=500, description="Límite de resultados"),
-    service: AlertasService = Depends(get_alertas_service)
+    db: EjecutorDB = Depends(get_read_db_ejecutor)
 ):
     """
     Obtiene lista de notificaciones activas con filtros opcionales.
     """
     try:
-        return service.obtener_notificaciones(
+        return await db(lambda s: AlertasService(s).obtener_notificaciones(
             tipo=tipo,
             solo_no_leidas=solo_no_leidas,
             limit=limit
-        )
+        ))
+    except Exception as e:
+        logger.error(f"Error al listar notificaciones: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get(
+    "/notificaciones/pagina",
+    response_model=PaginaKeyset[NotificacionResponse],
+    summary="Listar notificaciones paginadas por cursor"
+)
+async def listar_notificaciones_pagina(
+    tipo: Optional[str] = Query(
+        default=None,
+        description="Filtrar por tipo: STOCK_CRITICO, VENCIMIENTO_PROXIMO, USAR_HOY, VENCIDO"
+    ),
+    solo_no_leidas: bool = Query(default=False, description="Solo mostrar no leídas"),
+    after: Optional[str] = Query(
+        default=None,
+        description="Cursor '<fecha ISO>,<id>' (campo `siguiente` de la página anterior)"
+    ),
+    limit: int = Query(default=LIMITE_DEFECTO, ge=1, le=LIMITE_MAXIMO, description="Tamaño de página"),
+    con_total: bool = Query(default=False, description="Incluir total aproximado"),
+    db: EjecutorDB = Depends(get_read_db_ejecutor)
+):
+    """
+    Notificaciones activas de la más reciente a la más antigua, paginadas por cursor.
+    """
+    try:
+        return await db(lambda s: AlertasService(s).obtener_notificaciones_pagina(
+            tipo=tipo,
+            solo_no_leidas=solo_no_leidas,
+            after=after,
+            limit=limit,
+            con_total=con_total
+        ))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error al listar notificaciones: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -161,32 +203,89 @@ def marcar_todas_leidas(
     response_model=ResumenAlertas,
     summary="Resumen de alertas"
 )
-def obtener_resumen(service: AlertasService = Depends(get_alertas_service)):
+async def obtener_resumen(db: EjecutorDB = Depends(get_read_db_ejecutor)):
     """Obtiene un resumen de alertas activas no leídas."""
     try:
-        return service.obtener_resumen_alertas()
+        return await db(lambda s: AlertasService(s).obtener_resumen_alertas())
     except Exception as e:
         logger.error(f"Error al obtener resumen: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get(
+    "/stream",
+    summary="Stream de cambios de alertas (Server-Sent Events)",
+    response_class=StreamingResponse
+)
+async def stream_alertas(
+    request: Request,
+    id_empresa: int = Query(default=1, description="ID de la empresa (configuración del semáforo)"),
+    db: EjecutorDB = Depends(get_read_db_ejecutor)
+):
+    """
+    Reemplaza el polling de /resumen y /semaforo.
+    
+    Envía `estado` al conectarse y `alertas` con las notificaciones nuevas,
+    las resueltas, el resumen de no leídas y los conteos del semáforo (con su
+    diferencia) cada vez que cambian.
+    """
+    suscripcion = canal_alertas.suscribir(id_empresa)
+    try:
+        estado = await db(lambda s: estado_alertas(s, id_empresa))
+    except Exception as e:
+        canal_alertas.cancelar(suscripcion)
+        logger.error(f"Error al abrir stream de alertas: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return StreamingResponse(
+        eventos_sse(request, suscripcion, estado),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # ==================== SEMÁFORO DE VENCIMIENTOS ====================
 
+async def _semaforo_del_dia(db: EjecutorDB, id_empresa: int) -> dict:
+    """
+    Semáforo y lista FEFO del día, compartidos por los cuatro widgets.
+    
+    Una entrada de caché por umbrales de la empresa y día del negocio: las
+    empresas con la misma configuración comparten el cálculo y el cambio de
+    día usa una clave nueva. Las operaciones que modifican lotes invalidan
+    los reportes de hoy después de su commit (modules/alertas/incremental.py).
+    """
+    config = await db(lambda s: AlertasService(s).obtener_configuracion_alertas(id_empresa))
+    hoy = hoy_negocio()
+    return await cache_reportes.obtener_async(
+        "alertas_semaforo",
+        {
+            "dias_verde": config["dias_verde"],
+            "dias_amarillo": config["dias_amarillo"],
+            "dias_rojo": config["dias_rojo"],
+            "hoy": hoy
+        },
+        hoy,
+        hoy,
+        lambda: db(lambda s: AlertasService(s).obtener_semaforo_del_dia(config))
+    )
+
+
 @router.get(
     "/semaforo",
     response_model=ResumenSemaforo,
     summary="Semáforo de vencimientos"
 )
-def obtener_semaforo(
+async def obtener_semaforo(
     id_empresa: int = Query(default=1, description="ID de la empresa"),
-    service: AlertasService = Depends(get_alertas_service)
+    db: EjecutorDB = Depends(get_read_db_ejecutor)
 ):
     """
     Obtiene el semáforo completo de vencimientos.
     Clasifica los lotes en Verde (>15 días), Amarillo (7-15 días), Rojo (<7 días).
     """
     try:
-        return service.obtener_semaforo_vencimientos(id_empresa)
+        return (await _semaforo_del_dia(db, id_empresa))["semaforo"]
     except Exception as e:
         logger.error(f"Error al obtener semáforo: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -197,16 +296,16 @@ def obtener_semaforo(
     response_model=List[InsumoSemaforo],
     summary="Items en estado rojo (crítico)"
 )
-def obtener_items_rojos(
+async def obtener_items_rojos(
     id_empresa: int = Query(default=1, description="ID de la empresa"),
-    service: AlertasService = Depends(get_alertas_service)
+    db: EjecutorDB = Depends(get_read_db_ejecutor)
 ):
     """
     Obtiene solo los items en estado rojo (vencen en menos de 7 días).
     Estos deben usarse con prioridad máxima.
     """
     try:
-        return service.obtener_items_rojos(id_empresa)
+        return (await _semaforo_del_dia(db, id_empresa))["semaforo"].items_rojo
     except Exception as e:
         logger.error(f"Error al obtener items rojos: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -217,16 +316,16 @@ def obtener_items_rojos(
     response_model=List[InsumoSemaforo],
     summary="Items en estado amarillo (atención)"
 )
-def obtener_items_amarillos(
+async def obtener_items_amarillos(
     id_empresa: int = Query(default=1, description="ID de la empresa"),
-    service: AlertasService = Depends(get_alertas_service)
+    db: EjecutorDB = Depends(get_read_db_ejecutor)
 ):
     """
     Obtiene solo los items en estado amarillo (vencen en 7-15 días).
     Estos deben usarse esta semana.
     """
     try:
-        return service.obtener_items_amarillos(id_empresa)
+        return (await _semaforo_del_dia(db, id_empresa))["semaforo"].items_amarillo
     except Exception as e:
         logger.error(f"Error al obtener items amarillos: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -239,13 +338,13 @@ def obtener_items_amarillos(
     response_model=ResumenStockCritico,
     summary="Insumos con stock crítico"
 )
-def obtener_stock_critico(service: AlertasService = Depends(get_alertas_service)):
+async def obtener_stock_critico(db: EjecutorDB = Depends(get_read_db_ejecutor)):
     """
     Obtiene lista de insumos cuyo stock actual está por debajo del mínimo.
     Incluye insumos sin stock (es_critico=true) y con stock bajo.
     """
     try:
-        return service.obtener_stock_critico()
+        return await db(lambda s: AlertasService(s).obtener_stock_critico())
     except Exception as e:
         logger.error(f"Error al obtener stock crítico: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -258,16 +357,16 @@ def obtener_stock_critico(service: AlertasService = Depends(get_alertas_service)
     response_model=ListaUsarHoy,
     summary="Lista FEFO de items a usar hoy"
 )
-def obtener_usar_hoy(
+async def obtener_usar_hoy(
     id_empresa: int = Query(default=1, description="ID de la empresa"),
-    service: AlertasService = Depends(get_alertas_service)
+    db: EjecutorDB = Depends(get_read_db_ejecutor)
 ):
     """
     Genera lista FEFO (First Expired, First Out) de items que deben usarse hoy.
     Prioriza los que vencen primero.
     """
     try:
-        return service.obtener_lista_usar_hoy(id_empresa)
+        return (await _semaforo_del_dia(db, id_empresa))["usar_hoy"]
     except Exception as e:
         logger.error(f"Error al obtener lista usar hoy: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -303,7 +402,8 @@ def ejecutar_job_manual(
             alertas_vencimiento_creadas=resultado.get("alertas_vencimiento", 0),
             alertas_stock_creadas=resultado.get("alertas_stock", 0),
             emails_encolados=resultado.get("emails_encolados", 0),
-            tiempo_ejecucion_ms=tiempo_ms
+            tiempo_ejecucion_ms=tiempo_ms,
+            tiempos_por_fase_ms=resultado.get("tiempos_ms", {})
         )
     except Exception as e:
         logger.error(f"Error al ejecutar job manualmente: {e}")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime, date
 from enum import Enum
 
@@ -176,6 +176,7 @@ class JobEjecutarResponse(BaseModel):
     alertas_stock_creadas: int
     emails_encolados: int
     tiempo_ejecucion_ms: int
+    tiempos_por_fase_ms: Dict[str, float] = {}
 
     model_config = ConfigDict(from_attributes=True)
 
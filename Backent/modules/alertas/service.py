@@ -19,6 +19,9 @@ from .schemas import (
 )
 from modules.empresa.model import Empresa, DEFAULT_CONFIGURACION_ALERTAS
 from .service_interface import AlertasServiceInterface
+from .stream import publicar_cambios
+from utils.paginacion import PaginaKeyset, cortar_pagina, leer_cursor
+from utils.rango_fechas import hoy_negocio
 
 
 class AlertasService(AlertasServiceInterface):
@@ -82,33 +85,74 @@ class AlertasService(AlertasServiceInterface):
         )
         
         # Mapear a response con datos del insumo
-        result = []
-        for n in notificaciones:
-            response = NotificacionResponse(
-                id_notificacion=n.id_notificacion,
-                tipo=n.tipo,
-                titulo=n.titulo,
-                mensaje=n.mensaje,
-                id_insumo=n.id_insumo,
-                id_ingreso_detalle=n.id_ingreso_detalle,
-                semaforo=n.semaforo,
-                dias_restantes=n.dias_restantes,
-                cantidad_afectada=n.cantidad_afectada,
-                leida=n.leida,
-                activa=n.activa,
-                fecha_creacion=n.fecha_creacion,
-                fecha_lectura=n.fecha_lectura,
-                nombre_insumo=getattr(n, 'nombre_insumo', None),
-                codigo_insumo=getattr(n, 'codigo_insumo', None)
+        return [self._a_notificacion_response(n) for n in notificaciones]
+    
+    def obtener_notificaciones_pagina(
+        self,
+        tipo: Optional[str] = None,
+        solo_no_leidas: bool = False,
+        after: Optional[str] = None,
+        limit: int = 50,
+        con_total: bool = False
+    ) -> PaginaKeyset[NotificacionResponse]:
+        """
+        Obtiene notificaciones paginadas por cursor (fecha_creacion, id_notificacion).
+        `after` es el campo `siguiente` de la página anterior.
+        """
+        tipo_enum = TipoAlerta(tipo) if tipo else None
+        
+        # Una fila extra indica si hay página siguiente
+        notificaciones = self.repository.obtener_notificaciones_activas(
+            tipo=tipo_enum,
+            solo_no_leidas=solo_no_leidas,
+            limit=limit + 1,
+            cursor=leer_cursor(after)
+        )
+        items, siguiente, hay_mas = cortar_pagina(
+            notificaciones, limit, lambda n: (n.fecha_creacion, n.id_notificacion)
+        )
+        
+        total = None
+        if con_total:
+            total = self.repository.estimar_notificaciones_activas(
+                tipo=tipo_enum,
+                solo_no_leidas=solo_no_leidas
             )
-            result.append(response)
         
-        return result
+        return PaginaKeyset[NotificacionResponse](
+            items=[self._a_notificacion_response(n) for n in items],
+            limit=limit,
+            siguiente=siguiente,
+            hay_mas=hay_mas,
+            total_aproximado=total
+        )
+    
+    @staticmethod
+    def _a_notificacion_response(n: Notificacion) -> NotificacionResponse:
+        """Notificación (con nombre/código del insumo adjuntos) a response."""
+        return NotificacionResponse(
+            id_notificacion=n.id_notificacion,
+            tipo=n.tipo,
+            titulo=n.titulo,
+            mensaje=n.mensaje,
+            id_insumo=n.id_insumo,
+            id_ingreso_detalle=n.id_ingreso_detalle,
+            semaforo=n.semaforo,
+            dias_restantes=n.dias_restantes,
+            cantidad_afectada=n.cantidad_afectada,
+            leida=n.leida,
+            activa=n.activa,
+            fecha_creacion=n.fecha_creacion,
+            fecha_lectura=n.fecha_lectura,
+            nombre_insumo=getattr(n, 'nombre_insumo', None),
+            codigo_insumo=getattr(n, 'codigo_insumo', None)
+        )
     
     def marcar_notificacion_leida(self, id_notificacion: int) -> bool:
         """Marca una notificación como leída."""
         result = self.repository.marcar_como_leida(id_notificacion)
         self.db.commit()
+        publicar_cambios(self.db)
         return result
     
     def marcar_todas_leidas(self, tipo: Optional[str] = None) -> int:
@@ -116,6 +160,7 @@ class AlertasService(AlertasServiceInterface):
         tipo_enum = TipoAlerta(tipo) if tipo else None
         count = self.repository.marcar_todas_como_leidas(tipo=tipo_enum)
         self.db.commit()
+        publicar_cambios(self.db)
         return count
     
     def obtener_resumen_alertas(self) -> ResumenAlertas:
@@ -124,7 +169,7 @@ class AlertasService(AlertasServiceInterface):
         total = sum(conteos.values())
         
         return ResumenAlertas(
-            fecha=date.today(),
+            fecha=hoy_negocio(),
             total_no_leidas=total,
             por_tipo=conteos,
             ultima_ejecucion_job=None  # TODO: Guardar en algún lado
@@ -132,9 +177,24 @@ class AlertasService(AlertasServiceInterface):
     
     # ==================== SEMÁFORO DE VENCIMIENTOS ====================
     
+    def obtener_semaforo_del_dia(self, config: dict) -> dict:
+        """
+        Semáforo y lista FEFO con los umbrales de `config`: todo lo que muestran
+        /semaforo, /semaforo/rojo, /semaforo/amarillo y /usar-hoy.
+        
+        El router guarda el resultado en la caché de reportes por umbrales y
+        día del negocio, así los cuatro widgets comparten un solo cálculo.
+        """
+        return {
+            "semaforo": self._semaforo_con_config(config),
+            "usar_hoy": self._lista_usar_hoy_con_config(config)
+        }
+    
     def obtener_semaforo_vencimientos(self, id_empresa: int = 1) -> ResumenSemaforo:
         """Obtiene el semáforo completo de vencimientos."""
-        config = self.obtener_configuracion_alertas(id_empresa)
+        return self._semaforo_con_config(self.obtener_configuracion_alertas(id_empresa))
+    
+    def _semaforo_con_config(self, config: dict) -> ResumenSemaforo:
         dias_verde = config["dias_verde"]
         dias_amarillo = config["dias_amarillo"]
         dias_rojo = config["dias_rojo"]
@@ -185,7 +245,7 @@ class AlertasService(AlertasServiceInterface):
                 items_amarillo.append(item)
         
         return ResumenSemaforo(
-            fecha_consulta=date.today(),
+            fecha_consulta=hoy_negocio(),
             total_verde=conteos.get("VERDE", 0),
             total_amarillo=conteos.get("AMARILLO", 0),
             total_rojo=conteos.get("ROJO", 0),
@@ -240,7 +300,7 @@ class AlertasService(AlertasServiceInterface):
             items.append(item)
         
         return ResumenStockCritico(
-            fecha_consulta=date.today(),
+            fecha_consulta=hoy_negocio(),
             total_sin_stock=total_sin_stock,
             total_bajo_minimo=total_bajo_minimo,
             total_normal=0,  # No se incluyen en la query
@@ -251,7 +311,9 @@ class AlertasService(AlertasServiceInterface):
     
     def obtener_lista_usar_hoy(self, id_empresa: int = 1) -> ListaUsarHoy:
         """Obtiene lista FEFO de items a usar hoy."""
-        config = self.obtener_configuracion_alertas(id_empresa)
+        return self._lista_usar_hoy_con_config(self.obtener_configuracion_alertas(id_empresa))
+    
+    def _lista_usar_hoy_con_config(self, config: dict) -> ListaUsarHoy:
         dias_rojo = config["dias_rojo"]
         
         lotes = self.repository.obtener_lista_usar_hoy(dias_rojo=dias_rojo)
@@ -278,7 +340,7 @@ class AlertasService(AlertasServiceInterface):
             items.append(item)
         
         return ListaUsarHoy(
-            fecha=date.today(),
+            fecha=hoy_negocio(),
             total_items=len(items),
             valor_estimado_en_riesgo=round(valor_total, 2),
             items=items
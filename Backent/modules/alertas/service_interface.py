@@ -14,6 +14,7 @@ from .schemas import (
     ResumenAlertas,
     InsumoSemaforo
 )
+from utils.paginacion import PaginaKeyset
 
 
 class AlertasServiceInterface(ABC):
@@ -47,6 +48,18 @@ class AlertasServiceInterface(ABC):
         """Obtiene lista de notificaciones con filtros."""
         pass
 
+    @abstractmethod
+    def obtener_notificaciones_pagina(
+        self,
+        tipo: Optional[str] = None,
+        solo_no_leidas: bool = False,
+        after: Optional[str] = None,
+        limit: int = 50,
+        con_total: bool = False
+    ) -> PaginaKeyset[NotificacionResponse]:
+        """Obtiene notificaciones paginadas por cursor."""
+        pass
+
     @abstractmethod
     def marcar_notificacion_leida(self, id_notificacion: int) -> bool:
         """Marca una notificación como leída."""
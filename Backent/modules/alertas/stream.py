@@ -0,0 +1,278 @@
+"""
+Stream de alertas para los dashboards (Server-Sent Events).
+
+En lugar de consultar /resumen y /semaforo cada pocos segundos, el frontend
+abre GET /api/v1/alertas/stream y recibe:
+- `estado`: al conectarse, el resumen de no leídas y los conteos del semáforo
+- `alertas`: cada vez que cambian, las notificaciones nuevas, los ids de las
+  resueltas, el resumen y los conteos del semáforo con su diferencia
+
+Los cambios se publican en CanalAlertas (pub/sub en el proceso) desde el job
+de alertas, la evaluación incremental (modules/alertas/incremental.py) y las
+notificaciones marcadas como leídas. publicar_cambios() calcula el resumen una
+vez y el semáforo una vez por empresa suscrita, y el mismo evento ya
+serializado se entrega a todas las conexiones: N dashboards abiertos cuestan
+un cálculo, no N consultas. Sin conexiones abiertas no se calcula nada.
+
+El canal es de este proceso: con varios workers, cada uno avisa a sus propias
+conexiones de los cambios que confirma.
+"""
+
+import asyncio
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+from fastapi import Request
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from config import settings
+from modules.empresa.model import DEFAULT_CONFIGURACION_ALERTAS, Empresa
+from modules.insumo.model import Insumo
+
+from .model import Notificacion
+from .repository import AlertasRepository
+from .schemas import NotificacionResponse
+
+# Eventos pendientes por conexión; una conexión más lenta pierde los más antiguos
+COLA_MAXIMA = 100
+
+
+@dataclass(eq=False)
+class Suscripcion:
+    """Una conexión abierta: recibe los eventos de su empresa en su cola."""
+    id_empresa: int
+    loop: asyncio.AbstractEventLoop
+    cola: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=COLA_MAXIMA))
+
+
+class CanalAlertas:
+    """
+    Pub/sub de los cambios de alertas dentro del proceso.
+
+    Se publica desde cualquier hilo (threadpool de los endpoints, scheduler);
+    cada evento se encola en el event loop de la conexión con
+    call_soon_threadsafe. Mientras una empresa tiene conexiones, el canal guarda
+    el último resumen y los últimos conteos del semáforo para calcular las
+    diferencias y atender las conexiones nuevas sin volver a consultar.
+    """
+
+    def __init__(self):
+        self._suscripciones: Dict[int, List[Suscripcion]] = {}
+        self._resumen: Optional[dict] = None
+        self._semaforo: Dict[int, dict] = {}
+        self._lock = threading.Lock()
+
+    def suscribir(self, id_empresa: int) -> Suscripcion:
+        """Registra una conexión; debe llamarse desde su event loop."""
+        suscripcion = Suscripcion(id_empresa=id_empresa, loop=asyncio.get_running_loop())
+        with self._lock:
+            self._suscripciones.setdefault(id_empresa, []).append(suscripcion)
+        return suscripcion
+
+    def cancelar(self, suscripcion: Suscripcion) -> None:
+        """Quita la conexión; sin conexiones, la empresa deja de tener estado guardado."""
+        with self._lock:
+            suscripciones = self._suscripciones.get(suscripcion.id_empresa, [])
+            if suscripcion in suscripciones:
+                suscripciones.remove(suscripcion)
+            if not suscripciones:
+                self._suscripciones.pop(suscripcion.id_empresa, None)
+                self._semaforo.pop(suscripcion.id_empresa, None)
+            if not self._suscripciones:
+                self._resumen = None
+
+    def empresas(self) -> List[int]:
+        """Empresas con al menos una conexión abierta."""
+        with self._lock:
+            return list(self._suscripciones)
+
+    def estado(self, id_empresa: int) -> Optional[dict]:
+        """Último resumen y semáforo de la empresa, si el canal los tiene."""
+        with self._lock:
+            if self._resumen is None or id_empresa not in self._semaforo:
+                return None
+            return {"resumen": self._resumen, "semaforo": self._semaforo[id_empresa]}
+
+    def actualizar_resumen(self, resumen: dict) -> bool:
+        """Guarda el resumen de no leídas; True si cambió."""
+        with self._lock:
+            cambio = resumen != self._resumen
+            if self._suscripciones:
+                self._resumen = resumen
+            return cambio
+
+    def actualizar_semaforo(self, id_empresa: int, conteos: dict) -> dict:
+        """Guarda los conteos del semáforo de la empresa y retorna la diferencia con los anteriores."""
+        with self._lock:
+            anteriores = self._semaforo.get(id_empresa, {})
+            if id_empresa in self._suscripciones:
+                self._semaforo[id_empresa] = conteos
+        return {estado: cantidad - anteriores.get(estado, 0) for estado, cantidad in conteos.items()}
+
+    def publicar(self, id_empresa: int, evento: str) -> int:
+        """Entrega el evento (ya formateado) a las conexiones de la empresa; retorna cuántas."""
+        with self._lock:
+            suscripciones = list(self._suscripciones.get(id_empresa, []))
+
+        entregados = 0
+        for suscripcion in suscripciones:
+            try:
+                suscripcion.loop.call_soon_threadsafe(_encolar, suscripcion.cola, evento)
+                entregados += 1
+            except RuntimeError:
+                # El loop de la conexión ya se cerró
+                self.cancelar(suscripcion)
+        return entregados
+
+
+def _encolar(cola: asyncio.Queue, evento: str) -> None:
+    if cola.full():
+        cola.get_nowait()
+    cola.put_nowait(evento)
+
+
+canal_alertas = CanalAlertas()
+
+
+def formato_sse(evento: str, datos: dict) -> str:
+    """Mensaje Server-Sent Events con `datos` en JSON."""
+    return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False, default=str)}\n\n"
+
+
+def _configuraciones(db: Session, ids_empresa: List[int]) -> Dict[int, dict]:
+    """Configuración de alertas de cada empresa en una consulta (la de defecto si no existe)."""
+    empresas = db.query(Empresa).filter(Empresa.id_empresa.in_(ids_empresa)).all()
+    configuraciones = {e.id_empresa: e.get_configuracion_alertas() for e in empresas}
+    return {
+        id_empresa: configuraciones.get(id_empresa, DEFAULT_CONFIGURACION_ALERTAS.copy())
+        for id_empresa in ids_empresa
+    }
+
+
+def _conteos_semaforo(repository: AlertasRepository, config: dict) -> dict:
+    return repository.obtener_resumen_semaforo(
+        dias_verde=config["dias_verde"],
+        dias_amarillo=config["dias_amarillo"],
+        dias_rojo=config["dias_rojo"]
+    )
+
+
+def _resumen(repository: AlertasRepository) -> dict:
+    conteos = repository.contar_no_leidas_por_tipo()
+    return {"total_no_leidas": sum(conteos.values()), "por_tipo": conteos}
+
+
+def _notificaciones(db: Session, ids: List[int]) -> List[dict]:
+    """Notificaciones con nombre y código del insumo, como en el listado."""
+    filas = db.query(
+        Notificacion,
+        Insumo.nombre.label('nombre_insumo'),
+        Insumo.codigo.label('codigo_insumo')
+    ).outerjoin(
+        Insumo, Notificacion.id_insumo == Insumo.id_insumo
+    ).filter(
+        Notificacion.id_notificacion.in_(ids)
+    ).order_by(Notificacion.id_notificacion).all()
+
+    notificaciones = []
+    for notif, nombre_insumo, codigo_insumo in filas:
+        notif.nombre_insumo = nombre_insumo
+        notif.codigo_insumo = codigo_insumo
+        notificaciones.append(NotificacionResponse.model_validate(notif).model_dump(mode="json"))
+    return notificaciones
+
+
+def estado_alertas(db: Session, id_empresa: int) -> dict:
+    """
+    Resumen de no leídas y conteos del semáforo para una conexión nueva.
+
+    Si el canal ya tiene el estado de la empresa (otra conexión abierta) no
+    consulta la base de datos.
+    """
+    estado = canal_alertas.estado(id_empresa)
+    if estado is not None:
+        return estado
+
+    repository = AlertasRepository(db)
+    resumen = _resumen(repository)
+    semaforo = _conteos_semaforo(repository, _configuraciones(db, [id_empresa])[id_empresa])
+    canal_alertas.actualizar_resumen(resumen)
+    canal_alertas.actualizar_semaforo(id_empresa, semaforo)
+    return {"resumen": resumen, "semaforo": semaforo}
+
+
+def publicar_cambios(
+    db: Session,
+    creadas: Iterable[int] = (),
+    resueltas: Iterable[int] = ()
+) -> int:
+    """
+    Publica a las conexiones abiertas las alertas creadas y resueltas, y el
+    resumen y el semáforo si cambiaron.
+
+    Debe llamarse después del commit. Un error se registra y no se propaga:
+    la operación ya está confirmada y los dashboards se corrigen con el
+    siguiente evento.
+
+    Returns:
+        Eventos entregados (0 si no hay conexiones abiertas)
+    """
+    ids_empresa = canal_alertas.empresas()
+    if not ids_empresa:
+        return 0
+
+    try:
+        creadas = sorted(set(creadas))
+        resueltas = sorted(set(resueltas))
+        repository = AlertasRepository(db)
+
+        nuevas = _notificaciones(db, creadas) if creadas else []
+        resumen = _resumen(repository)
+        cambio_resumen = canal_alertas.actualizar_resumen(resumen)
+
+        entregados = 0
+        for id_empresa, config in _configuraciones(db, ids_empresa).items():
+            semaforo = _conteos_semaforo(repository, config)
+            diferencia = canal_alertas.actualizar_semaforo(id_empresa, semaforo)
+            if not (nuevas or resueltas or cambio_resumen or any(diferencia.values())):
+                continue
+            entregados += canal_alertas.publicar(id_empresa, formato_sse("alertas", {
+                "nuevas": nuevas,
+                "resueltas": resueltas,
+                "resumen": resumen,
+                "semaforo": semaforo,
+                "semaforo_diferencia": diferencia
+            }))
+        return entregados
+    except Exception as e:
+        logger.exception(f"❌ Error al publicar cambios de alertas: {e}")
+        return 0
+    finally:
+        db.rollback()
+
+
+async def eventos_sse(request: Request, suscripcion: Suscripcion, estado: dict) -> AsyncIterator[str]:
+    """
+    Eventos de una conexión: primero `estado`, luego cada `alertas` publicado.
+
+    Sin eventos durante ALERTAS_STREAM_KEEPALIVE_SEGUNDOS se envía un
+    comentario para que los proxies no cierren la conexión.
+    """
+    try:
+        yield formato_sse("estado", estado)
+        while True:
+            try:
+                evento = await asyncio.wait_for(
+                    suscripcion.cola.get(), timeout=settings.ALERTAS_STREAM_KEEPALIVE_SEGUNDOS
+                )
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+            yield evento
+    finally:
+        canal_alertas.cancelar(suscripcion)
@@ -7,16 +7,22 @@ utilizando mocks para aislar la lógica del servicio de las dependencias externa
 NO se evalúan: envío de emails, tareas cron, job scheduler.
 """
 
+import asyncio
+import threading
+
 import pytest
 from unittest.mock import Mock, MagicMock, patch
 from datetime import date, datetime
 from decimal import Decimal
 
 from modules.alertas.service import AlertasService
+from modules.alertas.incremental import CLAVE_PENDIENTES, _evaluar_al_confirmar
+from modules.alertas.stream import COLA_MAXIMA, CanalAlertas, formato_sse
 from modules.alertas.model import Notificacion, TipoAlerta, SemaforoEstado
 from modules.alertas.schemas import (
     SemaforoEstadoEnum, TipoAlertaEnum
 )
+from utils.rango_fechas import hoy_negocio
 
 
 # ==================== TEST CLASS ====================
@@ -307,7 +313,7 @@ class TestAlertasService:
             # Assert
             assert resultado.total_no_leidas == 6
             assert resultado.por_tipo == conteos
-            assert resultado.fecha == date.today()
+            assert resultado.fecha == hoy_negocio()
 
     # ==================== SEMÁFORO DE VENCIMIENTOS ====================
 
@@ -357,7 +363,7 @@ class TestAlertasService:
             assert resultado.total_amarillo == 5
             assert resultado.total_rojo == 2
             assert resultado.total_vencidos == 1
-            assert resultado.fecha_consulta == date.today()
+            assert resultado.fecha_consulta == hoy_negocio()
 
     def test_obtener_semaforo_sin_lotes(self, mock_empresa):
         """
@@ -432,6 +438,42 @@ class TestAlertasService:
             # Assert
             assert len(resultado) >= 0  # Items rojos
 
+    def test_obtener_semaforo_del_dia(self, mock_empresa):
+        """
+        Test: Semáforo y lista FEFO de una configuración, para la caché del router.
+        
+        Resultado esperado:
+        - Usa los umbrales recibidos, sin volver a leer la configuración
+        - El lote de 1 día queda en rojo y en la lista de hoy
+        """
+        config = {"dias_verde": 15, "dias_amarillo": 7, "dias_rojo": 3}
+        lote = {
+            "id_insumo": 1,
+            "codigo_insumo": "INS001",
+            "nombre_insumo": "Insumo Urgente",
+            "unidad_medida": "KG",
+            "cantidad_restante": Decimal("5.00"),
+            "fecha_vencimiento": date.today(),
+            "dias_restantes": 1,
+            "id_ingreso_detalle": 1,
+            "numero_ingreso": "ING001"
+        }
+        
+        with patch.object(self.service.repository, 'obtener_resumen_semaforo') as mock_resumen, \
+             patch.object(self.service.repository, 'obtener_lotes_por_vencer') as mock_lotes, \
+             patch.object(self.service.repository, 'obtener_lista_usar_hoy') as mock_lista:
+            mock_resumen.return_value = {"VERDE": 0, "AMARILLO": 0, "ROJO": 1, "VENCIDO": 0}
+            mock_lotes.return_value = [lote]
+            mock_lista.return_value = [{**lote, "prioridad": 1, "valor_estimado": Decimal("50.00")}]
+            
+            resultado = self.service.obtener_semaforo_del_dia(config)
+        
+        self.mock_db.query.assert_not_called()
+        mock_lotes.assert_called_once_with(dias_limite=7)
+        mock_lista.assert_called_once_with(dias_rojo=3)
+        assert [i.id_ingreso_detalle for i in resultado["semaforo"].items_rojo] == [1]
+        assert resultado["usar_hoy"].valor_estimado_en_riesgo == 50.0
+
     # ==================== STOCK CRÍTICO ====================
 
     def test_obtener_stock_critico(self):
@@ -474,7 +516,7 @@ class TestAlertasService:
             assert resultado.total_sin_stock == 1
             assert resultado.total_bajo_minimo == 1
             assert len(resultado.items) == 2
-            assert resultado.fecha_consulta == date.today()
+            assert resultado.fecha_consulta == hoy_negocio()
 
     def test_obtener_stock_critico_sin_items(self):
         """
@@ -538,7 +580,7 @@ class TestAlertasService:
             
             # Assert
             assert resultado.total_items == 1
-            assert resultado.fecha == date.today()
+            assert resultado.fecha == hoy_negocio()
             assert len(resultado.items) == 1
 
     def test_obtener_lista_usar_hoy_calcula_valor_total(self, mock_empresa):
@@ -618,3 +660,120 @@ class TestAlertasService:
             assert resultado.total_items == 0
             assert resultado.valor_estimado_en_riesgo == 0
             assert resultado.items == []
+
+
+# ==================== STREAM DE ALERTAS ====================
+
+class TestCanalAlertas:
+    """Tests para el pub/sub de cambios de alertas (modules/alertas/stream.py)."""
+
+    def test_publicar_desde_otro_hilo_llega_a_la_empresa(self):
+        """
+        Test: Dos conexiones de la empresa 1 y una de la 2; se publica desde otro hilo.
+        
+        Resultado esperado:
+        - Las dos conexiones de la empresa 1 reciben el mismo evento
+        - La de la empresa 2 no recibe nada
+        """
+        canal = CanalAlertas()
+        evento = formato_sse("alertas", {"resueltas": [7]})
+
+        async def escenario():
+            primera, segunda = canal.suscribir(1), canal.suscribir(1)
+            otra = canal.suscribir(2)
+            hilo = threading.Thread(target=canal.publicar, args=(1, evento))
+            hilo.start()
+            hilo.join()
+            recibidos = [await asyncio.wait_for(s.cola.get(), timeout=1) for s in (primera, segunda)]
+            return recibidos, otra.cola.qsize()
+
+        recibidos, pendientes_otra = asyncio.run(escenario())
+
+        assert recibidos == [evento, evento]
+        assert pendientes_otra == 0
+        assert evento.startswith("event: alertas\ndata: ") and evento.endswith("\n\n")
+
+    def test_diferencia_de_semaforo_y_estado_guardado(self):
+        """
+        Test: Dos actualizaciones del semáforo de una empresa con conexión abierta.
+        
+        Resultado esperado:
+        - La segunda retorna la diferencia con la primera
+        - Al cerrarse la última conexión se descarta el estado guardado
+        """
+        canal = CanalAlertas()
+
+        async def escenario():
+            suscripcion = canal.suscribir(1)
+            canal.actualizar_resumen({"total_no_leidas": 1, "por_tipo": {"VENCIDO": 1}})
+            canal.actualizar_semaforo(1, {"VERDE": 2, "AMARILLO": 0, "ROJO": 1, "VENCIDO": 0})
+            diferencia = canal.actualizar_semaforo(1, {"VERDE": 1, "AMARILLO": 1, "ROJO": 1, "VENCIDO": 0})
+            estado = canal.estado(1)
+            canal.cancelar(suscripcion)
+            return diferencia, estado
+
+        diferencia, estado = asyncio.run(escenario())
+
+        assert diferencia == {"VERDE": -1, "AMARILLO": 1, "ROJO": 0, "VENCIDO": 0}
+        assert estado["semaforo"]["AMARILLO"] == 1
+        assert canal.empresas() == []
+        assert canal.estado(1) is None
+
+    def test_conexion_lenta_pierde_los_eventos_mas_antiguos(self):
+        canal = CanalAlertas()
+
+        async def escenario():
+            suscripcion = canal.suscribir(1)
+            for n in range(COLA_MAXIMA + 5):
+                canal.publicar(1, f"evento {n}")
+            await asyncio.sleep(0)
+            return suscripcion.cola.qsize(), suscripcion.cola.get_nowait()
+
+        pendientes, primero = asyncio.run(escenario())
+
+        assert pendientes == COLA_MAXIMA
+        assert primero == "evento 5"
+
+    def test_sin_conexiones_no_consulta(self, mock_db_session):
+        """
+        Test: Marcar una notificación como leída sin dashboards conectados.
+        
+        Resultado esperado:
+        - No se ejecuta ninguna consulta extra después del commit
+        """
+        service = AlertasService(mock_db_session)
+        with patch.object(service.repository, 'marcar_como_leida', return_value=True):
+            service.marcar_notificacion_leida(id_notificacion=1)
+
+        mock_db_session.query.assert_not_called()
+        mock_db_session.execute.assert_not_called()
+
+
+# ==================== EVALUACIÓN INCREMENTAL ====================
+
+class TestAlertasIncrementales:
+    """Tests para el evento after_commit de modules/alertas/incremental.py."""
+
+    def test_commit_con_lotes_invalida_la_cache(self):
+        """
+        Test: Commit de una sesión con insumos marcados y la evaluación desactivada.
+        
+        Resultado esperado:
+        - Se invalidan los reportes de hoy (semáforo cacheado)
+        - No se reevalúan las alertas
+        """
+        sesion = Mock(info={CLAVE_PENDIENTES: {1, 2}})
+        with patch('modules.alertas.incremental.settings.ALERTAS_INCREMENTALES_ENABLED', False), \
+             patch('modules.alertas.incremental.invalidar_reportes') as mock_invalidar, \
+             patch('modules.alertas.incremental.evaluar_alertas_insumos') as mock_evaluar:
+            _evaluar_al_confirmar(sesion)
+        
+        mock_invalidar.assert_called_once_with()
+        mock_evaluar.assert_not_called()
+        assert sesion.info == {}
+
+    def test_commit_sin_lotes_no_hace_nada(self):
+        with patch('modules.alertas.incremental.invalidar_reportes') as mock_invalidar:
+            _evaluar_al_confirmar(Mock(info={}))
+        
+        mock_invalidar.assert_not_called()
@@ -16,7 +16,7 @@ from sqlalchemy.orm import Session
 from typing import Optional
 from loguru import logger
 
-from database import get_db
+from database import get_db, get_read_db
 from .service import BackupService
 from .schemas import (
     BackupManualRequest, EnviarBackupEmailRequest,
@@ -76,6 +76,7 @@ def ejecutar_backup_manual(
     request: BackupManualRequest,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
+    db_lectura: Session = Depends(get_read_db),
     usuario: str = Query(default="MANUAL", description="Usuario que ejecuta el backup")
 ):
     """
@@ -90,10 +91,11 @@ def ejecutar_backup_manual(
         resultado = backup_service.backup_completo(
             db, 
             ejecutado_por=usuario,
-            incluir_datos=request.incluir_datos
+            incluir_datos=request.incluir_datos,
+            db_lectura=db_lectura
         )
     else:
-        resultado = backup_service.backup_diferencial(db, ejecutado_por=usuario)
+        resultado = backup_service.backup_diferencial(db, ejecutado_por=usuario, db_lectura=db_lectura)
     
     if not resultado.exito:
         raise HTTPException(status_code=500, detail=resultado.mensaje)
@@ -234,20 +236,22 @@ def limpiar_backups_antiguos(
 @router.post("/ejecutar-completo", response_model=BackupResultado)
 def ejecutar_backup_completo(
     db: Session = Depends(get_db),
+    db_lectura: Session = Depends(get_read_db),
     usuario: str = Query(default="MANUAL", description="Usuario que ejecuta el backup")
 ):
     """
     Ejecuta un backup completo (atajo para /ejecutar con tipo COMPLETO).
     """
-    return backup_service.backup_completo(db, ejecutado_por=usuario)
+    return backup_service.backup_completo(db, ejecutado_por=usuario, db_lectura=db_lectura)
 
 
 @router.post("/ejecutar-diferencial", response_model=BackupResultado)
 def ejecutar_backup_diferencial(
     db: Session = Depends(get_db),
+    db_lectura: Session = Depends(get_read_db),
     usuario: str = Query(default="MANUAL", description="Usuario que ejecuta el backup")
 ):
     """
     Ejecuta un backup diferencial (atajo para /ejecutar con tipo DIFERENCIAL).
     """
-    return backup_service.backup_diferencial(db, ejecutado_por=usuario)
+    return backup_service.backup_diferencial(db, ejecutado_por=usuario, db_lectura=db_lectura)
@@ -8,6 +8,9 @@ está en un contenedor Docker separado).
 Estrategia:
 - Backup completo: Exporta estructura + todos los datos de todas las tablas
 - Backup diferencial: Exporta solo registros modificados desde el último backup completo
+
+Los datos se leen de `db_lectura` (la réplica de lectura, ver database.py)
+cuando se indica; el historial de backups se escribe siempre en la primaria.
 """
 
 import os
@@ -102,6 +105,10 @@ class BackupService:
             escaped = str(value).replace("'", "''")
             return f"'{escaped}'"
     
+    def _sin_statement_timeout(self, db: Session) -> None:
+        """Quita DB_STATEMENT_TIMEOUT_MS en la transacción actual: exportar una tabla grande puede tardar más."""
+        db.execute(text("SET LOCAL statement_timeout = 0"))
+    
     def _export_table_data(self, db: Session, table_name: str) -> Tuple[str, int]:
         """
         Exporta los datos de una tabla a formato SQL INSERT.
@@ -181,7 +188,8 @@ CREATE TABLE {table_name} (
         self,
         db: Session,
         ejecutado_por: str = "SCHEDULER",
-        incluir_datos: bool = True
+        incluir_datos: bool = True,
+        db_lectura: Optional[Session] = None
     ) -> BackupResultado:
         """
         Realiza un backup completo de la base de datos.
@@ -190,6 +198,7 @@ CREATE TABLE {table_name} (
             db: Sesión de base de datos
             ejecutado_por: Quién ejecuta el backup (SCHEDULER, MANUAL, usuario)
             incluir_datos: Si True, incluye datos; si False, solo estructura
+            db_lectura: Sesión de la que se leen los datos (réplica); por defecto `db`
             
         Returns:
             BackupResultado con información del backup
@@ -213,9 +222,12 @@ CREATE TABLE {table_name} (
         db.commit()
         db.refresh(backup_record)
         
+        lectura = db_lectura or db
+        
         try:
             tables = self._get_all_tables(db)
             total_registros = 0
+            self._sin_statement_timeout(lectura)
             
             # Generar contenido SQL
             sql_content = []
@@ -238,7 +250,7 @@ CREATE TABLE {table_name} (
                 
                 # Datos
                 if incluir_datos:
-                    data_sql, count = self._export_table_data(db, table)
+                    data_sql, count = self._export_table_data(lectura, table)
                     if data_sql:
                         sql_content.append(f"-- Datos de {table} ({count} registros)")
                         sql_content.append(data_sql)
@@ -301,7 +313,8 @@ CREATE TABLE {table_name} (
     def backup_diferencial(
         self,
         db: Session,
-        ejecutado_por: str = "SCHEDULER"
+        ejecutado_por: str = "SCHEDULER",
+        db_lectura: Optional[Session] = None
     ) -> BackupResultado:
         """
         Realiza un backup diferencial (solo cambios desde el último backup completo).
@@ -312,6 +325,7 @@ CREATE TABLE {table_name} (
         Args:
             db: Sesión de base de datos
             ejecutado_por: Quién ejecuta el backup
+            db_lectura: Sesión de la que se leen los datos (réplica); por defecto `db`
             
         Returns:
             BackupResultado con información del backup
@@ -325,7 +339,7 @@ CREATE TABLE {table_name} (
         
         if not ultimo_completo:
             logger.warning("⚠️ No hay backup completo previo, realizando backup completo")
-            return self.backup_completo(db, ejecutado_por)
+            return self.backup_completo(db, ejecutado_por, db_lectura=db_lectura)
         
         fecha_base = ultimo_completo.fecha_creacion
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -349,10 +363,13 @@ CREATE TABLE {table_name} (
         db.commit()
         db.refresh(backup_record)
         
+        lectura = db_lectura or db
+        
         try:
             tables = self._get_all_tables(db)
             total_registros = 0
             tablas_con_cambios = 0
+            self._sin_statement_timeout(lectura)
             
             # Campos de auditoría comunes
             audit_fields = ['fecha_creacion', 'fecha_actualizacion', 'created_at', 'updated_at', 'fecha_modificacion']
@@ -389,10 +406,10 @@ CREATE TABLE {table_name} (
                         query = text(
                             f"SELECT * FROM {table} WHERE {audit_col} >= :fecha_base"
                         )
-                        result = db.execute(query, {"fecha_base": fecha_base})
+                        result = lectura.execute(query, {"fecha_base": fecha_base})
                     else:
                         # Si no tiene campo de auditoría, exportar todo
-                        result = db.execute(text(f"SELECT * FROM {table}"))
+                        result = lectura.execute(text(f"SELECT * FROM {table}"))
                     
                     rows = result.fetchall()
                     result_columns = result.keys()
@@ -1,14 +1,18 @@
-from sqlalchemy import Column, BigInteger, String, Text, DECIMAL, TIMESTAMP, BOOLEAN, ForeignKey
+from sqlalchemy import Column, BigInteger, String, Text, DECIMAL, TIMESTAMP, BOOLEAN, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from modules.insumo.model import Insumo
 from modules.productos_terminados.model import ProductoTerminado
 from modules.Gestion_Usuarios.usuario.model import Usuario
 from modules.gestion_almacen_inusmos.ingresos_insumos.model import IngresoProductoDetalle
-import datetime
+from utils.rango_fechas import ahora_negocio
 
 class CalidadDesperdicioMerma(Base):
     __tablename__ = 'calidad_desperdicio_merma'
+    __table_args__ = (
+        # Reportes de merma por rango de fecha
+        Index('idx_merma_fecha_caso', 'fecha_caso'),
+    )
 
     id_merma = Column(BigInteger, primary_key=True, autoincrement=True)
     numero_registro = Column(String(50), unique=True, nullable=False)
@@ -17,7 +21,7 @@ class CalidadDesperdicioMerma(Base):
     cantidad = Column(DECIMAL(12, 4), nullable=False)
     costo_unitario = Column(DECIMAL(12, 4), default=0)
     costo_total = Column(DECIMAL(12, 2), default=0)
-    fecha_caso = Column(TIMESTAMP, nullable=False, default=datetime.datetime.now)
+    fecha_caso = Column(TIMESTAMP, nullable=False, default=ahora_negocio)
     id_insumo = Column(BigInteger, ForeignKey('insumo.id_insumo'))
     id_producto = Column(BigInteger, ForeignKey('productos_terminados.id_producto'))
     id_lote = Column(BigInteger, ForeignKey('ingresos_insumos_detalle.id_ingreso_detalle'))
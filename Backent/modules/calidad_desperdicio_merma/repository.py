@@ -3,8 +3,13 @@ from sqlalchemy.orm import Session
 from modules.calidad_desperdicio_merma.model import CalidadDesperdicioMerma
 from modules.calidad_desperdicio_merma.schemas import MermaCreate, MermaUpdate
 from modules.calidad_desperdicio_merma.repository_interface import MermaRepositoryInterface
+from modules.reportes.cache import invalidar_reportes
+from modules.resumen_diario.service import ResumenDiarioService
 
 class MermaRepository(MermaRepositoryInterface):
+    def __init__(self):
+        self.resumen_diario = ResumenDiarioService()
+
     def get_all(self, db: Session) -> List[CalidadDesperdicioMerma]:
         return db.query(CalidadDesperdicioMerma).filter(CalidadDesperdicioMerma.anulado == False).all()
 
@@ -14,17 +19,23 @@ class MermaRepository(MermaRepositoryInterface):
     def create(self, db: Session, merma: MermaCreate) -> CalidadDesperdicioMerma:
         db_merma = CalidadDesperdicioMerma(**merma.model_dump())
         db.add(db_merma)
+        # Una merma registrada con fecha pasada cambia el resumen de ese día
+        self.resumen_diario.actualizar_dias(db, [db_merma.fecha_caso.date()])
         db.commit()
+        invalidar_reportes(db_merma.fecha_caso.date())
         db.refresh(db_merma)
         return db_merma
 
     def update(self, db: Session, merma_id: int, merma: MermaUpdate) -> Optional[CalidadDesperdicioMerma]:
         db_merma = self.get_by_id(db, merma_id)
         if db_merma:
+            fecha_anterior = db_merma.fecha_caso
             update_data = merma.model_dump(exclude_unset=True)
             for key, value in update_data.items():
                 setattr(db_merma, key, value)
+            self.resumen_diario.actualizar_dias(db, [fecha_anterior.date(), db_merma.fecha_caso.date()])
             db.commit()
+            invalidar_reportes(fecha_anterior.date(), db_merma.fecha_caso.date())
             db.refresh(db_merma)
         return db_merma
 
@@ -32,7 +43,9 @@ class MermaRepository(MermaRepositoryInterface):
         db_merma = self.get_by_id(db, merma_id)
         if db_merma:
             db_merma.anulado = True
+            self.resumen_diario.actualizar_dias(db, [db_merma.fecha_caso.date()])
             db.commit()
+            invalidar_reportes(db_merma.fecha_caso.date())
             return True
         return False
 
@@ -1,9 +1,10 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from decimal import Decimal
 import datetime
 from enums.tipo_merma import TipoMermaEnum
 from enums.estado import EstadoEnum
+from utils.rango_fechas import ahora_negocio
 
 class MermaBase(BaseModel):
     numero_registro: str
@@ -12,7 +13,7 @@ class MermaBase(BaseModel):
     cantidad: Decimal
     costo_unitario: Optional[Decimal] = 0
     costo_total: Optional[Decimal] = 0
-    fecha_caso: datetime.datetime = datetime.datetime.now()
+    fecha_caso: datetime.datetime = Field(default_factory=ahora_negocio)
     id_insumo: Optional[int] = None
     id_producto: Optional[int] = None
     id_lote: Optional[int] = None
@@ -0,0 +1,216 @@
+"""
+Importación masiva de ingresos desde la guía del proveedor (CSV / XLSX).
+
+El archivo se lee fila por fila (sin cargarlo completo) y cada fila se valida
+contra el catálogo de insumos precargado en un dict por código. Las líneas
+válidas salen en lotes de TAMANO_LOTE_IMPORTACION hacia el INSERT multi-fila
+del repositorio; las inválidas quedan en el reporte de errores con su número
+de fila en el archivo (la fila 1 es el encabezado).
+
+Columnas reconocidas (el orden no importa, mayúsculas y espacios se ignoran):
+    codigo_insumo | codigo            obligatoria
+    cantidad | cantidad_ingresada     obligatoria, > 0
+    precio_unitario | precio          obligatoria, >= 0
+    fecha_vencimiento | vencimiento   opcional (YYYY-MM-DD o DD/MM/YYYY)
+    cantidad_ordenada                 opcional (por defecto, la de la orden de compra)
+"""
+
+import codecs
+import csv
+import datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from modules.gestion_almacen_inusmos.ingresos_insumos.schemas import ErrorLineaImportacion
+
+
+TAMANO_LOTE_IMPORTACION = 1000
+MAX_ERRORES_REPORTE = 500
+
+FORMATOS_IMPORTACION = ("csv", "xlsx")
+
+# encabezado del archivo -> campo de la línea
+ALIAS_COLUMNAS = {
+    "codigo_insumo": "codigo_insumo",
+    "codigo": "codigo_insumo",
+    "cantidad": "cantidad_ingresada",
+    "cantidad_ingresada": "cantidad_ingresada",
+    "precio_unitario": "precio_unitario",
+    "precio": "precio_unitario",
+    "fecha_vencimiento": "fecha_vencimiento",
+    "vencimiento": "fecha_vencimiento",
+    "cantidad_ordenada": "cantidad_ordenada",
+}
+COLUMNAS_OBLIGATORIAS = ("codigo_insumo", "cantidad_ingresada", "precio_unitario")
+
+Fila = Tuple[int, Dict[str, Any]]
+
+
+class ReporteErrores:
+    """Errores por línea; guarda los primeros MAX_ERRORES_REPORTE y cuenta el resto."""
+
+    def __init__(self):
+        self.errores: List[ErrorLineaImportacion] = []
+        self.total = 0
+
+    def agregar(self, linea: int, mensaje: str, codigo_insumo: Optional[str] = None):
+        self.total += 1
+        if len(self.errores) < MAX_ERRORES_REPORTE:
+            self.errores.append(ErrorLineaImportacion(linea=linea, codigo_insumo=codigo_insumo, mensaje=mensaje))
+
+    @property
+    def omitidos(self) -> int:
+        return self.total - len(self.errores)
+
+
+# ==================== LECTURA ====================
+
+def _mapear_encabezado(encabezado: Iterable[Any]) -> List[Optional[str]]:
+    """
+    Campo de línea de cada columna del encabezado (None si se ignora).
+
+    Raises:
+        ValueError: si falta una columna obligatoria.
+    """
+    campos = [
+        ALIAS_COLUMNAS.get(str(columna or "").strip().lower().replace(" ", "_"))
+        for columna in encabezado
+    ]
+    faltantes = [c for c in COLUMNAS_OBLIGATORIAS if c not in campos]
+    if faltantes:
+        raise ValueError(f"Faltan columnas obligatorias en el encabezado: {', '.join(faltantes)}")
+    return campos
+
+
+def _filas(tuplas: Iterator[Iterable[Any]]) -> Iterator[Fila]:
+    """(número de fila, {campo: valor}) de cada fila con datos después del encabezado."""
+    encabezado = next(tuplas, None)
+    if encabezado is None:
+        raise ValueError("El archivo está vacío")
+    campos = _mapear_encabezado(encabezado)
+
+    for numero, valores in enumerate(tuplas, start=2):
+        fila = {campo: valor for campo, valor in zip(campos, valores) if campo}
+        if any(v not in (None, "") for v in fila.values()):
+            yield numero, fila
+
+
+def leer_csv(archivo: IO[bytes]) -> Iterator[Fila]:
+    """Filas de un CSV (UTF-8, separado por coma o punto y coma), leídas de a una."""
+    texto = codecs.getreader("utf-8-sig")(archivo)
+    primera = texto.readline()
+    delimitador = ";" if primera.count(";") > primera.count(",") else ","
+
+    def lineas():
+        yield primera
+        yield from texto
+
+    return _filas(csv.reader(lineas(), delimiter=delimitador))
+
+
+def leer_xlsx(archivo: IO[bytes]) -> Iterator[Fila]:
+    """Filas de la primera hoja de un XLSX, en modo de solo lectura (por filas, sin cargar la hoja)."""
+    # Solo la importación de XLSX necesita openpyxl
+    from openpyxl import load_workbook
+
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        yield from _filas(libro.worksheets[0].iter_rows(values_only=True))
+    finally:
+        libro.close()
+
+
+def leer_filas(archivo: IO[bytes], formato: str) -> Iterator[Fila]:
+    return leer_xlsx(archivo) if formato == "xlsx" else leer_csv(archivo)
+
+
+# ==================== VALIDACIÓN ====================
+
+def _decimal(valor: Any) -> Decimal:
+    if isinstance(valor, (int, float, Decimal)):
+        return Decimal(str(valor))
+    texto = str(valor).strip()
+    if "," in texto and "." not in texto:
+        texto = texto.replace(",", ".")
+    return Decimal(texto)
+
+
+def _fecha(valor: Any) -> Optional[datetime.datetime]:
+    if valor in (None, ""):
+        return None
+    if isinstance(valor, datetime.datetime):
+        return valor
+    if isinstance(valor, datetime.date):
+        return datetime.datetime.combine(valor, datetime.time())
+    texto = str(valor).strip()
+    for formato in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.datetime.strptime(texto, formato)
+        except ValueError:
+            pass
+    raise ValueError(f"fecha_vencimiento inválida: '{texto}' (use YYYY-MM-DD o DD/MM/YYYY)")
+
+
+def validar_filas(
+    filas: Iterable[Fila],
+    insumos: Dict[str, int],
+    cantidades_orden: Dict[int, Decimal],
+    reporte: ReporteErrores
+) -> Iterator[Dict[str, Any]]:
+    """
+    Líneas de detalle listas para insertar; las filas inválidas se agregan al reporte.
+
+    Args:
+        insumos: código de insumo -> id_insumo (insumos no anulados).
+        cantidades_orden: id_insumo -> cantidad pedida en la orden de compra vinculada.
+    """
+    for numero, fila in filas:
+        codigo = str(fila.get("codigo_insumo") or "").strip()
+        if not codigo:
+            reporte.agregar(numero, "codigo_insumo vacío")
+            continue
+        id_insumo = insumos.get(codigo)
+        if id_insumo is None:
+            reporte.agregar(numero, f"Insumo '{codigo}' no existe o está anulado", codigo)
+            continue
+
+        try:
+            cantidad = _decimal(fila.get("cantidad_ingresada"))
+            precio = _decimal(fila.get("precio_unitario"))
+            ordenada = fila.get("cantidad_ordenada")
+            cantidad_ordenada = (
+                _decimal(ordenada) if ordenada not in (None, "")
+                else cantidades_orden.get(id_insumo, Decimal("0"))
+            )
+            fecha_vencimiento = _fecha(fila.get("fecha_vencimiento"))
+        except (InvalidOperation, ValueError) as e:
+            mensaje = str(e) if isinstance(e, ValueError) and str(e) else "Cantidad o precio no numérico"
+            reporte.agregar(numero, mensaje, codigo)
+            continue
+
+        if not cantidad.is_finite() or cantidad <= 0:
+            reporte.agregar(numero, "La cantidad debe ser mayor a 0", codigo)
+            continue
+        if not precio.is_finite() or precio < 0:
+            reporte.agregar(numero, "El precio unitario no puede ser negativo", codigo)
+            continue
+
+        yield {
+            "id_insumo": id_insumo,
+            "cantidad_ordenada": cantidad_ordenada,
+            "cantidad_ingresada": cantidad,
+            "precio_unitario": precio,
+            "subtotal": (cantidad * precio).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP),
+            "fecha_vencimiento": fecha_vencimiento,
+        }
+
+
+def en_lotes(lineas: Iterable[Dict[str, Any]], tamano: int = TAMANO_LOTE_IMPORTACION) -> Iterator[List[Dict[str, Any]]]:
+    lote = []
+    for linea in lineas:
+        lote.append(linea)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
@@ -1,21 +1,25 @@
-from sqlalchemy import Column, BigInteger, String, Text, DECIMAL, TIMESTAMP, BOOLEAN, ForeignKey
+from sqlalchemy import Column, BigInteger, String, Text, DECIMAL, TIMESTAMP, BOOLEAN, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from database import Base
 from modules.orden_de_compra.model import OrdenDeCompra
 from modules.Gestion_Usuarios.usuario.model import Usuario
 from modules.proveedores.model import Proveedor
 from modules.insumo.model import Insumo
-import datetime
+from utils.rango_fechas import ahora_negocio
 
 class IngresoProducto(Base):
     __tablename__ = 'ingresos_insumos'
+    __table_args__ = (
+        # Listado paginado por cursor (fecha_ingreso, id_ingreso)
+        Index('idx_ingresos_fecha_id', 'fecha_ingreso', 'id_ingreso'),
+    )
 
     id_ingreso = Column(BigInteger, primary_key=True, autoincrement=True)
     numero_ingreso = Column(String(50), unique=True, nullable=False)
     id_orden_compra = Column(BigInteger, ForeignKey('orden_de_compra.id_orden'), nullable=True)
     numero_documento = Column(String(50), nullable=False)
     tipo_documento = Column(String(20), nullable=False)
-    fecha_registro = Column(TIMESTAMP, nullable=False, default=datetime.datetime.now)
+    fecha_registro = Column(TIMESTAMP, nullable=False, default=ahora_negocio)
     fecha_ingreso = Column(TIMESTAMP, nullable=False)
     fecha_documento = Column(TIMESTAMP, nullable=False)
     id_user = Column(BigInteger, ForeignKey('usuario.id_user'), nullable=False)
@@ -32,6 +36,22 @@ class IngresoProducto(Base):
 
 class IngresoProductoDetalle(Base):
     __tablename__ = 'ingresos_insumos_detalle'
+    __table_args__ = (
+        # Lotes con stock en orden FEFO por insumo (producción, validación de stock)
+        Index(
+            'idx_iid_fefo_con_stock',
+            'id_insumo', 'fecha_vencimiento', 'id_ingreso_detalle',
+            postgresql_include=['cantidad_restante', 'id_ingreso'],
+            postgresql_where=text('cantidad_restante > 0')
+        ),
+        # Lotes con stock por fecha de vencimiento (alertas y semáforo)
+        Index(
+            'idx_iid_vencimiento_con_stock',
+            'fecha_vencimiento',
+            postgresql_where=text('cantidad_restante > 0 AND fecha_vencimiento IS NOT NULL')
+        ),
+        Index('idx_iid_ingreso', 'id_ingreso'),
+    )
 
     id_ingreso_detalle = Column(BigInteger, primary_key=True, autoincrement=True)
     id_ingreso = Column(BigInteger, ForeignKey('ingresos_insumos.id_ingreso'), nullable=False)
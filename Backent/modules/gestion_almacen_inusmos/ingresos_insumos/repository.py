@@ -1,86 +1,147 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import desc, asc, text, func
 from decimal import Decimal
-import datetime
+from datetime import date
 from modules.gestion_almacen_inusmos.ingresos_insumos.model import IngresoProducto, IngresoProductoDetalle
-from modules.gestion_almacen_inusmos.ingresos_insumos.schemas import IngresoProductoCreate, IngresoProductoUpdate
+from modules.gestion_almacen_inusmos.ingresos_insumos.schemas import IngresoProductoCreate, IngresoProductoUpdate, IngresoImportacionCabecera
 from modules.gestion_almacen_inusmos.ingresos_insumos.repository_interface import IngresoProductoRepositoryInterface
 from modules.gestion_almacen_inusmos.movimiento_insumos.model import MovimientoInsumo
-from modules.orden_de_compra.model import OrdenDeCompra
+from modules.orden_de_compra.model import OrdenDeCompra, OrdenDeCompraDetalle
+from modules.insumo.model import Insumo
 from enums.tipo_movimiento import TipoMovimientoEnum
 from enums.estado import EstadoEnum
+from enums.serie_documento import SerieDocumentoEnum
+from modules.numeracion.service import NumeracionService
+from modules.gestion_almacen_inusmos.insumo_stock.service import InsumoStockService
+from modules.reportes.cache import invalidar_reportes
+from modules.resumen_diario.service import ResumenDiarioService
+from utils.paginacion import Cursor, paginar
+from utils.rango_fechas import ahora_negocio
+from utils.sql_bulk import construir_values
 
 class IngresoProductoRepository(IngresoProductoRepositoryInterface):
+    def __init__(self):
+        self.numeracion = NumeracionService()
+        self.insumo_stock = InsumoStockService()
+        self.resumen_diario = ResumenDiarioService()
+
     def get_all(self, db: Session) -> List[IngresoProducto]:
-        ingresos = db.query(IngresoProducto).filter(IngresoProducto.anulado == False).all()
-        # Forzar carga de detalles
-        for ingreso in ingresos:
-            _ = ingreso.detalles
-        return ingresos
+        # Los detalles de todos los ingresos se cargan en una sola consulta (IN de ids)
+        return db.query(IngresoProducto).options(
+            selectinload(IngresoProducto.detalles)
+        ).filter(IngresoProducto.anulado == False).all()
+
+    def get_pagina(self, db: Session, cursor: Optional[Cursor], limit: int, con_total: bool = False) -> Dict[str, Any]:
+        # Más recientes primero; los detalles de la página se cargan en una sola consulta
+        query = db.query(IngresoProducto).options(
+            selectinload(IngresoProducto.detalles)
+        ).filter(IngresoProducto.anulado == False)
+        return paginar(
+            db, query, IngresoProducto.fecha_ingreso, IngresoProducto.id_ingreso,
+            cursor, limit, con_total
+        )
 
     def get_by_id(self, db: Session, ingreso_id: int) -> Optional[IngresoProducto]:
-        ingreso = db.query(IngresoProducto).filter(IngresoProducto.id_ingreso == ingreso_id, IngresoProducto.anulado == False).first()
-        if ingreso:
-            # Forzar carga de detalles
-            _ = ingreso.detalles
-        return ingreso
+        return db.query(IngresoProducto).options(
+            selectinload(IngresoProducto.detalles)
+        ).filter(IngresoProducto.id_ingreso == ingreso_id, IngresoProducto.anulado == False).first()
 
-    def _generar_numero_movimiento(self, db: Session) -> str:
-        """
-        Genera un número de movimiento único con formato: MOV-YYYYMM-XXXXX
-        Ejemplo: MOV-202511-00001
-        """
-        fecha_actual = datetime.datetime.now()
-        prefijo = f"MOV-{fecha_actual.strftime('%Y%m')}-"
-        
-        # Obtener el último número de movimiento del mes actual
-        ultimo_movimiento = db.query(MovimientoInsumo).filter(
-            MovimientoInsumo.numero_movimiento.like(f"{prefijo}%")
-        ).order_by(desc(MovimientoInsumo.numero_movimiento)).first()
-        
-        if ultimo_movimiento:
-            # Extraer el número secuencial y aumentar en 1
-            ultimo_numero = int(ultimo_movimiento.numero_movimiento.split('-')[-1])
-            nuevo_numero = ultimo_numero + 1
-        else:
-            nuevo_numero = 1
-        
-        return f"{prefijo}{nuevo_numero:05d}"
+    def _lotes_con_entrada(self, db: Session, ids_lote: List[int]) -> set:
+        """Lotes (id_ingreso_detalle) que ya tienen su movimiento de ENTRADA, en una consulta."""
+        if not ids_lote:
+            return set()
+        filas = db.query(MovimientoInsumo.id_lote).filter(
+            MovimientoInsumo.id_lote.in_(ids_lote),
+            MovimientoInsumo.tipo_movimiento == TipoMovimientoEnum.ENTRADA.value,
+            MovimientoInsumo.anulado == False
+        ).all()
+        return {fila.id_lote for fila in filas}
 
-    def _crear_movimientos_entrada(self, db: Session, db_ingreso: IngresoProducto, detalles: List[IngresoProductoDetalle]):
+    def _crear_movimientos_entrada(self, db: Session, db_ingreso: IngresoProducto, detalles: List[IngresoProductoDetalle]) -> int:
         """
         Crea movimientos de ENTRADA para los detalles del ingreso.
         Solo se llama cuando el ingreso pasa a estado COMPLETADO.
+
+        Un ingreso de N líneas usa una consulta para descartar los lotes que ya
+        tienen entrada (evitar duplicados), un bloque de N números y un único
+        INSERT multi-fila. Retorna la cantidad de movimientos creados.
         """
-        for db_detalle in detalles:
-            # Verificar si ya existe un movimiento para este detalle (evitar duplicados)
-            movimiento_existente = db.query(MovimientoInsumo).filter(
-                MovimientoInsumo.id_lote == db_detalle.id_ingreso_detalle,
-                MovimientoInsumo.tipo_movimiento == TipoMovimientoEnum.ENTRADA.value,
-                MovimientoInsumo.anulado == False
-            ).first()
-            
-            if not movimiento_existente:
-                numero_movimiento = self._generar_numero_movimiento(db)
-                
-                movimiento = MovimientoInsumo(
-                    numero_movimiento=numero_movimiento,
-                    id_insumo=db_detalle.id_insumo,
-                    id_lote=db_detalle.id_ingreso_detalle,
-                    tipo_movimiento=TipoMovimientoEnum.ENTRADA.value,
-                    motivo="COMPRA",
-                    cantidad=db_detalle.cantidad_ingresada,
-                    stock_anterior_lote=Decimal('0'),  # Lote nuevo, stock anterior es 0
-                    stock_nuevo_lote=db_detalle.cantidad_restante,
-                    fecha_movimiento=datetime.datetime.now(),
-                    id_user=db_ingreso.id_user,
-                    id_documento_origen=db_ingreso.id_ingreso,
-                    tipo_documento_origen="INGRESO",
-                    observaciones=f"Entrada automática por ingreso {db_ingreso.numero_ingreso}",
-                    anulado=False
-                )
-                db.add(movimiento)
+        existentes = self._lotes_con_entrada(db, [d.id_ingreso_detalle for d in detalles])
+        nuevos = [d for d in detalles if d.id_ingreso_detalle not in existentes]
+        if not nuevos:
+            return 0
+
+        numeros = self.numeracion.reservar_numeros(db, SerieDocumentoEnum.MOVIMIENTO_INSUMO, len(nuevos))
+
+        filas = [
+            {
+                "numero_movimiento": numero,
+                "id_insumo": db_detalle.id_insumo,
+                "id_lote": db_detalle.id_ingreso_detalle,
+                "cantidad": float(db_detalle.cantidad_ingresada),
+                "stock_nuevo": float(db_detalle.cantidad_restante)
+            }
+            for numero, db_detalle in zip(numeros, nuevos)
+        ]
+        values_sql, params = construir_values(
+            filas,
+            ["numero_movimiento", "id_insumo", "id_lote", "cantidad", "stock_nuevo"],
+            casts={
+                "id_insumo": "BIGINT",
+                "id_lote": "BIGINT",
+                "cantidad": "NUMERIC",
+                "stock_nuevo": "NUMERIC"
+            }
+        )
+
+        # Lote nuevo: el stock anterior del lote es 0
+        query = text(f"""
+            INSERT INTO movimiento_insumos (
+                numero_movimiento,
+                id_insumo,
+                id_lote,
+                tipo_movimiento,
+                motivo,
+                cantidad,
+                stock_anterior_lote,
+                stock_nuevo_lote,
+                fecha_movimiento,
+                id_user,
+                id_documento_origen,
+                tipo_documento_origen,
+                observaciones,
+                anulado
+            )
+            SELECT
+                v.numero_movimiento,
+                v.id_insumo,
+                v.id_lote,
+                :tipo_movimiento,
+                'COMPRA',
+                v.cantidad,
+                0,
+                v.stock_nuevo,
+                :fecha_movimiento,
+                :id_user,
+                :id_documento_origen,
+                'INGRESO',
+                :observaciones,
+                false
+            FROM (VALUES {values_sql})
+                AS v(numero_movimiento, id_insumo, id_lote, cantidad, stock_nuevo)
+        """)
+
+        params.update({
+            "tipo_movimiento": TipoMovimientoEnum.ENTRADA.value,
+            "fecha_movimiento": ahora_negocio(),
+            "id_user": db_ingreso.id_user,
+            "id_documento_origen": db_ingreso.id_ingreso,
+            "observaciones": f"Entrada automática por ingreso {db_ingreso.numero_ingreso}"
+        })
+        db.execute(query, params)
+
+        return len(nuevos)
 
     def _actualizar_estado_orden_compra(self, db: Session, db_ingreso: IngresoProducto):
         """
@@ -120,10 +181,11 @@ class IngresoProductoRepository(IngresoProductoRepositoryInterface):
             else:
                 detalle_dict['cantidad_restante'] = Decimal('0')
             
-            db_detalle = IngresoProductoDetalle(**detalle_dict, id_ingreso=db_ingreso.id_ingreso)
-            db.add(db_detalle)
-            db.flush()  # Obtener id_ingreso_detalle para el movimiento
-            detalles_creados.append(db_detalle)
+            detalles_creados.append(IngresoProductoDetalle(**detalle_dict, id_ingreso=db_ingreso.id_ingreso))
+
+        # Un solo flush: los detalles se insertan en lote y devuelven sus ids para los movimientos
+        db.add_all(detalles_creados)
+        db.flush()
 
         # Crear movimientos de ENTRADA solo si está COMPLETADO
         if es_completado:
@@ -131,11 +193,11 @@ class IngresoProductoRepository(IngresoProductoRepositoryInterface):
             # Actualizar estado de la orden de compra asociada
             self._actualizar_estado_orden_compra(db, db_ingreso)
 
+        # Actualizar resumen de stock de los insumos ingresados
+        self.insumo_stock.refrescar(db, [d.id_insumo for d in detalles_creados])
+
         db.commit()
-        db.refresh(db_ingreso)
-        # Forzar carga de detalles
-        _ = db_ingreso.detalles
-        return db_ingreso
+        return self.get_by_id(db, db_ingreso.id_ingreso)
 
     def update(self, db: Session, ingreso_id: int, ingreso: IngresoProductoUpdate) -> Optional[IngresoProducto]:
         db_ingreso = self.get_by_id(db, ingreso_id)
@@ -144,6 +206,9 @@ class IngresoProductoRepository(IngresoProductoRepositoryInterface):
             
             # Guardar estado anterior para detectar cambio PENDIENTE -> COMPLETADO
             estado_anterior = str(db_ingreso.estado).upper()
+            
+            # Insumos cuyos lotes pueden cambiar (antes de modificar los detalles)
+            ids_insumo_afectados = {d.id_insumo for d in db_ingreso.detalles}
 
             for key, value in update_data.items():
                 if key != "detalles":
@@ -194,19 +259,23 @@ class IngresoProductoRepository(IngresoProductoRepositoryInterface):
                         
                         nuevo_detalle = IngresoProductoDetalle(**detalle_dict, id_ingreso=ingreso_id)
                         db.add(nuevo_detalle)
-                        db.flush()  # Obtener id para el movimiento
                         detalles_actualizados.append(nuevo_detalle)
                 
+                # Obtener en lote los ids de los detalles nuevos para los movimientos
+                db.flush()
+                
                 # Eliminar detalles que ya no están en la lista (solo si no tienen referencias)
-                for id_existente, detalle_existente in detalles_existentes.items():
-                    if id_existente not in detalles_enviados_ids:
-                        # Verificar si tiene movimientos asociados
-                        tiene_movimientos = db.query(MovimientoInsumo).filter(
-                            MovimientoInsumo.id_lote == id_existente
-                        ).first() is not None
-                        
-                        if not tiene_movimientos:
-                            db.delete(detalle_existente)
+                ids_quitados = [i for i in detalles_existentes if i not in detalles_enviados_ids]
+                if ids_quitados:
+                    # Lotes con movimientos asociados, en una sola consulta
+                    con_movimientos = {
+                        fila.id_lote for fila in db.query(MovimientoInsumo.id_lote).filter(
+                            MovimientoInsumo.id_lote.in_(ids_quitados)
+                        ).distinct()
+                    }
+                    for id_existente in ids_quitados:
+                        if id_existente not in con_movimientos:
+                            db.delete(detalles_existentes[id_existente])
                         # Si tiene movimientos, no se puede eliminar - mantener el detalle
 
                 # Si cambió a COMPLETADO, crear movimientos de entrada
@@ -224,20 +293,152 @@ class IngresoProductoRepository(IngresoProductoRepositoryInterface):
                 # Actualizar estado de la orden de compra asociada
                 self._actualizar_estado_orden_compra(db, db_ingreso)
 
+            # Actualizar resumen de stock de los insumos antiguos y nuevos del ingreso
+            db.flush()
+            ids_insumo_afectados.update(d.id_insumo for d in db_ingreso.detalles)
+            self.insumo_stock.refrescar(db, ids_insumo_afectados)
+
             db.commit()
-            db.refresh(db_ingreso)
-            # Forzar carga de detalles
-            _ = db_ingreso.detalles
+            db_ingreso = self.get_by_id(db, ingreso_id)
         return db_ingreso
 
     def delete(self, db: Session, ingreso_id: int) -> bool:
         db_ingreso = self.get_by_id(db, ingreso_id)
         if db_ingreso:
             db_ingreso.anulado = True
+            # Sus movimientos de entrada se anulan con él; si son de días cerrados, cambia su resumen
+            fechas = self._anular_movimientos_entrada(db, ingreso_id)
+            # Los lotes de un ingreso anulado dejan de contar en el stock
+            self.insumo_stock.refrescar(db, [d.id_insumo for d in db_ingreso.detalles])
+            self.resumen_diario.actualizar_dias(db, fechas)
             db.commit()
+            invalidar_reportes(*fechas)
             return True
         return False
 
+    def _anular_movimientos_entrada(self, db: Session, ingreso_id: int) -> List[date]:
+        """Anula los movimientos de ENTRADA del ingreso y retorna los días en que se registraron."""
+        query = text("""
+            UPDATE movimiento_insumos
+            SET anulado = true
+            WHERE id_documento_origen = :id_ingreso
+              AND tipo_documento_origen = 'INGRESO'
+              AND anulado = false
+            RETURNING fecha_movimiento
+        """)
+
+        result = db.execute(query, {"id_ingreso": ingreso_id})
+        return sorted({row.fecha_movimiento.date() for row in result.fetchall()})
+
+    # ==================== IMPORTACIÓN MASIVA ====================
+
+    def get_insumos_por_codigo(self, db: Session) -> Dict[str, int]:
+        """Catálogo código -> id_insumo de los insumos no anulados, en una consulta."""
+        filas = db.query(Insumo.codigo, Insumo.id_insumo).filter(Insumo.anulado == False).all()
+        return {fila.codigo: fila.id_insumo for fila in filas}
+
+    def get_cantidades_orden(self, db: Session, id_orden: int) -> Optional[Dict[int, Decimal]]:
+        """
+        Cantidad pedida por insumo en la orden de compra.
+        Retorna None si la orden no existe o está anulada.
+        """
+        orden = db.query(OrdenDeCompra.id_orden).filter(
+            OrdenDeCompra.id_orden == id_orden,
+            OrdenDeCompra.anulado == False
+        ).first()
+        if not orden:
+            return None
+
+        filas = db.query(
+            OrdenDeCompraDetalle.id_insumo,
+            func.sum(OrdenDeCompraDetalle.cantidad).label("cantidad")
+        ).filter(
+            OrdenDeCompraDetalle.id_orden == id_orden
+        ).group_by(OrdenDeCompraDetalle.id_insumo).all()
+        return {fila.id_insumo: fila.cantidad for fila in filas}
+
+    def _insertar_detalles_lote(self, db: Session, id_ingreso: int, lineas: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Inserta un lote de detalles (ingreso COMPLETADO: cantidad_restante = cantidad_ingresada)
+        con un único INSERT multi-fila. Retorna las filas insertadas (id, insumo, cantidades).
+        """
+        values_sql, params = construir_values(
+            lineas,
+            ["id_insumo", "cantidad_ordenada", "cantidad_ingresada", "precio_unitario", "subtotal", "fecha_vencimiento"],
+            casts={
+                "id_insumo": "BIGINT",
+                "cantidad_ordenada": "NUMERIC",
+                "cantidad_ingresada": "NUMERIC",
+                "precio_unitario": "NUMERIC",
+                "subtotal": "NUMERIC",
+                "fecha_vencimiento": "TIMESTAMP"
+            }
+        )
+        query = text(f"""
+            INSERT INTO ingresos_insumos_detalle (
+                id_ingreso,
+                id_insumo,
+                cantidad_ordenada,
+                cantidad_ingresada,
+                precio_unitario,
+                subtotal,
+                fecha_vencimiento,
+                cantidad_restante
+            )
+            SELECT
+                :id_ingreso,
+                v.id_insumo,
+                v.cantidad_ordenada,
+                v.cantidad_ingresada,
+                v.precio_unitario,
+                v.subtotal,
+                v.fecha_vencimiento,
+                v.cantidad_ingresada
+            FROM (VALUES {values_sql})
+                AS v(id_insumo, cantidad_ordenada, cantidad_ingresada, precio_unitario, subtotal, fecha_vencimiento)
+            RETURNING id_ingreso_detalle, id_insumo, cantidad_ingresada, cantidad_restante
+        """)
+        params["id_ingreso"] = id_ingreso
+        return db.execute(query, params).fetchall()
+
+    def importar(
+        self,
+        db: Session,
+        cabecera: IngresoImportacionCabecera,
+        lotes: Iterable[List[Dict[str, Any]]]
+    ) -> Tuple[IngresoProducto, int]:
+        """
+        Crea un ingreso COMPLETADO con las líneas del archivo importado.
+
+        Por cada lote de líneas: un INSERT de detalles y los movimientos de
+        ENTRADA en bloque. Al final actualiza el monto total, el resumen de
+        stock y la orden de compra vinculada.
+
+        IMPORTANTE: no hace commit; el servicio confirma o descarta según el
+        reporte de errores. Retorna (ingreso, cantidad de líneas importadas).
+        """
+        datos = cabecera.model_dump()
+        datos["fecha_ingreso"] = datos["fecha_ingreso"] or ahora_negocio()
+        db_ingreso = IngresoProducto(**datos, estado=EstadoEnum.COMPLETADO.value, monto_total=0, anulado=False)
+        db.add(db_ingreso)
+        db.flush()
+
+        importadas = 0
+        monto_total = Decimal("0")
+        ids_insumo = set()
+        for lote in lotes:
+            detalles = self._insertar_detalles_lote(db, db_ingreso.id_ingreso, lote)
+            self._crear_movimientos_entrada(db, db_ingreso, detalles)
+            importadas += len(detalles)
+            monto_total += sum((linea["subtotal"] for linea in lote), Decimal("0"))
+            ids_insumo.update(linea["id_insumo"] for linea in lote)
+
+        db_ingreso.monto_total = monto_total
+        self.insumo_stock.refrescar(db, ids_insumo)
+        self._actualizar_estado_orden_compra(db, db_ingreso)
+        db.flush()
+        return db_ingreso, importadas
+
     def get_lotes_fefo(self, db: Session, id_insumo: int) -> List[IngresoProductoDetalle]:
         """Obtiene todos los lotes (ingresos_detalle) de un insumo ordenados por FEFO
         Ordenamiento: cantidad_restante DESC (disponibilidad), fecha_vencimiento ASC (FEFO)
@@ -1,14 +1,19 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from modules.gestion_almacen_inusmos.ingresos_insumos.model import IngresoProducto
-from modules.gestion_almacen_inusmos.ingresos_insumos.schemas import IngresoProductoCreate, IngresoProductoUpdate
+from modules.gestion_almacen_inusmos.ingresos_insumos.schemas import IngresoProductoCreate, IngresoProductoUpdate, IngresoImportacionCabecera
+from utils.paginacion import Cursor
 
 class IngresoProductoRepositoryInterface(ABC):
     @abstractmethod
     def get_all(self, db: Session) -> List[IngresoProducto]:
         pass
 
+    @abstractmethod
+    def get_pagina(self, db: Session, cursor: Optional[Cursor], limit: int, con_total: bool = False) -> Dict[str, Any]:
+        pass
+
     @abstractmethod
     def get_by_id(self, db: Session, ingreso_id: int) -> Optional[IngresoProducto]:
         pass
@@ -39,3 +44,17 @@ class IngresoProductoRepositoryInterface(ABC):
         Usa raw SQL para facilitar modificaciones futuras."""
         pass
 
+    @abstractmethod
+    def get_insumos_por_codigo(self, db: Session) -> Dict[str, int]:
+        """Catálogo código -> id_insumo de los insumos no anulados"""
+        pass
+
+    @abstractmethod
+    def get_cantidades_orden(self, db: Session, id_orden: int) -> Optional[Dict[int, Any]]:
+        """Cantidad pedida por insumo en la orden de compra (None si no existe o está anulada)"""
+        pass
+
+    @abstractmethod
+    def importar(self, db: Session, cabecera: IngresoImportacionCabecera, lotes: Iterable[List[Dict[str, Any]]]) -> Tuple[IngresoProducto, int]:
+        """Crea un ingreso COMPLETADO con las líneas importadas, en lotes. No hace commit."""
+        pass
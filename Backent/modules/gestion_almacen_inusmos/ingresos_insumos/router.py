@@ -1,23 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException
+import tempfile
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from database import get_db
 from modules.gestion_almacen_inusmos.ingresos_insumos.schemas import (
     IngresoProducto, IngresoProductoCreate, IngresoProductoUpdate, 
-    InsumoLotesFefoResponse, InsumoLotesConTotalResponse
+    InsumoLotesFefoResponse, InsumoLotesConTotalResponse,
+    IngresoImportacionCabecera, ResultadoImportacionIngreso
 )
 from modules.gestion_almacen_inusmos.ingresos_insumos.service import IngresoProductoService
+from utils.paginacion import LIMITE_DEFECTO, LIMITE_MAXIMO, PaginaKeyset
 from utils.standard_responses import api_response_ok, api_response_not_found, api_response_bad_request
 
 router = APIRouter()
 
 service = IngresoProductoService()
 
+# El archivo subido se guarda en memoria hasta este tamaño y luego en disco
+TAMANO_MEMORIA_IMPORTACION = 8 * 1024 * 1024
+
 @router.get("/", response_model=List[IngresoProducto])
 def get_all_ingresos_productos(db: Session = Depends(get_db)):
     ingresos = service.get_all(db)
     return api_response_ok(ingresos)
 
+@router.get("/pagina", response_model=PaginaKeyset[IngresoProducto])
+def get_pagina_ingresos_productos(
+    after: Optional[str] = Query(None, description="Cursor '<fecha ISO>,<id>' (campo `siguiente` de la página anterior)"),
+    limit: int = Query(LIMITE_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+    con_total: bool = Query(False, description="Incluir total aproximado (estimación del planificador)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Ingresos paginados por cursor, del más reciente (fecha_ingreso) al más antiguo,
+    con sus detalles.
+    """
+    try:
+        pagina = service.get_pagina(db, after, limit, con_total)
+        return api_response_ok(pagina)
+    except HTTPException as e:
+        return api_response_bad_request(str(e.detail))
+
+@router.post("/importar", response_model=ResultadoImportacionIngreso)
+async def importar_ingreso_producto(
+    request: Request,
+    formato: str = Query("csv", description="Formato del archivo: csv o xlsx"),
+    parcial: bool = Query(False, description="Importar las líneas válidas aunque otras tengan errores"),
+    cabecera: IngresoImportacionCabecera = Depends(),
+    db: Session = Depends(get_db)
+):
+    """
+    Importa un ingreso COMPLETADO desde la guía del proveedor.
+
+    El archivo va como cuerpo de la petición (CSV UTF-8 o XLSX); los datos
+    del ingreso como parámetros. Columnas: codigo_insumo, cantidad,
+    precio_unitario y, opcionales, fecha_vencimiento y cantidad_ordenada.
+
+    Retorna el reporte de errores por línea. Sin `parcial`, un archivo con
+    errores no importa nada.
+    """
+    archivo = tempfile.SpooledTemporaryFile(max_size=TAMANO_MEMORIA_IMPORTACION)
+    try:
+        async for bloque in request.stream():
+            archivo.write(bloque)
+        archivo.seek(0)
+        resultado = await run_in_threadpool(service.importar, db, archivo, formato, cabecera, parcial)
+        return api_response_ok(resultado)
+    except HTTPException as e:
+        if e.status_code == 404:
+            return api_response_not_found(str(e.detail))
+        return api_response_bad_request(str(e.detail))
+    except Exception as e:
+        return api_response_bad_request(str(e))
+    finally:
+        archivo.close()
+
 @router.get("/{ingreso_id}", response_model=IngresoProducto)
 def get_ingreso_producto_by_id(ingreso_id: int, db: Session = Depends(get_db)):
     try:
@@ -1,9 +1,10 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from decimal import Decimal
 import datetime
 from enums.estado import EstadoEnum
 from enums.tipo_documento import TipoDocumentoEnum
+from utils.rango_fechas import ahora_negocio
 
 # Detalle del ingreso de producto
 class IngresoProductoDetalleBase(BaseModel):
@@ -35,7 +36,7 @@ class IngresoProductoBase(BaseModel):
     id_orden_compra: Optional[int] = None
     numero_documento: str
     tipo_documento: TipoDocumentoEnum
-    fecha_registro: datetime.datetime = datetime.datetime.now()
+    fecha_registro: datetime.datetime = Field(default_factory=ahora_negocio)
     fecha_ingreso: datetime.datetime
     fecha_documento: datetime.datetime
     id_user: int
@@ -122,3 +123,36 @@ class InsumoLotesConTotalResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+# Schemas para importación masiva (CSV / XLSX del proveedor)
+class IngresoImportacionCabecera(BaseModel):
+    """Datos del ingreso; las líneas vienen en el archivo importado"""
+    numero_ingreso: str
+    id_orden_compra: Optional[int] = None
+    numero_documento: str
+    tipo_documento: TipoDocumentoEnum
+    fecha_ingreso: Optional[datetime.datetime] = None  # por defecto, ahora
+    fecha_documento: datetime.datetime
+    id_user: int
+    id_proveedor: int
+    observaciones: Optional[str] = None
+
+
+class ErrorLineaImportacion(BaseModel):
+    """Error de una línea del archivo (linea = número de fila; la 1 es el encabezado)"""
+    linea: int
+    codigo_insumo: Optional[str] = None
+    mensaje: str
+
+
+class ResultadoImportacionIngreso(BaseModel):
+    """Resultado de la importación con el reporte de errores por línea"""
+    importado: bool
+    id_ingreso: Optional[int] = None
+    numero_ingreso: str
+    lineas_importadas: int
+    lineas_con_error: int
+    monto_total: Decimal
+    errores: List[ErrorLineaImportacion] = []
+    errores_omitidos: int = 0  # errores más allá del límite del reporte
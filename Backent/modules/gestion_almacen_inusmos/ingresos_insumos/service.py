@@ -1,15 +1,20 @@
-from typing import List
+from typing import IO, List, Optional
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from decimal import Decimal
 from modules.gestion_almacen_inusmos.ingresos_insumos.schemas import (
     IngresoProducto, IngresoProductoCreate, IngresoProductoUpdate, 
     InsumoLotesFefoResponse, IngresoDetalleFefoResponse,
-    InsumoLotesConTotalResponse, LoteConProveedorResponse
+    InsumoLotesConTotalResponse, LoteConProveedorResponse,
+    IngresoImportacionCabecera, ResultadoImportacionIngreso
+)
+from modules.gestion_almacen_inusmos.ingresos_insumos.importacion import (
+    FORMATOS_IMPORTACION, ReporteErrores, en_lotes, leer_filas, validar_filas
 )
 from modules.gestion_almacen_inusmos.ingresos_insumos.repository import IngresoProductoRepository
 from modules.gestion_almacen_inusmos.ingresos_insumos.service_interface import IngresoProductoServiceInterface
 from modules.insumo.model import Insumo
+from utils.paginacion import PaginaKeyset, leer_cursor
 
 class IngresoProductoService(IngresoProductoServiceInterface):
     def __init__(self):
@@ -18,6 +23,10 @@ class IngresoProductoService(IngresoProductoServiceInterface):
     def get_all(self, db: Session) -> List[IngresoProducto]:
         return self.repository.get_all(db)
 
+    def get_pagina(self, db: Session, after: Optional[str], limit: int, con_total: bool = False) -> PaginaKeyset[IngresoProducto]:
+        pagina = self.repository.get_pagina(db, leer_cursor(after), limit, con_total)
+        return PaginaKeyset[IngresoProducto].model_validate(pagina, from_attributes=True)
+
     def get_by_id(self, db: Session, ingreso_id: int) -> IngresoProducto:
         ingreso = self.repository.get_by_id(db, ingreso_id)
         if not ingreso:
@@ -116,3 +125,66 @@ class IngresoProductoService(IngresoProductoServiceInterface):
             lotes=lotes_response
         )
 
+    def importar(
+        self,
+        db: Session,
+        archivo: IO[bytes],
+        formato: str,
+        cabecera: IngresoImportacionCabecera,
+        parcial: bool = False
+    ) -> ResultadoImportacionIngreso:
+        """
+        Importa un ingreso COMPLETADO desde la guía del proveedor (CSV/XLSX).
+
+        Las líneas se validan contra el catálogo de insumos y se insertan en
+        lotes mientras se lee el archivo. Si alguna línea tiene errores, el
+        ingreso se descarta completo salvo que `parcial` sea True (se importan
+        solo las líneas válidas). En ambos casos se retorna el reporte de errores.
+        """
+        if formato not in FORMATOS_IMPORTACION:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Formato no soportado: '{formato}'. Use: {', '.join(FORMATOS_IMPORTACION)}"
+            )
+
+        cantidades_orden = {}
+        if cabecera.id_orden_compra:
+            cantidades_orden = self.repository.get_cantidades_orden(db, cabecera.id_orden_compra)
+            if cantidades_orden is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Orden de compra no encontrada")
+
+        reporte = ReporteErrores()
+        lineas = validar_filas(
+            leer_filas(archivo, formato),
+            self.repository.get_insumos_por_codigo(db),
+            cantidades_orden,
+            reporte
+        )
+
+        try:
+            db_ingreso, importadas = self.repository.importar(db, cabecera, en_lotes(lineas))
+            id_ingreso, monto_total = db_ingreso.id_ingreso, db_ingreso.monto_total
+
+            importado = importadas > 0 and (parcial or reporte.total == 0)
+            if importado:
+                db.commit()
+            else:
+                db.rollback()
+        except ValueError as e:
+            # Encabezado inválido o archivo vacío
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        except Exception:
+            db.rollback()
+            raise
+
+        return ResultadoImportacionIngreso(
+            importado=importado,
+            id_ingreso=id_ingreso if importado else None,
+            numero_ingreso=cabecera.numero_ingreso,
+            lineas_importadas=importadas if importado else 0,
+            lineas_con_error=reporte.total,
+            monto_total=monto_total if importado else Decimal("0"),
+            errores=reporte.errores,
+            errores_omitidos=reporte.omitidos
+        )
@@ -1,13 +1,21 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import IO, List, Optional
 from sqlalchemy.orm import Session
-from modules.gestion_almacen_inusmos.ingresos_insumos.schemas import IngresoProducto, IngresoProductoCreate, IngresoProductoUpdate
+from modules.gestion_almacen_inusmos.ingresos_insumos.schemas import (
+    IngresoProducto, IngresoProductoCreate, IngresoProductoUpdate,
+    IngresoImportacionCabecera, ResultadoImportacionIngreso
+)
+from utils.paginacion import PaginaKeyset
 
 class IngresoProductoServiceInterface(ABC):
     @abstractmethod
     def get_all(self, db: Session) -> List[IngresoProducto]:
         pass
 
+    @abstractmethod
+    def get_pagina(self, db: Session, after: Optional[str], limit: int, con_total: bool = False) -> PaginaKeyset[IngresoProducto]:
+        pass
+
     @abstractmethod
     def get_by_id(self, db: Session, ingreso_id: int) -> IngresoProducto:
         pass
@@ -35,3 +43,7 @@ class IngresoProductoServiceInterface(ABC):
         el total de cantidad_restante y la cantidad de lotes disponibles"""
         pass
 
+    @abstractmethod
+    def importar(self, db: Session, archivo: IO[bytes], formato: str, cabecera: IngresoImportacionCabecera, parcial: bool = False) -> ResultadoImportacionIngreso:
+        """Importa un ingreso desde la guía del proveedor (CSV/XLSX) con reporte de errores por línea"""
+        pass
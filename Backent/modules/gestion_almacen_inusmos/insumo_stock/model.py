@@ -0,0 +1,20 @@
+from sqlalchemy import Column, BigInteger, Integer, DECIMAL, TIMESTAMP, ForeignKey
+from sqlalchemy.sql import func
+from database import Base
+
+
+class InsumoStock(Base):
+    """
+    Modelo para la tabla insumo_stock.
+    Resumen por insumo de los lotes con stock (ingresos no anulados): stock total,
+    stock valorizado, vencimiento más próximo y cantidad de lotes.
+    Se mantiene en la misma transacción que modifica los lotes (ver InsumoStockService).
+    """
+    __tablename__ = "insumo_stock"
+
+    id_insumo = Column(BigInteger, ForeignKey('insumo.id_insumo'), primary_key=True)
+    stock_actual = Column(DECIMAL(14, 4), nullable=False, server_default='0')
+    valor_stock = Column(DECIMAL(14, 4), nullable=False, server_default='0')
+    fecha_vencimiento_proxima = Column(TIMESTAMP, nullable=True)
+    cantidad_lotes = Column(Integer, nullable=False, server_default='0')
+    fecha_actualizacion = Column(TIMESTAMP, nullable=False, server_default=func.now())
@@ -0,0 +1,145 @@
+from typing import Any, Dict, List, Optional
+from decimal import Decimal
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from modules.gestion_almacen_inusmos.insumo_stock.repository_interface import InsumoStockRepositoryInterface
+
+
+# Resumen calculado desde los lotes: solo lotes con stock de ingresos no anulados.
+# {filtro} restringe los insumos a recalcular (vacío = todos).
+SQL_RESUMEN_CALCULADO = """
+    SELECT
+        ins.id_insumo,
+        COALESCE(SUM(l.cantidad_restante), 0) AS stock_actual,
+        COALESCE(SUM(l.cantidad_restante * l.precio_unitario), 0) AS valor_stock,
+        MIN(l.fecha_vencimiento) AS fecha_vencimiento_proxima,
+        COUNT(l.id_ingreso_detalle) AS cantidad_lotes
+    FROM insumo ins
+    LEFT JOIN (
+        SELECT d.id_ingreso_detalle, d.id_insumo, d.cantidad_restante,
+               d.precio_unitario, d.fecha_vencimiento
+        FROM ingresos_insumos_detalle d
+        INNER JOIN ingresos_insumos i ON d.id_ingreso = i.id_ingreso
+        WHERE d.cantidad_restante > 0
+          AND i.anulado = false
+    ) l ON l.id_insumo = ins.id_insumo
+    {filtro}
+    GROUP BY ins.id_insumo
+"""
+
+
+class InsumoStockRepository(InsumoStockRepositoryInterface):
+    """
+    Repository del resumen de stock por insumo (tabla insumo_stock).
+    Usa raw SQL: el recálculo es un único INSERT ... SELECT ... ON CONFLICT
+    que agrega solo los lotes de los insumos afectados.
+    """
+
+    def asegurar_filas(self, db: Session, ids_insumo: List[int]) -> None:
+        """
+        Crea en cero las filas de resumen faltantes, para poder bloquearlas.
+        Si otra transacción las creó primero no hace nada (ON CONFLICT DO NOTHING).
+        """
+        query = text("""
+            INSERT INTO insumo_stock (id_insumo)
+            SELECT ins.id_insumo
+            FROM insumo ins
+            WHERE ins.id_insumo = ANY(:ids_insumo)
+            ON CONFLICT (id_insumo) DO NOTHING
+        """)
+
+        db.execute(query, {"ids_insumo": ids_insumo})
+
+    def bloquear_filas(self, db: Session, ids_insumo: List[int]) -> None:
+        """
+        Bloquea las filas de resumen en orden de id_insumo.
+        La transacción que llega segunda espera aquí y, como el recálculo es una
+        sentencia posterior, agrega viendo los lotes ya confirmados por la primera.
+        """
+        query = text("""
+            SELECT id_insumo
+            FROM insumo_stock
+            WHERE id_insumo = ANY(:ids_insumo)
+            ORDER BY id_insumo
+            FOR UPDATE
+        """)
+
+        db.execute(query, {"ids_insumo": ids_insumo})
+
+    def recalcular(self, db: Session, ids_insumo: Optional[List[int]] = None) -> int:
+        """
+        Recalcula el resumen desde los lotes y lo guarda (upsert).
+        Retorna la cantidad de insumos recalculados.
+        """
+        params: Dict[str, Any] = {}
+        filtro = ""
+        if ids_insumo is not None:
+            filtro = "WHERE ins.id_insumo = ANY(:ids_insumo)"
+            params["ids_insumo"] = ids_insumo
+
+        query = text(f"""
+            INSERT INTO insumo_stock (
+                id_insumo,
+                stock_actual,
+                valor_stock,
+                fecha_vencimiento_proxima,
+                cantidad_lotes,
+                fecha_actualizacion
+            )
+            SELECT
+                r.id_insumo,
+                r.stock_actual,
+                r.valor_stock,
+                r.fecha_vencimiento_proxima,
+                r.cantidad_lotes,
+                now()
+            FROM ({SQL_RESUMEN_CALCULADO.format(filtro=filtro)}) r
+            ON CONFLICT (id_insumo) DO UPDATE SET
+                stock_actual = EXCLUDED.stock_actual,
+                valor_stock = EXCLUDED.valor_stock,
+                fecha_vencimiento_proxima = EXCLUDED.fecha_vencimiento_proxima,
+                cantidad_lotes = EXCLUDED.cantidad_lotes,
+                fecha_actualizacion = EXCLUDED.fecha_actualizacion
+        """)
+
+        result = db.execute(query, params)
+        return result.rowcount
+
+    def obtener_diferencias(self, db: Session) -> List[Dict[str, Any]]:
+        """
+        Compara el resumen guardado con el calculado desde los lotes.
+        Retorna un registro por insumo con diferencias (incluye filas faltantes).
+        """
+        query = text(f"""
+            SELECT
+                c.id_insumo,
+                s.stock_actual AS stock_registrado,
+                c.stock_actual AS stock_calculado,
+                s.valor_stock AS valor_registrado,
+                c.valor_stock AS valor_calculado,
+                s.cantidad_lotes AS lotes_registrados,
+                c.cantidad_lotes AS lotes_calculados
+            FROM ({SQL_RESUMEN_CALCULADO.format(filtro="")}) c
+            LEFT JOIN insumo_stock s ON s.id_insumo = c.id_insumo
+            WHERE s.id_insumo IS NULL
+               OR s.stock_actual <> c.stock_actual
+               OR s.valor_stock <> c.valor_stock
+               OR s.cantidad_lotes <> c.cantidad_lotes
+               OR s.fecha_vencimiento_proxima IS DISTINCT FROM c.fecha_vencimiento_proxima
+            ORDER BY c.id_insumo
+        """)
+
+        result = db.execute(query)
+
+        return [
+            {
+                "id_insumo": row.id_insumo,
+                "stock_registrado": Decimal(str(row.stock_registrado)) if row.stock_registrado is not None else None,
+                "stock_calculado": Decimal(str(row.stock_calculado)),
+                "valor_registrado": Decimal(str(row.valor_registrado)) if row.valor_registrado is not None else None,
+                "valor_calculado": Decimal(str(row.valor_calculado)),
+                "lotes_registrados": row.lotes_registrados,
+                "lotes_calculados": row.lotes_calculados
+            }
+            for row in result.fetchall()
+        ]
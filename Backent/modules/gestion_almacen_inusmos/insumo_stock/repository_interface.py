@@ -0,0 +1,27 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+
+
+class InsumoStockRepositoryInterface(ABC):
+    """Interfaz para el repositorio del resumen de stock por insumo."""
+
+    @abstractmethod
+    def asegurar_filas(self, db: Session, ids_insumo: List[int]) -> None:
+        """Crea en cero las filas de resumen que todavía no existen."""
+        pass
+
+    @abstractmethod
+    def bloquear_filas(self, db: Session, ids_insumo: List[int]) -> None:
+        """Bloquea las filas de resumen de los insumos (FOR UPDATE, en orden de id)."""
+        pass
+
+    @abstractmethod
+    def recalcular(self, db: Session, ids_insumo: Optional[List[int]] = None) -> int:
+        """Recalcula el resumen desde los lotes; None recalcula todos los insumos."""
+        pass
+
+    @abstractmethod
+    def obtener_diferencias(self, db: Session) -> List[Dict[str, Any]]:
+        """Compara el resumen guardado con el calculado desde los lotes."""
+        pass
@@ -0,0 +1,71 @@
+from typing import Any, Dict, Iterable, List
+from sqlalchemy.orm import Session
+from modules.alertas.incremental import marcar_insumos
+from modules.gestion_almacen_inusmos.insumo_stock.repository import InsumoStockRepository
+
+
+class InsumoStockService:
+    """
+    Servicio del resumen de stock por insumo (tabla insumo_stock).
+
+    Las consultas de listados, alertas, reportes y órdenes de compra leen el
+    stock de esta tabla en lugar de sumar cantidad_restante de todos los lotes.
+    Cada operación que modifica lotes (ingresos, producción, anulaciones) llama
+    a refrescar() con los insumos afectados antes de su commit, así el resumen
+    se confirma o se revierte junto con los lotes. Los mismos insumos quedan
+    marcados para reevaluar sus alertas cuando la transacción se confirme
+    (modules/alertas/incremental.py).
+
+    reconciliar() recalcula todo desde los lotes y reporta las diferencias.
+    """
+
+    def __init__(self):
+        self.repository = InsumoStockRepository()
+
+    def refrescar(self, db: Session, ids_insumo: Iterable[int]) -> None:
+        """
+        Recalcula el resumen de los insumos indicados desde sus lotes.
+
+        Primero bloquea las filas de resumen (en orden de id) y luego recalcula
+        en otra sentencia, para que dos transacciones que tocan el mismo insumo
+        no se pisen con un resumen calculado sobre un snapshot anterior.
+
+        IMPORTANTE: no hace commit; debe llamarse después de modificar los lotes.
+        """
+        ids = sorted(set(ids_insumo))
+        if not ids:
+            return
+
+        # Enviar a la BD los cambios pendientes del ORM antes de agregar con SQL
+        db.flush()
+
+        self.repository.asegurar_filas(db, ids)
+        self.repository.bloquear_filas(db, ids)
+        self.repository.recalcular(db, ids)
+        marcar_insumos(db, ids)
+
+    def reconciliar(self, db: Session, corregir: bool = True) -> Dict[str, Any]:
+        """
+        Compara el resumen con los lotes y, si corregir es True, lo reconstruye.
+
+        Retorna:
+            - diferencias: insumos cuyo resumen no coincidía con los lotes
+            - total_diferencias: cantidad de insumos con diferencias
+            - insumos_recalculados: insumos reconstruidos (0 si solo se reporta)
+        """
+        diferencias: List[Dict[str, Any]] = self.repository.obtener_diferencias(db)
+
+        insumos_recalculados = 0
+        if corregir:
+            try:
+                insumos_recalculados = self.repository.recalcular(db)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+        return {
+            "diferencias": diferencias,
+            "total_diferencias": len(diferencias),
+            "insumos_recalculados": insumos_recalculados
+        }
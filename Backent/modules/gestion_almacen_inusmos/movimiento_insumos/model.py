@@ -1,13 +1,28 @@
-from sqlalchemy import Column, BigInteger, String, Text, DECIMAL, TIMESTAMP, BOOLEAN, ForeignKey
+from sqlalchemy import Column, BigInteger, String, Text, DECIMAL, TIMESTAMP, BOOLEAN, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from database import Base
 from modules.insumo.model import Insumo
 from modules.Gestion_Usuarios.usuario.model import Usuario
 from modules.gestion_almacen_inusmos.ingresos_insumos.model import IngresoProductoDetalle
-import datetime
+from utils.rango_fechas import ahora_negocio
 
 class MovimientoInsumo(Base):
     __tablename__ = 'movimiento_insumos'
+    __table_args__ = (
+        # Movimientos de un documento (trazabilidad de producción, ingresos)
+        Index('idx_mov_insumos_documento', 'id_documento_origen', 'tipo_documento_origen', 'tipo_movimiento'),
+        Index('idx_mov_insumos_lote', 'id_lote'),
+        # Reportes por rango de fecha (filtros semiabiertos de utils.rango_fechas)
+        # y kardex paginado por cursor (fecha_movimiento, id_movimiento)
+        Index('idx_mov_insumos_fecha_id', 'fecha_movimiento', 'id_movimiento'),
+        # Kardex por insumo: saldo anterior y SUM() OVER leídos solo del índice
+        Index(
+            'idx_mov_insumos_kardex',
+            'id_insumo', 'fecha_movimiento', 'id_movimiento',
+            postgresql_include=['tipo_movimiento', 'cantidad'],
+            postgresql_where=text('anulado = false')
+        ),
+    )
 
     id_movimiento = Column(BigInteger, primary_key=True, autoincrement=True)
     numero_movimiento = Column(String(50), unique=True, nullable=False)
@@ -18,7 +33,7 @@ class MovimientoInsumo(Base):
     cantidad = Column(DECIMAL(12, 4), nullable=False)
     stock_anterior_lote = Column(DECIMAL(12, 4))
     stock_nuevo_lote = Column(DECIMAL(12, 4))
-    fecha_movimiento = Column(TIMESTAMP, nullable=False, default=datetime.datetime.now)
+    fecha_movimiento = Column(TIMESTAMP, nullable=False, default=ahora_negocio)
     id_user = Column(BigInteger, ForeignKey('usuario.id_user'), nullable=False)
     id_documento_origen = Column(BigInteger)
     tipo_documento_origen = Column(String(50))
@@ -1,20 +1,37 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from sqlalchemy.orm import Session
 from modules.gestion_almacen_inusmos.movimiento_insumos.model import MovimientoInsumo
 from modules.gestion_almacen_inusmos.movimiento_insumos.schemas import MovimientoInsumoCreate
 from modules.gestion_almacen_inusmos.movimiento_insumos.repository_interface import MovimientoInsumoRepositoryInterface
+from modules.reportes.cache import invalidar_reportes
+from modules.resumen_diario.service import ResumenDiarioService
+from utils.paginacion import Cursor, paginar
 
 class MovimientoInsumoRepository(MovimientoInsumoRepositoryInterface):
+    def __init__(self):
+        self.resumen_diario = ResumenDiarioService()
+
     def get_all(self, db: Session) -> List[MovimientoInsumo]:
         return db.query(MovimientoInsumo).filter(MovimientoInsumo.anulado == False).all()
 
+    def get_pagina(self, db: Session, cursor: Optional[Cursor], limit: int, con_total: bool = False) -> Dict[str, Any]:
+        # Kardex del más reciente al más antiguo; usa idx_mov_insumos_fecha_id
+        query = db.query(MovimientoInsumo).filter(MovimientoInsumo.anulado == False)
+        return paginar(
+            db, query, MovimientoInsumo.fecha_movimiento, MovimientoInsumo.id_movimiento,
+            cursor, limit, con_total
+        )
+
     def get_by_id(self, db: Session, movimiento_id: int) -> Optional[MovimientoInsumo]:
         return db.query(MovimientoInsumo).filter(MovimientoInsumo.id_movimiento == movimiento_id, MovimientoInsumo.anulado == False).first()
 
     def create(self, db: Session, movimiento: MovimientoInsumoCreate) -> MovimientoInsumo:
         db_movimiento = MovimientoInsumo(**movimiento.model_dump())
         db.add(db_movimiento)
+        # Un movimiento registrado con fecha pasada cambia el resumen de ese día
+        self.resumen_diario.actualizar_dias(db, [db_movimiento.fecha_movimiento.date()])
         db.commit()
+        invalidar_reportes(db_movimiento.fecha_movimiento.date())
         db.refresh(db_movimiento)
         return db_movimiento
 
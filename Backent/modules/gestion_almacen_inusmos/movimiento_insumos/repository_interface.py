@@ -1,14 +1,19 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from sqlalchemy.orm import Session
 from modules.gestion_almacen_inusmos.movimiento_insumos.model import MovimientoInsumo
 from modules.gestion_almacen_inusmos.movimiento_insumos.schemas import MovimientoInsumoCreate
+from utils.paginacion import Cursor
 
 class MovimientoInsumoRepositoryInterface(ABC):
     @abstractmethod
     def get_all(self, db: Session) -> List[MovimientoInsumo]:
         pass
 
+    @abstractmethod
+    def get_pagina(self, db: Session, cursor: Optional[Cursor], limit: int, con_total: bool = False) -> Dict[str, Any]:
+        pass
+
     @abstractmethod
     def get_by_id(self, db: Session, movimiento_id: int) -> Optional[MovimientoInsumo]:
         pass
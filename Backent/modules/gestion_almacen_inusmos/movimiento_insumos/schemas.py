@@ -1,8 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from decimal import Decimal
 import datetime
 from enums.tipo_movimiento import TipoMovimientoEnum
+from utils.rango_fechas import ahora_negocio
 
 class MovimientoInsumoBase(BaseModel):
     numero_movimiento: str
@@ -13,7 +14,7 @@ class MovimientoInsumoBase(BaseModel):
     cantidad: Decimal
     stock_anterior_lote: Optional[Decimal] = None
     stock_nuevo_lote: Optional[Decimal] = None
-    fecha_movimiento: datetime.datetime = datetime.datetime.now()
+    fecha_movimiento: datetime.datetime = Field(default_factory=ahora_negocio)
     id_user: int
     id_documento_origen: Optional[int] = None
     tipo_documento_origen: Optional[str] = None
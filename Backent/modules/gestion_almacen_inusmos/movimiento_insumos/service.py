@@ -1,9 +1,10 @@
-from typing import List
+from typing import List, Optional
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from modules.gestion_almacen_inusmos.movimiento_insumos.schemas import MovimientoInsumo, MovimientoInsumoCreate
 from modules.gestion_almacen_inusmos.movimiento_insumos.repository import MovimientoInsumoRepository
 from modules.gestion_almacen_inusmos.movimiento_insumos.service_interface import MovimientoInsumoServiceInterface
+from utils.paginacion import PaginaKeyset, leer_cursor
 
 class MovimientoInsumoService(MovimientoInsumoServiceInterface):
     def __init__(self):
@@ -12,6 +13,10 @@ class MovimientoInsumoService(MovimientoInsumoServiceInterface):
     def get_all(self, db: Session) -> List[MovimientoInsumo]:
         return self.repository.get_all(db)
 
+    def get_pagina(self, db: Session, after: Optional[str], limit: int, con_total: bool = False) -> PaginaKeyset[MovimientoInsumo]:
+        pagina = self.repository.get_pagina(db, leer_cursor(after), limit, con_total)
+        return PaginaKeyset[MovimientoInsumo].model_validate(pagina, from_attributes=True)
+
     def get_by_id(self, db: Session, movimiento_id: int) -> MovimientoInsumo:
         movimiento = self.repository.get_by_id(db, movimiento_id)
         if not movimiento:
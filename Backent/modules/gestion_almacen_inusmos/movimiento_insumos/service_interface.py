@@ -1,13 +1,18 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 from sqlalchemy.orm import Session
 from modules.gestion_almacen_inusmos.movimiento_insumos.schemas import MovimientoInsumo, MovimientoInsumoCreate
+from utils.paginacion import PaginaKeyset
 
 class MovimientoInsumoServiceInterface(ABC):
     @abstractmethod
     def get_all(self, db: Session) -> List[MovimientoInsumo]:
         pass
 
+    @abstractmethod
+    def get_pagina(self, db: Session, after: Optional[str], limit: int, con_total: bool = False) -> PaginaKeyset[MovimientoInsumo]:
+        pass
+
     @abstractmethod
     def get_by_id(self, db: Session, movimiento_id: int) -> MovimientoInsumo:
         pass
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, BigInteger, String, Text, DECIMAL, TIMESTAMP, BOOLEAN, ForeignKey
+from sqlalchemy import Column, BigInteger, String, Text, DECIMAL, TIMESTAMP, BOOLEAN, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from database import Base
-import datetime
+from utils.rango_fechas import ahora_negocio
 
 
 class Produccion(Base):
@@ -10,12 +10,16 @@ class Produccion(Base):
     Registra cada orden de producción ejecutada basada en una receta.
     """
     __tablename__ = 'produccion'
+    __table_args__ = (
+        # Rangos por fecha e historial paginado por cursor (fecha_produccion, id_produccion)
+        Index('idx_produccion_fecha_id', 'fecha_produccion', 'id_produccion'),
+    )
 
     id_produccion = Column(BigInteger, primary_key=True, autoincrement=True)
     numero_produccion = Column(String(50), unique=True, nullable=False)
     id_receta = Column(BigInteger, ForeignKey('recetas.id_receta'), nullable=False)
     cantidad_batch = Column(DECIMAL(12, 4), nullable=False)
-    fecha_produccion = Column(TIMESTAMP, nullable=False, default=datetime.datetime.now)
+    fecha_produccion = Column(TIMESTAMP, nullable=False, default=ahora_negocio)
     id_user = Column(BigInteger, ForeignKey('usuario.id_user'), nullable=False)
     observaciones = Column(Text)
     anulado = Column(BOOLEAN, nullable=False, default=False)
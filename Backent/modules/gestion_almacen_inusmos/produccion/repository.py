@@ -1,11 +1,15 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import text, desc
 from decimal import Decimal
-import datetime
-from modules.gestion_almacen_inusmos.movimiento_insumos.model import MovimientoInsumo
 from modules.gestion_almacen_inusmos.produccion.model import Produccion
 from enums.tipo_movimiento import TipoMovimientoEnum
+from enums.serie_documento import SerieDocumentoEnum
+from modules.numeracion.service import NumeracionService
+from modules.gestion_almacen_inusmos.insumo_stock.service import InsumoStockService
+from utils.paginacion import Cursor
+from utils.rango_fechas import ahora_negocio
+from utils.sql_bulk import construir_values
 from .repository_interface import ProduccionRepositoryInterface
 
 
@@ -15,42 +19,9 @@ class ProduccionRepository(ProduccionRepositoryInterface):
     Usa raw SQL para facilitar modificaciones futuras.
     """
     
-    # Contador para números de movimiento en la sesión actual
-    _numero_contador = {}
-
-    def _generar_numero_movimiento(self, db: Session) -> str:
-        """
-        Genera un número de movimiento único con formato: MOV-YYYYMM-XXXXX
-        Ejemplo: MOV-202511-00001
-        """
-        fecha_actual = datetime.datetime.now()
-        prefijo = f"MOV-{fecha_actual.strftime('%Y%m')}-"
-        
-        # Usar contador por prefijo para asegurar unicidad en la sesión
-        if prefijo not in self._numero_contador:
-            # Obtener el máximo actual de la BD
-            query = text("""
-                SELECT COALESCE(MAX(CAST(SUBSTRING(numero_movimiento FROM LENGTH(:prefijo) + 1) AS INTEGER)), 0)
-                FROM movimiento_insumos 
-                WHERE numero_movimiento LIKE :prefijo_pattern
-            """)
-            
-            result = db.execute(query, {
-                "prefijo": prefijo,
-                "prefijo_pattern": f"{prefijo}%"
-            })
-            max_bd = result.fetchone()[0]
-            self._numero_contador[prefijo] = max_bd
-        
-        # Incrementar contador
-        self._numero_contador[prefijo] += 1
-        nuevo_numero = self._numero_contador[prefijo]
-        
-        return f"{prefijo}{nuevo_numero:05d}"
-
-    def _reset_contador_movimientos(self):
-        """Resetea el contador de números de movimiento"""
-        self._numero_contador.clear()
+    def __init__(self):
+        self.numeracion = NumeracionService()
+        self.insumo_stock = InsumoStockService()
 
     def get_receta_con_insumos(self, db: Session, id_receta: int) -> Dict[str, Any]:
         """
@@ -117,31 +88,109 @@ class ProduccionRepository(ProduccionRepositoryInterface):
             ]
         }
 
-    def get_stock_disponible_insumo(self, db: Session, id_insumo: int) -> Decimal:
+    def get_recetas_con_insumos(self, db: Session, ids_receta: List[int]) -> Dict[int, Dict[str, Any]]:
         """
-        Obtiene el stock total disponible de un insumo.
-        Suma de cantidad_restante de todos los lotes con stock > 0.
+        Obtiene varias recetas activas con sus insumos en dos consultas.
+        Retorna {id_receta: {"receta": {...}, "insumos": [...]}} con el mismo
+        formato que get_receta_con_insumos; las recetas inexistentes o inactivas
+        no aparecen en el resultado.
         """
+        if not ids_receta:
+            return {}
+
+        query_recetas = text("""
+            SELECT 
+                r.id_receta,
+                r.id_producto,
+                r.codigo_receta,
+                r.nombre_receta,
+                r.rendimiento_producto_terminado
+            FROM recetas r
+            WHERE r.id_receta = ANY(:ids_receta)
+              AND r.anulado = false
+              AND r.estado = 'ACTIVA'
+        """)
+
+        recetas = {
+            row.id_receta: {
+                "receta": {
+                    "id_receta": row.id_receta,
+                    "id_producto": row.id_producto,
+                    "codigo_receta": row.codigo_receta,
+                    "nombre_receta": row.nombre_receta,
+                    "rendimiento_producto_terminado": row.rendimiento_producto_terminado
+                },
+                "insumos": []
+            }
+            for row in db.execute(query_recetas, {"ids_receta": list(ids_receta)}).fetchall()
+        }
+
+        if not recetas:
+            return {}
+
+        query_insumos = text("""
+            SELECT 
+                rd.id_receta,
+                rd.id_insumo,
+                rd.cantidad,
+                rd.es_opcional,
+                i.codigo AS codigo_insumo,
+                i.nombre AS nombre_insumo,
+                i.unidad_medida
+            FROM recetas_detalle rd
+            INNER JOIN insumo i ON rd.id_insumo = i.id_insumo
+            WHERE rd.id_receta = ANY(:ids_receta)
+              AND i.anulado = false
+            ORDER BY rd.id_receta, rd.id_receta_detalle
+        """)
+
+        for ins in db.execute(query_insumos, {"ids_receta": list(recetas.keys())}).fetchall():
+            recetas[ins.id_receta]["insumos"].append({
+                "id_insumo": ins.id_insumo,
+                "codigo_insumo": ins.codigo_insumo,
+                "nombre_insumo": ins.nombre_insumo,
+                "unidad_medida": ins.unidad_medida,
+                "cantidad_por_rendimiento": ins.cantidad,
+                "es_opcional": ins.es_opcional
+            })
+
+        return recetas
+
+    def get_stock_disponible_insumos(self, db: Session, ids_insumo: List[int]) -> Dict[int, Decimal]:
+        """
+        Obtiene el stock disponible de varios insumos en una sola consulta.
+        Retorna {id_insumo: stock}; los insumos sin resumen tienen stock 0.
+        """
+        if not ids_insumo:
+            return {}
+
         query = text("""
-            SELECT COALESCE(SUM(iid.cantidad_restante), 0) AS stock_total
-            FROM ingresos_insumos_detalle iid
-            INNER JOIN ingresos_insumos ii ON iid.id_ingreso = ii.id_ingreso
-            WHERE iid.id_insumo = :id_insumo
-              AND iid.cantidad_restante > 0
-              AND ii.anulado = false
+            SELECT id_insumo, stock_actual
+            FROM insumo_stock
+            WHERE id_insumo = ANY(:ids_insumo)
         """)
-        
-        result = db.execute(query, {"id_insumo": id_insumo})
-        row = result.fetchone()
-        
-        return Decimal(str(row.stock_total)) if row else Decimal('0')
 
-    def get_lotes_fefo(self, db: Session, id_insumo: int) -> List[Dict[str, Any]]:
+        stock = {id_insumo: Decimal('0') for id_insumo in ids_insumo}
+        for row in db.execute(query, {"ids_insumo": list(ids_insumo)}).fetchall():
+            stock[row.id_insumo] = Decimal(str(row.stock_actual))
+        return stock
+
+    # ============================================================
+    # CONSUMO FEFO EN LOTE
+    # ============================================================
+
+    def get_lotes_fefo_insumos(self, db: Session, ids_insumo: List[int]) -> Dict[int, List[Dict[str, Any]]]:
         """
-        Obtiene los lotes de un insumo ordenados por FEFO.
-        Solo lotes con cantidad_restante > 0.
-        Ordenamiento: fecha_vencimiento ASC (NULL al final).
+        Obtiene y bloquea los lotes con stock de varios insumos en una sola consulta.
+        Retorna {id_insumo: [lotes en orden FEFO]}.
+
+        Los lotes se bloquean con FOR UPDATE en un orden fijo (insumo, vencimiento,
+        lote), así dos producciones que comparten insumos esperan en el mismo
+        orden sin deadlocks y ninguna descuenta un lote que la otra ya consumió.
         """
+        if not ids_insumo:
+            return {}
+
         query = text("""
             SELECT 
                 iid.id_ingreso_detalle,
@@ -152,190 +201,240 @@ class ProduccionRepository(ProduccionRepositoryInterface):
                 iid.fecha_vencimiento
             FROM ingresos_insumos_detalle iid
             INNER JOIN ingresos_insumos ii ON iid.id_ingreso = ii.id_ingreso
-            WHERE iid.id_insumo = :id_insumo
+            WHERE iid.id_insumo = ANY(:ids_insumo)
               AND iid.cantidad_restante > 0
               AND ii.anulado = false
             ORDER BY 
+                iid.id_insumo,
                 CASE WHEN iid.fecha_vencimiento IS NULL THEN 1 ELSE 0 END,
-                iid.fecha_vencimiento ASC
+                iid.fecha_vencimiento ASC,
+                iid.id_ingreso_detalle ASC
+            FOR UPDATE OF iid
         """)
-        
-        result = db.execute(query, {"id_insumo": id_insumo})
-        rows = result.fetchall()
-        
-        return [
-            {
+
+        result = db.execute(query, {"ids_insumo": sorted(ids_insumo)})
+
+        lotes_por_insumo: Dict[int, List[Dict[str, Any]]] = {id_insumo: [] for id_insumo in ids_insumo}
+        for row in result.fetchall():
+            lotes_por_insumo[row.id_insumo].append({
                 "id_ingreso_detalle": row.id_ingreso_detalle,
                 "id_ingreso": row.id_ingreso,
                 "id_insumo": row.id_insumo,
                 "cantidad_restante": Decimal(str(row.cantidad_restante)),
                 "precio_unitario": Decimal(str(row.precio_unitario)),
                 "fecha_vencimiento": row.fecha_vencimiento
-            }
-            for row in rows
-        ]
+            })
 
-    def descontar_lote(self, db: Session, id_ingreso_detalle: int, cantidad_a_descontar: Decimal) -> Decimal:
+        return lotes_por_insumo
+
+    def descontar_lotes(self, db: Session, consumos: List[Dict[str, Any]]) -> None:
         """
-        Descuenta cantidad de un lote específico.
-        Retorna la nueva cantidad_restante del lote.
+        Descuenta varios lotes con un único UPDATE ... FROM (VALUES ...) y
+        actualiza el resumen de stock de los insumos afectados.
+        Cada consumo trae id_lote y cantidad.
         """
-        query = text("""
-            UPDATE ingresos_insumos_detalle
-            SET cantidad_restante = cantidad_restante - :cantidad
-            WHERE id_ingreso_detalle = :id_lote
-            RETURNING cantidad_restante
+        if not consumos:
+            return
+
+        filas = [
+            {"id_lote": consumo["id_lote"], "cantidad": float(consumo["cantidad"])}
+            for consumo in consumos
+        ]
+        values_sql, params = construir_values(
+            filas,
+            ["id_lote", "cantidad"],
+            casts={"id_lote": "BIGINT", "cantidad": "NUMERIC"}
+        )
+
+        query = text(f"""
+            UPDATE ingresos_insumos_detalle iid
+            SET cantidad_restante = iid.cantidad_restante - v.cantidad
+            FROM (VALUES {values_sql}) AS v(id_lote, cantidad)
+            WHERE iid.id_ingreso_detalle = v.id_lote
+            RETURNING iid.id_insumo
         """)
-        
-        result = db.execute(query, {
-            "cantidad": float(cantidad_a_descontar),
-            "id_lote": id_ingreso_detalle
-        })
-        
-        row = result.fetchone()
-        return Decimal(str(row.cantidad_restante)) if row else Decimal('0')
 
-    def crear_movimiento_salida(
-        self, 
-        db: Session, 
-        id_insumo: int,
-        id_lote: int,
-        cantidad: Decimal,
-        stock_anterior: Decimal,
-        stock_nuevo: Decimal,
+        result = db.execute(query, params)
+        self.insumo_stock.refrescar(db, [row.id_insumo for row in result.fetchall()])
+
+    def crear_movimientos_salida(
+        self,
+        db: Session,
+        consumos: List[Dict[str, Any]],
         id_user: int,
-        id_documento_origen: int,
-        observaciones: str
-    ) -> MovimientoInsumo:
+        id_documento_origen: Optional[int] = None,
+        observaciones: Optional[str] = None
+    ) -> int:
         """
-        Crea un movimiento de SALIDA para el Kardex.
+        Crea los movimientos de SALIDA (Kardex) de varios lotes con un bloque de
+        números y un único INSERT multi-fila. Retorna la cantidad de movimientos.
+
+        Un consumo puede traer su propio id_documento_origen y observaciones
+        (producciones distintas de un mismo plan); si no, se usan los argumentos.
         """
-        numero_movimiento = self._generar_numero_movimiento(db)
-        
-        movimiento = MovimientoInsumo(
-            numero_movimiento=numero_movimiento,
-            id_insumo=id_insumo,
-            id_lote=id_lote,
-            tipo_movimiento=TipoMovimientoEnum.SALIDA.value,
-            motivo="PRODUCCION",
-            cantidad=cantidad,  # Cantidad positiva, el tipo indica SALIDA
-            stock_anterior_lote=stock_anterior,
-            stock_nuevo_lote=stock_nuevo,
-            fecha_movimiento=datetime.datetime.now(),
-            id_user=id_user,
-            id_documento_origen=id_documento_origen,
-            tipo_documento_origen="PRODUCCION",
-            observaciones=observaciones,
-            anulado=False
+        if not consumos:
+            return 0
+
+        numeros = self.numeracion.reservar_numeros(db, SerieDocumentoEnum.MOVIMIENTO_INSUMO, len(consumos))
+
+        filas = [
+            {
+                "numero_movimiento": numero,
+                "id_insumo": consumo["id_insumo"],
+                "id_lote": consumo["id_lote"],
+                "cantidad": float(consumo["cantidad"]),
+                "stock_anterior": float(consumo["stock_anterior"]),
+                "stock_nuevo": float(consumo["stock_nuevo"]),
+                "id_documento_origen": consumo.get("id_documento_origen", id_documento_origen),
+                "observaciones": consumo.get("observaciones", observaciones)
+            }
+            for numero, consumo in zip(numeros, consumos)
+        ]
+        values_sql, params = construir_values(
+            filas,
+            [
+                "numero_movimiento", "id_insumo", "id_lote", "cantidad",
+                "stock_anterior", "stock_nuevo", "id_documento_origen", "observaciones"
+            ],
+            casts={
+                "id_insumo": "BIGINT",
+                "id_lote": "BIGINT",
+                "cantidad": "NUMERIC",
+                "stock_anterior": "NUMERIC",
+                "stock_nuevo": "NUMERIC",
+                "id_documento_origen": "BIGINT",
+                "observaciones": "TEXT"
+            }
         )
-        
-        db.add(movimiento)
-        return movimiento
 
-    def descontar_insumo_fefo(
-        self, 
-        db: Session, 
-        id_insumo: int, 
-        cantidad_requerida: Decimal,
-        id_user: int,
-        id_receta: int,
-        nombre_receta: str
-    ) -> int:
+        query = text(f"""
+            INSERT INTO movimiento_insumos (
+                numero_movimiento,
+                id_insumo,
+                id_lote,
+                tipo_movimiento,
+                motivo,
+                cantidad,
+                stock_anterior_lote,
+                stock_nuevo_lote,
+                fecha_movimiento,
+                id_user,
+                id_documento_origen,
+                tipo_documento_origen,
+                observaciones,
+                anulado
+            )
+            SELECT
+                v.numero_movimiento,
+                v.id_insumo,
+                v.id_lote,
+                :tipo_movimiento,
+                'PRODUCCION',
+                v.cantidad,
+                v.stock_anterior,
+                v.stock_nuevo,
+                :fecha_movimiento,
+                :id_user,
+                v.id_documento_origen,
+                'PRODUCCION',
+                v.observaciones,
+                false
+            FROM (VALUES {values_sql})
+                AS v(
+                    numero_movimiento, id_insumo, id_lote, cantidad,
+                    stock_anterior, stock_nuevo, id_documento_origen, observaciones
+                )
+        """)
+
+        params.update({
+            "tipo_movimiento": TipoMovimientoEnum.SALIDA.value,
+            "fecha_movimiento": ahora_negocio(),
+            "id_user": id_user
+        })
+        db.execute(query, params)
+
+        return len(consumos)
+
+    @staticmethod
+    def asignar_lotes_fefo(
+        lotes_por_insumo: Dict[int, List[Dict[str, Any]]],
+        requeridos: Dict[int, Decimal]
+    ) -> List[Dict[str, Any]]:
         """
-        Descuenta la cantidad requerida de un insumo usando FEFO.
-        Crea movimientos de SALIDA por cada lote afectado.
-        Retorna el número de movimientos creados.
-        
-        IMPORTANTE: Esta función NO hace commit, para permitir
-        que el service maneje la transacción completa.
+        Reparte en memoria la cantidad requerida de cada insumo entre sus lotes FEFO.
+        Retorna un consumo por lote afectado (id_insumo, id_lote, cantidad,
+        stock_anterior, stock_nuevo).
+
+        Lanza ValueError si algún insumo no tiene stock suficiente.
         """
-        lotes = self.get_lotes_fefo(db, id_insumo)
-        cantidad_pendiente = cantidad_requerida
-        movimientos_creados = 0
-        
-        for lote in lotes:
-            if cantidad_pendiente <= 0:
-                break
-            
-            stock_anterior = lote["cantidad_restante"]
-            
-            # Determinar cuánto descontar de este lote
-            if stock_anterior >= cantidad_pendiente:
-                cantidad_descontar = cantidad_pendiente
-            else:
-                cantidad_descontar = stock_anterior
-            
-            # Descontar del lote
-            stock_nuevo = self.descontar_lote(
-                db, 
-                lote["id_ingreso_detalle"], 
-                cantidad_descontar
-            )
-            
-            # Crear movimiento de SALIDA
-            self.crear_movimiento_salida(
-                db=db,
-                id_insumo=id_insumo,
-                id_lote=lote["id_ingreso_detalle"],
-                cantidad=cantidad_descontar,
-                stock_anterior=stock_anterior,
-                stock_nuevo=stock_nuevo,
-                id_user=id_user,
-                id_documento_origen=id_receta,
-                observaciones=f"Salida por producción de receta: {nombre_receta}"
-            )
-            
-            cantidad_pendiente -= cantidad_descontar
-            movimientos_creados += 1
-        
-        return movimientos_creados
+        consumos = []
+
+        for id_insumo, cantidad_requerida in requeridos.items():
+            cantidad_pendiente = cantidad_requerida
+
+            for lote in lotes_por_insumo.get(id_insumo, []):
+                if cantidad_pendiente <= 0:
+                    break
+
+                stock_anterior = lote["cantidad_restante"]
+                if stock_anterior <= 0:
+                    continue
+                cantidad_descontar = min(stock_anterior, cantidad_pendiente)
+
+                consumos.append({
+                    "id_insumo": id_insumo,
+                    "id_lote": lote["id_ingreso_detalle"],
+                    "cantidad": cantidad_descontar,
+                    "stock_anterior": stock_anterior,
+                    "stock_nuevo": stock_anterior - cantidad_descontar
+                })
+                cantidad_pendiente -= cantidad_descontar
+
+            if cantidad_pendiente > 0:
+                raise ValueError(
+                    f"Stock insuficiente del insumo {id_insumo}: "
+                    f"faltan {cantidad_pendiente} de {cantidad_requerida}"
+                )
+
+        return consumos
 
     # ============================================================
     # NUEVOS MÉTODOS PARA TABLA PRODUCCION
     # ============================================================
 
-    def _generar_numero_produccion(self, db: Session) -> str:
+    def crear_producciones(
+        self,
+        db: Session,
+        producciones: List[Dict[str, Any]],
+        id_user: int
+    ) -> List[Dict[str, Any]]:
         """
-        Genera un número de producción único con formato: PROD-YYYYMM-N
-        Ejemplo: PROD-202511-1, PROD-202511-2
+        Crea varios registros de producción con un bloque de números y un único
+        INSERT multi-fila. Cada producción trae id_receta, cantidad_batch y
+        observaciones. Retorna id_produccion, numero_produccion y
+        fecha_produccion de cada una, en el mismo orden.
         """
-        fecha_actual = datetime.datetime.now()
-        prefijo = f"PROD-{fecha_actual.strftime('%Y%m')}-"
-        
-        query = text("""
-            SELECT numero_produccion 
-            FROM produccion 
-            WHERE numero_produccion LIKE :prefijo
-            ORDER BY id_produccion DESC
-            LIMIT 1
-        """)
-        
-        result = db.execute(query, {"prefijo": f"{prefijo}%"})
-        ultima_produccion = result.fetchone()
-        
-        if ultima_produccion:
-            ultimo_numero = int(ultima_produccion.numero_produccion.split('-')[-1])
-            nuevo_numero = ultimo_numero + 1
-        else:
-            nuevo_numero = 1
-        
-        return f"{prefijo}{nuevo_numero}"
+        if not producciones:
+            return []
 
-    def crear_produccion(
-        self, 
-        db: Session, 
-        id_receta: int, 
-        cantidad_batch: Decimal, 
-        id_user: int, 
-        observaciones: str = None
-    ) -> Dict[str, Any]:
-        """
-        Crea un registro en la tabla produccion.
-        Retorna el id_produccion y numero_produccion generados.
-        """
-        numero_produccion = self._generar_numero_produccion(db)
-        
-        query = text("""
+        numeros = self.numeracion.reservar_numeros(db, SerieDocumentoEnum.PRODUCCION, len(producciones))
+
+        filas = [
+            {
+                "numero_produccion": numero,
+                "id_receta": produccion["id_receta"],
+                "cantidad_batch": float(produccion["cantidad_batch"]),
+                "observaciones": produccion.get("observaciones")
+            }
+            for numero, produccion in zip(numeros, producciones)
+        ]
+        values_sql, params = construir_values(
+            filas,
+            ["numero_produccion", "id_receta", "cantidad_batch", "observaciones"],
+            casts={"id_receta": "BIGINT", "cantidad_batch": "NUMERIC", "observaciones": "TEXT"}
+        )
+
+        query = text(f"""
             INSERT INTO produccion (
                 numero_produccion, 
                 id_receta, 
@@ -345,112 +444,101 @@ class ProduccionRepository(ProduccionRepositoryInterface):
                 observaciones, 
                 anulado
             )
-            VALUES (
-                :numero_produccion, 
-                :id_receta, 
-                :cantidad_batch, 
-                :fecha_produccion, 
-                :id_user, 
-                :observaciones, 
+            SELECT
+                v.numero_produccion,
+                v.id_receta,
+                v.cantidad_batch,
+                :fecha_produccion,
+                :id_user,
+                v.observaciones,
                 false
-            )
+            FROM (VALUES {values_sql}) AS v(numero_produccion, id_receta, cantidad_batch, observaciones)
             RETURNING id_produccion, numero_produccion, fecha_produccion
         """)
-        
-        result = db.execute(query, {
-            "numero_produccion": numero_produccion,
-            "id_receta": id_receta,
-            "cantidad_batch": float(cantidad_batch),
-            "fecha_produccion": datetime.datetime.now(),
-            "id_user": id_user,
-            "observaciones": observaciones
-        })
-        
-        row = result.fetchone()
-        return {
-            "id_produccion": row.id_produccion,
-            "numero_produccion": row.numero_produccion,
-            "fecha_produccion": row.fecha_produccion
-        }
 
-    def get_id_producto_de_receta(self, db: Session, id_receta: int) -> int:
-        """
-        Obtiene el id_producto asociado a una receta.
-        """
-        query = text("""
-            SELECT id_producto
-            FROM recetas
-            WHERE id_receta = :id_receta
-        """)
-        
-        result = db.execute(query, {"id_receta": id_receta})
-        row = result.fetchone()
-        return row.id_producto if row else None
+        params.update({"fecha_produccion": ahora_negocio(), "id_user": id_user})
 
-    def incrementar_stock_producto_terminado(
-        self, 
-        db: Session, 
-        id_producto: int, 
-        cantidad: Decimal
-    ) -> Decimal:
+        # RETURNING no garantiza el orden de VALUES: se ordena por número
+        creadas = {row.numero_produccion: row for row in db.execute(query, params).fetchall()}
+        return [
+            {
+                "id_produccion": creadas[numero].id_produccion,
+                "numero_produccion": numero,
+                "fecha_produccion": creadas[numero].fecha_produccion
+            }
+            for numero in numeros
+        ]
+
+    def incrementar_stock_productos_terminados(
+        self,
+        db: Session,
+        cantidades: Dict[int, Decimal]
+    ) -> Dict[int, Decimal]:
         """
-        Incrementa el stock_actual del producto terminado.
-        Retorna el nuevo stock.
+        Incrementa el stock de varios productos terminados con un único
+        UPDATE ... FROM (VALUES ...). Retorna {id_producto: stock nuevo}.
         """
-        query = text("""
-            UPDATE productos_terminados
-            SET stock_actual = stock_actual + :cantidad
-            WHERE id_producto = :id_producto
-            RETURNING stock_actual
+        if not cantidades:
+            return {}
+
+        # Orden fijo de ids: dos planes concurrentes bloquean en el mismo orden
+        filas = [
+            {"id_producto": id_producto, "cantidad": float(cantidad)}
+            for id_producto, cantidad in sorted(cantidades.items())
+        ]
+        values_sql, params = construir_values(
+            filas,
+            ["id_producto", "cantidad"],
+            casts={"id_producto": "BIGINT", "cantidad": "NUMERIC"}
+        )
+
+        query = text(f"""
+            UPDATE productos_terminados pt
+            SET stock_actual = pt.stock_actual + v.cantidad
+            FROM (VALUES {values_sql}) AS v(id_producto, cantidad)
+            WHERE pt.id_producto = v.id_producto
+            RETURNING pt.id_producto, pt.stock_actual
         """)
-        
-        result = db.execute(query, {
-            "cantidad": float(cantidad),
-            "id_producto": id_producto
-        })
-        
-        row = result.fetchone()
-        return Decimal(str(row.stock_actual)) if row else Decimal('0')
 
-    def crear_movimiento_producto_terminado(
+        return {
+            row.id_producto: Decimal(str(row.stock_actual))
+            for row in db.execute(query, params).fetchall()
+        }
+
+    def crear_movimientos_producto_terminado(
         self,
         db: Session,
-        id_producto: int,
-        cantidad: Decimal,
-        stock_anterior: Decimal,
-        stock_nuevo: Decimal,
-        id_user: int,
-        id_produccion: int,
-        observaciones: str
+        movimientos: List[Dict[str, Any]],
+        id_user: int
     ) -> int:
         """
-        Crea un movimiento de ENTRADA en productos_terminados (Kardex).
-        Retorna el id del movimiento creado.
+        Crea los movimientos de ENTRADA (Kardex) de varias producciones con un
+        bloque de números y un único INSERT multi-fila. Cada movimiento trae
+        id_producto, cantidad, id_produccion y observaciones.
+        Retorna la cantidad de movimientos.
         """
-        # Generar número de movimiento para productos terminados
-        fecha_actual = datetime.datetime.now()
-        prefijo = f"MPT-{fecha_actual.strftime('%Y%m')}-"
-        
-        query_ultimo = text("""
-            SELECT numero_movimiento 
-            FROM movimiento_productos_terminados 
-            WHERE numero_movimiento LIKE :prefijo
-            ORDER BY id_movimiento DESC
-            LIMIT 1
-        """)
-        
-        result = db.execute(query_ultimo, {"prefijo": f"{prefijo}%"})
-        ultimo = result.fetchone()
-        
-        if ultimo:
-            ultimo_numero = int(ultimo.numero_movimiento.split('-')[-1])
-            nuevo_numero = ultimo_numero + 1
-        else:
-            nuevo_numero = 1
-        
-        numero_movimiento = f"{prefijo}{nuevo_numero:05d}"
-        
-        query = text("""
+        if not movimientos:
+            return 0
+
+        numeros = self.numeracion.reservar_numeros(db, SerieDocumentoEnum.MOVIMIENTO_PRODUCTO, len(movimientos))
+
+        filas = [
+            {
+                "numero_movimiento": numero,
+                "id_producto": movimiento["id_producto"],
+                "cantidad": float(movimiento["cantidad"]),
+                "id_produccion": movimiento["id_produccion"],
+                "observaciones": movimiento["observaciones"]
+            }
+            for numero, movimiento in zip(numeros, movimientos)
+        ]
+        values_sql, params = construir_values(
+            filas,
+            ["numero_movimiento", "id_producto", "cantidad", "id_produccion", "observaciones"],
+            casts={"id_producto": "BIGINT", "cantidad": "NUMERIC", "id_produccion": "BIGINT", "observaciones": "TEXT"}
+        )
+
+        query = text(f"""
             INSERT INTO movimiento_productos_terminados (
                 numero_movimiento,
                 id_producto,
@@ -465,61 +553,50 @@ class ProduccionRepository(ProduccionRepositoryInterface):
                 observaciones,
                 anulado
             )
-            VALUES (
-                :numero_movimiento,
-                :id_producto,
+            SELECT
+                v.numero_movimiento,
+                v.id_producto,
                 'ENTRADA',
                 'PRODUCCION',
-                :cantidad,
+                v.cantidad,
                 0,
                 :fecha_movimiento,
                 :id_user,
-                :id_produccion,
+                v.id_produccion,
                 'PRODUCCION',
-                :observaciones,
+                v.observaciones,
                 false
-            )
-            RETURNING id_movimiento
+            FROM (VALUES {values_sql})
+                AS v(numero_movimiento, id_producto, cantidad, id_produccion, observaciones)
         """)
-        
-        result = db.execute(query, {
-            "numero_movimiento": numero_movimiento,
-            "id_producto": id_producto,
-            "cantidad": float(cantidad),
-            "fecha_movimiento": datetime.datetime.now(),
-            "id_user": id_user,
-            "id_produccion": id_produccion,
-            "observaciones": observaciones
-        })
-        
-        row = result.fetchone()
-        return row.id_movimiento if row else None
 
-    def get_stock_producto_terminado(self, db: Session, id_producto: int) -> Decimal:
-        """
-        Obtiene el stock actual de un producto terminado.
-        """
-        query = text("""
-            SELECT stock_actual
-            FROM productos_terminados
-            WHERE id_producto = :id_producto
-        """)
-        
-        result = db.execute(query, {"id_producto": id_producto})
-        row = result.fetchone()
-        return Decimal(str(row.stock_actual)) if row else Decimal('0')
+        params.update({"fecha_movimiento": ahora_negocio(), "id_user": id_user})
+        db.execute(query, params)
+
+        return len(movimientos)
 
     def get_historial_producciones(
         self, 
         db: Session, 
         limit: int = 50, 
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[Cursor] = None
     ) -> List[Dict[str, Any]]:
         """
         Obtiene el historial de producciones con información de receta.
         Ordenado por fecha descendente.
+
+        Con `cursor` (fecha_produccion, id_produccion) continúa después de esa
+        producción: la página se lee directamente de idx_produccion_fecha_id,
+        sin recorrer las anteriores como hace OFFSET.
         """
-        query = text("""
+        filtro_cursor = ""
+        params: Dict[str, Any] = {"limit": limit, "offset": offset}
+        if cursor is not None:
+            filtro_cursor = "WHERE (p.fecha_produccion, p.id_produccion) < (:cursor_fecha, :cursor_id)"
+            params["cursor_fecha"], params["cursor_id"] = cursor
+
+        query = text(f"""
             SELECT 
                 p.id_produccion,
                 p.numero_produccion,
@@ -539,11 +616,12 @@ class ProduccionRepository(ProduccionRepositoryInterface):
             INNER JOIN recetas r ON p.id_receta = r.id_receta
             INNER JOIN productos_terminados pt ON r.id_producto = pt.id_producto
             INNER JOIN usuario u ON p.id_user = u.id_user
-            ORDER BY p.fecha_produccion DESC
+            {filtro_cursor}
+            ORDER BY p.fecha_produccion DESC, p.id_produccion DESC
             LIMIT :limit OFFSET :offset
         """)
         
-        result = db.execute(query, {"limit": limit, "offset": offset})
+        result = db.execute(query, params)
         rows = result.fetchall()
         
         return [
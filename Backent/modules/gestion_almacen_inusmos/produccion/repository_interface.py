@@ -8,7 +8,7 @@ from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from decimal import Decimal
 
-from modules.gestion_almacen_inusmos.movimiento_insumos.model import MovimientoInsumo
+from utils.paginacion import Cursor
 
 
 class ProduccionRepositoryInterface(ABC):
@@ -20,94 +20,64 @@ class ProduccionRepositoryInterface(ABC):
         pass
 
     @abstractmethod
-    def get_stock_disponible_insumo(self, db: Session, id_insumo: int) -> Decimal:
-        """Obtiene el stock total disponible de un insumo."""
+    def get_recetas_con_insumos(self, db: Session, ids_receta: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Obtiene varias recetas activas con sus insumos, indexadas por id_receta."""
         pass
 
     @abstractmethod
-    def get_lotes_fefo(self, db: Session, id_insumo: int) -> List[Dict[str, Any]]:
-        """Obtiene los lotes de un insumo ordenados por FEFO."""
+    def get_stock_disponible_insumos(self, db: Session, ids_insumo: List[int]) -> Dict[int, Decimal]:
+        """Obtiene el stock disponible de varios insumos en una consulta."""
         pass
 
     @abstractmethod
-    def descontar_lote(self, db: Session, id_ingreso_detalle: int, cantidad_a_descontar: Decimal) -> Decimal:
-        """Descuenta cantidad de un lote específico."""
+    def get_lotes_fefo_insumos(self, db: Session, ids_insumo: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """Obtiene y bloquea los lotes FEFO de varios insumos en una consulta."""
         pass
 
     @abstractmethod
-    def crear_movimiento_salida(
-        self,
-        db: Session,
-        id_insumo: int,
-        id_lote: int,
-        cantidad: Decimal,
-        stock_anterior: Decimal,
-        stock_nuevo: Decimal,
-        id_user: int,
-        id_documento_origen: int,
-        observaciones: str
-    ) -> MovimientoInsumo:
-        """Crea un movimiento de salida de insumo."""
+    def descontar_lotes(self, db: Session, consumos: List[Dict[str, Any]]) -> None:
+        """Descuenta varios lotes en un solo UPDATE."""
         pass
 
     @abstractmethod
-    def descontar_insumo_fefo(
+    def crear_movimientos_salida(
         self,
         db: Session,
-        id_insumo: int,
-        cantidad_requerida: Decimal,
+        consumos: List[Dict[str, Any]],
         id_user: int,
-        id_receta: int,
-        nombre_receta: str
+        id_documento_origen: Optional[int] = None,
+        observaciones: Optional[str] = None
     ) -> int:
-        """Descuenta la cantidad requerida de un insumo usando FEFO."""
+        """Crea los movimientos de SALIDA de varios lotes en un solo INSERT."""
         pass
 
     @abstractmethod
-    def crear_produccion(
+    def crear_producciones(
         self,
         db: Session,
-        id_receta: int,
-        cantidad_batch: Decimal,
-        id_user: int,
-        observaciones: str = None
-    ) -> Dict[str, Any]:
-        """Crea un registro de producción."""
-        pass
-
-    @abstractmethod
-    def get_id_producto_de_receta(self, db: Session, id_receta: int) -> Optional[int]:
-        """Obtiene el id_producto asociado a una receta."""
+        producciones: List[Dict[str, Any]],
+        id_user: int
+    ) -> List[Dict[str, Any]]:
+        """Crea varios registros de producción en un solo INSERT."""
         pass
 
     @abstractmethod
-    def incrementar_stock_producto_terminado(
+    def incrementar_stock_productos_terminados(
         self,
         db: Session,
-        id_producto: int,
-        cantidad: Decimal
-    ) -> Decimal:
-        """Incrementa el stock de un producto terminado."""
-        pass
-
-    @abstractmethod
-    def get_stock_producto_terminado(self, db: Session, id_producto: int) -> Decimal:
-        """Obtiene el stock actual de un producto terminado."""
+        cantidades: Dict[int, Decimal]
+    ) -> Dict[int, Decimal]:
+        """Incrementa el stock de varios productos terminados en un solo UPDATE."""
         pass
 
     @abstractmethod
-    def crear_movimiento_producto_terminado(
+    def crear_movimientos_producto_terminado(
         self,
         db: Session,
-        id_producto: int,
-        cantidad: Decimal,
-        stock_anterior: Decimal,
-        stock_nuevo: Decimal,
-        id_user: int,
-        id_produccion: int,
-        observaciones: str
+        movimientos: List[Dict[str, Any]],
+        id_user: int
     ) -> int:
-        """Crea un movimiento de entrada de producto terminado."""
+        """Crea los movimientos de entrada de varias producciones en un solo INSERT."""
         pass
 
     @abstractmethod
@@ -115,7 +85,8 @@ class ProduccionRepositoryInterface(ABC):
         self,
         db: Session,
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[Cursor] = None
     ) -> List[Dict[str, Any]]:
         """Obtiene el historial de producción con filtros."""
         pass
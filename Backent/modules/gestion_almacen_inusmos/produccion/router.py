@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from typing import Optional
 from database import get_db
 from modules.gestion_almacen_inusmos.produccion.schemas import (
     ProduccionRequest,
+    ProduccionLoteRequest,
+    ProduccionLoteResponse,
     ValidacionStockResponse,
     ProduccionResponse,
     HistorialProduccionResponse,
@@ -71,17 +74,50 @@ def ejecutar_produccion(request: ProduccionRequest, db: Session = Depends(get_db
         return api_response_bad_request(str(e))
 
 
+@router.post("/ejecutar-lote", response_model=ProduccionLoteResponse)
+def ejecutar_produccion_lote(request: ProduccionLoteRequest, db: Session = Depends(get_db)):
+    """
+    Ejecuta un plan de producción completo (varias recetas) en una sola transacción.
+    
+    - **items**: Lista de recetas con su cantidad_batch (y observaciones opcionales)
+    - **id_user**: ID del usuario que ejecuta la producción
+    - **modo**: TODO_O_NADA (default) o MEJOR_ESFUERZO
+    - **observaciones**: Observaciones por defecto para todas las producciones
+    
+    Proceso:
+    1. Suma la demanda de insumos de todo el plan y la valida una sola vez
+    2. Descuenta insumos de los lotes en orden FEFO (en lote)
+    3. Registra una producción por receta con sus movimientos en el Kardex
+    
+    Retorna el resultado de cada receta. En TODO_O_NADA, si el plan no puede
+    ejecutarse completo no se registra nada y se responde 400 con el detalle.
+    """
+    try:
+        resultado = service.ejecutar_produccion_lote(db, request)
+        if resultado.total_ejecutadas == 0:
+            return api_response_bad_request(resultado)
+        return api_response_ok(resultado)
+    except HTTPException as e:
+        return api_response_bad_request(str(e.detail))
+    except Exception as e:
+        return api_response_bad_request(str(e))
+
+
 @router.get("/historial", response_model=HistorialProduccionResponse)
 def get_historial_producciones(
     limit: int = Query(50, ge=1, le=100, description="Cantidad de registros a obtener"),
     offset: int = Query(0, ge=0, description="Cantidad de registros a saltar"),
+    after: Optional[str] = Query(None, description="Cursor '<fecha ISO>,<id>' (campo `siguiente` de la página anterior)"),
+    con_total: bool = Query(False, description="Incluir total aproximado (estimación del planificador)"),
     db: Session = Depends(get_db)
 ):
     """
     Obtiene el historial de producciones realizadas.
     
     - **limit**: Cantidad máxima de registros a retornar (default: 50, max: 100)
-    - **offset**: Cantidad de registros a saltar para paginación
+    - **after**: Cursor de la página anterior (`siguiente`); cada página cuesta lo mismo
+    - **offset**: Cantidad de registros a saltar (compatibilidad; preferir `after`)
+    - **con_total**: Incluye `total_aproximado` de producciones
     
     Retorna lista de producciones ordenadas por fecha descendente, con:
     - Datos de la producción (número, fecha, cantidad)
@@ -90,8 +126,10 @@ def get_historial_producciones(
     - Usuario que ejecutó la producción
     """
     try:
-        historial = service.get_historial_producciones(db, limit, offset)
+        historial = service.get_historial_producciones(db, limit, offset, after, con_total)
         return api_response_ok(historial)
+    except HTTPException as e:
+        return api_response_bad_request(str(e.detail))
     except Exception as e:
         return api_response_bad_request(str(e))
 
@@ -1,7 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from decimal import Decimal
 import datetime
+from enums.modo_ejecucion_lote import ModoEjecucionLoteEnum
 
 
 # ===== Request Schemas =====
@@ -17,6 +18,26 @@ class ProduccionRequest(BaseModel):
     observaciones: Optional[str] = None
 
 
+class ProduccionLoteItemRequest(BaseModel):
+    """Una receta del plan de producción"""
+    id_receta: int
+    cantidad_batch: Decimal = Field(..., gt=0)
+    observaciones: Optional[str] = None
+
+
+class ProduccionLoteRequest(BaseModel):
+    """
+    Request para ejecutar un plan de producción completo (varias recetas).
+    
+    - TODO_O_NADA: si alguna receta no puede producirse, no se registra ninguna.
+    - MEJOR_ESFUERZO: se ejecutan en orden las recetas que alcancen con el stock.
+    """
+    items: List[ProduccionLoteItemRequest] = Field(..., min_length=1)
+    id_user: int
+    modo: ModoEjecucionLoteEnum = ModoEjecucionLoteEnum.TODO_O_NADA
+    observaciones: Optional[str] = None
+
+
 # ===== Response Schemas para Validación =====
 
 class InsumoRequeridoResponse(BaseModel):
@@ -70,6 +91,57 @@ class ProduccionResponse(BaseModel):
         from_attributes = True
 
 
+# ===== Response Schemas para Ejecución en Lote =====
+
+class ResultadoProduccionLoteItem(BaseModel):
+    """Resultado de una receta dentro del plan de producción"""
+    posicion: int  # Índice del item en el request
+    id_receta: int
+    nombre_receta: Optional[str] = None
+    cantidad_batch: Decimal
+    success: bool
+    mensaje: str
+    id_produccion: Optional[int] = None
+    numero_produccion: Optional[str] = None
+    cantidad_producida: Decimal = Decimal('0')
+    total_movimientos_creados: int = 0
+
+    class Config:
+        from_attributes = True
+
+
+class DemandaInsumoLoteResponse(BaseModel):
+    """Demanda total de un insumo sumando todas las recetas del plan"""
+    id_insumo: int
+    codigo_insumo: str
+    nombre_insumo: str
+    unidad_medida: str
+    cantidad_requerida: Decimal
+    stock_disponible: Decimal
+    es_suficiente: bool
+
+    class Config:
+        from_attributes = True
+
+
+class ProduccionLoteResponse(BaseModel):
+    """
+    Respuesta de la ejecución de un plan de producción.
+    success es True solo si se ejecutaron todas las recetas.
+    """
+    success: bool
+    modo: ModoEjecucionLoteEnum
+    mensaje: str
+    total_recetas: int
+    total_ejecutadas: int
+    total_fallidas: int
+    resultados: List[ResultadoProduccionLoteItem] = []
+    insumos: List[DemandaInsumoLoteResponse] = []
+
+    class Config:
+        from_attributes = True
+
+
 # ===== Response Schemas para Historial =====
 
 class HistorialProduccionItem(BaseModel):
@@ -97,6 +169,9 @@ class HistorialProduccionResponse(BaseModel):
     """Respuesta del historial de producciones"""
     total: int
     producciones: List[HistorialProduccionItem]
+    siguiente: Optional[str] = None  # cursor para `after` de la próxima página
+    hay_mas: bool = False
+    total_aproximado: Optional[int] = None
 
     class Config:
         from_attributes = True
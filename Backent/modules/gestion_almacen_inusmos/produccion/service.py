@@ -1,10 +1,14 @@
-from typing import List
+from typing import Any, Dict, List, Optional
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from decimal import Decimal
 from modules.gestion_almacen_inusmos.produccion.repository import ProduccionRepository
 from modules.gestion_almacen_inusmos.produccion.schemas import (
     ProduccionRequest,
+    ProduccionLoteRequest,
+    ProduccionLoteResponse,
+    ResultadoProduccionLoteItem,
+    DemandaInsumoLoteResponse,
     ValidacionStockResponse,
     InsumoRequeridoResponse,
     ProduccionResponse,
@@ -17,6 +21,9 @@ from modules.gestion_almacen_inusmos.produccion.schemas import (
     MovimientoProductoTerminado,
     InsumoConsumidoTrazabilidad
 )
+from enums.modo_ejecucion_lote import ModoEjecucionLoteEnum
+from modules.reportes.cache import invalidar_reportes
+from utils.paginacion import cortar_pagina, leer_cursor, total_aproximado
 from .service_interface import ProduccionServiceInterface
 
 
@@ -29,6 +36,23 @@ class ProduccionService(ProduccionServiceInterface):
     def __init__(self):
         self.repository = ProduccionRepository()
 
+    @staticmethod
+    def _calcular_requeridos(insumos: List[Dict[str, Any]], cantidad_batch: Decimal) -> Dict[int, Decimal]:
+        """
+        Calcula la cantidad requerida de cada insumo para un batch:
+        cantidad_por_rendimiento × cantidad_batch (los opcionales se omiten).
+        """
+        requeridos: Dict[int, Decimal] = {}
+        for insumo in insumos:
+            if insumo["es_opcional"]:
+                continue
+            cantidad_por_unidad = Decimal(str(insumo["cantidad_por_rendimiento"]))
+            requeridos[insumo["id_insumo"]] = (
+                requeridos.get(insumo["id_insumo"], Decimal("0"))
+                + cantidad_por_unidad * cantidad_batch
+            )
+        return requeridos
+
     def validar_stock_receta(
         self, 
         db: Session, 
@@ -61,6 +85,11 @@ class ProduccionService(ProduccionServiceInterface):
         # Calcular unidades totales a producir
         unidades_totales = cantidad_batch * rendimiento
         
+        # Stock de todos los insumos obligatorios en una sola consulta
+        stock_por_insumo = self.repository.get_stock_disponible_insumos(
+            db, [insumo["id_insumo"] for insumo in insumos if not insumo["es_opcional"]]
+        )
+        
         # Validar cada insumo
         insumos_validados: List[InsumoRequeridoResponse] = []
         puede_producir = True
@@ -75,8 +104,7 @@ class ProduccionService(ProduccionServiceInterface):
             cantidad_por_unidad = Decimal(str(insumo["cantidad_por_rendimiento"]))
             cantidad_requerida = cantidad_por_unidad * cantidad_batch
             
-            # Obtener stock disponible
-            stock_disponible = self.repository.get_stock_disponible_insumo(db, insumo["id_insumo"])
+            stock_disponible = stock_por_insumo[insumo["id_insumo"]]
             
             # Verificar si es suficiente
             es_suficiente = stock_disponible >= cantidad_requerida
@@ -112,143 +140,330 @@ class ProduccionService(ProduccionServiceInterface):
 
     def ejecutar_produccion(self, db: Session, request: ProduccionRequest) -> ProduccionResponse:
         """
-        Ejecuta la producción descontando insumos en orden FEFO.
+        Ejecuta la producción de una receta descontando insumos en orden FEFO.
         
-        Pasos atómicos:
-        1. Valida stock suficiente para todos los insumos
-        2. Crea registro en tabla 'produccion' (cabecera)
-        3. Descuenta de lotes FEFO y crea movimientos de SALIDA
-        4. Incrementa stock de producto terminado
-        5. Crea movimiento de ENTRADA en productos terminados
+        Es un plan de una sola receta en modo TODO_O_NADA (ver ejecutar_produccion_lote):
+        la receta se carga una vez, el stock se valida sobre los lotes FEFO ya
+        bloqueados y las escrituras son las mismas del plan.
         
         Si falla cualquier paso, revierte toda la transacción.
         """
-        # Primero validar stock
-        validacion = self.validar_stock_receta(db, request.id_receta, request.cantidad_batch)
+        try:
+            plan = self._ejecutar_plan(db, [request], ModoEjecucionLoteEnum.TODO_O_NADA, request.id_user)
+        except Exception as e:
+            # Revertir toda la transacción si hay error
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al ejecutar producción: {str(e)}. Se revirtieron todos los cambios."
+            )
         
-        if not validacion.puede_producir:
+        resultado = plan.resultados[0]
+        if not resultado.success:
+            if resultado.nombre_receta is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Receta no encontrada o no está activa"
+                )
+            insumos_faltantes = [ins.nombre_insumo for ins in plan.insumos if not ins.es_suficiente]
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=validacion.mensaje
+                detail=f"Stock insuficiente para los siguientes insumos: {', '.join(insumos_faltantes)}"
             )
         
-        # Obtener receta para el nombre
-        receta_data = self.repository.get_receta_con_insumos(db, request.id_receta)
-        receta = receta_data["receta"]
-        insumos = receta_data["insumos"]
+        return ProduccionResponse(
+            success=True,
+            mensaje=f"Producción {resultado.numero_produccion} ejecutada correctamente. Se produjeron {resultado.cantidad_producida} unidades de {resultado.nombre_receta}",
+            id_produccion=resultado.id_produccion,
+            numero_produccion=resultado.numero_produccion,
+            id_receta=request.id_receta,
+            nombre_receta=resultado.nombre_receta,
+            cantidad_batch=request.cantidad_batch,
+            cantidad_producida=resultado.cantidad_producida,
+            total_movimientos_creados=resultado.total_movimientos_creados
+        )
+
+    def ejecutar_produccion_lote(self, db: Session, request: ProduccionLoteRequest) -> ProduccionLoteResponse:
+        """
+        Ejecuta un plan de producción (varias recetas) en una sola transacción.
+        
+        Pasos:
+        1. Carga todas las recetas del plan (dos consultas)
+        2. Suma la demanda de insumos de todo el plan
+        3. Bloquea una sola vez los lotes FEFO de todos los insumos (snapshot de stock)
+        4. Reparte cada receta, en el orden del request, sobre ese snapshot en memoria
+        5. Registra producciones, salidas, stock y entradas de todo el plan con un
+           INSERT/UPDATE por tabla; descuenta todos los lotes con un UPDATE
         
+        Modos:
+        - TODO_O_NADA: si falta una receta o el stock no alcanza para el plan completo,
+          no se registra nada y se retorna el detalle de lo que faltó.
+        - MEJOR_ESFUERZO: se omiten las recetas que no alcancen con el stock que
+          dejaron las anteriores y se ejecutan las demás.
+        """
         try:
-            # PASO 1: Crear registro en tabla produccion
-            produccion_creada = self.repository.crear_produccion(
-                db=db,
-                id_receta=request.id_receta,
-                cantidad_batch=request.cantidad_batch,
-                id_user=request.id_user,
-                observaciones=request.observaciones
+            return self._ejecutar_plan(db, request.items, request.modo, request.id_user, request.observaciones)
+        except Exception as e:
+            # Revertir todo el plan si hay error inesperado
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al ejecutar el plan de producción: {str(e)}. Se revirtieron todos los cambios."
             )
+
+    def _ejecutar_plan(
+        self,
+        db: Session,
+        items: List[Any],
+        modo: ModoEjecucionLoteEnum,
+        id_user: int,
+        observaciones: Optional[str] = None
+    ) -> ProduccionLoteResponse:
+        """
+        Pasos de ejecutar_produccion_lote para los `items` (id_receta, cantidad_batch,
+        observaciones). No captura errores inesperados: cada llamador hace rollback.
+        """
+        todo_o_nada = modo == ModoEjecucionLoteEnum.TODO_O_NADA
+        total_recetas = len(items)
+        
+        recetas = self.repository.get_recetas_con_insumos(
+            db, sorted({item.id_receta for item in items})
+        )
+        
+        # Demanda por receta y demanda agregada del plan
+        requeridos_por_item: List[Dict[int, Decimal]] = []
+        demanda_total: Dict[int, Decimal] = {}
+        info_insumos: Dict[int, Dict[str, Any]] = {}
+        for item in items:
+            receta_data = recetas.get(item.id_receta)
+            if not receta_data:
+                requeridos_por_item.append({})
+                continue
             
-            id_produccion = produccion_creada["id_produccion"]
-            numero_produccion = produccion_creada["numero_produccion"]
-            
-            total_movimientos = 0
-            
-            # Calcular rendimiento y unidades totales
-            rendimiento = Decimal(str(receta["rendimiento_producto_terminado"]))
-            unidades_totales = request.cantidad_batch * rendimiento
-            
-            # PASO 2: Descontar cada insumo en orden FEFO
-            for insumo in insumos:
-                # Saltar opcionales
-                if insumo["es_opcional"]:
-                    continue
-                
-                # Calcular cantidad requerida: cantidad_por_rendimiento × cantidad_batch
-                cantidad_por_unidad = Decimal(str(insumo["cantidad_por_rendimiento"]))
-                cantidad_requerida = cantidad_por_unidad * request.cantidad_batch
-                
-                # Descontar usando FEFO y crear movimientos
-                # AHORA usa id_produccion como id_documento_origen
-                movimientos_creados = self.repository.descontar_insumo_fefo(
-                    db=db,
-                    id_insumo=insumo["id_insumo"],
-                    cantidad_requerida=cantidad_requerida,
-                    id_user=request.id_user,
-                    id_receta=id_produccion,  # Ahora usamos id_produccion
-                    nombre_receta=receta["nombre_receta"]
+            requeridos = self._calcular_requeridos(receta_data["insumos"], item.cantidad_batch)
+            requeridos_por_item.append(requeridos)
+            for id_insumo, cantidad in requeridos.items():
+                demanda_total[id_insumo] = demanda_total.get(id_insumo, Decimal("0")) + cantidad
+            for insumo in receta_data["insumos"]:
+                info_insumos.setdefault(insumo["id_insumo"], insumo)
+        
+        # Snapshot único: lotes bloqueados de todos los insumos del plan
+        lotes_por_insumo = self.repository.get_lotes_fefo_insumos(db, list(demanda_total.keys()))
+
+        insumos_response = []
+        for id_insumo in sorted(demanda_total):
+            stock_disponible = sum(
+                (lote["cantidad_restante"] for lote in lotes_por_insumo.get(id_insumo, [])),
+                Decimal("0")
+            )
+            insumo = info_insumos[id_insumo]
+            insumos_response.append(DemandaInsumoLoteResponse(
+                id_insumo=id_insumo,
+                codigo_insumo=insumo["codigo_insumo"],
+                nombre_insumo=insumo["nombre_insumo"],
+                unidad_medida=insumo["unidad_medida"],
+                cantidad_requerida=demanda_total[id_insumo],
+                stock_disponible=stock_disponible,
+                es_suficiente=stock_disponible >= demanda_total[id_insumo]
+            ))
+
+        recetas_faltantes = [item.id_receta for item in items if item.id_receta not in recetas]
+        insumos_faltantes = [ins.nombre_insumo for ins in insumos_response if not ins.es_suficiente]
+
+        if todo_o_nada and (recetas_faltantes or insumos_faltantes):
+            # Nada que registrar: liberar los bloqueos y reportar el motivo
+            db.rollback()
+
+            if recetas_faltantes:
+                mensaje = f"Recetas no encontradas o inactivas: {', '.join(map(str, recetas_faltantes))}"
+            else:
+                mensaje = f"Stock insuficiente para el plan en los insumos: {', '.join(insumos_faltantes)}"
+
+            resultados = [
+                ResultadoProduccionLoteItem(
+                    posicion=posicion,
+                    id_receta=item.id_receta,
+                    nombre_receta=recetas[item.id_receta]["receta"]["nombre_receta"] if item.id_receta in recetas else None,
+                    cantidad_batch=item.cantidad_batch,
+                    success=False,
+                    mensaje=(
+                        "No ejecutada: el plan no puede producirse completo"
+                        if item.id_receta in recetas
+                        else "Receta no encontrada o no está activa"
+                    )
                 )
-                
-                total_movimientos += movimientos_creados
-            
-            # PASO 3: Incrementar stock de producto terminado
-            id_producto = self.repository.get_id_producto_de_receta(db, request.id_receta)
-            
-            if id_producto:
-                # Calcular cantidad producida (ya calculada como unidades_totales)
-                cantidad_producida = unidades_totales
-                
-                # Obtener stock anterior
-                stock_anterior = self.repository.get_stock_producto_terminado(db, id_producto)
-                
-                # Incrementar stock
-                stock_nuevo = self.repository.incrementar_stock_producto_terminado(
-                    db=db,
-                    id_producto=id_producto,
-                    cantidad=cantidad_producida
+                for posicion, item in enumerate(items)
+            ]
+
+            return ProduccionLoteResponse(
+                success=False,
+                modo=modo,
+                mensaje=f"{mensaje}. No se registró ninguna producción.",
+                total_recetas=total_recetas,
+                total_ejecutadas=0,
+                total_fallidas=total_recetas,
+                resultados=resultados,
+                insumos=insumos_response
+            )
+
+        lotes_por_id = {
+            lote["id_ingreso_detalle"]: lote
+            for lotes in lotes_por_insumo.values()
+            for lote in lotes
+        }
+        descuento_por_lote: Dict[int, Decimal] = {}
+        resultados: List[ResultadoProduccionLoteItem] = []
+        # Recetas que alcanzaron con el stock: (posición, item, receta, consumos)
+        planificadas = []
+
+        for posicion, item in enumerate(items):
+            receta_data = recetas.get(item.id_receta)
+            if not receta_data:
+                resultados.append(ResultadoProduccionLoteItem(
+                    posicion=posicion,
+                    id_receta=item.id_receta,
+                    cantidad_batch=item.cantidad_batch,
+                    success=False,
+                    mensaje="Receta no encontrada o no está activa"
+                ))
+                continue
+
+            receta = receta_data["receta"]
+
+            # Reparto sobre el snapshot; en MEJOR_ESFUERZO una receta sin stock se omite
+            try:
+                consumos = self.repository.asignar_lotes_fefo(lotes_por_insumo, requeridos_por_item[posicion])
+            except ValueError as e:
+                resultados.append(ResultadoProduccionLoteItem(
+                    posicion=posicion,
+                    id_receta=item.id_receta,
+                    nombre_receta=receta["nombre_receta"],
+                    cantidad_batch=item.cantidad_batch,
+                    success=False,
+                    mensaje=str(e)
+                ))
+                continue
+
+            # Reservar en el snapshot lo consumido por esta receta
+            for consumo in consumos:
+                lotes_por_id[consumo["id_lote"]]["cantidad_restante"] = consumo["stock_nuevo"]
+                descuento_por_lote[consumo["id_lote"]] = (
+                    descuento_por_lote.get(consumo["id_lote"], Decimal("0")) + consumo["cantidad"]
                 )
-                
-                # PASO 4: Crear movimiento de ENTRADA en productos terminados
-                self.repository.crear_movimiento_producto_terminado(
-                    db=db,
-                    id_producto=id_producto,
-                    cantidad=cantidad_producida,
-                    stock_anterior=stock_anterior,
-                    stock_nuevo=stock_nuevo,
-                    id_user=request.id_user,
-                    id_produccion=id_produccion,
-                    observaciones=f"Entrada por producción {numero_produccion} de {receta['nombre_receta']}"
+            planificadas.append((posicion, item, receta, consumos))
+
+        # Escrituras de todo el plan en lote: las sentencias no crecen con las recetas
+        producciones = self.repository.crear_producciones(
+            db,
+            [
+                {
+                    "id_receta": item.id_receta,
+                    "cantidad_batch": item.cantidad_batch,
+                    "observaciones": item.observaciones or observaciones
+                }
+                for _, item, _, _ in planificadas
+            ],
+            id_user
+        )
+
+        salidas: List[Dict[str, Any]] = []
+        entradas: List[Dict[str, Any]] = []
+        producido_por_producto: Dict[int, Decimal] = {}
+        for (posicion, item, receta, consumos), produccion in zip(planificadas, producciones):
+            id_produccion = produccion["id_produccion"]
+            numero_produccion = produccion["numero_produccion"]
+
+            salidas.extend(
+                {
+                    **consumo,
+                    "id_documento_origen": id_produccion,
+                    "observaciones": f"Salida por producción de receta: {receta['nombre_receta']}"
+                }
+                for consumo in consumos
+            )
+
+            cantidad_producida = Decimal('0')
+            if receta["id_producto"]:
+                rendimiento = Decimal(str(receta["rendimiento_producto_terminado"]))
+                cantidad_producida = item.cantidad_batch * rendimiento
+                producido_por_producto[receta["id_producto"]] = (
+                    producido_por_producto.get(receta["id_producto"], Decimal("0")) + cantidad_producida
                 )
-            else:
-                cantidad_producida = Decimal('0')
-            
-            # Commit de toda la transacción
-            db.commit()
-            
-            # Resetear contador de movimientos
-            self.repository._reset_contador_movimientos()
-            
-            return ProduccionResponse(
+                entradas.append({
+                    "id_producto": receta["id_producto"],
+                    "cantidad": cantidad_producida,
+                    "id_produccion": id_produccion,
+                    "observaciones": f"Entrada por producción {numero_produccion} de {receta['nombre_receta']}"
+                })
+
+            resultados.append(ResultadoProduccionLoteItem(
+                posicion=posicion,
+                id_receta=item.id_receta,
+                nombre_receta=receta["nombre_receta"],
+                cantidad_batch=item.cantidad_batch,
                 success=True,
-                mensaje=f"Producción {numero_produccion} ejecutada correctamente. Se produjeron {cantidad_producida} unidades de {receta['nombre_receta']}",
+                mensaje=f"Producción {numero_produccion} ejecutada correctamente",
                 id_produccion=id_produccion,
                 numero_produccion=numero_produccion,
-                id_receta=request.id_receta,
-                nombre_receta=receta["nombre_receta"],
-                cantidad_batch=request.cantidad_batch,
                 cantidad_producida=cantidad_producida,
-                total_movimientos_creados=total_movimientos
-            )
-            
-        except Exception as e:
-            # Resetear contador de movimientos en caso de error
-            self.repository._reset_contador_movimientos()
-            
-            # Revertir toda la transacción si hay error
+                total_movimientos_creados=len(consumos)
+            ))
+        resultados.sort(key=lambda resultado: resultado.posicion)
+
+        self.repository.crear_movimientos_salida(db=db, consumos=salidas, id_user=id_user)
+        self.repository.incrementar_stock_productos_terminados(db, producido_por_producto)
+        self.repository.crear_movimientos_producto_terminado(db, entradas, id_user)
+
+        # Un solo UPDATE para todos los lotes tocados por el plan
+        self.repository.descontar_lotes(
+            db,
+            [
+                {"id_lote": id_lote, "cantidad": cantidad}
+                for id_lote, cantidad in sorted(descuento_por_lote.items())
+            ]
+        )
+
+        total_ejecutadas = sum(1 for r in resultados if r.success)
+        if total_ejecutadas:
+            db.commit()
+            invalidar_reportes()
+        else:
             db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error al ejecutar producción: {str(e)}. Se revirtieron todos los cambios."
-            )
+
+        return ProduccionLoteResponse(
+            success=total_ejecutadas == total_recetas,
+            modo=modo,
+            mensaje=f"Se ejecutaron {total_ejecutadas} de {total_recetas} recetas del plan",
+            total_recetas=total_recetas,
+            total_ejecutadas=total_ejecutadas,
+            total_fallidas=total_recetas - total_ejecutadas,
+            resultados=resultados,
+            insumos=insumos_response
+        )
+
 
     def get_historial_producciones(
         self, 
         db: Session, 
         limit: int = 50, 
-        offset: int = 0
+        offset: int = 0,
+        after: Optional[str] = None,
+        con_total: bool = False
     ) -> HistorialProduccionResponse:
         """
         Obtiene el historial de producciones realizadas.
+
+        Para recorrer el historial usar `after` con el campo `siguiente` de la
+        página anterior (paginación por cursor); `offset` se mantiene por
+        compatibilidad.
         """
-        producciones = self.repository.get_historial_producciones(db, limit, offset)
+        # Una fila extra indica si hay página siguiente
+        producciones = self.repository.get_historial_producciones(
+            db, limit + 1, offset, leer_cursor(after)
+        )
+        producciones, siguiente, hay_mas = cortar_pagina(
+            producciones, limit, lambda p: (p["fecha_produccion"], p["id_produccion"])
+        )
         
         items = [
             HistorialProduccionItem(
@@ -272,7 +487,10 @@ class ProduccionService(ProduccionServiceInterface):
         
         return HistorialProduccionResponse(
             total=len(items),
-            producciones=items
+            producciones=items,
+            siguiente=siguiente,
+            hay_mas=hay_mas,
+            total_aproximado=total_aproximado(db, "SELECT 1 FROM produccion") if con_total else None
         )
 
     def get_trazabilidad_produccion(
@@ -4,11 +4,14 @@ Define el contrato para la lógica de negocio del módulo de producción.
 """
 
 from abc import ABC, abstractmethod
+from typing import Optional
 from sqlalchemy.orm import Session
 from decimal import Decimal
 
 from .schemas import (
     ProduccionRequest,
+    ProduccionLoteRequest,
+    ProduccionLoteResponse,
     ValidacionStockResponse,
     ProduccionResponse,
     HistorialProduccionResponse,
@@ -38,12 +41,23 @@ class ProduccionServiceInterface(ABC):
         """Ejecuta la producción descontando insumos en orden FEFO."""
         pass
 
+    @abstractmethod
+    def ejecutar_produccion_lote(
+        self,
+        db: Session,
+        request: ProduccionLoteRequest
+    ) -> ProduccionLoteResponse:
+        """Ejecuta varias recetas en una transacción validando la demanda agregada una sola vez."""
+        pass
+
     @abstractmethod
     def get_historial_producciones(
         self,
         db: Session,
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        after: Optional[str] = None,
+        con_total: bool = False
     ) -> HistorialProduccionResponse:
         """Obtiene el historial de producciones realizadas."""
         pass
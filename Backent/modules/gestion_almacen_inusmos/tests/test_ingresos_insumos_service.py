@@ -2,6 +2,8 @@
 Tests unitarios para IngresoProductoService - Lógica de negocio de ingresos.
 Usa mocks para simular el repositorio y la base de datos.
 """
+import io
+import datetime
 import pytest
 from decimal import Decimal
 from unittest.mock import Mock, patch
@@ -9,7 +11,8 @@ from fastapi import HTTPException
 from modules.gestion_almacen_inusmos.ingresos_insumos.service import IngresoProductoService
 from modules.gestion_almacen_inusmos.ingresos_insumos.schemas import (
     IngresoProductoCreate,
-    IngresoProductoUpdate
+    IngresoProductoUpdate,
+    IngresoImportacionCabecera
 )
 
 
@@ -328,3 +331,197 @@ class TestIngresoProductoServiceLotesFEFO:
             assert resultado.total_cantidad_restante == Decimal("0")
             assert resultado.cantidad_lotes == 0
             assert len(resultado.lotes) == 0
+
+
+class TestIngresoProductoServiceImportacion:
+    """Tests para la importación masiva de ingresos (CSV del proveedor)."""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup ejecutado antes de cada test."""
+        self.service = IngresoProductoService()
+        self.cabecera = IngresoImportacionCabecera(
+            numero_ingreso="ING-IMP-001",
+            numero_documento="GR-001",
+            tipo_documento="GUIA_REMISION",
+            fecha_documento=datetime.datetime(2026, 10, 1),
+            id_user=1,
+            id_proveedor=1
+        )
+        self.lotes_recibidos = []
+        
+        def importar(db, cabecera, lotes):
+            # Consume los lotes como el repositorio real
+            self.lotes_recibidos = list(lotes)
+            lineas = [linea for lote in self.lotes_recibidos for linea in lote]
+            ingreso = Mock(id_ingreso=10, monto_total=sum(l["subtotal"] for l in lineas))
+            return ingreso, len(lineas)
+        
+        self.patch_importar = patch.object(self.service.repository, 'importar', side_effect=importar)
+        self.patch_insumos = patch.object(
+            self.service.repository, 'get_insumos_por_codigo', return_value={"HAR001": 1, "AZU001": 2}
+        )
+        self.patch_importar.start()
+        self.patch_insumos.start()
+        yield
+        self.patch_importar.stop()
+        self.patch_insumos.stop()
+    
+    @staticmethod
+    def _csv(*lineas):
+        return io.BytesIO(("codigo_insumo,cantidad,precio_unitario,fecha_vencimiento\n" + "\n".join(lineas)).encode())
+    
+    def test_importar_csv_valido(self, mock_db_session):
+        """
+        Test: Importar un CSV sin errores.
+        
+        Resultado esperado:
+        - Se confirma la transacción
+        - Monto total = suma de cantidad × precio
+        """
+        # Act
+        resultado = self.service.importar(
+            mock_db_session,
+            self._csv("HAR001,10,2.50,2026-12-31", "AZU001,4,1.25,"),
+            "csv",
+            self.cabecera
+        )
+        
+        # Assert
+        assert resultado.importado is True
+        assert resultado.id_ingreso == 10
+        assert resultado.lineas_importadas == 2
+        assert resultado.lineas_con_error == 0
+        assert resultado.monto_total == Decimal("30.00")
+        mock_db_session.commit.assert_called_once()
+        mock_db_session.rollback.assert_not_called()
+    
+    def test_importar_con_errores_descarta_todo(self, mock_db_session):
+        """
+        Test: CSV con líneas inválidas sin importación parcial.
+        
+        Resultado esperado:
+        - Se descarta el ingreso (rollback)
+        - Reporte con el número de fila de cada error
+        """
+        # Act
+        resultado = self.service.importar(
+            mock_db_session,
+            self._csv("HAR001,10,2.50,", "XXX999,1,1,", "AZU001,0,1,"),
+            "csv",
+            self.cabecera
+        )
+        
+        # Assert
+        assert resultado.importado is False
+        assert resultado.id_ingreso is None
+        assert resultado.lineas_importadas == 0
+        assert resultado.lineas_con_error == 2
+        assert [e.linea for e in resultado.errores] == [3, 4]
+        assert resultado.errores[0].codigo_insumo == "XXX999"
+        mock_db_session.rollback.assert_called_once()
+        mock_db_session.commit.assert_not_called()
+    
+    def test_importar_parcial_importa_lineas_validas(self, mock_db_session):
+        """
+        Test: CSV con líneas inválidas e importación parcial.
+        
+        Resultado esperado:
+        - Se importan solo las líneas válidas y se confirma la transacción
+        """
+        # Act
+        resultado = self.service.importar(
+            mock_db_session,
+            self._csv("HAR001,10,2.50,", "XXX999,1,1,", "AZU001,abc,1,"),
+            "csv",
+            self.cabecera,
+            parcial=True
+        )
+        
+        # Assert
+        assert resultado.importado is True
+        assert resultado.lineas_importadas == 1
+        assert resultado.lineas_con_error == 2
+        mock_db_session.commit.assert_called_once()
+    
+    def test_importar_en_lotes(self, mock_db_session):
+        """
+        Test: Archivo más grande que un lote.
+        
+        Resultado esperado:
+        - Las líneas llegan al repositorio en lotes de TAMANO_LOTE_IMPORTACION
+        """
+        # Arrange
+        archivo = self._csv(*["HAR001,1,1,"] * 2500)
+        
+        # Act
+        resultado = self.service.importar(mock_db_session, archivo, "csv", self.cabecera)
+        
+        # Assert
+        assert resultado.lineas_importadas == 2500
+        assert [len(lote) for lote in self.lotes_recibidos] == [1000, 1000, 500]
+    
+    def test_importar_encabezado_incompleto(self, mock_db_session):
+        """
+        Test: CSV sin la columna de precio.
+        
+        Resultado esperado:
+        - Lanza HTTPException 400 y descarta la transacción
+        """
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            self.service.importar(
+                mock_db_session, io.BytesIO(b"codigo,cantidad\nHAR001,1\n"), "csv", self.cabecera
+            )
+        
+        assert exc_info.value.status_code == 400
+        assert "precio_unitario" in exc_info.value.detail
+        mock_db_session.rollback.assert_called_once()
+    
+    def test_importar_orden_compra_inexistente(self, mock_db_session):
+        """
+        Test: Cabecera vinculada a una orden de compra que no existe.
+        
+        Resultado esperado:
+        - Lanza HTTPException 404 sin leer el archivo
+        """
+        # Arrange
+        cabecera = self.cabecera.model_copy(update={"id_orden_compra": 99})
+        
+        with patch.object(self.service.repository, 'get_cantidades_orden', return_value=None):
+            # Act & Assert
+            with pytest.raises(HTTPException) as exc_info:
+                self.service.importar(mock_db_session, self._csv("HAR001,1,1,"), "csv", cabecera)
+        
+        assert exc_info.value.status_code == 404
+    
+    def test_importar_cantidad_ordenada_desde_orden(self, mock_db_session):
+        """
+        Test: Ingreso vinculado a una orden de compra.
+        
+        Resultado esperado:
+        - cantidad_ordenada de cada línea se toma de la orden
+        """
+        # Arrange
+        cabecera = self.cabecera.model_copy(update={"id_orden_compra": 5})
+        
+        with patch.object(self.service.repository, 'get_cantidades_orden', return_value={1: Decimal("12")}):
+            # Act
+            self.service.importar(mock_db_session, self._csv("HAR001,10,2.50,", "AZU001,1,1,"), "csv", cabecera)
+        
+        # Assert
+        lineas = self.lotes_recibidos[0]
+        assert lineas[0]["cantidad_ordenada"] == Decimal("12")
+        assert lineas[1]["cantidad_ordenada"] == Decimal("0")
+    
+    def test_importar_formato_no_soportado(self, mock_db_session):
+        """
+        Test: Formato distinto de csv/xlsx.
+        
+        Resultado esperado:
+        - Lanza HTTPException 400
+        """
+        with pytest.raises(HTTPException) as exc_info:
+            self.service.importar(mock_db_session, io.BytesIO(b""), "pdf", self.cabecera)
+        
+        assert exc_info.value.status_code == 400
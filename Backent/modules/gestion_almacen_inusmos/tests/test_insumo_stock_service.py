@@ -0,0 +1,123 @@
+"""
+Tests unitarios para InsumoStockService - Resumen de stock por insumo.
+Usa mocks para simular el repositorio y la base de datos.
+"""
+import pytest
+from decimal import Decimal
+from unittest.mock import Mock, patch
+from modules.alertas.incremental import CLAVE_PENDIENTES
+from modules.gestion_almacen_inusmos.insumo_stock.service import InsumoStockService
+
+
+class TestInsumoStockServiceRefrescar:
+    """Tests para el recálculo transaccional del resumen."""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup ejecutado antes de cada test."""
+        self.service = InsumoStockService()
+    
+    def test_refrescar_bloquea_antes_de_recalcular(self, mock_db_session):
+        """
+        Test: Refrescar varios insumos (con repetidos y desordenados).
+        
+        Resultado esperado:
+        - Se crean las filas faltantes, se bloquean y luego se recalculan
+        - Los ids llegan sin repetir y ordenados (orden de bloqueo fijo)
+        - No se hace commit
+        """
+        llamadas = Mock()
+        with patch.object(self.service.repository, 'asegurar_filas', llamadas.asegurar), \
+             patch.object(self.service.repository, 'bloquear_filas', llamadas.bloquear), \
+             patch.object(self.service.repository, 'recalcular', llamadas.recalcular):
+            
+            self.service.refrescar(mock_db_session, [3, 1, 3, 2])
+        
+        assert [c[0] for c in llamadas.mock_calls] == ['asegurar', 'bloquear', 'recalcular']
+        llamadas.recalcular.assert_called_once_with(mock_db_session, [1, 2, 3])
+        mock_db_session.flush.assert_called_once()
+        mock_db_session.commit.assert_not_called()
+    
+    def test_refrescar_sin_insumos_no_consulta(self, mock_db_session):
+        """
+        Test: Refrescar una lista vacía no ejecuta SQL.
+        """
+        with patch.object(self.service.repository, 'recalcular') as mock_recalcular:
+            self.service.refrescar(mock_db_session, [])
+        
+        mock_recalcular.assert_not_called()
+        mock_db_session.execute.assert_not_called()
+    
+    def test_refrescar_marca_insumos_para_alertas(self, mock_db_session):
+        """
+        Test: Refrescar marca los insumos para reevaluar sus alertas al confirmar.
+        
+        Resultado esperado:
+        - Los insumos quedan en la sesión, acumulados entre llamadas
+        """
+        mock_db_session.info = {}
+        with patch.object(self.service.repository, 'asegurar_filas'), \
+             patch.object(self.service.repository, 'bloquear_filas'), \
+             patch.object(self.service.repository, 'recalcular'):
+            
+            self.service.refrescar(mock_db_session, [2, 1])
+            self.service.refrescar(mock_db_session, [3])
+        
+        assert mock_db_session.info[CLAVE_PENDIENTES] == {1, 2, 3}
+
+
+class TestInsumoStockServiceReconciliar:
+    """Tests para la reconciliación del resumen con los lotes."""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup ejecutado antes de cada test."""
+        self.service = InsumoStockService()
+    
+    @pytest.fixture
+    def diferencia(self):
+        return {
+            "id_insumo": 1,
+            "stock_registrado": Decimal("10.0000"),
+            "stock_calculado": Decimal("8.0000"),
+            "valor_registrado": Decimal("25.0000"),
+            "valor_calculado": Decimal("20.0000"),
+            "lotes_registrados": 2,
+            "lotes_calculados": 1
+        }
+    
+    def test_reconciliar_reporta_y_reconstruye(self, mock_db_session, diferencia):
+        """
+        Test: Reconciliar con corrección.
+        
+        Resultado esperado:
+        - Reporta las diferencias encontradas
+        - Recalcula todos los insumos y hace commit
+        """
+        with patch.object(self.service.repository, 'obtener_diferencias', return_value=[diferencia]), \
+             patch.object(self.service.repository, 'recalcular', return_value=40) as mock_recalcular:
+            
+            resultado = self.service.reconciliar(mock_db_session)
+        
+        assert resultado["total_diferencias"] == 1
+        assert resultado["diferencias"][0]["stock_calculado"] == Decimal("8.0000")
+        assert resultado["insumos_recalculados"] == 40
+        mock_recalcular.assert_called_once_with(mock_db_session)
+        mock_db_session.commit.assert_called_once()
+    
+    def test_reconciliar_solo_reporte_no_modifica(self, mock_db_session, diferencia):
+        """
+        Test: Reconciliar en modo solo reporte.
+        
+        Resultado esperado:
+        - Reporta las diferencias sin recalcular ni hacer commit
+        """
+        with patch.object(self.service.repository, 'obtener_diferencias', return_value=[diferencia]), \
+             patch.object(self.service.repository, 'recalcular') as mock_recalcular:
+            
+            resultado = self.service.reconciliar(mock_db_session, corregir=False)
+        
+        assert resultado["total_diferencias"] == 1
+        assert resultado["insumos_recalculados"] == 0
+        mock_recalcular.assert_not_called()
+        mock_db_session.commit.assert_not_called()
@@ -3,8 +3,10 @@ Tests unitarios para MovimientoInsumoService - Lógica de negocio de movimientos
 Usa mocks para simular el repositorio y la base de datos.
 """
 import pytest
+from datetime import datetime, timedelta, timezone
 from unittest.mock import Mock, patch
 from fastapi import HTTPException
+from modules.gestion_almacen_inusmos.movimiento_insumos.repository import MovimientoInsumoRepository
 from modules.gestion_almacen_inusmos.movimiento_insumos.service import MovimientoInsumoService
 from modules.gestion_almacen_inusmos.movimiento_insumos.schemas import MovimientoInsumoCreate
 
@@ -182,3 +184,118 @@ class TestMovimientoInsumoServiceLogica:
         assert callable(self.service.get_all)
         assert callable(self.service.get_by_id)
         assert callable(self.service.create)
+
+
+class TestMovimientoInsumoPaginacion:
+    """Tests para el kardex paginado por cursor (utils.paginacion)."""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup ejecutado antes de cada test."""
+        self.service = MovimientoInsumoService()
+        self.repository = MovimientoInsumoRepository()
+    
+    @staticmethod
+    def _movimientos(cantidad):
+        inicio = datetime(2025, 12, 1, 12, 0)
+        return [
+            Mock(fecha_movimiento=inicio - timedelta(hours=i), id_movimiento=100 - i)
+            for i in range(cantidad)
+        ]
+    
+    def test_cursor_ida_y_vuelta(self):
+        """
+        Test: El cursor "<fecha ISO>,<id>" se decodifica a la misma fila.
+        
+        Resultado esperado:
+        - Fechas con y sin zona horaria; el "+" de la zona sin codificar en la URL llega como espacio
+        """
+        from utils.paginacion import codificar_cursor, decodificar_cursor
+        
+        fecha = datetime(2025, 12, 1, 8, 30, 15, 123456)
+        assert decodificar_cursor(codificar_cursor(fecha, 42)) == (fecha, 42)
+        
+        con_zona = datetime(2025, 12, 1, 8, 30, tzinfo=timezone(timedelta(hours=-5)))
+        assert decodificar_cursor(codificar_cursor(con_zona, 7)) == (con_zona, 7)
+        
+        utc = datetime(2025, 12, 1, 13, 30, tzinfo=timezone.utc)
+        assert decodificar_cursor("2025-12-01T13:30:00 00:00,7") == (utc, 7)
+    
+    @pytest.mark.parametrize("cursor", ["42", "ayer,1", "2025-12-01T08:30:00", "2025-12-01T08:30:00,x"])
+    def test_cursor_invalido(self, mock_db_session, cursor):
+        """
+        Test: Cursor con formato inválido.
+        
+        Resultado esperado:
+        - Lanza HTTPException 400 sin consultar el repositorio
+        """
+        with patch.object(self.service.repository, 'get_pagina') as mock_get_pagina:
+            with pytest.raises(HTTPException) as exc_info:
+                self.service.get_pagina(mock_db_session, cursor, 50)
+            
+            assert exc_info.value.status_code == 400
+            mock_get_pagina.assert_not_called()
+    
+    def test_get_pagina_sin_cursor(self, mock_db_session):
+        """
+        Test: Primera página (sin `after`).
+        
+        Resultado esperado:
+        - Llama al repositorio sin cursor y retorna una PaginaKeyset
+        """
+        with patch.object(self.service.repository, 'get_pagina') as mock_get_pagina:
+            mock_get_pagina.return_value = {
+                "items": [], "limit": 50, "siguiente": None, "hay_mas": False, "total_aproximado": None
+            }
+            
+            resultado = self.service.get_pagina(mock_db_session, None, 50)
+            
+            assert resultado.items == []
+            assert resultado.hay_mas is False
+            mock_get_pagina.assert_called_once_with(mock_db_session, None, 50, False)
+    
+    def test_get_pagina_con_mas_filas(self, mock_db_session):
+        """
+        Test: Primera página cuando hay más movimientos que el límite.
+        
+        Resultado esperado:
+        - Pide limit + 1 filas y devuelve solo limit
+        - `siguiente` es el cursor de la última fila devuelta
+        """
+        # Arrange
+        movimientos = self._movimientos(3)
+        query = mock_db_session.query.return_value.filter.return_value
+        query.order_by.return_value.limit.return_value.all.return_value = movimientos
+        
+        # Act
+        pagina = self.repository.get_pagina(mock_db_session, None, 2)
+        
+        # Assert
+        assert pagina["items"] == movimientos[:2]
+        assert pagina["hay_mas"] is True
+        assert pagina["siguiente"] == "2025-12-01T11:00:00,99"
+        assert pagina["total_aproximado"] is None
+        query.order_by.return_value.limit.assert_called_once_with(3)
+        query.filter.assert_not_called()
+    
+    def test_get_pagina_ultima_pagina(self, mock_db_session):
+        """
+        Test: Página siguiente a un cursor, sin más filas después.
+        
+        Resultado esperado:
+        - Aplica el filtro (fecha, id) < cursor
+        - hay_mas es False y no hay cursor siguiente
+        """
+        # Arrange
+        movimientos = self._movimientos(2)
+        query = mock_db_session.query.return_value.filter.return_value
+        query.filter.return_value.order_by.return_value.limit.return_value.all.return_value = movimientos
+        
+        # Act
+        pagina = self.repository.get_pagina(mock_db_session, (datetime(2025, 12, 2), 101), 2)
+        
+        # Assert
+        assert pagina["items"] == movimientos
+        assert pagina["hay_mas"] is False
+        assert pagina["siguiente"] is None
+        query.filter.assert_called_once()
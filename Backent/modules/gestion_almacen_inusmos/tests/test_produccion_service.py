@@ -3,11 +3,17 @@ Tests unitarios para ProduccionService - Lógica de negocio de producción.
 Usa mocks para simular el repositorio y la base de datos.
 """
 import pytest
+from datetime import datetime
 from decimal import Decimal
 from unittest.mock import Mock, patch, MagicMock
 from fastapi import HTTPException
 from modules.gestion_almacen_inusmos.produccion.service import ProduccionService
-from modules.gestion_almacen_inusmos.produccion.schemas import ProduccionRequest
+from modules.gestion_almacen_inusmos.produccion.schemas import (
+    ProduccionRequest,
+    ProduccionLoteRequest,
+    ProduccionLoteItemRequest
+)
+from enums.modo_ejecucion_lote import ModoEjecucionLoteEnum
 
 
 class TestProduccionServiceValidarStock:
@@ -38,11 +44,11 @@ class TestProduccionServiceValidarStock:
         """
         # Arrange
         with patch.object(self.service.repository, 'get_receta_con_insumos') as mock_get_receta, \
-             patch.object(self.service.repository, 'get_stock_disponible_insumo') as mock_get_stock:
+             patch.object(self.service.repository, 'get_stock_disponible_insumos') as mock_get_stock:
             
             mock_get_receta.return_value = mock_receta_data
             # Mock de stock disponible para cada insumo
-            mock_get_stock.side_effect = [Decimal("50.00"), Decimal("10.00")]
+            mock_get_stock.return_value = {1: Decimal("50.00"), 2: Decimal("10.00")}
             
             # Act
             resultado = self.service.validar_stock_receta(
@@ -69,7 +75,7 @@ class TestProduccionServiceValidarStock:
             
             # Verificar que se llamaron los métodos correctos
             mock_get_receta.assert_called_once_with(mock_db_session, 1)
-            assert mock_get_stock.call_count == 2
+            mock_get_stock.assert_called_once_with(mock_db_session, [1, 2])  # Una consulta para todos
     
     def test_validar_stock_receta_con_stock_insuficiente(
         self, 
@@ -91,11 +97,11 @@ class TestProduccionServiceValidarStock:
         """
         # Arrange
         with patch.object(self.service.repository, 'get_receta_con_insumos') as mock_get_receta, \
-             patch.object(self.service.repository, 'get_stock_disponible_insumo') as mock_get_stock:
+             patch.object(self.service.repository, 'get_stock_disponible_insumos') as mock_get_stock:
             
             mock_get_receta.return_value = mock_receta_data
             # Stock insuficiente para harina, suficiente para sal
-            mock_get_stock.side_effect = [Decimal("50.00"), Decimal("10.00")]
+            mock_get_stock.return_value = {1: Decimal("50.00"), 2: Decimal("10.00")}
             
             # Act
             resultado = self.service.validar_stock_receta(
@@ -171,11 +177,11 @@ class TestProduccionServiceValidarStock:
         })
         
         with patch.object(self.service.repository, 'get_receta_con_insumos') as mock_get_receta, \
-             patch.object(self.service.repository, 'get_stock_disponible_insumo') as mock_get_stock:
+             patch.object(self.service.repository, 'get_stock_disponible_insumos') as mock_get_stock:
             
             mock_get_receta.return_value = receta_con_opcionales
             # Stock para insumos obligatorios (opcionales no se consultan)
-            mock_get_stock.side_effect = [Decimal("50.00"), Decimal("10.00")]
+            mock_get_stock.return_value = {1: Decimal("50.00"), 2: Decimal("10.00")}
             
             # Act
             resultado = self.service.validar_stock_receta(
@@ -191,183 +197,370 @@ class TestProduccionServiceValidarStock:
             # El colorante opcional NO debe aparecer en la lista
             nombres_validados = [ins.nombre_insumo for ins in resultado.insumos]
             assert "Colorante (Opcional)" not in nombres_validados
+            mock_get_stock.assert_called_once_with(mock_db_session, [1, 2])
 
 
-class TestProduccionServiceEjecutar:
-    """Tests para ejecución de producción."""
+class _ProduccionConEscriturasMock:
+    """Helpers comunes: receta del plan, lotes FEFO y escrituras del repositorio parcheadas."""
     
     @pytest.fixture(autouse=True)
     def setup(self):
         """Setup ejecutado antes de cada test."""
         self.service = ProduccionService()
     
-    def test_ejecutar_produccion_exitoso(
-        self, 
-        mock_db_session, 
-        mock_receta_data,
-        mock_produccion_creada
-    ):
+    @pytest.fixture
+    def recetas_plan(self, mock_receta_data):
+        """Receta 1 (Pan Francés, producto 10) indexada por id_receta."""
+        mock_receta_data["receta"]["id_producto"] = 10
+        return {1: mock_receta_data}
+    
+    @staticmethod
+    def _lotes(harina: str, sal: str):
+        """Un lote por insumo con el stock indicado."""
+        return {
+            1: [{"id_ingreso_detalle": 11, "id_insumo": 1, "cantidad_restante": Decimal(harina)}],
+            2: [{"id_ingreso_detalle": 21, "id_insumo": 2, "cantidad_restante": Decimal(sal)}]
+        }
+    
+    @staticmethod
+    def _request(modo, *batches):
+        return ProduccionLoteRequest(
+            items=[ProduccionLoteItemRequest(id_receta=1, cantidad_batch=Decimal(b)) for b in batches],
+            id_user=1,
+            modo=modo
+        )
+    
+    def _patch_escrituras(self):
+        """Parchea los métodos del repositorio que escriben en la BD."""
+        repo = self.service.repository
+        patches = {
+            nombre: patch.object(repo, nombre)
+            for nombre in (
+                "crear_producciones",
+                "crear_movimientos_salida",
+                "incrementar_stock_productos_terminados",
+                "crear_movimientos_producto_terminado",
+                "descontar_lotes"
+            )
+        }
+        mocks = {nombre: p.start() for nombre, p in patches.items()}
+        mocks["crear_producciones"].side_effect = lambda db, producciones, id_user: [
+            {"id_produccion": n, "numero_produccion": f"PROD-202512-{n}", "fecha_produccion": None}
+            for n in range(1, len(producciones) + 1)
+        ]
+        mocks["crear_movimientos_salida"].side_effect = lambda **kwargs: len(kwargs["consumos"])
+        self._patches = patches
+        return mocks
+    
+    def teardown_method(self):
+        for p in getattr(self, "_patches", {}).values():
+            p.stop()
+
+
+class TestProduccionServiceEjecutar(_ProduccionConEscriturasMock):
+    """Tests para ejecución de producción (plan de una sola receta)."""
+    
+    def test_ejecutar_produccion_exitoso(self, mock_db_session, recetas_plan):
         """
         Test: Ejecutar producción con stock suficiente.
         
         Escenario:
         - Receta produce 10 unidades por batch
-        - Requiere 2 kg de harina por batch
-        - Stock disponible: 50 kg
+        - Requiere 2 kg de harina y 0.05 kg de sal por batch
+        - Stock disponible: 50 kg de harina, 10 kg de sal
         - Producir 5 batches
         
         Resultado esperado:
         - success = True
         - cantidad_producida = 50 unidades (5 batches * 10)
-        - Se descuentan 10 kg de harina
-        - Se crean movimientos de entrada/salida
+        - La receta y los lotes se leen una sola vez (misma ruta que el plan)
+        - Se descuentan 10 kg de harina y se hace commit una vez
         """
-        # Arrange
         request = ProduccionRequest(
             id_receta=1,
             cantidad_batch=Decimal("5.00"),
             id_user=1,
             observaciones="Test producción"
         )
+        mocks = self._patch_escrituras()
         
-        with patch.object(self.service, 'validar_stock_receta') as mock_validar, \
-             patch.object(self.service.repository, 'get_receta_con_insumos') as mock_get_receta, \
-             patch.object(self.service.repository, 'crear_produccion') as mock_crear_prod, \
-             patch.object(self.service.repository, 'descontar_insumo_fefo') as mock_descontar, \
-             patch.object(self.service.repository, 'get_id_producto_de_receta') as mock_get_producto, \
-             patch.object(self.service.repository, 'get_stock_producto_terminado') as mock_get_stock_pt, \
-             patch.object(self.service.repository, 'incrementar_stock_producto_terminado') as mock_incrementar, \
-             patch.object(self.service.repository, 'crear_movimiento_producto_terminado') as mock_crear_mov, \
-             patch.object(self.service.repository, '_reset_contador_movimientos') as mock_reset:
-            
-            # Mock validación exitosa
-            mock_validacion = Mock()
-            mock_validacion.puede_producir = True
-            mock_validar.return_value = mock_validacion
+        with patch.object(self.service.repository, 'get_recetas_con_insumos', return_value=recetas_plan) as mock_recetas, \
+             patch.object(self.service.repository, 'get_lotes_fefo_insumos', return_value=self._lotes("50", "10")) as mock_lotes, \
+             patch.object(self.service.repository, 'get_receta_con_insumos') as mock_get_receta:
             
-            mock_get_receta.return_value = mock_receta_data
-            mock_crear_prod.return_value = mock_produccion_creada
-            mock_descontar.return_value = 2  # 2 movimientos por insumo
-            mock_get_producto.return_value = 1  # id_producto
-            mock_get_stock_pt.return_value = Decimal("0.00")
-            mock_incrementar.return_value = Decimal("50.00")
-            
-            # Act
-            resultado = self.service.ejecutar_produccion(
-                db=mock_db_session,
-                request=request
-            )
-            
-            # Assert
-            assert resultado.success is True
-            assert resultado.cantidad_batch == Decimal("5.00")
-            assert resultado.cantidad_producida == Decimal("50.00")  # 5 * 10
-            assert "ejecutada correctamente" in resultado.mensaje
-            
-            # Verificar que se llamaron los métodos en orden
-            mock_validar.assert_called_once()
-            mock_crear_prod.assert_called_once()
-            assert mock_descontar.call_count == 2  # 2 insumos
-            mock_incrementar.assert_called_once()
-            mock_crear_mov.assert_called_once()
-            mock_db_session.commit.assert_called_once()
-            mock_reset.assert_called()
+            resultado = self.service.ejecutar_produccion(db=mock_db_session, request=request)
+        
+        assert resultado.success is True
+        assert resultado.cantidad_batch == Decimal("5.00")
+        assert resultado.cantidad_producida == Decimal("50.00")  # 5 * 10
+        assert resultado.total_movimientos_creados == 2
+        assert "ejecutada correctamente" in resultado.mensaje
+        
+        mock_recetas.assert_called_once_with(mock_db_session, [1])
+        mock_lotes.assert_called_once()
+        mock_get_receta.assert_not_called()
+        assert mocks["crear_producciones"].call_args.args[1][0]["observaciones"] == "Test producción"
+        mocks["incrementar_stock_productos_terminados"].assert_called_once_with(
+            mock_db_session, {10: Decimal("50.00")}
+        )
+        mocks["descontar_lotes"].assert_called_once_with(
+            mock_db_session,
+            [{"id_lote": 11, "cantidad": Decimal("10.00")}, {"id_lote": 21, "cantidad": Decimal("0.25")}]
+        )
+        mock_db_session.commit.assert_called_once()
     
-    def test_ejecutar_produccion_sin_stock_falla(
-        self, 
-        mock_db_session
-    ):
+    def test_ejecutar_produccion_sin_stock_falla(self, mock_db_session, recetas_plan):
         """
-        Test: Ejecutar producción SIN stock suficiente debe fallar.
+        Test: Ejecutar producción SIN stock suficiente en los lotes bloqueados.
         
         Resultado esperado:
-        - Lanza HTTPException con código 400
-        - Mensaje: "Stock insuficiente"
-        - NO se crea ningún registro (rollback implícito)
+        - Lanza HTTPException con código 400 e indica el insumo faltante
+        - NO se crea ningún registro (rollback)
         """
-        # Arrange
         request = ProduccionRequest(
             id_receta=1,
             cantidad_batch=Decimal("30.00"),
             id_user=1,
             observaciones="Sin stock"
         )
+        mocks = self._patch_escrituras()
         
-        with patch.object(self.service, 'validar_stock_receta') as mock_validar:
-            # Mock validación FALLIDA
-            mock_validacion = Mock()
-            mock_validacion.puede_producir = False
-            mock_validacion.mensaje = "Stock insuficiente para: Harina de Trigo"
-            mock_validar.return_value = mock_validacion
+        with patch.object(self.service.repository, 'get_recetas_con_insumos', return_value=recetas_plan), \
+             patch.object(self.service.repository, 'get_lotes_fefo_insumos', return_value=self._lotes("50", "10")):
             
-            # Act & Assert
             with pytest.raises(HTTPException) as exc_info:
-                self.service.ejecutar_produccion(
-                    db=mock_db_session,
-                    request=request
-                )
-            
-            assert exc_info.value.status_code == 400
-            assert "Stock insuficiente" in str(exc_info.value.detail)
+                self.service.ejecutar_produccion(db=mock_db_session, request=request)
+        
+        assert exc_info.value.status_code == 400
+        assert "Stock insuficiente" in str(exc_info.value.detail)
+        assert "Harina de Trigo" in str(exc_info.value.detail)
+        mocks["crear_producciones"].assert_not_called()
+        mock_db_session.rollback.assert_called_once()
+        mock_db_session.commit.assert_not_called()
+    
+    def test_ejecutar_produccion_receta_no_encontrada(self, mock_db_session):
+        """
+        Test: Ejecutar producción de una receta inexistente o inactiva.
+        
+        Resultado esperado:
+        - Lanza HTTPException con código 404
+        """
+        request = ProduccionRequest(id_receta=999, cantidad_batch=Decimal("1"), id_user=1)
+        mocks = self._patch_escrituras()
+        
+        with patch.object(self.service.repository, 'get_recetas_con_insumos', return_value={}), \
+             patch.object(self.service.repository, 'get_lotes_fefo_insumos', return_value={}):
             
-            # Verificar que NO se hizo commit
-            mock_db_session.commit.assert_not_called()
+            with pytest.raises(HTTPException) as exc_info:
+                self.service.ejecutar_produccion(db=mock_db_session, request=request)
+        
+        assert exc_info.value.status_code == 404
+        mocks["crear_producciones"].assert_not_called()
     
-    def test_ejecutar_produccion_error_rollback(
-        self, 
-        mock_db_session, 
-        mock_receta_data,
-        mock_produccion_creada
-    ):
+    def test_ejecutar_produccion_error_rollback(self, mock_db_session, recetas_plan):
         """
         Test: Si ocurre un error durante la producción, debe hacer rollback.
         
-        Escenario:
-        - Error al descontar insumos
-        
         Resultado esperado:
         - Lanza HTTPException con código 500
         - Se hace rollback de la transacción
-        - Se resetea el contador de movimientos
         """
-        # Arrange
         request = ProduccionRequest(
             id_receta=1,
             cantidad_batch=Decimal("5.00"),
             id_user=1,
             observaciones="Test error"
         )
+        mocks = self._patch_escrituras()
+        mocks["descontar_lotes"].side_effect = Exception("Error simulado al descontar")
         
-        with patch.object(self.service, 'validar_stock_receta') as mock_validar, \
-             patch.object(self.service.repository, 'get_receta_con_insumos') as mock_get_receta, \
-             patch.object(self.service.repository, 'crear_produccion') as mock_crear_prod, \
-             patch.object(self.service.repository, 'descontar_insumo_fefo') as mock_descontar, \
-             patch.object(self.service.repository, '_reset_contador_movimientos') as mock_reset:
-            
-            mock_validacion = Mock()
-            mock_validacion.puede_producir = True
-            mock_validar.return_value = mock_validacion
+        with patch.object(self.service.repository, 'get_recetas_con_insumos', return_value=recetas_plan), \
+             patch.object(self.service.repository, 'get_lotes_fefo_insumos', return_value=self._lotes("50", "10")):
             
-            mock_get_receta.return_value = mock_receta_data
-            mock_crear_prod.return_value = mock_produccion_creada
+            with pytest.raises(HTTPException) as exc_info:
+                self.service.ejecutar_produccion(db=mock_db_session, request=request)
+        
+        assert exc_info.value.status_code == 500
+        assert "Error al ejecutar producción" in str(exc_info.value.detail)
+        mock_db_session.rollback.assert_called_once()
+        mock_db_session.commit.assert_not_called()
+
+
+class TestProduccionRepositoryAsignacionFefo:
+    """Tests del reparto FEFO en memoria (sin base de datos)."""
+    
+    def test_asignar_lotes_fefo_reparte_en_orden(self, mock_lotes_fefo):
+        """
+        Test: La cantidad se toma del primer lote y el resto del siguiente.
+        
+        Resultado esperado:
+        - 50 kg del lote 1 (se agota) y 10 kg del lote 2
+        """
+        from modules.gestion_almacen_inusmos.produccion.repository import ProduccionRepository
+        
+        consumos = ProduccionRepository.asignar_lotes_fefo(
+            {1: mock_lotes_fefo},
+            {1: Decimal("60.00")}
+        )
+        
+        assert [(c["id_lote"], c["cantidad"]) for c in consumos] == [
+            (1, Decimal("50.00")),
+            (2, Decimal("10.00"))
+        ]
+        assert consumos[0]["stock_nuevo"] == Decimal("0.00")
+        assert consumos[1]["stock_anterior"] == Decimal("30.00")
+        assert consumos[1]["stock_nuevo"] == Decimal("20.00")
+    
+    def test_asignar_lotes_fefo_no_toca_lotes_innecesarios(self, mock_lotes_fefo):
+        """
+        Test: Si el primer lote alcanza, no se generan consumos de otros lotes.
+        """
+        from modules.gestion_almacen_inusmos.produccion.repository import ProduccionRepository
+        
+        consumos = ProduccionRepository.asignar_lotes_fefo(
+            {1: mock_lotes_fefo},
+            {1: Decimal("5.00")}
+        )
+        
+        assert len(consumos) == 1
+        assert consumos[0]["id_lote"] == 1
+    
+    def test_asignar_lotes_fefo_stock_insuficiente(self, mock_lotes_fefo):
+        """
+        Test: Pedir más de lo que suman los lotes lanza ValueError.
+        """
+        from modules.gestion_almacen_inusmos.produccion.repository import ProduccionRepository
+        
+        with pytest.raises(ValueError) as exc_info:
+            ProduccionRepository.asignar_lotes_fefo(
+                {1: mock_lotes_fefo},
+                {1: Decimal("100.00")}
+            )
+        
+        assert "Stock insuficiente" in str(exc_info.value)
+
+
+class TestProduccionServiceEjecutarLote(_ProduccionConEscriturasMock):
+    """Tests para la ejecución de un plan de producción (varias recetas)."""
+    
+    def test_ejecutar_lote_todo_o_nada_exitoso(self, mock_db_session, recetas_plan):
+        """
+        Test: Plan de 2 recetas con stock suficiente para ambas.
+        
+        Resultado esperado:
+        - Recetas y lotes se leen una sola vez para todo el plan
+        - Producciones, salidas, stock y entradas se escriben una vez para todo el plan
+        - Se descuentan los lotes con un único UPDATE y se hace commit una vez
+        """
+        request = self._request(ModoEjecucionLoteEnum.TODO_O_NADA, "5", "3")
+        mocks = self._patch_escrituras()
+        
+        with patch.object(self.service.repository, 'get_recetas_con_insumos', return_value=recetas_plan) as mock_recetas, \
+             patch.object(self.service.repository, 'get_lotes_fefo_insumos', return_value=self._lotes("50", "10")) as mock_lotes:
             
-            # Simular error al descontar
-            mock_descontar.side_effect = Exception("Error simulado al descontar")
+            resultado = self.service.ejecutar_produccion_lote(db=mock_db_session, request=request)
+        
+        assert resultado.success is True
+        assert resultado.total_ejecutadas == 2
+        assert [r.cantidad_producida for r in resultado.resultados] == [Decimal("50.00"), Decimal("30.00")]
+        mock_recetas.assert_called_once_with(mock_db_session, [1])
+        mock_lotes.assert_called_once()
+        mocks["crear_producciones"].assert_called_once()
+        assert len(mocks["crear_producciones"].call_args.args[1]) == 2
+        
+        # Cada salida queda asociada a su producción
+        salidas = mocks["crear_movimientos_salida"].call_args.kwargs["consumos"]
+        assert [s["id_documento_origen"] for s in salidas] == [1, 1, 2, 2]
+        mocks["incrementar_stock_productos_terminados"].assert_called_once_with(
+            mock_db_session, {10: Decimal("80.00")}
+        )
+        entradas = mocks["crear_movimientos_producto_terminado"].call_args.args[1]
+        assert [(e["id_produccion"], e["cantidad"]) for e in entradas] == [(1, Decimal("50.00")), (2, Decimal("30.00"))]
+        
+        # Demanda agregada: 8 batches × 2 kg harina, 8 × 0.05 kg sal
+        assert resultado.insumos[0].cantidad_requerida == Decimal("16.00")
+        mocks["descontar_lotes"].assert_called_once_with(
+            mock_db_session,
+            [{"id_lote": 11, "cantidad": Decimal("16.00")}, {"id_lote": 21, "cantidad": Decimal("0.40")}]
+        )
+        mock_db_session.commit.assert_called_once()
+    
+    def test_ejecutar_lote_todo_o_nada_stock_insuficiente(self, mock_db_session, recetas_plan):
+        """
+        Test: Cada receta alcanza por separado pero el plan completo no.
+        
+        Resultado esperado:
+        - No se registra ninguna producción y se hace rollback
+        - La respuesta indica el insumo faltante en la demanda agregada
+        """
+        request = self._request(ModoEjecucionLoteEnum.TODO_O_NADA, "5", "5")
+        mocks = self._patch_escrituras()
+        
+        with patch.object(self.service.repository, 'get_recetas_con_insumos', return_value=recetas_plan), \
+             patch.object(self.service.repository, 'get_lotes_fefo_insumos', return_value=self._lotes("15", "10")):
             
-            # Act & Assert
-            with pytest.raises(HTTPException) as exc_info:
-                self.service.ejecutar_produccion(
-                    db=mock_db_session,
-                    request=request
-                )
+            resultado = self.service.ejecutar_produccion_lote(db=mock_db_session, request=request)
+        
+        assert resultado.success is False
+        assert resultado.total_ejecutadas == 0
+        assert "Harina de Trigo" in resultado.mensaje
+        assert resultado.insumos[0].es_suficiente is False
+        mocks["crear_producciones"].assert_not_called()
+        mocks["descontar_lotes"].assert_not_called()
+        mock_db_session.rollback.assert_called_once()
+        mock_db_session.commit.assert_not_called()
+    
+    def test_ejecutar_lote_mejor_esfuerzo_omite_recetas_sin_stock(self, mock_db_session, recetas_plan):
+        """
+        Test: Con stock para solo una de las recetas en modo MEJOR_ESFUERZO.
+        
+        Resultado esperado:
+        - La primera receta se ejecuta y la segunda falla con el motivo
+        - Se hace commit de lo ejecutado
+        """
+        request = self._request(ModoEjecucionLoteEnum.MEJOR_ESFUERZO, "5", "5")
+        mocks = self._patch_escrituras()
+        
+        with patch.object(self.service.repository, 'get_recetas_con_insumos', return_value=recetas_plan), \
+             patch.object(self.service.repository, 'get_lotes_fefo_insumos', return_value=self._lotes("15", "10")):
             
-            assert exc_info.value.status_code == 500
-            assert "Error al ejecutar producción" in str(exc_info.value.detail)
+            resultado = self.service.ejecutar_produccion_lote(db=mock_db_session, request=request)
+        
+        assert resultado.success is False
+        assert [r.success for r in resultado.resultados] == [True, False]
+        assert "Stock insuficiente" in resultado.resultados[1].mensaje
+        assert len(mocks["crear_producciones"].call_args.args[1]) == 1
+        mocks["descontar_lotes"].assert_called_once_with(
+            mock_db_session,
+            [{"id_lote": 11, "cantidad": Decimal("10.00")}, {"id_lote": 21, "cantidad": Decimal("0.25")}]
+        )
+        mock_db_session.commit.assert_called_once()
+    
+    def test_ejecutar_lote_receta_inexistente(self, mock_db_session, recetas_plan):
+        """
+        Test: El plan incluye una receta que no existe en modo TODO_O_NADA.
+        
+        Resultado esperado:
+        - No se ejecuta ninguna receta y se informa cuál no existe
+        """
+        request = ProduccionLoteRequest(
+            items=[
+                ProduccionLoteItemRequest(id_receta=1, cantidad_batch=Decimal("1")),
+                ProduccionLoteItemRequest(id_receta=999, cantidad_batch=Decimal("1"))
+            ],
+            id_user=1
+        )
+        mocks = self._patch_escrituras()
+        
+        with patch.object(self.service.repository, 'get_recetas_con_insumos', return_value=recetas_plan), \
+             patch.object(self.service.repository, 'get_lotes_fefo_insumos', return_value=self._lotes("50", "10")):
             
-            # Verificar rollback
-            mock_db_session.rollback.assert_called_once()
-            # Verificar reset del contador
-            mock_reset.assert_called()
+            resultado = self.service.ejecutar_produccion_lote(db=mock_db_session, request=request)
+        
+        assert resultado.total_ejecutadas == 0
+        assert "999" in resultado.mensaje
+        assert resultado.resultados[1].mensaje == "Receta no encontrada o no está activa"
+        mocks["crear_producciones"].assert_not_called()
 
 
 class TestProduccionServiceHistorial:
@@ -407,7 +600,57 @@ class TestProduccionServiceHistorial:
             assert resultado.producciones[0].numero_produccion == "PROD-20251201-001"
             assert resultado.producciones[0].cantidad_producida == Decimal("50.00")
             
-            mock_get_historial.assert_called_once_with(mock_db_session, 50, 0)
+            assert resultado.hay_mas is False
+            assert resultado.siguiente is None
+            
+            # Pide una fila extra para saber si hay página siguiente
+            mock_get_historial.assert_called_once_with(mock_db_session, 51, 0, None)
+    
+    def test_get_historial_producciones_con_cursor(
+        self, 
+        mock_db_session,
+        mock_historial_producciones
+    ):
+        """
+        Test: Historial paginado por cursor.
+        
+        Resultado esperado:
+        - El cursor `after` se decodifica y se pasa al repositorio
+        - Con más filas que el límite, `siguiente` es el cursor de la última fila de la página
+        """
+        # Arrange
+        with patch.object(self.service.repository, 'get_historial_producciones') as mock_get_historial:
+            mock_get_historial.return_value = mock_historial_producciones
+            
+            # Act
+            resultado = self.service.get_historial_producciones(
+                db=mock_db_session,
+                limit=1,
+                after="2025-12-01T10:00:00,7"
+            )
+            
+            # Assert
+            assert len(resultado.producciones) == 1
+            assert resultado.hay_mas is True
+            primera = mock_historial_producciones[0]
+            assert resultado.siguiente == f"{primera['fecha_produccion'].isoformat()},{primera['id_produccion']}"
+            mock_get_historial.assert_called_once_with(
+                mock_db_session, 2, 0, (datetime(2025, 12, 1, 10, 0), 7)
+            )
+    
+    def test_get_historial_producciones_cursor_invalido(self, mock_db_session):
+        """
+        Test: Cursor con formato inválido.
+        
+        Resultado esperado:
+        - Lanza HTTPException 400 sin consultar el repositorio
+        """
+        with patch.object(self.service.repository, 'get_historial_producciones') as mock_get_historial:
+            with pytest.raises(HTTPException) as exc_info:
+                self.service.get_historial_producciones(db=mock_db_session, after="ayer")
+            
+            assert exc_info.value.status_code == 400
+            mock_get_historial.assert_not_called()
     
     def test_get_trazabilidad_produccion(
         self, 
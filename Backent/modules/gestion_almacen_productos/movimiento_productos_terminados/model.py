@@ -1,12 +1,25 @@
-from sqlalchemy import Column, BigInteger, String, Text, DECIMAL, TIMESTAMP, BOOLEAN, ForeignKey
+from sqlalchemy import Column, BigInteger, String, Text, DECIMAL, TIMESTAMP, BOOLEAN, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from database import Base
 from modules.productos_terminados.model import ProductoTerminado
 from modules.Gestion_Usuarios.usuario.model import Usuario
-import datetime
+from utils.rango_fechas import ahora_negocio
 
 class MovimientoProductoTerminado(Base):
     __tablename__ = 'movimiento_productos_terminados'
+    __table_args__ = (
+        # Movimientos de un documento (trazabilidad de producción, anulación de ventas)
+        Index('idx_mov_productos_documento', 'id_documento_origen', 'tipo_documento_origen', 'tipo_movimiento'),
+        # Kardex paginado por cursor (fecha_movimiento, id_movimiento)
+        Index('idx_mov_productos_fecha_id', 'fecha_movimiento', 'id_movimiento'),
+        # Kardex por producto: saldo anterior y SUM() OVER leídos solo del índice
+        Index(
+            'idx_mov_productos_kardex',
+            'id_producto', 'fecha_movimiento', 'id_movimiento',
+            postgresql_include=['tipo_movimiento', 'cantidad'],
+            postgresql_where=text('anulado = false')
+        ),
+    )
 
     id_movimiento = Column(BigInteger, primary_key=True, autoincrement=True)
     numero_movimiento = Column(String(50), unique=True, nullable=False)
@@ -15,7 +28,7 @@ class MovimientoProductoTerminado(Base):
     motivo = Column(String(100), nullable=False)
     cantidad = Column(DECIMAL(12, 4), nullable=False)
     precio_venta = Column(DECIMAL(12, 4), default=0)
-    fecha_movimiento = Column(TIMESTAMP, default=datetime.datetime.now)
+    fecha_movimiento = Column(TIMESTAMP, nullable=False, default=ahora_negocio)
     id_user = Column(BigInteger, ForeignKey('usuario.id_user'), nullable=False)
     id_documento_origen = Column(BigInteger)
     tipo_documento_origen = Column(String(50))
@@ -1,13 +1,22 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from sqlalchemy.orm import Session
 from modules.gestion_almacen_productos.movimiento_productos_terminados.model import MovimientoProductoTerminado
 from modules.gestion_almacen_productos.movimiento_productos_terminados.schemas import MovimientoProductoTerminadoCreate
 from modules.gestion_almacen_productos.movimiento_productos_terminados.repository_interface import MovimientoProductoTerminadoRepositoryInterface
+from utils.paginacion import Cursor, paginar
 
 class MovimientoProductoTerminadoRepository(MovimientoProductoTerminadoRepositoryInterface):
     def get_all(self, db: Session) -> List[MovimientoProductoTerminado]:
         return db.query(MovimientoProductoTerminado).filter(MovimientoProductoTerminado.anulado == False).all()
 
+    def get_pagina(self, db: Session, cursor: Optional[Cursor], limit: int, con_total: bool = False) -> Dict[str, Any]:
+        # Kardex del más reciente al más antiguo; usa idx_mov_productos_fecha_id
+        query = db.query(MovimientoProductoTerminado).filter(MovimientoProductoTerminado.anulado == False)
+        return paginar(
+            db, query, MovimientoProductoTerminado.fecha_movimiento, MovimientoProductoTerminado.id_movimiento,
+            cursor, limit, con_total
+        )
+
     def get_by_id(self, db: Session, movimiento_id: int) -> Optional[MovimientoProductoTerminado]:
         return db.query(MovimientoProductoTerminado).filter(MovimientoProductoTerminado.id_movimiento == movimiento_id, MovimientoProductoTerminado.anulado == False).first()
 
@@ -1,14 +1,19 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from sqlalchemy.orm import Session
 from modules.gestion_almacen_productos.movimiento_productos_terminados.model import MovimientoProductoTerminado
 from modules.gestion_almacen_productos.movimiento_productos_terminados.schemas import MovimientoProductoTerminadoCreate
+from utils.paginacion import Cursor
 
 class MovimientoProductoTerminadoRepositoryInterface(ABC):
     @abstractmethod
     def get_all(self, db: Session) -> List[MovimientoProductoTerminado]:
         pass
 
+    @abstractmethod
+    def get_pagina(self, db: Session, cursor: Optional[Cursor], limit: int, con_total: bool = False) -> Dict[str, Any]:
+        pass
+
     @abstractmethod
     def get_by_id(self, db: Session, movimiento_id: int) -> Optional[MovimientoProductoTerminado]:
         pass
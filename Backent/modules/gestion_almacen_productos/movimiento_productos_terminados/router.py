@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from database import get_db
 from modules.gestion_almacen_productos.movimiento_productos_terminados.schemas import MovimientoProductoTerminado
 from modules.gestion_almacen_productos.movimiento_productos_terminados.service import MovimientoProductoTerminadoService
 from modules.productos_terminados.repository import ProductoTerminadoRepository
+from utils.paginacion import LIMITE_DEFECTO, LIMITE_MAXIMO, PaginaKeyset
 from utils.standard_responses import api_response_ok, api_response_not_found, api_response_bad_request
 
 router = APIRouter()
@@ -17,6 +18,23 @@ def get_all_movimientos_productos_terminados(db: Session = Depends(get_db)):
     movimientos = service.get_all(db)
     return api_response_ok(movimientos)
 
+@router.get("/pagina", response_model=PaginaKeyset[MovimientoProductoTerminado])
+def get_pagina_movimientos_productos_terminados(
+    after: Optional[str] = Query(None, description="Cursor '<fecha ISO>,<id>' (campo `siguiente` de la página anterior)"),
+    limit: int = Query(LIMITE_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+    con_total: bool = Query(False, description="Incluir total aproximado (estimación del planificador)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Kardex de productos terminados paginado por cursor, del movimiento más
+    reciente al más antiguo.
+    """
+    try:
+        pagina = service.get_pagina(db, after, limit, con_total)
+        return api_response_ok(pagina)
+    except HTTPException as e:
+        return api_response_bad_request(str(e.detail))
+
 @router.get("/{movimiento_id}", response_model=MovimientoProductoTerminado)
 def get_movimiento_producto_terminado_by_id(movimiento_id: int, db: Session = Depends(get_db)):
     try:
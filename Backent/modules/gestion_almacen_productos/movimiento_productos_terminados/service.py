@@ -1,9 +1,10 @@
-from typing import List
+from typing import List, Optional
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from modules.gestion_almacen_productos.movimiento_productos_terminados.schemas import MovimientoProductoTerminado, MovimientoProductoTerminadoCreate
 from modules.gestion_almacen_productos.movimiento_productos_terminados.repository import MovimientoProductoTerminadoRepository
 from modules.gestion_almacen_productos.movimiento_productos_terminados.service_interface import MovimientoProductoTerminadoServiceInterface
+from utils.paginacion import PaginaKeyset, leer_cursor
 
 class MovimientoProductoTerminadoService(MovimientoProductoTerminadoServiceInterface):
     def __init__(self):
@@ -12,6 +13,10 @@ class MovimientoProductoTerminadoService(MovimientoProductoTerminadoServiceInter
     def get_all(self, db: Session) -> List[MovimientoProductoTerminado]:
         return self.repository.get_all(db)
 
+    def get_pagina(self, db: Session, after: Optional[str], limit: int, con_total: bool = False) -> PaginaKeyset[MovimientoProductoTerminado]:
+        pagina = self.repository.get_pagina(db, leer_cursor(after), limit, con_total)
+        return PaginaKeyset[MovimientoProductoTerminado].model_validate(pagina, from_attributes=True)
+
     def get_by_id(self, db: Session, movimiento_id: int) -> MovimientoProductoTerminado:
         movimiento = self.repository.get_by_id(db, movimiento_id)
         if not movimiento:
@@ -1,13 +1,18 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 from sqlalchemy.orm import Session
 from modules.gestion_almacen_productos.movimiento_productos_terminados.schemas import MovimientoProductoTerminado, MovimientoProductoTerminadoCreate
+from utils.paginacion import PaginaKeyset
 
 class MovimientoProductoTerminadoServiceInterface(ABC):
     @abstractmethod
     def get_all(self, db: Session) -> List[MovimientoProductoTerminado]:
         pass
 
+    @abstractmethod
+    def get_pagina(self, db: Session, after: Optional[str], limit: int, con_total: bool = False) -> PaginaKeyset[MovimientoProductoTerminado]:
+        pass
+
     @abstractmethod
     def get_by_id(self, db: Session, movimiento_id: int) -> MovimientoProductoTerminado:
         pass
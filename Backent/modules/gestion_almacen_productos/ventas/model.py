@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BIGINT, VARCHAR, TIMESTAMP, DECIMAL, TEXT, BOOLEAN, ForeignKey
+from sqlalchemy import Column, BIGINT, VARCHAR, TIMESTAMP, DECIMAL, TEXT, BOOLEAN, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -10,6 +10,18 @@ class Venta(Base):
     Registra las ventas realizadas en el sistema.
     """
     __tablename__ = "ventas"
+    __table_args__ = (
+        # Rangos por fecha y listado paginado por cursor (fecha_venta, id_venta)
+        Index('idx_venta_fecha_id', 'fecha_venta', 'id_venta'),
+        # Ventas vigentes por rango de fecha; incluye total y método de pago
+        # para resolver los resúmenes diarios solo con el índice
+        Index(
+            'idx_ventas_fecha_activas',
+            'fecha_venta',
+            postgresql_include=['total', 'metodo_pago'],
+            postgresql_where=text('anulado = false')
+        ),
+    )
     
     id_venta = Column(BIGINT, primary_key=True, autoincrement=True)
     numero_venta = Column(VARCHAR(50), unique=True, nullable=False)
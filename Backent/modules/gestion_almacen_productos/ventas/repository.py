@@ -2,9 +2,13 @@ from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from decimal import Decimal
-import datetime
 from datetime import date
 from modules.gestion_almacen_productos.ventas.repository_interface import VentasRepositoryInterface
+from modules.numeracion.service import NumeracionService
+from enums.serie_documento import SerieDocumentoEnum
+from utils.paginacion import Cursor
+from utils.rango_fechas import ahora_negocio, rango_dia
+from utils.sql_bulk import construir_values
 
 
 class VentasRepository(VentasRepositoryInterface):
@@ -13,60 +17,23 @@ class VentasRepository(VentasRepositoryInterface):
     Usa raw SQL para facilitar modificaciones futuras.
     """
 
+    def __init__(self):
+        self.numeracion = NumeracionService()
+
     def generar_numero_venta(self, db: Session) -> str:
         """
         Genera un número de venta único con formato: VENTA-YYYYMM-N
         Ejemplo: VENTA-202511-1, VENTA-202511-2
         """
-        fecha_actual = datetime.datetime.now()
-        prefijo = f"VENTA-{fecha_actual.strftime('%Y%m')}-"
-        
-        query = text("""
-            SELECT numero_venta 
-            FROM ventas 
-            WHERE numero_venta LIKE :prefijo
-            ORDER BY id_venta DESC
-            LIMIT 1
-        """)
-        
-        result = db.execute(query, {"prefijo": f"{prefijo}%"})
-        ultima_venta = result.fetchone()
-        
-        if ultima_venta:
-            ultimo_numero = int(ultima_venta.numero_venta.split('-')[-1])
-            nuevo_numero = ultimo_numero + 1
-        else:
-            nuevo_numero = 1
-        
-        return f"{prefijo}{nuevo_numero}"
+        return self.numeracion.siguiente_numero(db, SerieDocumentoEnum.VENTA)
 
-    def generar_numero_movimiento_productos_terminados(self, db: Session) -> str:
+    def generar_numeros_movimiento_productos_terminados(self, db: Session, cantidad: int) -> List[str]:
         """
-        Genera un número de movimiento único para movimiento_productos_terminados.
+        Reserva un bloque de números de movimiento consecutivos con una sola sentencia.
         Formato: MPT-YYYYMM-NNNNN
         Ejemplo: MPT-202511-00001
         """
-        fecha_actual = datetime.datetime.now()
-        prefijo = f"MPT-{fecha_actual.strftime('%Y%m')}-"
-
-        query_ultimo = text("""
-            SELECT numero_movimiento 
-            FROM movimiento_productos_terminados 
-            WHERE numero_movimiento LIKE :prefijo
-            ORDER BY id_movimiento DESC
-            LIMIT 1
-        """)
-
-        result = db.execute(query_ultimo, {"prefijo": f"{prefijo}%"})
-        ultimo = result.fetchone()
-
-        if ultimo:
-            ultimo_numero = int(ultimo.numero_movimiento.split('-')[-1])
-            nuevo_numero = ultimo_numero + 1
-        else:
-            nuevo_numero = 1
-
-        return f"{prefijo}{nuevo_numero:05d}"
+        return self.numeracion.reservar_numeros(db, SerieDocumentoEnum.MOVIMIENTO_PRODUCTO, cantidad)
 
     def crear_venta(
         self, 
@@ -102,7 +69,7 @@ class VentasRepository(VentasRepositoryInterface):
         
         result = db.execute(query, {
             "numero_venta": numero_venta,
-            "fecha_venta": datetime.datetime.now(),
+            "fecha_venta": ahora_negocio(),
             "total": float(total),
             "metodo_pago": metodo_pago,
             "id_user": id_user,
@@ -116,18 +83,36 @@ class VentasRepository(VentasRepositoryInterface):
             "fecha_venta": row.fecha_venta
         }
 
-    def crear_detalle_venta(
+    def crear_detalles_venta(
         self,
         db: Session,
         id_venta: int,
-        id_producto: int,
-        cantidad: Decimal,
-        precio_unitario: Decimal,
-        descuento_porcentaje: Decimal,
-        subtotal: Decimal
-    ) -> int:
-        """Crea un detalle de venta y retorna el id_detalle."""
-        query = text("""
+        detalles: List[Dict[str, Any]]
+    ) -> List[int]:
+        """
+        Crea todos los detalles de una venta con un único INSERT multi-fila.
+        Retorna los id_detalle en el mismo orden que `detalles`.
+        """
+        if not detalles:
+            return []
+
+        filas = [
+            {
+                "id_venta": id_venta,
+                "id_producto": detalle["id_producto"],
+                "cantidad": float(detalle["cantidad"]),
+                "precio_unitario": float(detalle["precio_unitario"]),
+                "descuento_porcentaje": float(detalle["descuento_porcentaje"]),
+                "subtotal": float(detalle["subtotal"])
+            }
+            for detalle in detalles
+        ]
+        values_sql, params = construir_values(
+            filas,
+            ["id_venta", "id_producto", "cantidad", "precio_unitario", "descuento_porcentaje", "subtotal"]
+        )
+
+        query = text(f"""
             INSERT INTO venta_detalles (
                 id_venta,
                 id_producto,
@@ -136,63 +121,52 @@ class VentasRepository(VentasRepositoryInterface):
                 descuento_porcentaje,
                 subtotal
             )
-            VALUES (
-                :id_venta,
-                :id_producto,
-                :cantidad,
-                :precio_unitario,
-                :descuento_porcentaje,
-                :subtotal
-            )
+            VALUES {values_sql}
             RETURNING id_detalle
         """)
-        
-        result = db.execute(query, {
-            "id_venta": id_venta,
-            "id_producto": id_producto,
-            "cantidad": float(cantidad),
-            "precio_unitario": float(precio_unitario),
-            "descuento_porcentaje": float(descuento_porcentaje),
-            "subtotal": float(subtotal)
-        })
-        
-        row = result.fetchone()
-        return row.id_detalle if row else None
 
-    def get_stock_producto(self, db: Session, id_producto: int) -> Decimal:
-        """Obtiene el stock actual de un producto terminado."""
-        query = text("""
-            SELECT stock_actual
-            FROM productos_terminados
-            WHERE id_producto = :id_producto
-              AND anulado = false
-        """)
-        
-        result = db.execute(query, {"id_producto": id_producto})
-        row = result.fetchone()
-        return Decimal(str(row.stock_actual)) if row else Decimal('0')
+        result = db.execute(query, params)
+        return [row.id_detalle for row in result.fetchall()]
 
-    def descontar_stock_producto(
-        self, 
-        db: Session, 
-        id_producto: int, 
-        cantidad: Decimal
-    ) -> Decimal:
-        """Descuenta stock de un producto y retorna el nuevo stock."""
-        query = text("""
-            UPDATE productos_terminados
-            SET stock_actual = stock_actual - :cantidad
-            WHERE id_producto = :id_producto
-            RETURNING stock_actual
+    def descontar_stock_productos(
+        self,
+        db: Session,
+        cantidades: Dict[int, Decimal]
+    ) -> Dict[int, Decimal]:
+        """
+        Descuenta stock de uno o varios productos con un único UPDATE ... FROM (VALUES ...).
+        Solo descuenta los productos con stock suficiente (stock_actual >= cantidad);
+        los que no cumplen no aparecen en el resultado.
+        Retorna {id_producto: stock_nuevo}.
+        """
+        if not cantidades:
+            return {}
+
+        filas = [
+            {"id_producto": id_producto, "cantidad": float(cantidad)}
+            for id_producto, cantidad in sorted(cantidades.items())
+        ]
+        values_sql, params = construir_values(
+            filas,
+            ["id_producto", "cantidad"],
+            casts={"id_producto": "BIGINT", "cantidad": "NUMERIC"}
+        )
+
+        query = text(f"""
+            UPDATE productos_terminados pt
+            SET stock_actual = pt.stock_actual - v.cantidad
+            FROM (VALUES {values_sql}) AS v(id_producto, cantidad)
+            WHERE pt.id_producto = v.id_producto
+              AND pt.anulado = false
+              AND pt.stock_actual >= v.cantidad
+            RETURNING pt.id_producto, pt.stock_actual
         """)
-        
-        result = db.execute(query, {
-            "cantidad": float(cantidad),
-            "id_producto": id_producto
-        })
-        
-        row = result.fetchone()
-        return Decimal(str(row.stock_actual)) if row else Decimal('0')
+
+        result = db.execute(query, params)
+        return {
+            row.id_producto: Decimal(str(row.stock_actual))
+            for row in result.fetchall()
+        }
 
     def incrementar_stock_producto(
         self,
@@ -216,19 +190,35 @@ class VentasRepository(VentasRepositoryInterface):
         row = result.fetchone()
         return Decimal(str(row.stock_actual)) if row else Decimal('0')
 
-    def crear_movimiento_salida(
+    def crear_movimientos_salida(
         self,
         db: Session,
-        id_producto: int,
-        cantidad: Decimal,
+        items: List[Dict[str, Any]],
         id_user: int,
         id_venta: int,
         numero_venta: str
     ):
-        """Crea un movimiento de SALIDA en movimiento_productos_terminados."""
-        numero_movimiento = self.generar_numero_movimiento_productos_terminados(db)
+        """
+        Crea los movimientos de SALIDA de todos los items de una venta
+        con un bloque de números y un único INSERT multi-fila.
+        """
+        if not items:
+            return
 
-        query = text("""
+        numeros = self.generar_numeros_movimiento_productos_terminados(db, len(items))
+        fecha_movimiento = ahora_negocio()
+
+        filas = [
+            {
+                "numero_movimiento": numero,
+                "id_producto": item["id_producto"],
+                "cantidad": float(item["cantidad"])
+            }
+            for numero, item in zip(numeros, items)
+        ]
+        values_sql, params = construir_values(filas, ["numero_movimiento", "id_producto", "cantidad"])
+
+        query = text(f"""
             INSERT INTO movimiento_productos_terminados (
                 numero_movimiento,
                 id_producto,
@@ -242,44 +232,57 @@ class VentasRepository(VentasRepositoryInterface):
                 observaciones,
                 anulado
             )
-            VALUES (
-                :numero_movimiento,
-                :id_producto,
+            SELECT
+                v.numero_movimiento,
+                CAST(v.id_producto AS BIGINT),
                 'SALIDA',
                 'VENTA',
-                :cantidad,
+                CAST(v.cantidad AS NUMERIC),
                 :fecha_movimiento,
                 :id_user,
                 :id_venta,
                 'VENTA',
                 :observaciones,
                 false
-            )
+            FROM (VALUES {values_sql}) AS v(numero_movimiento, id_producto, cantidad)
         """)
 
-        db.execute(query, {
-            "numero_movimiento": numero_movimiento,
-            "id_producto": id_producto,
-            "cantidad": float(cantidad),
-            "fecha_movimiento": datetime.datetime.now(),
+        params.update({
+            "fecha_movimiento": fecha_movimiento,
             "id_user": id_user,
             "id_venta": id_venta,
             "observaciones": f"Salida por venta {numero_venta}"
         })
+        db.execute(query, params)
 
-    def crear_movimiento_entrada_compensacion(
+    def crear_movimientos_entrada_compensacion(
         self,
         db: Session,
-        id_producto: int,
-        cantidad: Decimal,
+        items: List[Dict[str, Any]],
+        numeros_movimiento: List[str],
         id_user: int,
         id_venta: int,
         numero_venta: str
     ):
-        """Crea un movimiento de ENTRADA por anulación de venta."""
-        numero_movimiento = self.generar_numero_movimiento_productos_terminados(db)
+        """
+        Crea los movimientos de ENTRADA por anulación de venta en un único INSERT multi-fila.
+        Los números (generar_numeros_movimiento_productos_terminados) se reservan
+        antes de bloquear los productos.
+        """
+        if not items:
+            return
 
-        query = text("""
+        filas = [
+            {
+                "numero_movimiento": numero,
+                "id_producto": item["id_producto"],
+                "cantidad": float(item["cantidad"])
+            }
+            for numero, item in zip(numeros_movimiento, items)
+        ]
+        values_sql, params = construir_values(filas, ["numero_movimiento", "id_producto", "cantidad"])
+
+        query = text(f"""
             INSERT INTO movimiento_productos_terminados (
                 numero_movimiento,
                 id_producto,
@@ -293,34 +296,48 @@ class VentasRepository(VentasRepositoryInterface):
                 observaciones,
                 anulado
             )
-            VALUES (
-                :numero_movimiento,
-                :id_producto,
+            SELECT
+                v.numero_movimiento,
+                CAST(v.id_producto AS BIGINT),
                 'ENTRADA',
                 'ANULACION_VENTA',
-                :cantidad,
+                CAST(v.cantidad AS NUMERIC),
                 :fecha_movimiento,
                 :id_user,
                 :id_venta,
                 'VENTA',
                 :observaciones,
                 false
-            )
+            FROM (VALUES {values_sql}) AS v(numero_movimiento, id_producto, cantidad)
         """)
 
-        db.execute(query, {
-            "numero_movimiento": numero_movimiento,
-            "id_producto": id_producto,
-            "cantidad": float(cantidad),
-            "fecha_movimiento": datetime.datetime.now(),
+        params.update({
+            "fecha_movimiento": ahora_negocio(),
             "id_user": id_user,
             "id_venta": id_venta,
             "observaciones": f"Entrada por anulación de venta {numero_venta}"
         })
+        db.execute(query, params)
 
-    def get_producto_info(self, db: Session, id_producto: int) -> Optional[Dict[str, Any]]:
-        """Obtiene información de un producto terminado."""
-        query = text("""
+    def get_productos_info(
+        self,
+        db: Session,
+        ids_producto: List[int],
+        bloquear: bool = False
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Obtiene la información de varios productos terminados en una sola consulta.
+        Retorna {id_producto: info}; los productos inexistentes o anulados no aparecen.
+
+        Con bloquear=True toma FOR UPDATE sobre las filas en orden de id_producto,
+        de modo que dos ventas concurrentes con los mismos productos siempre
+        esperan en el mismo orden y no pueden producir un deadlock.
+        """
+        if not ids_producto:
+            return {}
+
+        bloqueo = "FOR UPDATE" if bloquear else ""
+        query = text(f"""
             SELECT 
                 id_producto,
                 codigo_producto,
@@ -330,24 +347,25 @@ class VentasRepository(VentasRepositoryInterface):
                 precio_venta,
                 anulado
             FROM productos_terminados
-            WHERE id_producto = :id_producto
+            WHERE id_producto = ANY(:ids_producto)
               AND anulado = false
+            ORDER BY id_producto
+            {bloqueo}
         """)
-        
-        result = db.execute(query, {"id_producto": id_producto})
-        row = result.fetchone()
-        
-        if not row:
-            return None
-        
+
+        result = db.execute(query, {"ids_producto": sorted(ids_producto)})
+
         return {
-            "id_producto": row.id_producto,
-            "codigo_producto": row.codigo_producto,
-            "nombre": row.nombre,
-            "descripcion": row.descripcion,
-            "stock_actual": Decimal(str(row.stock_actual)),
-            "precio_venta": Decimal(str(row.precio_venta)),
-            "anulado": row.anulado
+            row.id_producto: {
+                "id_producto": row.id_producto,
+                "codigo_producto": row.codigo_producto,
+                "nombre": row.nombre,
+                "descripcion": row.descripcion,
+                "stock_actual": Decimal(str(row.stock_actual)),
+                "precio_venta": Decimal(str(row.precio_venta)),
+                "anulado": row.anulado
+            }
+            for row in result.fetchall()
         }
 
     def get_venta_por_id(self, db: Session, id_venta: int) -> Optional[Dict[str, Any]]:
@@ -432,13 +450,14 @@ class VentasRepository(VentasRepositoryInterface):
             FROM ventas v
             INNER JOIN usuario u ON v.id_user = u.id_user
             LEFT JOIN venta_detalles vd ON v.id_venta = vd.id_venta
-            WHERE DATE(v.fecha_venta) = :fecha
+            WHERE v.fecha_venta >= :desde AND v.fecha_venta < :hasta
             GROUP BY v.id_venta, v.numero_venta, v.fecha_venta, v.total, 
                      v.metodo_pago, u.nombre, v.anulado
             ORDER BY v.fecha_venta DESC
         """)
         
-        result = db.execute(query, {"fecha": fecha})
+        desde, hasta = rango_dia(fecha)
+        result = db.execute(query, {"desde": desde, "hasta": hasta})
         rows = result.fetchall()
         
         return [
@@ -455,20 +474,88 @@ class VentasRepository(VentasRepositoryInterface):
             for row in rows
         ]
 
+    def get_ventas_pagina(
+        self,
+        db: Session,
+        cursor: Optional[Cursor],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Ventas (incluidas las anuladas) de la más reciente a la más antigua,
+        a partir del cursor (fecha_venta, id_venta).
+
+        Primero se corta la página sobre idx_venta_fecha_id y recién después
+        se cuentan los items de esas ventas.
+        """
+        filtro_cursor = ""
+        params: Dict[str, Any] = {"limit": limit}
+        if cursor is not None:
+            filtro_cursor = "WHERE (v.fecha_venta, v.id_venta) < (:cursor_fecha, :cursor_id)"
+            params["cursor_fecha"], params["cursor_id"] = cursor
+
+        query = text(f"""
+            WITH pagina AS (
+                SELECT v.id_venta, v.numero_venta, v.fecha_venta, v.total,
+                       v.metodo_pago, v.id_user, v.anulado
+                FROM ventas v
+                {filtro_cursor}
+                ORDER BY v.fecha_venta DESC, v.id_venta DESC
+                LIMIT :limit
+            )
+            SELECT 
+                p.id_venta,
+                p.numero_venta,
+                p.fecha_venta,
+                p.total,
+                p.metodo_pago,
+                u.nombre AS nombre_usuario,
+                p.anulado,
+                (SELECT COUNT(*) FROM venta_detalles vd WHERE vd.id_venta = p.id_venta) AS cantidad_items
+            FROM pagina p
+            INNER JOIN usuario u ON p.id_user = u.id_user
+            ORDER BY p.fecha_venta DESC, p.id_venta DESC
+        """)
+
+        rows = db.execute(query, params).fetchall()
+
+        return [
+            {
+                "id_venta": row.id_venta,
+                "numero_venta": row.numero_venta,
+                "fecha_venta": row.fecha_venta,
+                "total": Decimal(str(row.total)),
+                "metodo_pago": row.metodo_pago,
+                "nombre_usuario": row.nombre_usuario,
+                "cantidad_items": row.cantidad_items,
+                "anulado": row.anulado
+            }
+            for row in rows
+        ]
+
     def get_productos_disponibles(self, db: Session) -> List[Dict[str, Any]]:
-        """Obtiene productos con stock disponible para venta."""
+        """
+        Obtiene productos con stock disponible para venta, con la fecha de su
+        última producción (None si nunca se produjo) en la misma consulta.
+        """
         query = text("""
             SELECT 
-                id_producto,
-                codigo_producto,
-                nombre,
-                descripcion,
-                stock_actual,
-                precio_venta
-            FROM productos_terminados
-            WHERE stock_actual > 0
-              AND anulado = false
-            ORDER BY nombre ASC
+                pt.id_producto,
+                pt.codigo_producto,
+                pt.nombre,
+                pt.descripcion,
+                pt.stock_actual,
+                pt.precio_venta,
+                (
+                    SELECT MAX(p.fecha_produccion)
+                    FROM produccion p
+                    INNER JOIN recetas r ON p.id_receta = r.id_receta
+                    WHERE r.id_producto = pt.id_producto
+                      AND p.anulado = false
+                ) AS fecha_ultima_produccion
+            FROM productos_terminados pt
+            WHERE pt.stock_actual > 0
+              AND pt.anulado = false
+            ORDER BY pt.nombre ASC
         """)
         
         result = db.execute(query)
@@ -481,7 +568,8 @@ class VentasRepository(VentasRepositoryInterface):
                 "nombre": row.nombre,
                 "descripcion": row.descripcion,
                 "stock_actual": Decimal(str(row.stock_actual)),
-                "precio_venta": Decimal(str(row.precio_venta))
+                "precio_venta": Decimal(str(row.precio_venta)),
+                "fecha_ultima_produccion": row.fecha_ultima_produccion
             }
             for row in rows
         ]
@@ -498,36 +586,3 @@ class VentasRepository(VentasRepositoryInterface):
         result = db.execute(query, {"id_venta": id_venta})
         row = result.fetchone()
         return row is not None
-
-    def get_ultima_produccion_producto(
-        self, 
-        db: Session, 
-        id_producto: int
-    ) -> Optional[Dict[str, Any]]:
-        """Obtiene la fecha de la última producción de un producto."""
-        query = text("""
-            SELECT 
-                p.id_produccion,
-                p.fecha_produccion,
-                p.cantidad_batch,
-                r.rendimiento_producto_terminado
-            FROM produccion p
-            INNER JOIN recetas r ON p.id_receta = r.id_receta
-            WHERE r.id_producto = :id_producto
-              AND p.anulado = false
-            ORDER BY p.fecha_produccion DESC
-            LIMIT 1
-        """)
-        
-        result = db.execute(query, {"id_producto": id_producto})
-        row = result.fetchone()
-        
-        if not row:
-            return None
-        
-        return {
-            "id_produccion": row.id_produccion,
-            "fecha_produccion": row.fecha_produccion,
-            "cantidad_batch": Decimal(str(row.cantidad_batch)),
-            "rendimiento_producto_terminado": Decimal(str(row.rendimiento_producto_terminado))
-        }
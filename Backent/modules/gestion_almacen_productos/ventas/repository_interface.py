@@ -3,6 +3,7 @@ from typing import List, Dict, Any, Optional
 from decimal import Decimal
 from sqlalchemy.orm import Session
 from datetime import date
+from utils.paginacion import Cursor
 
 
 class VentasRepositoryInterface(ABC):
@@ -27,37 +28,57 @@ class VentasRepositoryInterface(ABC):
         pass
     
     @abstractmethod
-    def crear_detalle_venta(
+    def crear_detalles_venta(
         self,
         db: Session,
         id_venta: int,
-        id_producto: int,
-        cantidad: Decimal,
-        precio_unitario: Decimal,
-        descuento_porcentaje: Decimal,
-        subtotal: Decimal
-    ) -> int:
-        """Crea un detalle de venta y retorna el id_detalle."""
+        detalles: List[Dict[str, Any]]
+    ) -> List[int]:
+        """Crea todos los detalles de una venta en un solo INSERT y retorna sus id_detalle."""
         pass
     
     @abstractmethod
-    def get_stock_producto(self, db: Session, id_producto: int) -> Decimal:
-        """Obtiene el stock actual de un producto terminado."""
+    def descontar_stock_productos(
+        self,
+        db: Session,
+        cantidades: Dict[int, Decimal]
+    ) -> Dict[int, Decimal]:
+        """Descuenta stock de varios productos si alcanza y retorna los nuevos stocks."""
         pass
     
     @abstractmethod
-    def descontar_stock_producto(
-        self, 
-        db: Session, 
-        id_producto: int, 
-        cantidad: Decimal
-    ) -> Decimal:
-        """Descuenta stock de un producto y retorna el nuevo stock."""
+    def crear_movimientos_salida(
+        self,
+        db: Session,
+        items: List[Dict[str, Any]],
+        id_user: int,
+        id_venta: int,
+        numero_venta: str
+    ):
+        """Crea los movimientos de SALIDA de una venta en un solo INSERT."""
+        pass
+
+    @abstractmethod
+    def crear_movimientos_entrada_compensacion(
+        self,
+        db: Session,
+        items: List[Dict[str, Any]],
+        numeros_movimiento: List[str],
+        id_user: int,
+        id_venta: int,
+        numero_venta: str
+    ):
+        """Crea los movimientos de ENTRADA por anulación de una venta en un solo INSERT."""
         pass
     
     @abstractmethod
-    def get_producto_info(self, db: Session, id_producto: int) -> Optional[Dict[str, Any]]:
-        """Obtiene información de un producto terminado."""
+    def get_productos_info(
+        self,
+        db: Session,
+        ids_producto: List[int],
+        bloquear: bool = False
+    ) -> Dict[int, Dict[str, Any]]:
+        """Obtiene información de varios productos; opcionalmente los bloquea en orden de id."""
         pass
     
     @abstractmethod
@@ -71,20 +92,21 @@ class VentasRepositoryInterface(ABC):
         pass
     
     @abstractmethod
-    def get_productos_disponibles(self, db: Session) -> List[Dict[str, Any]]:
-        """Obtiene productos con stock disponible para venta."""
+    def get_ventas_pagina(
+        self,
+        db: Session,
+        cursor: Optional[Cursor],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Ventas de la más reciente a la más antigua a partir del cursor (fecha_venta, id_venta)."""
         pass
     
     @abstractmethod
-    def anular_venta(self, db: Session, id_venta: int) -> bool:
-        """Marca una venta como anulada."""
+    def get_productos_disponibles(self, db: Session) -> List[Dict[str, Any]]:
+        """Obtiene productos con stock disponible para venta y la fecha de su última producción."""
         pass
     
     @abstractmethod
-    def get_ultima_produccion_producto(
-        self, 
-        db: Session, 
-        id_producto: int
-    ) -> Optional[Dict[str, Any]]:
-        """Obtiene la fecha de la última producción de un producto."""
+    def anular_venta(self, db: Session, id_venta: int) -> bool:
+        """Marca una venta como anulada."""
         pass
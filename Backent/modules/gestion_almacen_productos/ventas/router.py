@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import date, datetime
-from database import get_db
+from database import EjecutorDB, get_db, get_db_ejecutor
 from modules.gestion_almacen_productos.ventas.service import VentasService
 from modules.gestion_almacen_productos.ventas.schemas import (
     RegistrarVentaRequest,
@@ -16,6 +16,8 @@ from utils.standard_responses import (
     api_response_bad_request,
     api_response_internal_server_error
 )
+from utils.paginacion import LIMITE_DEFECTO, LIMITE_MAXIMO
+from utils.rango_fechas import hoy_negocio
 
 router = APIRouter()
 
@@ -83,7 +85,7 @@ def obtener_ventas_del_dia(
     """
     try:
         if not fecha:
-            fecha = date.today()
+            fecha = hoy_negocio()
         
         ventas = service.get_ventas_del_dia(db, fecha)
         return api_response_ok(
@@ -93,9 +95,34 @@ def obtener_ventas_del_dia(
         return api_response_internal_server_error(str(e))
 
 
-@router.get("/productos-disponibles", response_model=dict)
-def obtener_productos_disponibles(
+@router.get("/pagina", response_model=dict)
+def obtener_ventas_pagina(
+    after: Optional[str] = Query(None, description="Cursor '<fecha ISO>,<id>' (campo `siguiente` de la página anterior)"),
+    limit: int = Query(LIMITE_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+    con_total: bool = Query(False, description="Incluir total aproximado (estimación del planificador)"),
     db: Session = Depends(get_db)
+):
+    """
+    Historial de ventas paginado por cursor, de la más reciente a la más antigua.
+    
+    **Ejemplo:**
+    ```
+    GET /ventas/pagina?limit=50
+    GET /ventas/pagina?limit=50&after=2025-11-29T18:42:10,1542
+    ```
+    """
+    try:
+        pagina = service.get_ventas_pagina(db, after, limit, con_total)
+        return api_response_ok(data=pagina.model_dump())
+    except HTTPException as e:
+        return api_response_bad_request(str(e.detail))
+    except Exception as e:
+        return api_response_internal_server_error(str(e))
+
+
+@router.get("/productos-disponibles", response_model=dict)
+async def obtener_productos_disponibles(
+    db: EjecutorDB = Depends(get_db_ejecutor)
 ):
     """
     Obtiene productos disponibles para venta con descuentos sugeridos.
@@ -108,7 +135,7 @@ def obtener_productos_disponibles(
     Solo retorna productos con stock > 0.
     """
     try:
-        productos = service.get_productos_disponibles(db)
+        productos = await db(service.get_productos_disponibles)
         return api_response_ok(
             data=[p.model_dump() for p in productos]
         )
@@ -1,10 +1,14 @@
-from typing import List
+from typing import List, Optional
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from decimal import Decimal
 from datetime import date, datetime
 from modules.gestion_almacen_productos.ventas.service_interface import VentasServiceInterface
 from modules.gestion_almacen_productos.ventas.repository import VentasRepository
+from utils.paginacion import PaginaKeyset, cortar_pagina, leer_cursor, total_aproximado
+from utils.rango_fechas import hoy_negocio
+from modules.reportes.cache import invalidar_reportes
+from modules.resumen_diario.service import ResumenDiarioService
 from modules.gestion_almacen_productos.ventas.schemas import (
     RegistrarVentaRequest,
     VentaResponse,
@@ -20,6 +24,7 @@ class VentasService(VentasServiceInterface):
     
     def __init__(self):
         self.repository = VentasRepository()
+        self.resumen_diario = ResumenDiarioService()
     
     def registrar_venta(
         self,
@@ -30,23 +35,38 @@ class VentasService(VentasServiceInterface):
         """
         Registra una venta completa con descuento automático de stock.
         Transacción atómica: si falla algo, se hace rollback.
+
+        Todas las operaciones se hacen por conjunto (un producto o cien cuestan
+        las mismas consultas): una lectura de productos, un INSERT de detalles,
+        un UPDATE condicional de stock y un INSERT de movimientos.
+
+        Los productos se bloquean (FOR UPDATE, en orden de id_producto) antes de
+        validar, así dos cajas que venden el mismo producto se serializan y el
+        stock nunca queda negativo.
         """
         try:
-            # 1. VALIDAR STOCK DISPONIBLE
+            # 1. BLOQUEAR PRODUCTOS DEL TICKET Y VALIDAR STOCK DISPONIBLE
+            ids_producto = sorted({item.id_producto for item in request.items})
+            productos = self.repository.get_productos_info(db, ids_producto, bloquear=True)
+
+            cantidades_por_producto = {}
             for item in request.items:
-                producto = self.repository.get_producto_info(db, item.id_producto)
-                if not producto:
+                if item.id_producto not in productos:
                     raise HTTPException(
                         status_code=status.HTTP_404_NOT_FOUND,
                         detail=f"Producto con ID {item.id_producto} no encontrado"
                     )
-                
-                stock_actual = self.repository.get_stock_producto(db, item.id_producto)
-                if stock_actual < item.cantidad:
+                cantidades_por_producto[item.id_producto] = (
+                    cantidades_por_producto.get(item.id_producto, Decimal("0")) + item.cantidad
+                )
+
+            for id_producto, cantidad in cantidades_por_producto.items():
+                producto = productos[id_producto]
+                if producto["stock_actual"] < cantidad:
                     raise HTTPException(
                         status_code=status.HTTP_400_BAD_REQUEST,
                         detail=f"Stock insuficiente para {producto['nombre']}. "
-                               f"Disponible: {stock_actual}, Solicitado: {item.cantidad}"
+                               f"Disponible: {producto['stock_actual']}, Solicitado: {cantidad}"
                     )
             
             # 2. CALCULAR TOTALES
@@ -61,7 +81,10 @@ class VentasService(VentasServiceInterface):
                 total += subtotal
                 
                 items_calculados.append({
-                    "item": item,
+                    "id_producto": item.id_producto,
+                    "cantidad": item.cantidad,
+                    "precio_unitario": item.precio_unitario,
+                    "descuento_porcentaje": item.descuento_porcentaje,
                     "subtotal": subtotal
                 })
             
@@ -78,58 +101,43 @@ class VentasService(VentasServiceInterface):
             
             id_venta = venta_data["id_venta"]
             
-            # 4. CREAR DETALLES Y DESCONTAR STOCK
-            detalles_response = []
-            
-            for item_calc in items_calculados:
-                item = item_calc["item"]
-                subtotal = item_calc["subtotal"]
-                
-                # Crear detalle
-                id_detalle = self.repository.crear_detalle_venta(
-                    db=db,
-                    id_venta=id_venta,
-                    id_producto=item.id_producto,
-                    cantidad=item.cantidad,
-                    precio_unitario=item.precio_unitario,
-                    descuento_porcentaje=item.descuento_porcentaje,
-                    subtotal=subtotal
-                )
-                
-                # Obtener info del producto
-                producto = self.repository.get_producto_info(db, item.id_producto)
-                stock_anterior = self.repository.get_stock_producto(db, item.id_producto)
-                
-                # Descontar stock
-                stock_nuevo = self.repository.descontar_stock_producto(
-                    db=db,
-                    id_producto=item.id_producto,
-                    cantidad=item.cantidad
-                )
-                
-                # Crear movimiento de salida
-                self._crear_movimiento_salida(
-                    db=db,
-                    id_producto=item.id_producto,
-                    cantidad=item.cantidad,
-                    id_user=id_user,
-                    id_venta=id_venta,
-                    numero_venta=numero_venta
-                )
-                
-                # Preparar respuesta del detalle
-                detalles_response.append(VentaDetalleResponse(
+            # 4. CREAR DETALLES, DESCONTAR STOCK Y REGISTRAR MOVIMIENTOS (EN LOTE)
+            ids_detalle = self.repository.crear_detalles_venta(db, id_venta, items_calculados)
+
+            stocks_nuevos = self.repository.descontar_stock_productos(db, cantidades_por_producto)
+            for id_producto, cantidad in cantidades_por_producto.items():
+                if id_producto not in stocks_nuevos:
+                    # Otro proceso consumió el stock entre la validación y el descuento
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Stock insuficiente para {productos[id_producto]['nombre']}. "
+                               f"Solicitado: {cantidad}"
+                    )
+
+            self.repository.crear_movimientos_salida(
+                db=db,
+                items=items_calculados,
+                id_user=id_user,
+                id_venta=id_venta,
+                numero_venta=numero_venta
+            )
+
+            detalles_response = [
+                VentaDetalleResponse(
                     id_detalle=id_detalle,
-                    id_producto=item.id_producto,
-                    nombre_producto=producto["nombre"],
-                    cantidad=item.cantidad,
-                    precio_unitario=item.precio_unitario,
-                    descuento_porcentaje=item.descuento_porcentaje,
-                    subtotal=subtotal
-                ))
+                    id_producto=item_calc["id_producto"],
+                    nombre_producto=productos[item_calc["id_producto"]]["nombre"],
+                    cantidad=item_calc["cantidad"],
+                    precio_unitario=item_calc["precio_unitario"],
+                    descuento_porcentaje=item_calc["descuento_porcentaje"],
+                    subtotal=item_calc["subtotal"]
+                )
+                for id_detalle, item_calc in zip(ids_detalle, items_calculados)
+            ]
             
             # 5. COMMIT DE LA TRANSACCIÓN
             db.commit()
+            invalidar_reportes()
             
             # 6. PREPARAR RESPUESTA
             return VentaResponse(
@@ -202,28 +210,46 @@ class VentasService(VentasServiceInterface):
             ventas=ventas_response
         )
     
+    def get_ventas_pagina(
+        self,
+        db: Session,
+        after: Optional[str],
+        limit: int,
+        con_total: bool = False
+    ) -> PaginaKeyset[VentaResumenResponse]:
+        """Historial de ventas paginado por cursor (fecha_venta, id_venta)."""
+        ventas = self.repository.get_ventas_pagina(db, leer_cursor(after), limit + 1)
+        items, siguiente, hay_mas = cortar_pagina(
+            ventas, limit, lambda v: (v["fecha_venta"], v["id_venta"])
+        )
+        
+        return PaginaKeyset[VentaResumenResponse](
+            items=[VentaResumenResponse(**venta) for venta in items],
+            limit=limit,
+            siguiente=siguiente,
+            hay_mas=hay_mas,
+            total_aproximado=total_aproximado(db, "SELECT 1 FROM ventas") if con_total else None
+        )
+    
     def get_productos_disponibles(self, db: Session) -> List[ProductoDisponibleResponse]:
         """
         Obtiene productos disponibles con descuento sugerido según antigüedad.
         Implementa FC-09: Descuento automático productos día anterior.
         """
         productos = self.repository.get_productos_disponibles(db)
-        hoy = date.today()
+        hoy = hoy_negocio()
         
         resultado = []
         
         for producto in productos:
-            # Obtener última producción
-            ultima_prod = self.repository.get_ultima_produccion_producto(
-                db, 
-                producto["id_producto"]
-            )
+            # Última producción: viene en la misma consulta de productos
+            ultima_produccion = producto["fecha_ultima_produccion"]
             
             dias_antiguedad = None
             descuento_sugerido = Decimal("0")
             
-            if ultima_prod:
-                fecha_prod = ultima_prod["fecha_produccion"].date()
+            if ultima_produccion:
+                fecha_prod = ultima_produccion.date()
                 dias_antiguedad = (hoy - fecha_prod).days
                 
                 # Calcular descuento según antigüedad (FC-09)
@@ -267,34 +293,40 @@ class VentasService(VentasServiceInterface):
                     detail="La venta ya está anulada"
                 )
             
-            # Restaurar stock de cada producto
-            for detalle in venta_data["detalles"]:
-                stock_anterior = self.repository.get_stock_producto(
-                    db, 
-                    detalle["id_producto"]
-                )
-                
-                # Incrementar stock (restaurar)
-                nuevo_stock = self.repository.incrementar_stock_producto(
+            detalles = sorted(venta_data["detalles"], key=lambda d: d["id_producto"])
+
+            # Números de los movimientos de compensación, antes de bloquear productos
+            numeros_movimiento = self.repository.generar_numeros_movimiento_productos_terminados(
+                db, len(detalles)
+            )
+
+            # Restaurar stock de cada producto (en orden de id_producto, igual que registrar_venta)
+            for detalle in detalles:
+                self.repository.incrementar_stock_producto(
                     db=db,
                     id_producto=detalle["id_producto"],
                     cantidad=detalle["cantidad"]
                 )
 
-                # Crear movimiento de entrada (compensación)
-                self._crear_movimiento_entrada_compensacion(
-                    db=db,
-                    id_producto=detalle["id_producto"],
-                    cantidad=detalle["cantidad"],
-                    id_user=id_user,
-                    id_venta=id_venta,
-                    numero_venta=venta_data["numero_venta"]
-                )
+            # Movimientos de entrada (compensación) en un solo INSERT
+            self.repository.crear_movimientos_entrada_compensacion(
+                db=db,
+                items=detalles,
+                numeros_movimiento=numeros_movimiento,
+                id_user=id_user,
+                id_venta=id_venta,
+                numero_venta=venta_data["numero_venta"]
+            )
             
             # Marcar venta como anulada
             self.repository.anular_venta(db, id_venta)
             
+            # Si la venta es de un día ya cerrado, recalcular su resumen diario
+            self.resumen_diario.actualizar_dias(db, [venta_data["fecha_venta"].date()])
+            
             db.commit()
+            # El día de la venta y hoy (el stock del producto vuelve a subir)
+            invalidar_reportes(venta_data["fecha_venta"].date(), hoy_negocio())
             
             # Retornar venta actualizada
             return self.get_venta_por_id(db, id_venta)
@@ -308,45 +340,3 @@ class VentasService(VentasServiceInterface):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error al anular venta: {str(e)}"
             )
-    
-    # ============================================================
-    # MÉTODOS PRIVADOS
-    # ============================================================
-    
-    def _crear_movimiento_salida(
-        self,
-        db: Session,
-        id_producto: int,
-        cantidad: Decimal,
-        id_user: int,
-        id_venta: int,
-        numero_venta: str
-    ):
-        """Crea un movimiento de SALIDA en movimiento_productos_terminados."""
-        self.repository.crear_movimiento_salida(
-            db=db,
-            id_producto=id_producto,
-            cantidad=cantidad,
-            id_user=id_user,
-            id_venta=id_venta,
-            numero_venta=numero_venta
-        )
-
-    def _crear_movimiento_entrada_compensacion(
-        self,
-        db: Session,
-        id_producto: int,
-        cantidad: Decimal,
-        id_user: int,
-        id_venta: int,
-        numero_venta: str
-    ):
-        """Crea un movimiento de ENTRADA por anulación de venta."""
-        self.repository.crear_movimiento_entrada_compensacion(
-            db=db,
-            id_producto=id_producto,
-            cantidad=cantidad,
-            id_user=id_user,
-            id_venta=id_venta,
-            numero_venta=numero_venta
-        )
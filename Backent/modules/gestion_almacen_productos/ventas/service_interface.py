@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 from sqlalchemy.orm import Session
 from datetime import date
 from modules.gestion_almacen_productos.ventas.schemas import (
@@ -9,6 +9,7 @@ from modules.gestion_almacen_productos.ventas.schemas import (
     ProductoDisponibleResponse,
     VentasDelDiaResponse
 )
+from utils.paginacion import PaginaKeyset
 
 
 class VentasServiceInterface(ABC):
@@ -40,6 +41,17 @@ class VentasServiceInterface(ABC):
         """Obtiene todas las ventas de un día específico."""
         pass
     
+    @abstractmethod
+    def get_ventas_pagina(
+        self,
+        db: Session,
+        after: Optional[str],
+        limit: int,
+        con_total: bool = False
+    ) -> PaginaKeyset[VentaResumenResponse]:
+        """Historial de ventas paginado por cursor, de la más reciente a la más antigua."""
+        pass
+    
     @abstractmethod
     def get_productos_disponibles(self, db: Session) -> List[ProductoDisponibleResponse]:
         """Obtiene productos disponibles para venta con descuentos sugeridos."""
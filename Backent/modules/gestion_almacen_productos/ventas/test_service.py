@@ -19,6 +19,7 @@ from modules.gestion_almacen_productos.ventas.schemas import (
     VentaResponse,
     VentaResumenResponse
 )
+from utils.rango_fechas import hoy_negocio
 
 
 # ==================== FIXTURES ====================
@@ -114,7 +115,8 @@ def mock_productos_disponibles():
             "nombre": "Pan de Chocolate",
             "descripcion": "Delicioso",
             "stock_actual": Decimal("100"),
-            "precio_venta": Decimal("10.00")
+            "precio_venta": Decimal("10.00"),
+            "fecha_ultima_produccion": None
         },
         {
             "id_producto": 2,
@@ -122,7 +124,8 @@ def mock_productos_disponibles():
             "nombre": "Croissant",
             "descripcion": "Crujiente",
             "stock_actual": Decimal("50"),
-            "precio_venta": Decimal("8.00")
+            "precio_venta": Decimal("8.00"),
+            "fecha_ultima_produccion": None
         }
     ]
 
@@ -154,23 +157,21 @@ class TestVentasService:
         - Se crea movimiento de salida
         """
         # Arrange
-        with patch.object(self.service.repository, 'get_producto_info') as mock_get_producto, \
-             patch.object(self.service.repository, 'get_stock_producto') as mock_get_stock, \
+        with patch.object(self.service.repository, 'get_productos_info') as mock_get_productos, \
              patch.object(self.service.repository, 'generar_numero_venta') as mock_generar_num, \
              patch.object(self.service.repository, 'crear_venta') as mock_crear_venta, \
-             patch.object(self.service.repository, 'crear_detalle_venta') as mock_crear_detalle, \
-             patch.object(self.service.repository, 'descontar_stock_producto') as mock_descontar, \
-             patch.object(self.service.repository, 'crear_movimiento_salida') as mock_mov:
+             patch.object(self.service.repository, 'crear_detalles_venta') as mock_crear_detalles, \
+             patch.object(self.service.repository, 'descontar_stock_productos') as mock_descontar, \
+             patch.object(self.service.repository, 'crear_movimientos_salida') as mock_mov:
             
-            mock_get_producto.return_value = mock_producto_info
-            mock_get_stock.return_value = Decimal("100")
+            mock_get_productos.return_value = {1: mock_producto_info}
             mock_generar_num.return_value = "V-20250101-001"
             mock_crear_venta.return_value = {
                 "id_venta": 1,
                 "fecha_venta": datetime(2025, 1, 1, 10, 0, 0)
             }
-            mock_crear_detalle.return_value = 1
-            mock_descontar.return_value = Decimal("95")
+            mock_crear_detalles.return_value = [1]
+            mock_descontar.return_value = {1: Decimal("95")}
             
             # Act
             resultado = self.service.registrar_venta(
@@ -194,8 +195,8 @@ class TestVentasService:
         - Lanza HTTPException 404
         """
         # Arrange
-        with patch.object(self.service.repository, 'get_producto_info') as mock_get:
-            mock_get.return_value = None
+        with patch.object(self.service.repository, 'get_productos_info') as mock_get:
+            mock_get.return_value = {}
             
             # Act & Assert
             with pytest.raises(HTTPException) as exc_info:
@@ -218,11 +219,10 @@ class TestVentasService:
         - Mensaje indica stock disponible y solicitado
         """
         # Arrange
-        with patch.object(self.service.repository, 'get_producto_info') as mock_get_producto, \
-             patch.object(self.service.repository, 'get_stock_producto') as mock_get_stock:
+        with patch.object(self.service.repository, 'get_productos_info') as mock_get_productos:
             
-            mock_get_producto.return_value = mock_producto_info
-            mock_get_stock.return_value = Decimal("2")  # Solo hay 2, se piden 5
+            mock_producto_info["stock_actual"] = Decimal("2")  # Solo hay 2, se piden 5
+            mock_get_productos.return_value = {1: mock_producto_info}
             
             # Act & Assert
             with pytest.raises(HTTPException) as exc_info:
@@ -251,23 +251,21 @@ class TestVentasService:
             metodo_pago="efectivo"
         )
         
-        with patch.object(self.service.repository, 'get_producto_info') as mock_get_producto, \
-             patch.object(self.service.repository, 'get_stock_producto') as mock_get_stock, \
+        with patch.object(self.service.repository, 'get_productos_info') as mock_get_productos, \
              patch.object(self.service.repository, 'generar_numero_venta') as mock_generar_num, \
              patch.object(self.service.repository, 'crear_venta') as mock_crear_venta, \
-             patch.object(self.service.repository, 'crear_detalle_venta') as mock_crear_detalle, \
-             patch.object(self.service.repository, 'descontar_stock_producto') as mock_descontar, \
-             patch.object(self.service.repository, 'crear_movimiento_salida') as mock_mov:
+             patch.object(self.service.repository, 'crear_detalles_venta') as mock_crear_detalles, \
+             patch.object(self.service.repository, 'descontar_stock_productos') as mock_descontar, \
+             patch.object(self.service.repository, 'crear_movimientos_salida') as mock_mov:
             
-            mock_get_producto.return_value = mock_producto_info
-            mock_get_stock.return_value = Decimal("100")
+            mock_get_productos.return_value = {1: mock_producto_info}
             mock_generar_num.return_value = "V-20250101-001"
             mock_crear_venta.return_value = {
                 "id_venta": 1,
                 "fecha_venta": datetime(2025, 1, 1, 10, 0, 0)
             }
-            mock_crear_detalle.return_value = 1
-            mock_descontar.return_value = Decimal("95")
+            mock_crear_detalles.return_value = [1]
+            mock_descontar.return_value = {1: Decimal("95")}
             
             # Act
             resultado = self.service.registrar_venta(mock_db_session, request, id_user=1)
@@ -285,7 +283,7 @@ class TestVentasService:
         - Se propaga HTTPException 500
         """
         # Arrange
-        with patch.object(self.service.repository, 'get_producto_info') as mock_get:
+        with patch.object(self.service.repository, 'get_productos_info') as mock_get:
             mock_get.side_effect = Exception("Error de conexión")
             
             # Act & Assert
@@ -295,6 +293,97 @@ class TestVentasService:
             assert exc_info.value.status_code == 500
             mock_db_session.rollback.assert_called()
 
+    def test_registrar_venta_multiples_items_usa_operaciones_en_lote(
+        self,
+        mock_db_session,
+        mock_producto_info
+    ):
+        """
+        Test: Una venta con muchos items usa una sola llamada por operación.
+        
+        Resultado esperado:
+        - Productos, detalles, stock y movimientos se procesan en lote
+        - Las cantidades de un mismo producto se agregan antes de descontar
+        """
+        # Arrange
+        segundo_producto = dict(mock_producto_info, id_producto=2, nombre="Croissant")
+        items = [
+            VentaItemRequest(id_producto=1, cantidad=Decimal("2"), precio_unitario=Decimal("10.00")),
+            VentaItemRequest(id_producto=2, cantidad=Decimal("1"), precio_unitario=Decimal("8.00")),
+            VentaItemRequest(id_producto=1, cantidad=Decimal("3"), precio_unitario=Decimal("10.00")),
+        ]
+        request = RegistrarVentaRequest(items=items, metodo_pago="efectivo")
+        
+        with patch.object(self.service.repository, 'get_productos_info') as mock_get_productos, \
+             patch.object(self.service.repository, 'generar_numero_venta') as mock_generar_num, \
+             patch.object(self.service.repository, 'crear_venta') as mock_crear_venta, \
+             patch.object(self.service.repository, 'crear_detalles_venta') as mock_crear_detalles, \
+             patch.object(self.service.repository, 'descontar_stock_productos') as mock_descontar, \
+             patch.object(self.service.repository, 'crear_movimientos_salida') as mock_mov:
+            
+            mock_get_productos.return_value = {1: mock_producto_info, 2: segundo_producto}
+            mock_generar_num.return_value = "VENTA-202501-1"
+            mock_crear_venta.return_value = {
+                "id_venta": 1,
+                "fecha_venta": datetime(2025, 1, 1, 10, 0, 0)
+            }
+            mock_crear_detalles.return_value = [10, 11, 12]
+            mock_descontar.return_value = {1: Decimal("95"), 2: Decimal("99")}
+            
+            # Act
+            resultado = self.service.registrar_venta(mock_db_session, request, id_user=1)
+            
+            # Assert
+            mock_get_productos.assert_called_once_with(mock_db_session, [1, 2], bloquear=True)
+            mock_crear_detalles.assert_called_once()
+            mock_descontar.assert_called_once_with(
+                mock_db_session, {1: Decimal("5"), 2: Decimal("1")}
+            )
+            mock_mov.assert_called_once()
+            assert [d.id_detalle for d in resultado.detalles] == [10, 11, 12]
+            assert resultado.detalles[1].nombre_producto == "Croissant"
+            assert resultado.total == Decimal("58.00")
+
+    def test_registrar_venta_stock_consumido_durante_registro(
+        self,
+        mock_db_session,
+        mock_venta_request,
+        mock_producto_info
+    ):
+        """
+        Test: El UPDATE condicional no descuenta porque el stock ya no alcanza.
+        
+        Resultado esperado:
+        - Lanza HTTPException 400
+        - Se hace rollback y no se registran movimientos
+        """
+        # Arrange
+        with patch.object(self.service.repository, 'get_productos_info') as mock_get_productos, \
+             patch.object(self.service.repository, 'generar_numero_venta') as mock_generar_num, \
+             patch.object(self.service.repository, 'crear_venta') as mock_crear_venta, \
+             patch.object(self.service.repository, 'crear_detalles_venta') as mock_crear_detalles, \
+             patch.object(self.service.repository, 'descontar_stock_productos') as mock_descontar, \
+             patch.object(self.service.repository, 'crear_movimientos_salida') as mock_mov:
+            
+            mock_get_productos.return_value = {1: mock_producto_info}
+            mock_generar_num.return_value = "VENTA-202501-1"
+            mock_crear_venta.return_value = {
+                "id_venta": 1,
+                "fecha_venta": datetime(2025, 1, 1, 10, 0, 0)
+            }
+            mock_crear_detalles.return_value = [1]
+            mock_descontar.return_value = {}  # Ningún producto cumplió stock_actual >= cantidad
+            
+            # Act & Assert
+            with pytest.raises(HTTPException) as exc_info:
+                self.service.registrar_venta(mock_db_session, mock_venta_request, id_user=1)
+            
+            assert exc_info.value.status_code == 400
+            assert "Stock insuficiente" in exc_info.value.detail
+            mock_mov.assert_not_called()
+            mock_db_session.rollback.assert_called()
+            mock_db_session.commit.assert_not_called()
+
     # -------------------- GET VENTA POR ID --------------------
 
     def test_get_venta_por_id_existente(self, mock_db_session, mock_venta_data):
@@ -428,11 +517,9 @@ class TestVentasService:
         - Retorna lista de productos con stock
         """
         # Arrange
-        with patch.object(self.service.repository, 'get_productos_disponibles') as mock_get, \
-             patch.object(self.service.repository, 'get_ultima_produccion_producto') as mock_prod:
+        with patch.object(self.service.repository, 'get_productos_disponibles') as mock_get:
             
-            mock_get.return_value = mock_productos_disponibles
-            mock_prod.return_value = None  # Sin producción registrada
+            mock_get.return_value = mock_productos_disponibles  # Sin producción registrada
             
             # Act
             resultado = self.service.get_productos_disponibles(mock_db_session)
@@ -451,18 +538,14 @@ class TestVentasService:
         - 3+ días: 70%
         """
         # Arrange
-        hoy = date.today()
+        hoy = hoy_negocio()
         
-        with patch.object(self.service.repository, 'get_productos_disponibles') as mock_get, \
-             patch.object(self.service.repository, 'get_ultima_produccion_producto') as mock_prod:
-            
-            # Solo un producto para simplificar
-            mock_get.return_value = [mock_productos_disponibles[0]]
+        with patch.object(self.service.repository, 'get_productos_disponibles') as mock_get:
             
-            # Producido ayer (1 día de antigüedad)
-            mock_prod.return_value = {
-                "fecha_produccion": datetime.combine(hoy, datetime.min.time()) - timedelta(days=1)
-            }
+            # Solo un producto para simplificar, producido ayer (1 día de antigüedad)
+            producto = dict(mock_productos_disponibles[0])
+            producto["fecha_ultima_produccion"] = datetime.combine(hoy, datetime.min.time()) - timedelta(days=1)
+            mock_get.return_value = [producto]
             
             # Act
             resultado = self.service.get_productos_disponibles(mock_db_session)
@@ -478,20 +561,25 @@ class TestVentasService:
         
         Resultado esperado:
         - Restaura stock
+        - Reserva los números de compensación antes de bloquear productos
+        - Crea los movimientos de compensación en un solo INSERT
         - Marca venta como anulada
         """
         # Arrange
         venta_anulada = mock_venta_data.copy()
         venta_anulada["anulado"] = True
+        llamadas = Mock()
         
         with patch.object(self.service.repository, 'get_venta_por_id') as mock_get, \
-             patch.object(self.service.repository, 'get_stock_producto') as mock_stock, \
-             patch.object(self.service.repository, 'incrementar_stock_producto') as mock_incr, \
-             patch.object(self.service.repository, 'crear_movimiento_entrada_compensacion') as mock_mov, \
+             patch.object(self.service.repository, 'generar_numeros_movimiento_productos_terminados',
+                          llamadas.generar_numeros), \
+             patch.object(self.service.repository, 'incrementar_stock_producto',
+                          llamadas.incrementar_stock) as mock_incr, \
+             patch.object(self.service.repository, 'crear_movimientos_entrada_compensacion') as mock_mov, \
              patch.object(self.service.repository, 'anular_venta') as mock_anular:
             
             mock_get.side_effect = [mock_venta_data, venta_anulada]
-            mock_stock.return_value = Decimal("95")
+            llamadas.generar_numeros.return_value = ["MPT-202501-00001"]
             mock_incr.return_value = Decimal("100")
             
             # Act
@@ -500,9 +588,39 @@ class TestVentasService:
             # Assert
             assert resultado.anulado == True
             mock_incr.assert_called_once()
+            assert [c[0] for c in llamadas.mock_calls] == ['generar_numeros', 'incrementar_stock']
+            llamadas.generar_numeros.assert_called_once_with(mock_db_session, 1)
+            mock_mov.assert_called_once()
+            assert mock_mov.call_args.kwargs["numeros_movimiento"] == ["MPT-202501-00001"]
             mock_anular.assert_called_once_with(mock_db_session, 1)
             mock_db_session.commit.assert_called()
 
+    def test_anular_venta_recalcula_resumen_del_dia(self, mock_db_session, mock_venta_data):
+        """
+        Test: Anular una venta de un día anterior.
+        
+        Resultado esperado:
+        - Se recalcula el resumen diario del día de la venta antes del commit
+        """
+        # Arrange
+        llamadas = Mock()
+        mock_db_session.commit = llamadas.commit
+        
+        with patch.object(self.service.repository, 'get_venta_por_id', return_value=mock_venta_data), \
+             patch.object(self.service.repository, 'incrementar_stock_producto', return_value=Decimal("100")), \
+             patch.object(self.service.repository, 'generar_numeros_movimiento_productos_terminados',
+                          return_value=["MPT-202501-00001"]), \
+             patch.object(self.service.repository, 'crear_movimientos_entrada_compensacion'), \
+             patch.object(self.service.repository, 'anular_venta'), \
+             patch.object(self.service.resumen_diario, 'actualizar_dias', llamadas.actualizar_dias):
+            
+            # Act
+            self.service.anular_venta(mock_db_session, id_venta=1, id_user=1)
+        
+        # Assert
+        llamadas.actualizar_dias.assert_called_once_with(mock_db_session, [date(2025, 1, 1)])
+        assert [c[0] for c in llamadas.mock_calls][:2] == ['actualizar_dias', 'commit']
+
     def test_anular_venta_no_encontrada(self, mock_db_session):
         """
         Test: Error al anular venta inexistente.
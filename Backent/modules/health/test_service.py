@@ -244,3 +244,138 @@ class TestMiddlewareRequestID:
         # Restaurar
         request_id_ctx.reset(token)
         assert get_request_id() == ""
+
+
+class TestMetricasDB:
+    """Tests para la instrumentación del pool y de las sentencias SQL."""
+
+    @pytest.fixture
+    def engine(self):
+        from sqlalchemy import create_engine
+        from utils.metricas_db import PoolInstrumentado, instrumentar_engine
+
+        engine = create_engine(
+            "sqlite://",
+            poolclass=PoolInstrumentado,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.05,
+            connect_args={"check_same_thread": False}
+        )
+        instrumentar_engine(engine, "sync")
+        yield engine
+        engine.dispose()
+
+    def test_sentencias_y_espera_se_acumulan_en_el_request(self, engine):
+        """Test que las sentencias y la espera del pool se suman a las estadísticas del contexto."""
+        from sqlalchemy import text
+        from utils.metricas_db import EstadisticasSQL, estadisticas_sql_ctx
+
+        estadisticas = EstadisticasSQL()
+        token = estadisticas_sql_ctx.set(estadisticas)
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+        finally:
+            estadisticas_sql_ctx.reset(token)
+
+        assert estadisticas.sentencias == 2
+        assert estadisticas.tiempo_sql > 0
+        assert estadisticas.espera_pool > 0
+
+    def test_pool_agotado_cuenta_timeout(self, engine):
+        """Test que un checkout que agota pool_timeout se cuenta en db_pool_timeouts_total."""
+        from prometheus_client import REGISTRY
+        from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+        antes = REGISTRY.get_sample_value("db_pool_timeouts_total", {"engine": "sync"}) or 0
+
+        with engine.connect():
+            assert REGISTRY.get_sample_value("db_conexiones_activas", {"engine": "sync"}) == 1
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+
+        assert REGISTRY.get_sample_value("db_pool_timeouts_total", {"engine": "sync"}) == antes + 1
+
+    def test_middleware_registra_sentencias_por_endpoint(self, engine):
+        """Test que DBTimingMiddleware publica las sentencias con la ruta del endpoint."""
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from prometheus_client import REGISTRY
+        from sqlalchemy import text
+        from middleware.db_timing import DBTimingMiddleware
+
+        app = FastAPI()
+
+        @app.get("/prueba-db/{id_item}")
+        def endpoint(id_item: int):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+                conn.execute(text("SELECT 3"))
+            return {"id_item": id_item}
+
+        app.add_middleware(DBTimingMiddleware)
+        etiqueta = {"endpoint": "/prueba-db/{id_item}"}
+        antes = REGISTRY.get_sample_value("db_sentencias_por_request_sum", etiqueta) or 0
+
+        response = TestClient(app).get("/prueba-db/7")
+
+        assert response.status_code == 200
+        assert REGISTRY.get_sample_value("db_sentencias_por_request_sum", etiqueta) == antes + 3
+
+
+class TestGuardiaReplica:
+    """Tests para el control de retraso de la réplica de lectura."""
+
+    @staticmethod
+    def _guardia(lag=None, error=None, max_lag=30, intervalo=60):
+        from database import GuardiaReplica
+
+        engine = MagicMock()
+        conn = engine.connect.return_value.__enter__.return_value
+        if error is not None:
+            engine.connect.side_effect = error
+        else:
+            conn.execute.return_value.scalar.return_value = lag
+        return GuardiaReplica(engine, max_lag_segundos=max_lag, intervalo_segundos=intervalo), engine
+
+    def test_replica_al_dia_es_utilizable(self):
+        guardia, _ = self._guardia(lag=0.5)
+
+        assert guardia.utilizable() is True
+
+    def test_replica_atrasada_vuelve_a_la_primaria(self):
+        guardia, _ = self._guardia(lag=45)
+
+        assert guardia.utilizable() is False
+
+    def test_replica_sin_respuesta_vuelve_a_la_primaria(self):
+        guardia, _ = self._guardia(error=Exception("connection refused"))
+
+        assert guardia.utilizable() is False
+
+    def test_replica_sin_wal_aplicado_no_es_utilizable(self):
+        guardia, _ = self._guardia(lag=None)
+
+        assert guardia.utilizable() is False
+
+    def test_retraso_se_mide_una_vez_por_intervalo(self):
+        """Test que dentro del intervalo se reutiliza la última medición."""
+        guardia, engine = self._guardia(lag=0)
+
+        for _ in range(5):
+            guardia.utilizable()
+
+        assert engine.connect.call_count == 1
+        assert guardia.verificacion_pendiente is False
+
+    def test_crear_sesion_lectura_sin_replica_usa_la_primaria(self):
+        import database
+
+        with patch.object(database, "guardia_replica", None), \
+             patch.object(database, "SessionLocal") as primaria:
+            sesion = database.crear_sesion_lectura()
+
+        assert sesion is primaria.return_value
@@ -4,6 +4,7 @@ from decimal import Decimal
 from modules.insumo.model import Insumo
 from modules.insumo.schemas import InsumoCreate, InsumoUpdate
 from modules.gestion_almacen_inusmos.ingresos_insumos.model import IngresoProducto, IngresoProductoDetalle
+from modules.gestion_almacen_inusmos.insumo_stock.model import InsumoStock
 from .repository_interface import InsumoRepositoryInterface
 
 
@@ -22,45 +23,25 @@ class InsumoRepository(InsumoRepositoryInterface):
 
     def get_stock_actual_por_insumo(self) -> dict:
         """
-        Calcula el stock actual de cada insumo sumando cantidad_restante 
-        de todos los detalles de ingreso de ingresos COMPLETADOS y no anulados.
+        Obtiene el stock actual de cada insumo desde el resumen insumo_stock
+        (suma de cantidad_restante de los lotes de ingresos no anulados).
         Retorna un diccionario {id_insumo: stock_actual}
         """
-        resultados = (
-            self.db.query(
-                IngresoProductoDetalle.id_insumo,
-                func.coalesce(func.sum(IngresoProductoDetalle.cantidad_restante), 0).label('stock_actual')
-            )
-            .join(IngresoProducto, IngresoProductoDetalle.id_ingreso == IngresoProducto.id_ingreso)
-            .filter(
-                IngresoProducto.anulado == False,
-                IngresoProducto.estado == 'COMPLETADO'  # Solo ingresos completados
-            )
-            .group_by(IngresoProductoDetalle.id_insumo)
-            .all()
-        )
+        resultados = self.db.query(InsumoStock.id_insumo, InsumoStock.stock_actual).all()
         return {r.id_insumo: Decimal(str(r.stock_actual)) for r in resultados}
 
     def get_precio_promedio_por_insumo(self) -> dict:
         """
-        Calcula el precio promedio ponderado de cada insumo
-        basándose en los detalles de ingreso con cantidad_restante > 0.
+        Calcula el precio promedio ponderado de cada insumo con stock
+        a partir del resumen insumo_stock: valor_stock / stock_actual.
         Retorna un diccionario {id_insumo: precio_promedio}
         """
-        # Precio promedio ponderado = SUM(cantidad_restante * precio_unitario) / SUM(cantidad_restante)
         resultados = (
             self.db.query(
-                IngresoProductoDetalle.id_insumo,
-                (func.sum(IngresoProductoDetalle.cantidad_restante * IngresoProductoDetalle.precio_unitario) /
-                 func.nullif(func.sum(IngresoProductoDetalle.cantidad_restante), 0)).label('precio_promedio')
+                InsumoStock.id_insumo,
+                (InsumoStock.valor_stock / func.nullif(InsumoStock.stock_actual, 0)).label('precio_promedio')
             )
-            .join(IngresoProducto, IngresoProductoDetalle.id_ingreso == IngresoProducto.id_ingreso)
-            .filter(
-                IngresoProducto.anulado == False,
-                IngresoProducto.estado == 'COMPLETADO',
-                IngresoProductoDetalle.cantidad_restante > 0
-            )
-            .group_by(IngresoProductoDetalle.id_insumo)
+            .filter(InsumoStock.stock_actual > 0)
             .all()
         )
         return {r.id_insumo: Decimal(str(r.precio_promedio or 0)) for r in resultados}
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from database import get_db
+from database import EjecutorDB, get_db, get_db_ejecutor
 from modules.insumo.schemas import Insumo, InsumoCreate, InsumoUpdate
 from modules.insumo.service import InsumoService
 from typing import List
@@ -22,8 +22,8 @@ def create_insumo(insumo: InsumoCreate, service: InsumoService = Depends(get_ins
         return api_response_not_found(f"Error al crear el insumo: {str(e)}")
 
 @router.get("/", response_model=List[Insumo])
-def read_insumos(skip: int = 0, limit: int = 100, service: InsumoService = Depends(get_insumo_service)):
-    insumos = service.get_insumos(skip, limit)
+async def read_insumos(skip: int = 0, limit: int = 100, db: EjecutorDB = Depends(get_db_ejecutor)):
+    insumos = await db(lambda s: InsumoService(s).get_insumos(skip, limit))
     return api_response_ok(insumos)
 
 @router.get("/precios/ultimos")
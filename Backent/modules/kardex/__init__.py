@@ -0,0 +1,4 @@
+# Módulo de Kardex
+# Consulta de movimientos de insumos y productos terminados con saldo acumulado
+
+from . import router
@@ -0,0 +1,223 @@
+"""
+Repository para el módulo de Kardex.
+
+El saldo de cada fila se calcula en SQL con una función de ventana, sin
+recorrer el historial completo del ítem:
+
+1. `pagina`: los movimientos filtrados de la página (keyset por
+   (fecha_movimiento, id_movimiento), en orden cronológico).
+2. `limites`: por cada ítem de la página, el rango de fechas que cubre y el
+   saldo anterior a ese rango (una suma por ítem sobre idx_*_kardex, que
+   incluye tipo y cantidad: solo lee el índice).
+3. `saldos`: SUM() OVER de todos los movimientos del ítem dentro del rango
+   (también los que no cumplen los filtros de tipo o documento, porque
+   también mueven el stock) más el saldo anterior.
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.paginacion import Cursor, total_aproximado
+from utils.rango_fechas import rango_periodo
+from .repository_interface import KardexRepositoryInterface
+from .schemas import FiltrosKardex
+
+
+# kardex -> tabla de movimientos, columna del ítem y joins de la fila
+KARDEX = {
+    "insumos": {
+        "tabla": "movimiento_insumos",
+        "item": "id_insumo",
+        "join_item": "INNER JOIN insumo i ON i.id_insumo = m.id_insumo",
+        "codigo": "i.codigo",
+        "nombre": "i.nombre",
+        "unidad": "i.unidad_medida",
+        # Costo del lote (FEFO) que el movimiento consumió o ingresó
+        "join_costo": "LEFT JOIN ingresos_insumos_detalle d ON d.id_ingreso_detalle = m.id_lote",
+        "costo": "d.precio_unitario",
+        "lote": "m.id_lote",
+    },
+    "productos": {
+        "tabla": "movimiento_productos_terminados",
+        "item": "id_producto",
+        "join_item": "INNER JOIN productos_terminados i ON i.id_producto = m.id_producto",
+        "codigo": "i.codigo_producto",
+        "nombre": "i.nombre",
+        "unidad": "i.unidad_medida",
+        # Los productos no tienen lotes valorizados: se usa el precio del movimiento
+        "join_costo": "",
+        "costo": "m.precio_venta",
+        "lote": "NULL::bigint",
+    },
+}
+
+
+def _signo(alias: str) -> str:
+    """Cantidad con signo: ENTRADA suma, SALIDA resta, AJUSTE trae su propio signo."""
+    return (
+        f"CASE {alias}.tipo_movimiento WHEN 'SALIDA' THEN -{alias}.cantidad "
+        f"ELSE {alias}.cantidad END"
+    )
+
+
+class KardexRepository(KardexRepositoryInterface):
+    """Repository con las consultas del kardex."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def _filtros(
+        config: Dict[str, str],
+        filtros: FiltrosKardex,
+        cursor: Optional[Cursor] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Condiciones WHERE (sobre el alias m) y sus parámetros."""
+        condiciones = ["m.anulado = false"]
+        params: Dict[str, Any] = {}
+
+        if filtros.id_item is not None:
+            condiciones.append(f"m.{config['item']} = :id_item")
+            params["id_item"] = filtros.id_item
+        if filtros.fecha_inicio is not None:
+            condiciones.append("m.fecha_movimiento >= :desde")
+            params["desde"] = rango_periodo(filtros.fecha_inicio, filtros.fecha_inicio)[0]
+        if filtros.fecha_fin is not None:
+            condiciones.append("m.fecha_movimiento < :hasta")
+            params["hasta"] = rango_periodo(filtros.fecha_fin, filtros.fecha_fin)[1]
+        if filtros.tipo_movimiento is not None:
+            condiciones.append("m.tipo_movimiento = :tipo_movimiento")
+            params["tipo_movimiento"] = filtros.tipo_movimiento.value
+        if filtros.id_documento_origen is not None:
+            condiciones.append("m.id_documento_origen = :id_documento_origen")
+            params["id_documento_origen"] = filtros.id_documento_origen
+        if filtros.tipo_documento_origen is not None:
+            condiciones.append("m.tipo_documento_origen = :tipo_documento_origen")
+            params["tipo_documento_origen"] = filtros.tipo_documento_origen
+        if cursor is not None:
+            condiciones.append("(m.fecha_movimiento, m.id_movimiento) > (:cursor_fecha, :cursor_id)")
+            params["cursor_fecha"], params["cursor_id"] = cursor
+
+        return " AND ".join(condiciones), params
+
+    def obtener_movimientos(
+        self,
+        kardex: str,
+        filtros: FiltrosKardex,
+        cursor: Optional[Cursor],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Movimientos del kardex (`insumos` o `productos`) en orden cronológico
+        a partir del cursor, con el saldo del ítem después de cada movimiento
+        y su costo.
+        """
+        config = KARDEX[kardex]
+        tabla, item = config["tabla"], config["item"]
+        where, params = self._filtros(config, filtros, cursor)
+        params["limit"] = limit
+
+        query = text(f"""
+            WITH pagina AS (
+                SELECT m.id_movimiento, m.{item} AS id_item, m.fecha_movimiento
+                FROM {tabla} m
+                WHERE {where}
+                ORDER BY m.fecha_movimiento, m.id_movimiento
+                LIMIT :limit
+            ),
+            limites AS (
+                SELECT
+                    l.id_item, l.desde, l.hasta,
+                    (
+                        SELECT COALESCE(SUM({_signo('a')}), 0)
+                        FROM {tabla} a
+                        WHERE a.anulado = false
+                          AND a.{item} = l.id_item
+                          AND a.fecha_movimiento < l.desde
+                    ) AS saldo_anterior
+                FROM (
+                    SELECT id_item, MIN(fecha_movimiento) AS desde, MAX(fecha_movimiento) AS hasta
+                    FROM pagina
+                    GROUP BY id_item
+                ) l
+            ),
+            saldos AS (
+                SELECT
+                    m.id_movimiento,
+                    l.saldo_anterior + SUM({_signo('m')}) OVER (
+                        PARTITION BY m.{item}
+                        ORDER BY m.fecha_movimiento, m.id_movimiento
+                    ) AS saldo
+                FROM limites l
+                INNER JOIN {tabla} m
+                    ON m.{item} = l.id_item
+                   AND m.anulado = false
+                   AND m.fecha_movimiento >= l.desde
+                   AND m.fecha_movimiento <= l.hasta
+            )
+            SELECT
+                m.id_movimiento,
+                m.numero_movimiento,
+                m.fecha_movimiento,
+                m.{item} AS id_item,
+                {config['codigo']} AS codigo_item,
+                {config['nombre']} AS nombre_item,
+                {config['unidad']} AS unidad_medida,
+                m.tipo_movimiento,
+                m.motivo,
+                m.cantidad,
+                s.saldo,
+                {config['lote']} AS id_lote,
+                {config['costo']} AS costo_unitario,
+                m.id_documento_origen,
+                m.tipo_documento_origen,
+                m.observaciones
+            FROM pagina p
+            INNER JOIN {tabla} m ON m.id_movimiento = p.id_movimiento
+            INNER JOIN saldos s ON s.id_movimiento = p.id_movimiento
+            {config['join_item']}
+            {config['join_costo']}
+            ORDER BY p.fecha_movimiento, p.id_movimiento
+        """)
+
+        rows = self.db.execute(query, params).fetchall()
+
+        resultado = []
+        for row in rows:
+            cantidad = Decimal(str(row.cantidad))
+            movimiento = _signo_python(row.tipo_movimiento, cantidad)
+            costo = Decimal(str(row.costo_unitario)) if row.costo_unitario is not None else None
+            resultado.append({
+                "id_movimiento": row.id_movimiento,
+                "numero_movimiento": row.numero_movimiento,
+                "fecha_movimiento": row.fecha_movimiento,
+                "id_item": row.id_item,
+                "codigo_item": row.codigo_item,
+                "nombre_item": row.nombre_item,
+                "unidad_medida": str(row.unidad_medida),
+                "tipo_movimiento": row.tipo_movimiento,
+                "motivo": row.motivo,
+                "entrada": movimiento if movimiento > 0 else Decimal("0"),
+                "salida": -movimiento if movimiento < 0 else Decimal("0"),
+                "saldo": Decimal(str(row.saldo)),
+                "id_lote": row.id_lote,
+                "costo_unitario": costo,
+                "costo_total": cantidad * costo if costo is not None else None,
+                "id_documento_origen": row.id_documento_origen,
+                "tipo_documento_origen": row.tipo_documento_origen,
+                "observaciones": row.observaciones
+            })
+        return resultado
+
+    def estimar_movimientos(self, kardex: str, filtros: FiltrosKardex) -> int:
+        """Total aproximado (estimación del planificador) de movimientos filtrados."""
+        config = KARDEX[kardex]
+        where, params = self._filtros(config, filtros)
+        return total_aproximado(self.db, f"SELECT 1 FROM {config['tabla']} m WHERE {where}", params)
+
+
+def _signo_python(tipo_movimiento: str, cantidad: Decimal) -> Decimal:
+    """Mismo criterio que _signo() para repartir la cantidad en entrada/salida."""
+    return -cantidad if tipo_movimiento == "SALIDA" else cantidad
@@ -0,0 +1,31 @@
+"""
+Interface del repositorio de Kardex.
+Define el contrato para las consultas del kardex de insumos y productos terminados.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from utils.paginacion import Cursor
+
+from .schemas import FiltrosKardex
+
+
+class KardexRepositoryInterface(ABC):
+    """Interface para el repositorio de kardex."""
+
+    @abstractmethod
+    def obtener_movimientos(
+        self,
+        kardex: str,
+        filtros: FiltrosKardex,
+        cursor: Optional[Cursor],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Movimientos del kardex en orden cronológico, con saldo acumulado y costo."""
+        pass
+
+    @abstractmethod
+    def estimar_movimientos(self, kardex: str, filtros: FiltrosKardex) -> int:
+        """Total aproximado de movimientos que cumplen los filtros."""
+        pass
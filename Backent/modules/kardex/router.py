@@ -0,0 +1,114 @@
+"""
+Router para el módulo de Kardex.
+Endpoints de consulta del kardex de insumos y productos terminados.
+
+Cada fila trae el saldo del ítem después del movimiento, calculado en la
+base de datos (repository.py); las páginas avanzan por cursor.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import Optional
+from loguru import logger
+
+from database import get_db
+from enums.tipo_movimiento import TipoMovimientoEnum
+from utils.paginacion import LIMITE_DEFECTO, LIMITE_MAXIMO, PaginaKeyset
+from .schemas import FiltrosKardex, MovimientoKardex
+from .service import KardexService
+
+router = APIRouter()
+
+
+def get_kardex_service(db: Session = Depends(get_db)) -> KardexService:
+    """Dependency injection para el servicio de kardex."""
+    return KardexService(db)
+
+
+@router.get(
+    "/insumos",
+    response_model=PaginaKeyset[MovimientoKardex],
+    summary="Kardex de insumos",
+    description="""
+    Movimientos de insumos en orden cronológico con el saldo del insumo después
+    de cada movimiento y el costo del lote (FEFO) consumido o ingresado.
+
+    **Paginación:** enviar en `after` el campo `siguiente` de la página anterior.
+    """
+)
+def obtener_kardex_insumos(
+    id_insumo: Optional[int] = Query(default=None, description="Filtrar por insumo"),
+    fecha_inicio: Optional[date] = Query(default=None, description="Desde (YYYY-MM-DD)"),
+    fecha_fin: Optional[date] = Query(default=None, description="Hasta, inclusive (YYYY-MM-DD)"),
+    tipo_movimiento: Optional[TipoMovimientoEnum] = Query(default=None, description="ENTRADA, SALIDA o AJUSTE"),
+    id_documento_origen: Optional[int] = Query(default=None, description="ID del documento de origen"),
+    tipo_documento_origen: Optional[str] = Query(default=None, description="Ej. PRODUCCION, INGRESO"),
+    after: Optional[str] = Query(
+        default=None,
+        description="Cursor '<fecha ISO>,<id>' (campo `siguiente` de la página anterior)"
+    ),
+    limit: int = Query(default=LIMITE_DEFECTO, ge=1, le=LIMITE_MAXIMO, description="Tamaño de página"),
+    con_total: bool = Query(default=False, description="Incluir total aproximado"),
+    service: KardexService = Depends(get_kardex_service)
+):
+    """Kardex de insumos paginado por cursor."""
+    filtros = FiltrosKardex(
+        id_item=id_insumo,
+        fecha_inicio=fecha_inicio,
+        fecha_fin=fecha_fin,
+        tipo_movimiento=tipo_movimiento,
+        id_documento_origen=id_documento_origen,
+        tipo_documento_origen=tipo_documento_origen
+    )
+    try:
+        return service.obtener_kardex_insumos(filtros, after=after, limit=limit, con_total=con_total)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error al obtener kardex de insumos: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get(
+    "/productos",
+    response_model=PaginaKeyset[MovimientoKardex],
+    summary="Kardex de productos terminados",
+    description="""
+    Movimientos de productos terminados en orden cronológico con el saldo del
+    producto después de cada movimiento.
+
+    **Paginación:** enviar en `after` el campo `siguiente` de la página anterior.
+    """
+)
+def obtener_kardex_productos(
+    id_producto: Optional[int] = Query(default=None, description="Filtrar por producto"),
+    fecha_inicio: Optional[date] = Query(default=None, description="Desde (YYYY-MM-DD)"),
+    fecha_fin: Optional[date] = Query(default=None, description="Hasta, inclusive (YYYY-MM-DD)"),
+    tipo_movimiento: Optional[TipoMovimientoEnum] = Query(default=None, description="ENTRADA, SALIDA o AJUSTE"),
+    id_documento_origen: Optional[int] = Query(default=None, description="ID del documento de origen"),
+    tipo_documento_origen: Optional[str] = Query(default=None, description="Ej. PRODUCCION, VENTA"),
+    after: Optional[str] = Query(
+        default=None,
+        description="Cursor '<fecha ISO>,<id>' (campo `siguiente` de la página anterior)"
+    ),
+    limit: int = Query(default=LIMITE_DEFECTO, ge=1, le=LIMITE_MAXIMO, description="Tamaño de página"),
+    con_total: bool = Query(default=False, description="Incluir total aproximado"),
+    service: KardexService = Depends(get_kardex_service)
+):
+    """Kardex de productos terminados paginado por cursor."""
+    filtros = FiltrosKardex(
+        id_item=id_producto,
+        fecha_inicio=fecha_inicio,
+        fecha_fin=fecha_fin,
+        tipo_movimiento=tipo_movimiento,
+        id_documento_origen=id_documento_origen,
+        tipo_documento_origen=tipo_documento_origen
+    )
+    try:
+        return service.obtener_kardex_productos(filtros, after=after, limit=limit, con_total=con_total)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error al obtener kardex de productos: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,47 @@
+"""
+Schemas para el módulo de Kardex.
+"""
+
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional
+from datetime import date, datetime
+from decimal import Decimal
+
+from enums.tipo_movimiento import TipoMovimientoEnum
+
+
+class FiltrosKardex(BaseModel):
+    """Filtros de la consulta de kardex (todos opcionales)."""
+    id_item: Optional[int] = Field(default=None, description="id_insumo o id_producto")
+    fecha_inicio: Optional[date] = None
+    fecha_fin: Optional[date] = None
+    tipo_movimiento: Optional[TipoMovimientoEnum] = None
+    id_documento_origen: Optional[int] = None
+    tipo_documento_origen: Optional[str] = None
+
+
+class MovimientoKardex(BaseModel):
+    """Una fila del kardex con el saldo del ítem después del movimiento."""
+    id_movimiento: int
+    numero_movimiento: str
+    fecha_movimiento: datetime
+    id_item: int = Field(description="id_insumo o id_producto")
+    codigo_item: str
+    nombre_item: str
+    unidad_medida: str
+    tipo_movimiento: str
+    motivo: str
+    entrada: Decimal = Field(description="Cantidad que ingresa (0 en salidas)")
+    salida: Decimal = Field(description="Cantidad que sale (0 en entradas)")
+    saldo: Decimal = Field(description="Stock del ítem después del movimiento")
+    id_lote: Optional[int] = None
+    costo_unitario: Optional[Decimal] = Field(
+        default=None,
+        description="Insumos: precio del lote (FEFO) consumido o ingresado; productos: precio de venta"
+    )
+    costo_total: Optional[Decimal] = None
+    id_documento_origen: Optional[int] = None
+    tipo_documento_origen: Optional[str] = None
+    observaciones: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,77 @@
+"""
+Service para el módulo de Kardex.
+Valida los filtros y arma las páginas del kardex de insumos y productos terminados.
+"""
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from utils.paginacion import PaginaKeyset, cortar_pagina, leer_cursor
+from .repository import KardexRepository
+from .schemas import FiltrosKardex, MovimientoKardex
+from .service_interface import KardexServiceInterface
+
+
+class KardexService(KardexServiceInterface):
+    """Servicio de lógica de negocio para el kardex."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repository = KardexRepository(db)
+
+    def obtener_kardex_insumos(
+        self,
+        filtros: FiltrosKardex,
+        after: Optional[str] = None,
+        limit: int = 50,
+        con_total: bool = False
+    ) -> PaginaKeyset[MovimientoKardex]:
+        """Kardex de insumos: saldo por insumo y costo del lote (FEFO) de cada movimiento."""
+        return self._kardex("insumos", filtros, after, limit, con_total)
+
+    def obtener_kardex_productos(
+        self,
+        filtros: FiltrosKardex,
+        after: Optional[str] = None,
+        limit: int = 50,
+        con_total: bool = False
+    ) -> PaginaKeyset[MovimientoKardex]:
+        """Kardex de productos terminados: saldo por producto y precio de cada movimiento."""
+        return self._kardex("productos", filtros, after, limit, con_total)
+
+    def _kardex(
+        self,
+        kardex: str,
+        filtros: FiltrosKardex,
+        after: Optional[str],
+        limit: int,
+        con_total: bool
+    ) -> PaginaKeyset[MovimientoKardex]:
+        """
+        Página del kardex en orden cronológico (del movimiento más antiguo al
+        más reciente). `after` es el campo `siguiente` de la página anterior.
+        """
+        if filtros.fecha_inicio and filtros.fecha_fin and filtros.fecha_fin < filtros.fecha_inicio:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="fecha_fin debe ser mayor o igual a fecha_inicio"
+            )
+
+        # Una fila extra indica si hay página siguiente
+        movimientos = self.repository.obtener_movimientos(
+            kardex, filtros, leer_cursor(after), limit + 1
+        )
+        items, siguiente, hay_mas = cortar_pagina(
+            movimientos, limit, lambda m: (m["fecha_movimiento"], m["id_movimiento"])
+        )
+
+        total = self.repository.estimar_movimientos(kardex, filtros) if con_total else None
+
+        return PaginaKeyset[MovimientoKardex](
+            items=[MovimientoKardex(**m) for m in items],
+            limit=limit,
+            siguiente=siguiente,
+            hay_mas=hay_mas,
+            total_aproximado=total
+        )
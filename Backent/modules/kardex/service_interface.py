@@ -0,0 +1,37 @@
+"""
+Interface del servicio de Kardex.
+Define el contrato para la lógica de negocio del módulo de kardex.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from utils.paginacion import PaginaKeyset
+
+from .schemas import FiltrosKardex, MovimientoKardex
+
+
+class KardexServiceInterface(ABC):
+    """Interface para el servicio de kardex."""
+
+    @abstractmethod
+    def obtener_kardex_insumos(
+        self,
+        filtros: FiltrosKardex,
+        after: Optional[str] = None,
+        limit: int = 50,
+        con_total: bool = False
+    ) -> PaginaKeyset[MovimientoKardex]:
+        """Kardex de insumos paginado por cursor, con saldo y costo por movimiento."""
+        pass
+
+    @abstractmethod
+    def obtener_kardex_productos(
+        self,
+        filtros: FiltrosKardex,
+        after: Optional[str] = None,
+        limit: int = 50,
+        con_total: bool = False
+    ) -> PaginaKeyset[MovimientoKardex]:
+        """Kardex de productos terminados paginado por cursor, con saldo por movimiento."""
+        pass
@@ -0,0 +1,147 @@
+"""
+Tests unitarios para KardexService.
+
+Este módulo contiene tests para validar el comportamiento del servicio de kardex
+utilizando mocks para aislar la lógica del servicio.
+
+Se evalúa: paginación por cursor, validación de filtros y kardex de productos.
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+from decimal import Decimal
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+
+from modules.kardex.service import KardexService
+from modules.kardex.schemas import FiltrosKardex, MovimientoKardex
+from utils.paginacion import PaginaKeyset
+from utils.rango_fechas import hoy_negocio
+
+
+# ==================== FIXTURES ADICIONALES ====================
+
+def _movimiento(id_movimiento, fecha, tipo='ENTRADA', cantidad='10', saldo='10'):
+    """Fila del kardex tal como la devuelve el repository."""
+    cantidad = Decimal(cantidad)
+    return {
+        'id_movimiento': id_movimiento,
+        'numero_movimiento': f'MOV-{id_movimiento:05d}',
+        'fecha_movimiento': fecha,
+        'id_item': 1,
+        'codigo_item': 'INS001',
+        'nombre_item': 'Harina',
+        'unidad_medida': 'KG',
+        'tipo_movimiento': tipo,
+        'motivo': 'Ingreso' if tipo == 'ENTRADA' else 'Producción',
+        'entrada': cantidad if tipo == 'ENTRADA' else Decimal('0'),
+        'salida': cantidad if tipo == 'SALIDA' else Decimal('0'),
+        'saldo': Decimal(saldo),
+        'id_lote': 7,
+        'costo_unitario': Decimal('2.50'),
+        'costo_total': cantidad * Decimal('2.50'),
+        'id_documento_origen': 3,
+        'tipo_documento_origen': 'INGRESO' if tipo == 'ENTRADA' else 'PRODUCCION',
+        'observaciones': None
+    }
+
+
+@pytest.fixture
+def mock_movimientos_kardex():
+    """Tres movimientos de un insumo con su saldo acumulado."""
+    inicio = datetime(2026, 10, 1, 8, 0)
+    return [
+        _movimiento(1, inicio, 'ENTRADA', '10', '10'),
+        _movimiento(2, inicio + timedelta(hours=1), 'SALIDA', '4', '6'),
+        _movimiento(3, inicio + timedelta(hours=2), 'ENTRADA', '5', '11'),
+    ]
+
+
+# ==================== TEST CLASS ====================
+
+class TestKardexService:
+    """Tests para KardexService."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, mock_db_session):
+        """Configura el servicio antes de cada test."""
+        self.mock_repository = MagicMock()
+
+        with patch('modules.kardex.service.KardexRepository', return_value=self.mock_repository):
+            self.service = KardexService(mock_db_session)
+
+        self.service.repository = self.mock_repository
+
+    def test_obtener_kardex_insumos_primera_pagina(self, mock_movimientos_kardex):
+        """Con más filas que el límite devuelve el cursor del último movimiento de la página."""
+        self.mock_repository.obtener_movimientos.return_value = mock_movimientos_kardex
+        filtros = FiltrosKardex(id_item=1)
+
+        resultado = self.service.obtener_kardex_insumos(filtros, limit=2)
+
+        assert isinstance(resultado, PaginaKeyset)
+        assert [m.id_movimiento for m in resultado.items] == [1, 2]
+        assert all(isinstance(m, MovimientoKardex) for m in resultado.items)
+        assert resultado.hay_mas is True
+        assert resultado.siguiente == '2026-10-01T09:00:00,2'
+        assert resultado.total_aproximado is None
+        # Se pide una fila extra para saber si hay página siguiente
+        self.mock_repository.obtener_movimientos.assert_called_once_with('insumos', filtros, None, 3)
+        self.mock_repository.estimar_movimientos.assert_not_called()
+
+    def test_obtener_kardex_insumos_ultima_pagina(self, mock_movimientos_kardex):
+        """Sin fila extra no hay página siguiente."""
+        self.mock_repository.obtener_movimientos.return_value = mock_movimientos_kardex
+
+        resultado = self.service.obtener_kardex_insumos(FiltrosKardex(), limit=50)
+
+        assert len(resultado.items) == 3
+        assert resultado.hay_mas is False
+        assert resultado.siguiente is None
+        assert resultado.items[-1].saldo == Decimal('11')
+
+    def test_obtener_kardex_insumos_con_cursor_y_total(self, mock_movimientos_kardex):
+        """El cursor `after` se decodifica y el total se pide solo con con_total."""
+        self.mock_repository.obtener_movimientos.return_value = mock_movimientos_kardex[2:]
+        self.mock_repository.estimar_movimientos.return_value = 120
+        filtros = FiltrosKardex(id_item=1)
+
+        resultado = self.service.obtener_kardex_insumos(
+            filtros, after='2026-10-01T09:00:00,2', limit=2, con_total=True
+        )
+
+        self.mock_repository.obtener_movimientos.assert_called_once_with(
+            'insumos', filtros, (datetime(2026, 10, 1, 9, 0), 2), 3
+        )
+        self.mock_repository.estimar_movimientos.assert_called_once_with('insumos', filtros)
+        assert resultado.total_aproximado == 120
+
+    def test_obtener_kardex_cursor_invalido(self):
+        """Un cursor mal formado es un 400 y no consulta la base."""
+        with pytest.raises(HTTPException) as exc_info:
+            self.service.obtener_kardex_insumos(FiltrosKardex(), after='no-es-cursor')
+
+        assert exc_info.value.status_code == 400
+        self.mock_repository.obtener_movimientos.assert_not_called()
+
+    def test_obtener_kardex_fechas_invertidas(self):
+        """fecha_fin anterior a fecha_inicio es un 400."""
+        hoy = hoy_negocio()
+        filtros = FiltrosKardex(fecha_inicio=hoy, fecha_fin=hoy - timedelta(days=1))
+
+        with pytest.raises(HTTPException) as exc_info:
+            self.service.obtener_kardex_insumos(filtros)
+
+        assert exc_info.value.status_code == 400
+        self.mock_repository.obtener_movimientos.assert_not_called()
+
+    def test_obtener_kardex_productos(self, mock_movimientos_kardex):
+        """El kardex de productos consulta la tabla de movimientos de productos."""
+        self.mock_repository.obtener_movimientos.return_value = mock_movimientos_kardex[:1]
+        filtros = FiltrosKardex(id_item=5, tipo_movimiento='SALIDA')
+
+        resultado = self.service.obtener_kardex_productos(filtros, limit=10)
+
+        self.mock_repository.obtener_movimientos.assert_called_once_with('productos', filtros, None, 11)
+        assert len(resultado.items) == 1
+        assert resultado.hay_mas is False
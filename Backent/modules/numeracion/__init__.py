@@ -0,0 +1,4 @@
+"""
+Módulo de Numeración de Documentos
+Contadores por serie y periodo para ventas, movimientos, producción y órdenes de compra.
+"""
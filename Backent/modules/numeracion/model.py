@@ -0,0 +1,16 @@
+from sqlalchemy import Column, BIGINT, VARCHAR, TIMESTAMP
+from sqlalchemy.sql import func
+from database import Base
+
+
+class ContadorDocumento(Base):
+    """
+    Modelo para la tabla contador_documentos.
+    Guarda el último número asignado por serie (VENTA, MOV, ...) y periodo (YYYYMM o YYYYMMDD).
+    """
+    __tablename__ = "contador_documentos"
+
+    serie = Column(VARCHAR(20), primary_key=True)
+    periodo = Column(VARCHAR(8), primary_key=True)
+    ultimo_numero = Column(BIGINT, nullable=False, server_default='0')
+    fecha_actualizacion = Column(TIMESTAMP, nullable=False, server_default=func.now())
@@ -0,0 +1,76 @@
+from typing import Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from modules.numeracion.repository_interface import NumeracionRepositoryInterface
+
+
+class NumeracionRepository(NumeracionRepositoryInterface):
+    """
+    Repository para los contadores de documentos.
+    Usa raw SQL: la asignación es un único UPDATE ... RETURNING sobre una fila
+    por serie y periodo, que queda bloqueada hasta el commit de la transacción
+    (NumeracionService la ejecuta en una transacción propia y corta).
+    """
+
+    def incrementar_contador(self, db: Session, serie: str, periodo: str, cantidad: int) -> Optional[int]:
+        """
+        Reserva `cantidad` números consecutivos.
+        Retorna el último número reservado, o None si el contador no existe.
+        """
+        query = text("""
+            UPDATE contador_documentos
+            SET ultimo_numero = ultimo_numero + :cantidad,
+                fecha_actualizacion = now()
+            WHERE serie = :serie
+              AND periodo = :periodo
+            RETURNING ultimo_numero
+        """)
+
+        result = db.execute(query, {
+            "serie": serie,
+            "periodo": periodo,
+            "cantidad": cantidad
+        })
+
+        row = result.fetchone()
+        return row.ultimo_numero if row else None
+
+    def crear_contador(self, db: Session, serie: str, periodo: str, valor_inicial: int) -> None:
+        """
+        Crea el contador de la serie/periodo.
+        Si otra transacción lo creó primero no hace nada (ON CONFLICT DO NOTHING).
+        """
+        query = text("""
+            INSERT INTO contador_documentos (serie, periodo, ultimo_numero, fecha_actualizacion)
+            VALUES (:serie, :periodo, :valor_inicial, now())
+            ON CONFLICT (serie, periodo) DO NOTHING
+        """)
+
+        db.execute(query, {
+            "serie": serie,
+            "periodo": periodo,
+            "valor_inicial": valor_inicial
+        })
+
+    def obtener_maximo_existente(self, db: Session, tabla: str, columna: str, prefijo: str) -> int:
+        """
+        Obtiene el mayor sufijo numérico ya usado con `prefijo`.
+        Solo se ejecuta la primera vez que se usa un periodo, para continuar
+        la numeración de documentos creados antes de existir el contador.
+
+        `tabla` y `columna` vienen de la configuración fija de series, nunca del usuario.
+        """
+        query = text(f"""
+            SELECT COALESCE(MAX(CAST(SUBSTRING({columna} FROM :inicio) AS BIGINT)), 0) AS maximo
+            FROM {tabla}
+            WHERE {columna} LIKE :patron
+              AND SUBSTRING({columna} FROM :inicio) ~ '^[0-9]+$'
+        """)
+
+        result = db.execute(query, {
+            "inicio": len(prefijo) + 1,
+            "patron": f"{prefijo}%"
+        })
+
+        row = result.fetchone()
+        return int(row.maximo) if row else 0
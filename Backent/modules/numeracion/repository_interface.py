@@ -0,0 +1,22 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+from sqlalchemy.orm import Session
+
+
+class NumeracionRepositoryInterface(ABC):
+    """Interfaz para el repositorio de contadores de documentos."""
+
+    @abstractmethod
+    def incrementar_contador(self, db: Session, serie: str, periodo: str, cantidad: int) -> Optional[int]:
+        """Suma `cantidad` al contador y retorna el nuevo último número, o None si no existe."""
+        pass
+
+    @abstractmethod
+    def crear_contador(self, db: Session, serie: str, periodo: str, valor_inicial: int) -> None:
+        """Crea el contador de la serie/periodo si todavía no existe."""
+        pass
+
+    @abstractmethod
+    def obtener_maximo_existente(self, db: Session, tabla: str, columna: str, prefijo: str) -> int:
+        """Obtiene el mayor número ya usado con ese prefijo en la tabla del documento."""
+        pass
@@ -0,0 +1,123 @@
+from typing import Iterator, List, Optional
+from contextlib import contextmanager
+from sqlalchemy.orm import Session
+import datetime
+from enums.serie_documento import SerieDocumentoEnum
+from modules.numeracion.repository import NumeracionRepository
+from utils.rango_fechas import ahora_negocio
+
+
+# Configuración de cada serie: tabla/columna donde vive el número,
+# formato del periodo (el contador se reinicia al cambiar) y relleno con ceros.
+CONFIGURACION_SERIES = {
+    SerieDocumentoEnum.VENTA: {
+        "tabla": "ventas",
+        "columna": "numero_venta",
+        "formato_periodo": "%Y%m",
+        "ancho": 0
+    },
+    SerieDocumentoEnum.MOVIMIENTO_PRODUCTO: {
+        "tabla": "movimiento_productos_terminados",
+        "columna": "numero_movimiento",
+        "formato_periodo": "%Y%m",
+        "ancho": 5
+    },
+    SerieDocumentoEnum.MOVIMIENTO_INSUMO: {
+        "tabla": "movimiento_insumos",
+        "columna": "numero_movimiento",
+        "formato_periodo": "%Y%m",
+        "ancho": 5
+    },
+    SerieDocumentoEnum.PRODUCCION: {
+        "tabla": "produccion",
+        "columna": "numero_produccion",
+        "formato_periodo": "%Y%m",
+        "ancho": 0
+    },
+    SerieDocumentoEnum.ORDEN_COMPRA: {
+        "tabla": "orden_de_compra",
+        "columna": "numero_orden",
+        "formato_periodo": "%Y%m%d",
+        "ancho": 4
+    },
+}
+
+
+@contextmanager
+def transaccion_propia(db: Session) -> Iterator[Session]:
+    """
+    Sesión y transacción propias sobre el mismo engine que `db`, confirmadas al salir.
+
+    El contador de la serie se bloquea solo mientras dura esta transacción corta,
+    no hasta el commit del documento: así la numeración no serializa ventas,
+    anulaciones y producciones ni se cruza con los bloqueos de filas de producto.
+    """
+    bind = db.get_bind()
+    with Session(bind=getattr(bind, "engine", bind)) as sesion, sesion.begin():
+        yield sesion
+
+
+class NumeracionService:
+    """
+    Servicio de numeración de documentos.
+
+    Reemplaza los cálculos con LIKE/MAX/COUNT sobre las tablas de documentos:
+    cada número se asigna incrementando una fila de contador_documentos, lo que
+    cuesta lo mismo sin importar cuántos documentos existan y no repite números
+    entre transacciones concurrentes. Mantiene los formatos existentes
+    (VENTA-YYYYMM-N, MOV-YYYYMM-00001, OC-YYYYMMDD-0001, ...).
+
+    IMPORTANTE: los números se confirman en una transacción propia, antes que el
+    documento; si el documento hace rollback, esos números quedan sin usar (huecos).
+    Conviene reservarlos antes de bloquear filas de la transacción de negocio.
+    """
+
+    def __init__(self):
+        self.repository = NumeracionRepository()
+
+    def siguiente_numero(
+        self,
+        db: Session,
+        serie: SerieDocumentoEnum,
+        fecha: Optional[datetime.datetime] = None
+    ) -> str:
+        """Asigna el siguiente número de la serie."""
+        return self.reservar_numeros(db, serie, 1, fecha)[0]
+
+    def reservar_numeros(
+        self,
+        db: Session,
+        serie: SerieDocumentoEnum,
+        cantidad: int,
+        fecha: Optional[datetime.datetime] = None
+    ) -> List[str]:
+        """
+        Reserva un bloque de `cantidad` números consecutivos con una sola sentencia.
+        Pensado para inserciones masivas (detalles de venta, movimientos FEFO, importaciones).
+        """
+        if cantidad <= 0:
+            return []
+
+        config = CONFIGURACION_SERIES[serie]
+        fecha = fecha or ahora_negocio()
+        periodo = fecha.strftime(config["formato_periodo"])
+        prefijo = f"{serie.value}-{periodo}-"
+
+        with transaccion_propia(db) as sesion:
+            ultimo = self.repository.incrementar_contador(sesion, serie.value, periodo, cantidad)
+
+            if ultimo is None:
+                # Primer uso del periodo: continuar desde lo que ya exista en la tabla
+                maximo = self.repository.obtener_maximo_existente(
+                    sesion, config["tabla"], config["columna"], prefijo
+                )
+                self.repository.crear_contador(sesion, serie.value, periodo, maximo)
+                ultimo = self.repository.incrementar_contador(sesion, serie.value, periodo, cantidad)
+
+        primero = ultimo - cantidad + 1
+        ancho = config["ancho"]
+
+        return [
+            f"{prefijo}{numero:0{ancho}d}" if ancho else f"{prefijo}{numero}"
+            for numero in range(primero, ultimo + 1)
+        ]
@@ -0,0 +1,145 @@
+"""
+Tests unitarios para NumeracionService.
+
+Valida el formato de los números, la reserva de bloques y la creación
+del contador la primera vez que se usa un periodo.
+"""
+
+import pytest
+from contextlib import nullcontext
+from unittest.mock import MagicMock, patch
+from datetime import datetime
+
+from enums.serie_documento import SerieDocumentoEnum
+from modules.numeracion.service import NumeracionService
+
+
+@pytest.fixture
+def mock_db_session():
+    """Mock de la sesión de base de datos."""
+    return MagicMock()
+
+
+class TestNumeracionService:
+    """Tests para NumeracionService."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Configura el servicio antes de cada test."""
+        self.service = NumeracionService()
+        self.fecha = datetime(2025, 11, 29, 10, 0, 0)
+        # La transacción propia se sustituye por la misma sesión mock
+        with patch('modules.numeracion.service.transaccion_propia', side_effect=nullcontext) as mock_tx:
+            self.mock_transaccion = mock_tx
+            yield
+
+    def test_siguiente_numero_venta_sin_relleno(self, mock_db_session):
+        """
+        Test: Formato VENTA-YYYYMM-N.
+        
+        Resultado esperado:
+        - El número no se rellena con ceros
+        - Se incrementa el contador de la serie y periodo
+        """
+        with patch.object(self.service.repository, 'incrementar_contador') as mock_incr:
+            mock_incr.return_value = 42
+
+            numero = self.service.siguiente_numero(mock_db_session, SerieDocumentoEnum.VENTA, self.fecha)
+
+            assert numero == "VENTA-202511-42"
+            mock_incr.assert_called_once_with(mock_db_session, "VENTA", "202511", 1)
+
+    def test_siguiente_numero_movimiento_con_relleno(self, mock_db_session):
+        """
+        Test: Formato MOV-YYYYMM-00001.
+        """
+        with patch.object(self.service.repository, 'incrementar_contador') as mock_incr:
+            mock_incr.return_value = 7
+
+            numero = self.service.siguiente_numero(
+                mock_db_session, SerieDocumentoEnum.MOVIMIENTO_INSUMO, self.fecha
+            )
+
+            assert numero == "MOV-202511-00007"
+
+    def test_orden_compra_usa_periodo_diario(self, mock_db_session):
+        """
+        Test: Formato OC-YYYYMMDD-0001 con contador por día.
+        """
+        with patch.object(self.service.repository, 'incrementar_contador') as mock_incr:
+            mock_incr.return_value = 3
+
+            numero = self.service.siguiente_numero(
+                mock_db_session, SerieDocumentoEnum.ORDEN_COMPRA, self.fecha
+            )
+
+            assert numero == "OC-20251129-0003"
+            mock_incr.assert_called_once_with(mock_db_session, "OC", "20251129", 1)
+
+    def test_reservar_bloque_de_numeros(self, mock_db_session):
+        """
+        Test: Reservar un bloque usa una sola sentencia.
+        
+        Resultado esperado:
+        - Retorna números consecutivos que terminan en el último reservado
+        """
+        with patch.object(self.service.repository, 'incrementar_contador') as mock_incr:
+            mock_incr.return_value = 13
+
+            numeros = self.service.reservar_numeros(
+                mock_db_session, SerieDocumentoEnum.MOVIMIENTO_PRODUCTO, 3, self.fecha
+            )
+
+            assert numeros == ["MPT-202511-00011", "MPT-202511-00012", "MPT-202511-00013"]
+            mock_incr.assert_called_once_with(mock_db_session, "MPT", "202511", 3)
+
+    def test_primer_uso_del_periodo_continua_numeracion_existente(self, mock_db_session):
+        """
+        Test: Sin contador para el periodo se crea a partir del máximo existente.
+        
+        Resultado esperado:
+        - Se busca el máximo con el prefijo de la serie
+        - Se crea el contador y se vuelve a incrementar
+        """
+        with patch.object(self.service.repository, 'incrementar_contador') as mock_incr, \
+             patch.object(self.service.repository, 'obtener_maximo_existente') as mock_max, \
+             patch.object(self.service.repository, 'crear_contador') as mock_crear:
+            mock_incr.side_effect = [None, 16]
+            mock_max.return_value = 15
+
+            numero = self.service.siguiente_numero(mock_db_session, SerieDocumentoEnum.PRODUCCION, self.fecha)
+
+            assert numero == "PROD-202511-16"
+            mock_max.assert_called_once_with(
+                mock_db_session, "produccion", "numero_produccion", "PROD-202511-"
+            )
+            mock_crear.assert_called_once_with(mock_db_session, "PROD", "202511", 15)
+
+    def test_reservar_cero_numeros_no_consulta(self, mock_db_session):
+        """
+        Test: Reservar 0 números no toca la base de datos.
+        """
+        with patch.object(self.service.repository, 'incrementar_contador') as mock_incr:
+            assert self.service.reservar_numeros(mock_db_session, SerieDocumentoEnum.VENTA, 0) == []
+            mock_incr.assert_not_called()
+
+    def test_reserva_en_transaccion_propia(self, mock_db_session):
+        """
+        Test: El contador se incrementa en una transacción propia, no en la del documento.
+
+        Resultado esperado:
+        - La transacción propia se abre a partir de la sesión del llamador
+        - El UPDATE del contador usa la sesión propia
+        """
+        sesion_propia = MagicMock()
+        self.mock_transaccion.side_effect = None
+        self.mock_transaccion.return_value = nullcontext(sesion_propia)
+
+        with patch.object(self.service.repository, 'incrementar_contador') as mock_incr:
+            mock_incr.return_value = 5
+
+            numero = self.service.siguiente_numero(mock_db_session, SerieDocumentoEnum.VENTA, self.fecha)
+
+            assert numero == "VENTA-202511-5"
+            self.mock_transaccion.assert_called_once_with(mock_db_session)
+            mock_incr.assert_called_once_with(sesion_propia, "VENTA", "202511", 1)
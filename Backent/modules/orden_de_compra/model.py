@@ -4,7 +4,7 @@ from database import Base
 from modules.proveedores.model import Proveedor
 from modules.Gestion_Usuarios.usuario.model import Usuario
 from modules.insumo.model import Insumo
-import datetime
+from utils.rango_fechas import ahora_negocio
 
 class OrdenDeCompra(Base):
     __tablename__ = 'orden_de_compra'
@@ -12,7 +12,7 @@ class OrdenDeCompra(Base):
     id_orden = Column(BigInteger, primary_key=True, autoincrement=True)
     numero_orden = Column(String(50), unique=True, nullable=False)
     id_proveedor = Column(BigInteger, ForeignKey('proveedores.id_proveedor'), nullable=False)
-    fecha_orden = Column(TIMESTAMP, default=datetime.datetime.now)
+    fecha_orden = Column(TIMESTAMP, default=ahora_negocio)
     fecha_entrega_esperada = Column(TIMESTAMP, nullable=False)
     moneda = Column(String(3), nullable=False, default='PEN')
     tipo_cambio = Column(DECIMAL(8, 4), default=1)
@@ -6,8 +6,14 @@ from decimal import Decimal
 from modules.orden_de_compra.model import OrdenDeCompra, OrdenDeCompraDetalle
 from modules.orden_de_compra.schemas import OrdenDeCompraCreate, OrdenDeCompraUpdate
 from modules.orden_de_compra.repository_interface import OrdenDeCompraRepositoryInterface
+from modules.numeracion.service import NumeracionService
+from enums.serie_documento import SerieDocumentoEnum
+from utils.rango_fechas import filtro_desde, filtro_periodo, hoy_negocio
 
 class OrdenDeCompraRepository(OrdenDeCompraRepositoryInterface):
+    def __init__(self):
+        self.numeracion = NumeracionService()
+
     def get_all(self, db: Session, activas_solo: bool = True) -> List[OrdenDeCompra]:
         if activas_solo:
             ordenes = db.query(OrdenDeCompra).filter(OrdenDeCompra.anulado == False).all()
@@ -75,9 +81,9 @@ class OrdenDeCompraRepository(OrdenDeCompraRepositoryInterface):
     # ==================== SUGERENCIAS DE COMPRA (FC-10) ====================
     
     def obtener_stock_actual_insumos(self, db: Session) -> List[Dict[str, Any]]:
-        """Obtiene el stock actual de todos los insumos activos."""
+        """Obtiene el stock actual (resumen insumo_stock) de todos los insumos activos."""
         from modules.insumo.model import Insumo
-        from modules.gestion_almacen_inusmos.ingresos_insumos.model import IngresoProductoDetalle
+        from modules.gestion_almacen_inusmos.insumo_stock.model import InsumoStock
         
         resultado = db.query(
             Insumo.id_insumo,
@@ -86,18 +92,11 @@ class OrdenDeCompraRepository(OrdenDeCompraRepositoryInterface):
             Insumo.unidad_medida,
             Insumo.stock_minimo,
             Insumo.categoria,
-            func.coalesce(func.sum(IngresoProductoDetalle.cantidad_restante), 0).label('stock_actual')
+            func.coalesce(InsumoStock.stock_actual, 0).label('stock_actual')
         ).outerjoin(
-            IngresoProductoDetalle, Insumo.id_insumo == IngresoProductoDetalle.id_insumo
+            InsumoStock, Insumo.id_insumo == InsumoStock.id_insumo
         ).filter(
             Insumo.anulado == False
-        ).group_by(
-            Insumo.id_insumo,
-            Insumo.codigo,
-            Insumo.nombre,
-            Insumo.unidad_medida,
-            Insumo.stock_minimo,
-            Insumo.categoria
         ).all()
         
         return [
@@ -121,7 +120,7 @@ class OrdenDeCompraRepository(OrdenDeCompraRepositoryInterface):
         """Obtiene el consumo promedio diario de insumos en los últimos N días."""
         from modules.gestion_almacen_inusmos.movimiento_insumos.model import MovimientoInsumo
         
-        fecha_inicio = date.today() - timedelta(days=dias)
+        fecha_inicio = hoy_negocio() - timedelta(days=dias)
         
         resultado = db.query(
             MovimientoInsumo.id_insumo,
@@ -129,7 +128,7 @@ class OrdenDeCompraRepository(OrdenDeCompraRepositoryInterface):
         ).filter(
             MovimientoInsumo.anulado == False,
             MovimientoInsumo.tipo_movimiento == 'SALIDA',
-            func.date(MovimientoInsumo.fecha_movimiento) >= fecha_inicio
+            filtro_desde(MovimientoInsumo.fecha_movimiento, fecha_inicio)
         ).group_by(
             MovimientoInsumo.id_insumo
         ).all()
@@ -151,7 +150,7 @@ class OrdenDeCompraRepository(OrdenDeCompraRepositoryInterface):
         from modules.gestion_almacen_inusmos.ingresos_insumos.model import IngresoProductoDetalle
         from modules.insumo.model import Insumo
         
-        fecha_limite = date.today() + timedelta(days=dias_limite)
+        hoy = hoy_negocio()
         
         resultado = db.query(
             IngresoProductoDetalle.id_insumo,
@@ -160,8 +159,7 @@ class OrdenDeCompraRepository(OrdenDeCompraRepositoryInterface):
             Insumo, IngresoProductoDetalle.id_insumo == Insumo.id_insumo
         ).filter(
             IngresoProductoDetalle.cantidad_restante > 0,
-            IngresoProductoDetalle.fecha_vencimiento <= fecha_limite,
-            IngresoProductoDetalle.fecha_vencimiento >= date.today(),
+            filtro_periodo(IngresoProductoDetalle.fecha_vencimiento, hoy, hoy + timedelta(days=dias_limite)),
             Insumo.perecible == True
         ).group_by(
             IngresoProductoDetalle.id_insumo
@@ -255,14 +253,6 @@ class OrdenDeCompraRepository(OrdenDeCompraRepositoryInterface):
         return None
     
     def generar_numero_orden(self, db: Session) -> str:
-        """Genera un número de orden único."""
-        from datetime import datetime
-        
-        # Contar órdenes del día
-        hoy = date.today()
-        count = db.query(func.count(OrdenDeCompra.id_orden)).filter(
-            func.date(OrdenDeCompra.fecha_orden) == hoy
-        ).scalar() or 0
-        
-        return f"OC-{hoy.strftime('%Y%m%d')}-{str(count + 1).zfill(4)}"
+        """Genera un número de orden único con formato: OC-YYYYMMDD-NNNN"""
+        return self.numeracion.siguiente_numero(db, SerieDocumentoEnum.ORDEN_COMPRA)
 
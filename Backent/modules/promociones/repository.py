@@ -1,9 +1,9 @@
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_, or_
 from typing import List, Optional
-from datetime import date
 from .model import Promocion, PromocionCombo, EstadoPromocion, TipoPromocion
 from .repository_interface import PromocionRepositoryInterface
+from utils.rango_fechas import hoy_negocio
 
 
 class PromocionRepository(PromocionRepositoryInterface):
@@ -13,7 +13,7 @@ class PromocionRepository(PromocionRepositoryInterface):
     def get_all(self, include_anulados: bool = False) -> List[Promocion]:
         query = self.db.query(Promocion).options(
             joinedload(Promocion.producto),
-            joinedload(Promocion.productos_combo)
+            joinedload(Promocion.productos_combo).joinedload(PromocionCombo.producto)
         )
         if not include_anulados:
             query = query.filter(Promocion.anulado == False)
@@ -22,17 +22,17 @@ class PromocionRepository(PromocionRepositoryInterface):
     def get_by_id(self, promocion_id: int) -> Optional[Promocion]:
         return self.db.query(Promocion).options(
             joinedload(Promocion.producto),
-            joinedload(Promocion.productos_combo)
+            joinedload(Promocion.productos_combo).joinedload(PromocionCombo.producto)
         ).filter(Promocion.id_promocion == promocion_id).first()
 
     def get_by_codigo(self, codigo: str) -> Optional[Promocion]:
         return self.db.query(Promocion).filter(Promocion.codigo_promocion == codigo).first()
 
     def get_activas(self) -> List[Promocion]:
-        today = date.today()
+        today = hoy_negocio()
         return self.db.query(Promocion).options(
             joinedload(Promocion.producto),
-            joinedload(Promocion.productos_combo)
+            joinedload(Promocion.productos_combo).joinedload(PromocionCombo.producto)
         ).filter(
             and_(
                 Promocion.estado == EstadoPromocion.ACTIVA,
@@ -45,7 +45,7 @@ class PromocionRepository(PromocionRepositoryInterface):
     def get_sugeridas(self) -> List[Promocion]:
         return self.db.query(Promocion).options(
             joinedload(Promocion.producto),
-            joinedload(Promocion.productos_combo)
+            joinedload(Promocion.productos_combo).joinedload(PromocionCombo.producto)
         ).filter(
             and_(
                 Promocion.estado == EstadoPromocion.SUGERIDA,
@@ -56,7 +56,7 @@ class PromocionRepository(PromocionRepositoryInterface):
     def get_by_producto(self, producto_id: int) -> List[Promocion]:
         return self.db.query(Promocion).options(
             joinedload(Promocion.producto),
-            joinedload(Promocion.productos_combo)
+            joinedload(Promocion.productos_combo).joinedload(PromocionCombo.producto)
         ).filter(
             and_(
                 Promocion.id_producto == producto_id,
@@ -67,7 +67,7 @@ class PromocionRepository(PromocionRepositoryInterface):
     def get_by_estado(self, estado: EstadoPromocion) -> List[Promocion]:
         return self.db.query(Promocion).options(
             joinedload(Promocion.producto),
-            joinedload(Promocion.productos_combo)
+            joinedload(Promocion.productos_combo).joinedload(PromocionCombo.producto)
         ).filter(
             and_(
                 Promocion.estado == estado,
@@ -10,6 +10,7 @@ from .schemas import (
 from modules.productos_terminados.model import ProductoTerminado
 from modules.gestion_almacen_productos.movimiento_productos_terminados.model import MovimientoProductoTerminado
 from .service_interface import PromocionServiceInterface
+from utils.rango_fechas import hoy_negocio
 
 
 class PromocionService(PromocionServiceInterface):
@@ -145,7 +146,7 @@ class PromocionService(PromocionServiceInterface):
             dias_alerta: Número de días antes del vencimiento para generar alertas
         """
         sugerencias = []
-        today = date.today()
+        today = hoy_negocio()
         
         # Obtener productos con vida útil y stock
         productos = self.db.query(ProductoTerminado).filter(
@@ -256,7 +257,7 @@ class PromocionService(PromocionServiceInterface):
     def crear_desde_sugerencia(self, sugerencia: SugerenciaPromocion, fecha_fin: date = None) -> PromocionResponse:
         """Crea una promoción activa basada en una sugerencia"""
         if fecha_fin is None:
-            fecha_fin = date.today() + timedelta(days=sugerencia.dias_hasta_vencimiento)
+            fecha_fin = hoy_negocio() + timedelta(days=sugerencia.dias_hasta_vencimiento)
 
         promocion_data = {
             "codigo_promocion": self.repository.get_next_codigo(),
@@ -267,7 +268,7 @@ class PromocionService(PromocionServiceInterface):
             "id_producto": sugerencia.id_producto,
             "porcentaje_descuento": sugerencia.descuento_sugerido,
             "cantidad_minima": 1,
-            "fecha_inicio": date.today(),
+            "fecha_inicio": hoy_negocio(),
             "fecha_fin": fecha_fin,
             "dias_hasta_vencimiento": sugerencia.dias_hasta_vencimiento,
             "motivo": f"Generada automáticamente - Producto vence en {sugerencia.dias_hasta_vencimiento} días",
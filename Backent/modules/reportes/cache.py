@@ -0,0 +1,255 @@
+"""
+Caché en memoria de resultados de reportes.
+
+- Clave: nombre del reporte + parámetros de la consulta.
+- Los reportes que dependen del estado actual (stock, lotes por vencer) o que
+  incluyen hoy expiran a los REPORTES_CACHE_TTL_SEGUNDOS; los reportes solo
+  históricos de un período ya cerrado no expiran.
+- Ventas, producción y mermas llaman a invalidar() después de su commit con
+  los días que modificaron; se descartan las entradas cuyo período los incluye.
+- Single-flight: peticiones simultáneas con la misma clave calculan una sola vez
+  (obtener() con locks de hilo; obtener_async() con asyncio.Lock, para los
+  endpoints async que no deben bloquear el event loop).
+- Aciertos y fallos se exportan como métricas Prometheus (mismo registro que
+  expone el instrumentator en /metrics).
+
+La caché es por proceso: con varios workers cada uno tiene la suya y solo ve
+las invalidaciones de las escrituras que atendió; el TTL acota la diferencia.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, TypeVar
+
+from loguru import logger
+from prometheus_client import Counter
+
+from config import settings
+from utils.rango_fechas import hoy_negocio
+
+
+T = TypeVar("T")
+
+CACHE_HITS = Counter(
+    "reportes_cache_hits_total",
+    "Consultas de reportes respondidas desde la caché",
+    ["reporte"]
+)
+CACHE_MISSES = Counter(
+    "reportes_cache_misses_total",
+    "Consultas de reportes calculadas contra la base de datos",
+    ["reporte"]
+)
+CACHE_INVALIDACIONES = Counter(
+    "reportes_cache_invalidaciones_total",
+    "Entradas de la caché de reportes descartadas por escrituras"
+)
+
+
+@dataclass
+class _Entrada:
+    valor: Any
+    fecha_inicio: date
+    fecha_fin: date
+    expira: Optional[float]  # time.monotonic(); None = no expira
+
+
+class CacheReportes:
+    """Caché de reportes con TTL, invalidación por fecha y single-flight."""
+
+    def __init__(self, ttl_segundos: int, max_entradas: int, habilitada: bool = True):
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+        self.habilitada = habilitada
+        self._entradas: "OrderedDict[str, _Entrada]" = OrderedDict()
+        self._calculando: Dict[str, threading.Lock] = {}
+        self._calculando_async: Dict[str, asyncio.Lock] = {}
+        self._lock = threading.Lock()
+        # Se incrementa en cada invalidación; un resultado calculado mientras
+        # hubo una invalidación puede estar desactualizado y no se guarda
+        self._version = 0
+
+    @staticmethod
+    def _clave(reporte: str, parametros: Dict[str, Any]) -> str:
+        return reporte + "?" + "&".join(f"{k}={parametros[k]}" for k in sorted(parametros))
+
+    def _vigente(self, clave: str) -> Optional[_Entrada]:
+        """Entrada vigente de la clave (requiere self._lock)."""
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            return None
+        if entrada.expira is not None and entrada.expira <= time.monotonic():
+            del self._entradas[clave]
+            return None
+        self._entradas.move_to_end(clave)
+        return entrada
+
+    def obtener(
+        self,
+        reporte: str,
+        parametros: Dict[str, Any],
+        fecha_inicio: date,
+        fecha_fin: date,
+        calcular: Callable[[], T],
+        historico: bool = False
+    ) -> T:
+        """
+        Retorna el resultado cacheado o lo calcula con `calcular()`.
+
+        Args:
+            reporte: Nombre del reporte (etiqueta de las métricas).
+            parametros: Parámetros que identifican la consulta.
+            fecha_inicio, fecha_fin: Días que cubre el resultado (para invalidar).
+            historico: True si el resultado depende solo de movimientos del
+                período; cerrado el período, no expira.
+        """
+        if not self.habilitada:
+            return calcular()
+
+        clave = self._clave(reporte, parametros)
+
+        with self._lock:
+            entrada = self._vigente(clave)
+            if entrada is not None:
+                CACHE_HITS.labels(reporte=reporte).inc()
+                return entrada.valor
+            lock_clave = self._calculando.setdefault(clave, threading.Lock())
+
+        with lock_clave:
+            # Otra petición pudo calcularlo mientras esperábamos
+            with self._lock:
+                entrada = self._vigente(clave)
+                if entrada is not None:
+                    CACHE_HITS.labels(reporte=reporte).inc()
+                    return entrada.valor
+                version = self._version
+
+            CACHE_MISSES.labels(reporte=reporte).inc()
+            try:
+                valor = calcular()
+            except Exception:
+                with self._lock:
+                    self._calculando.pop(clave, None)
+                raise
+
+            self._guardar(self._calculando, clave, valor, version, fecha_inicio, fecha_fin, historico)
+            return valor
+
+    async def obtener_async(
+        self,
+        reporte: str,
+        parametros: Dict[str, Any],
+        fecha_inicio: date,
+        fecha_fin: date,
+        calcular: Callable[[], Awaitable[T]],
+        historico: bool = False
+    ) -> T:
+        """
+        Igual que obtener(), para endpoints async: `calcular` es una corrutina y
+        las peticiones que esperan el mismo cálculo no bloquean el event loop.
+        """
+        if not self.habilitada:
+            return await calcular()
+
+        clave = self._clave(reporte, parametros)
+
+        with self._lock:
+            entrada = self._vigente(clave)
+            if entrada is not None:
+                CACHE_HITS.labels(reporte=reporte).inc()
+                return entrada.valor
+            lock_clave = self._calculando_async.setdefault(clave, asyncio.Lock())
+
+        async with lock_clave:
+            with self._lock:
+                entrada = self._vigente(clave)
+                if entrada is not None:
+                    CACHE_HITS.labels(reporte=reporte).inc()
+                    return entrada.valor
+                version = self._version
+
+            CACHE_MISSES.labels(reporte=reporte).inc()
+            try:
+                valor = await calcular()
+            except Exception:
+                with self._lock:
+                    self._calculando_async.pop(clave, None)
+                raise
+
+            self._guardar(self._calculando_async, clave, valor, version, fecha_inicio, fecha_fin, historico)
+            return valor
+
+    def _guardar(
+        self,
+        calculando: Dict[str, Any],
+        clave: str,
+        valor: Any,
+        version: int,
+        fecha_inicio: date,
+        fecha_fin: date,
+        historico: bool
+    ) -> None:
+        """Guarda el resultado calculado (si no hubo invalidaciones) y libera su lock de cálculo."""
+        cerrado = historico and fecha_fin < hoy_negocio()
+        with self._lock:
+            # Guardar y liberar la clave juntos: una petición nueva encuentra
+            # la entrada o el lock de cálculo, nunca ninguno de los dos
+            calculando.pop(clave, None)
+            if self._version == version:
+                self._entradas[clave] = _Entrada(
+                    valor=valor,
+                    fecha_inicio=fecha_inicio,
+                    fecha_fin=fecha_fin,
+                    expira=None if cerrado else time.monotonic() + self.ttl_segundos
+                )
+                self._entradas.move_to_end(clave)
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+
+    def invalidar(self, fechas: Iterable[date]) -> int:
+        """
+        Descarta las entradas cuyo período incluye alguna de las fechas.
+        Llamar después del commit de la escritura.
+
+        Returns:
+            Cantidad de entradas descartadas.
+        """
+        fechas = {f for f in fechas if f is not None}
+        if not fechas:
+            return 0
+
+        with self._lock:
+            self._version += 1
+            claves = [
+                clave for clave, entrada in self._entradas.items()
+                if any(entrada.fecha_inicio <= f <= entrada.fecha_fin for f in fechas)
+            ]
+            for clave in claves:
+                del self._entradas[clave]
+
+        if claves:
+            CACHE_INVALIDACIONES.inc(len(claves))
+            logger.debug(f"Caché de reportes: {len(claves)} entradas invalidadas ({sorted(fechas)})")
+        return len(claves)
+
+    def limpiar(self) -> None:
+        """Vacía la caché."""
+        with self._lock:
+            self._version += 1
+            self._entradas.clear()
+
+
+cache_reportes = CacheReportes(
+    ttl_segundos=settings.REPORTES_CACHE_TTL_SEGUNDOS,
+    max_entradas=settings.REPORTES_CACHE_MAX_ENTRADAS,
+    habilitada=settings.REPORTES_CACHE_ENABLED
+)
+
+
+def invalidar_reportes(*fechas: date) -> None:
+    """Invalida los reportes de los días indicados (por defecto hoy)."""
+    cache_reportes.invalidar(fechas or [hoy_negocio()])
@@ -0,0 +1,125 @@
+"""
+Exportación en streaming (CSV / NDJSON) de reportes de períodos largos.
+
+Las filas se leen con cursor del lado del servidor (ReportesRepository.iterar_*)
+y se escriben por lotes en la respuesta, sin armar la lista completa ni los
+modelos Pydantic: la memoria usada no depende de la cantidad de filas.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple
+
+from sqlalchemy.orm import Session
+
+from database import crear_sesion_lectura
+from .repository import ReportesRepository, TAMANO_LOTE_EXPORT
+
+
+FORMATOS_EXPORT = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+# reporte -> (método de ReportesRepository, columnas en orden)
+REPORTES_EXPORT: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "abc": (
+        "iterar_abc",
+        ("id_producto", "codigo", "nombre", "cantidad_vendida", "monto_total", "num_ventas",
+         "porcentaje_ventas", "porcentaje_acumulado", "clasificacion"),
+    ),
+    "rotacion": (
+        "iterar_rotacion",
+        ("tipo", "id", "codigo", "nombre", "unidad_medida", "stock_actual", "consumo_periodo",
+         "dias_stock", "rotacion_anualizada", "clasificacion"),
+    ),
+    "ventas": (
+        "iterar_ventas",
+        ("id_venta", "numero_venta", "fecha_venta", "metodo_pago", "total", "anulado", "id_user"),
+    ),
+}
+
+
+def _valor_json(valor: Any) -> Any:
+    """Serializa los tipos que json no conoce."""
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, Enum):
+        return valor.value
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def _valor_csv(valor: Any) -> Any:
+    if valor is None:
+        return ""
+    if isinstance(valor, Enum):
+        return valor.value
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def _lotes(filas: Iterable[Dict[str, Any]], tamano: int) -> Iterator[list]:
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def codificar_csv(filas: Iterable[Dict[str, Any]], columnas: Tuple[str, ...]) -> Iterator[str]:
+    """Encabezado y luego un bloque de texto CSV por lote de filas."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    escritor.writerow(columnas)
+    yield buffer.getvalue()
+
+    for lote in _lotes(filas, TAMANO_LOTE_EXPORT):
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerows([_valor_csv(fila[c]) for c in columnas] for fila in lote)
+        yield buffer.getvalue()
+
+
+def codificar_ndjson(filas: Iterable[Dict[str, Any]], columnas: Tuple[str, ...]) -> Iterator[str]:
+    """Un objeto JSON por línea; un bloque de texto por lote de filas."""
+    for lote in _lotes(filas, TAMANO_LOTE_EXPORT):
+        yield "".join(
+            json.dumps({c: fila[c] for c in columnas}, default=_valor_json, ensure_ascii=False) + "\n"
+            for fila in lote
+        )
+
+
+def exportar_reporte(
+    reporte: str,
+    formato: str,
+    fecha_inicio: date,
+    fecha_fin: date,
+    crear_sesion: Callable[[], Session] = crear_sesion_lectura
+) -> Iterator[str]:
+    """
+    Generador del contenido exportado para un StreamingResponse.
+
+    Abre su propia sesión (de la réplica de lectura si está disponible): la
+    sesión de una dependencia se cierra al terminar el endpoint, antes de que
+    se envíe el cuerpo de la respuesta.
+    """
+    metodo, columnas = REPORTES_EXPORT[reporte]
+    codificar = codificar_csv if formato == "csv" else codificar_ndjson
+
+    db = crear_sesion()
+    try:
+        filas = getattr(ReportesRepository(db), metodo)(fecha_inicio, fecha_fin)
+        yield from codificar(filas, columnas)
+    finally:
+        db.close()
@@ -1,21 +1,188 @@
 """
 Repository para el módulo de Reportes.
 Consultas SQL para análisis ABC, reporte diario, KPIs y rotación.
+
+Las ventas, movimientos de insumos y mermas de días cerrados se leen de los
+resúmenes diarios (modules.resumen_diario); solo los días sin sellar
+(normalmente hoy) se agregan desde las tablas de origen.
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case, and_, or_, desc, text
+from sqlalchemy import func, case, and_, or_, desc, text, select, union_all, true, literal, cast, String
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any
+from modules.resumen_diario.service import ResumenDiarioService
+from utils.rango_fechas import filtro_dia, filtro_periodo, hoy_negocio
 from .repository_interface import ReportesRepositoryInterface
 
 
+METODOS_PAGO = ('efectivo', 'tarjeta', 'transferencia', 'yape', 'plin')
+
+# KPIs calculados por obtener_datos_kpis (el de FEFO es constante)
+KPIS_DASHBOARD = ('merma_diaria', 'productos_vencidos_hoy', 'stock_critico', 'rotacion_inventario')
+
+# Filas por lote del cursor del servidor en las exportaciones
+TAMANO_LOTE_EXPORT = 1000
+
+
 class ReportesRepository(ReportesRepositoryInterface):
     """Repository con consultas SQL para reportes."""
     
     def __init__(self, db: Session):
         self.db = db
+        self.resumen_diario = ResumenDiarioService()
+        self._ultimo_sellado = None
+        self._ultimo_sellado_leido = False
+    
+    # ==================== RESÚMENES DIARIOS ====================
+    
+    def _tramos(self, fecha_inicio: date, fecha_fin: date):
+        """
+        (tramo_resumen, tramo_origen) del período; ver ResumenDiarioService.partir_en.
+        El último día sellado se consulta una sola vez por instancia (por request).
+        """
+        if not self._ultimo_sellado_leido:
+            self._ultimo_sellado = self.resumen_diario.ultimo_dia_sellado(self.db)
+            self._ultimo_sellado_leido = True
+        return self.resumen_diario.partir_en(fecha_inicio, fecha_fin, self._ultimo_sellado)
+    
+    @staticmethod
+    def _unir(partes: list, clave: str, *sumas: str):
+        """Une (UNION ALL) las partes y re-agrupa por `clave` sumando las columnas `sumas`."""
+        union = partes[0].subquery() if len(partes) == 1 else union_all(*partes).subquery()
+        return select(
+            union.c[clave],
+            *[func.sum(union.c[columna]).label(columna) for columna in sumas]
+        ).group_by(union.c[clave]).subquery()
+    
+    def _ventas_por_producto(self, fecha_inicio: date, fecha_fin: date):
+        """Subquery (id_producto, cantidad_vendida, monto_total, num_ventas) del período."""
+        from modules.gestion_almacen_productos.ventas.model import Venta, VentaDetalle
+        from modules.resumen_diario.model import ResumenVentasProductoDia
+        
+        tramo_resumen, tramo_origen = self._tramos(fecha_inicio, fecha_fin)
+        partes = []
+        if tramo_resumen:
+            partes.append(select(
+                ResumenVentasProductoDia.id_producto,
+                ResumenVentasProductoDia.cantidad_vendida,
+                ResumenVentasProductoDia.monto_total,
+                ResumenVentasProductoDia.num_ventas
+            ).where(
+                ResumenVentasProductoDia.fecha.between(*tramo_resumen)
+            ))
+        if tramo_origen:
+            partes.append(select(
+                VentaDetalle.id_producto.label('id_producto'),
+                func.sum(VentaDetalle.cantidad).label('cantidad_vendida'),
+                func.sum(VentaDetalle.subtotal).label('monto_total'),
+                func.count(func.distinct(Venta.id_venta)).label('num_ventas')
+            ).join(
+                Venta, VentaDetalle.id_venta == Venta.id_venta
+            ).where(
+                Venta.anulado == False,
+                filtro_periodo(Venta.fecha_venta, *tramo_origen)
+            ).group_by(
+                VentaDetalle.id_producto
+            ))
+        
+        return self._unir(partes, 'id_producto', 'cantidad_vendida', 'monto_total', 'num_ventas')
+    
+    def _ventas_por_metodo(self, fecha_inicio: date, fecha_fin: date):
+        """Subquery (metodo_pago, total_ventas, cantidad_transacciones) del período."""
+        from modules.gestion_almacen_productos.ventas.model import Venta
+        from modules.resumen_diario.model import ResumenVentasMetodoDia
+        
+        tramo_resumen, tramo_origen = self._tramos(fecha_inicio, fecha_fin)
+        partes = []
+        if tramo_resumen:
+            partes.append(select(
+                ResumenVentasMetodoDia.metodo_pago,
+                ResumenVentasMetodoDia.total_ventas,
+                ResumenVentasMetodoDia.cantidad_transacciones
+            ).where(
+                ResumenVentasMetodoDia.fecha.between(*tramo_resumen)
+            ))
+        if tramo_origen:
+            partes.append(select(
+                Venta.metodo_pago.label('metodo_pago'),
+                func.sum(Venta.total).label('total_ventas'),
+                func.count(Venta.id_venta).label('cantidad_transacciones')
+            ).where(
+                Venta.anulado == False,
+                filtro_periodo(Venta.fecha_venta, *tramo_origen)
+            ).group_by(
+                Venta.metodo_pago
+            ))
+        
+        return self._unir(partes, 'metodo_pago', 'total_ventas', 'cantidad_transacciones')
+    
+    def _movimientos_por_insumo(self, fecha_inicio: date, fecha_fin: date):
+        """Subquery (id_insumo, cantidad_entrada, cantidad_salida, cantidad_total) del período."""
+        from modules.gestion_almacen_inusmos.movimiento_insumos.model import MovimientoInsumo
+        from modules.resumen_diario.model import ResumenInsumosDia
+        
+        tramo_resumen, tramo_origen = self._tramos(fecha_inicio, fecha_fin)
+        partes = []
+        if tramo_resumen:
+            partes.append(select(
+                ResumenInsumosDia.id_insumo,
+                ResumenInsumosDia.cantidad_entrada,
+                ResumenInsumosDia.cantidad_salida,
+                ResumenInsumosDia.cantidad_total
+            ).where(
+                ResumenInsumosDia.fecha.between(*tramo_resumen)
+            ))
+        if tramo_origen:
+            partes.append(select(
+                MovimientoInsumo.id_insumo.label('id_insumo'),
+                func.coalesce(func.sum(
+                    case((MovimientoInsumo.tipo_movimiento == 'ENTRADA', MovimientoInsumo.cantidad), else_=0)
+                ), 0).label('cantidad_entrada'),
+                func.coalesce(func.sum(
+                    case((MovimientoInsumo.tipo_movimiento == 'SALIDA', MovimientoInsumo.cantidad), else_=0)
+                ), 0).label('cantidad_salida'),
+                func.sum(MovimientoInsumo.cantidad).label('cantidad_total')
+            ).where(
+                MovimientoInsumo.anulado == False,
+                filtro_periodo(MovimientoInsumo.fecha_movimiento, *tramo_origen)
+            ).group_by(
+                MovimientoInsumo.id_insumo
+            ))
+        
+        return self._unir(partes, 'id_insumo', 'cantidad_entrada', 'cantidad_salida', 'cantidad_total')
+    
+    def _mermas_por_tipo(self, fecha_inicio: date, fecha_fin: date):
+        """Subquery (tipo, cantidad_casos, cantidad_total, costo_total) del período."""
+        from modules.calidad_desperdicio_merma.model import CalidadDesperdicioMerma
+        from modules.resumen_diario.model import ResumenMermasDia
+        
+        tramo_resumen, tramo_origen = self._tramos(fecha_inicio, fecha_fin)
+        partes = []
+        if tramo_resumen:
+            partes.append(select(
+                ResumenMermasDia.tipo,
+                ResumenMermasDia.cantidad_casos,
+                ResumenMermasDia.cantidad_total,
+                ResumenMermasDia.costo_total
+            ).where(
+                ResumenMermasDia.fecha.between(*tramo_resumen)
+            ))
+        if tramo_origen:
+            partes.append(select(
+                CalidadDesperdicioMerma.tipo.label('tipo'),
+                func.count(CalidadDesperdicioMerma.id_merma).label('cantidad_casos'),
+                func.sum(CalidadDesperdicioMerma.cantidad).label('cantidad_total'),
+                func.coalesce(func.sum(CalidadDesperdicioMerma.costo_total), 0).label('costo_total')
+            ).where(
+                CalidadDesperdicioMerma.anulado == False,
+                filtro_periodo(CalidadDesperdicioMerma.fecha_caso, *tramo_origen)
+            ).group_by(
+                CalidadDesperdicioMerma.tipo
+            ))
+        
+        return self._unir(partes, 'tipo', 'cantidad_casos', 'cantidad_total', 'costo_total')
     
     # ==================== ANÁLISIS ABC ====================
     
@@ -29,30 +196,21 @@ class ReportesRepository(ReportesRepositoryInterface):
         Obtiene ventas agrupadas por producto para análisis ABC.
         Ordenado por monto total descendente.
         """
-        from modules.gestion_almacen_productos.ventas.model import Venta, VentaDetalle
         from modules.productos_terminados.model import ProductoTerminado
         
+        ventas = self._ventas_por_producto(fecha_inicio, fecha_fin)
+        
         query = self.db.query(
             ProductoTerminado.id_producto,
             ProductoTerminado.codigo_producto.label('codigo'),
             ProductoTerminado.nombre,
-            func.sum(VentaDetalle.cantidad).label('cantidad_vendida'),
-            func.sum(VentaDetalle.subtotal).label('monto_total'),
-            func.count(func.distinct(Venta.id_venta)).label('num_ventas')
+            ventas.c.cantidad_vendida,
+            ventas.c.monto_total,
+            ventas.c.num_ventas
         ).join(
-            VentaDetalle, ProductoTerminado.id_producto == VentaDetalle.id_producto
-        ).join(
-            Venta, VentaDetalle.id_venta == Venta.id_venta
-        ).filter(
-            Venta.anulado == False,
-            func.date(Venta.fecha_venta) >= fecha_inicio,
-            func.date(Venta.fecha_venta) <= fecha_fin
-        ).group_by(
-            ProductoTerminado.id_producto,
-            ProductoTerminado.codigo_producto,
-            ProductoTerminado.nombre
+            ventas, ProductoTerminado.id_producto == ventas.c.id_producto
         ).order_by(
-            desc('monto_total')
+            desc(ventas.c.monto_total)
         )
         
         resultados = query.all()
@@ -64,7 +222,7 @@ class ReportesRepository(ReportesRepositoryInterface):
                 'nombre': r.nombre,
                 'cantidad_vendida': Decimal(str(r.cantidad_vendida or 0)),
                 'monto_total': Decimal(str(r.monto_total or 0)),
-                'num_ventas': r.num_ventas or 0
+                'num_ventas': int(r.num_ventas or 0)
             }
             for r in resultados
         ]
@@ -73,80 +231,48 @@ class ReportesRepository(ReportesRepositoryInterface):
     
     def obtener_resumen_ventas_dia(self, fecha: date) -> Dict[str, Any]:
         """Obtiene resumen de ventas del día."""
-        from modules.gestion_almacen_productos.ventas.model import Venta
+        ventas = self._ventas_por_metodo(fecha, fecha)
         
-        resultado = self.db.query(
-            func.count(Venta.id_venta).label('cantidad_transacciones'),
-            func.coalesce(func.sum(Venta.total), 0).label('total_ventas'),
-            func.coalesce(func.sum(
-                case((Venta.metodo_pago == 'efectivo', Venta.total), else_=0)
-            ), 0).label('total_efectivo'),
-            func.coalesce(func.sum(
-                case((Venta.metodo_pago == 'tarjeta', Venta.total), else_=0)
-            ), 0).label('total_tarjeta'),
-            func.coalesce(func.sum(
-                case((Venta.metodo_pago == 'transferencia', Venta.total), else_=0)
-            ), 0).label('total_transferencia'),
-            func.coalesce(func.sum(
-                case((Venta.metodo_pago == 'yape', Venta.total), else_=0)
-            ), 0).label('total_yape'),
-            func.coalesce(func.sum(
-                case((Venta.metodo_pago == 'plin', Venta.total), else_=0)
-            ), 0).label('total_plin')
-        ).filter(
-            Venta.anulado == False,
-            func.date(Venta.fecha_venta) == fecha
-        ).first()
+        filas = self.db.query(
+            ventas.c.metodo_pago,
+            ventas.c.total_ventas,
+            ventas.c.cantidad_transacciones
+        ).all()
         
-        total = Decimal(str(resultado.total_ventas or 0))
-        cantidad = resultado.cantidad_transacciones or 0
+        por_metodo = {f.metodo_pago: Decimal(str(f.total_ventas or 0)) for f in filas}
+        total = sum(por_metodo.values(), Decimal('0'))
+        cantidad = sum(int(f.cantidad_transacciones or 0) for f in filas)
         
         return {
             'total_ventas': total,
             'cantidad_transacciones': cantidad,
             'ticket_promedio': total / cantidad if cantidad > 0 else Decimal('0'),
             'ventas_por_metodo': {
-                'efectivo': Decimal(str(resultado.total_efectivo or 0)),
-                'tarjeta': Decimal(str(resultado.total_tarjeta or 0)),
-                'transferencia': Decimal(str(resultado.total_transferencia or 0)),
-                'yape': Decimal(str(resultado.total_yape or 0)),
-                'plin': Decimal(str(resultado.total_plin or 0))
+                metodo: por_metodo.get(metodo, Decimal('0'))
+                for metodo in METODOS_PAGO
             }
         }
     
     def obtener_resumen_mermas_dia(self, fecha: date) -> Dict[str, Any]:
         """Obtiene resumen de mermas del día."""
-        from modules.calidad_desperdicio_merma.model import CalidadDesperdicioMerma
-        
-        resultado = self.db.query(
-            func.count(CalidadDesperdicioMerma.id_merma).label('cantidad_casos'),
-            func.coalesce(func.sum(CalidadDesperdicioMerma.cantidad), 0).label('cantidad_total'),
-            func.coalesce(func.sum(CalidadDesperdicioMerma.costo_total), 0).label('costo_total')
-        ).filter(
-            CalidadDesperdicioMerma.anulado == False,
-            func.date(CalidadDesperdicioMerma.fecha_caso) == fecha
-        ).first()
+        mermas = self._mermas_por_tipo(fecha, fecha)
         
         # Desglose por tipo
         desglose = self.db.query(
-            CalidadDesperdicioMerma.tipo,
-            func.count(CalidadDesperdicioMerma.id_merma).label('cantidad'),
-            func.coalesce(func.sum(CalidadDesperdicioMerma.costo_total), 0).label('costo')
-        ).filter(
-            CalidadDesperdicioMerma.anulado == False,
-            func.date(CalidadDesperdicioMerma.fecha_caso) == fecha
-        ).group_by(
-            CalidadDesperdicioMerma.tipo
+            mermas.c.tipo,
+            mermas.c.cantidad_casos,
+            mermas.c.cantidad_total,
+            mermas.c.costo_total
         ).all()
         
         return {
-            'cantidad_casos': resultado.cantidad_casos or 0,
-            'cantidad_total_kg': Decimal(str(resultado.cantidad_total or 0)),
-            'costo_total': Decimal(str(resultado.costo_total or 0)),
+            'cantidad_casos': sum(int(d.cantidad_casos or 0) for d in desglose),
+            'cantidad_total_kg': sum((Decimal(str(d.cantidad_total or 0)) for d in desglose), Decimal('0')),
+            'costo_total': sum((Decimal(str(d.costo_total or 0)) for d in desglose), Decimal('0')),
             'desglose_por_tipo': {
                 d.tipo: {
-                    'cantidad': d.cantidad,
-                    'costo': Decimal(str(d.costo or 0))
+                    'cantidad': int(d.cantidad_casos or 0),
+                    'costo': Decimal(str(d.costo_total or 0))
                 }
                 for d in desglose
             }
@@ -172,7 +298,7 @@ class ReportesRepository(ReportesRepositoryInterface):
             ProductoTerminado, Receta.id_producto == ProductoTerminado.id_producto
         ).filter(
             Produccion.anulado == False,
-            func.date(Produccion.fecha_produccion) == fecha
+            filtro_dia(Produccion.fecha_produccion, fecha)
         ).all()
         
         total_unidades = sum(
@@ -204,17 +330,14 @@ class ReportesRepository(ReportesRepositoryInterface):
         Obtiene los kg totales manejados en el día.
         Suma de entradas + stock inicial usado.
         """
-        from modules.gestion_almacen_inusmos.movimiento_insumos.model import MovimientoInsumo
+        movimientos = self._movimientos_por_insumo(fecha, fecha)
         
         # Total de movimientos del día (entradas y salidas)
-        resultado = self.db.query(
-            func.coalesce(func.sum(MovimientoInsumo.cantidad), 0).label('total')
-        ).filter(
-            MovimientoInsumo.anulado == False,
-            func.date(MovimientoInsumo.fecha_movimiento) == fecha
-        ).first()
+        total = self.db.query(
+            func.coalesce(func.sum(movimientos.c.cantidad_total), 0)
+        ).scalar()
         
-        return Decimal(str(resultado.total or 0))
+        return Decimal(str(total or 0))
     
     def contar_lotes_vencidos_hoy(self, fecha: date) -> Dict[str, Any]:
         """Cuenta lotes vencidos a la fecha con stock disponible."""
@@ -237,37 +360,140 @@ class ReportesRepository(ReportesRepositoryInterface):
             'cantidad_kg': Decimal(str(resultado.cantidad_kg or 0))
         }
     
+    # ==================== MOTOR DE KPIs ====================
+    
+    def _consultas_kpis(self, fecha: date, fecha_inicio_rotacion: date) -> Dict[str, Any]:
+        """
+        Una consulta de una sola fila por KPI del dashboard.
+        La rotación se calcula sobre [fecha_inicio_rotacion, fecha].
+        """
+        from modules.gestion_almacen_inusmos.ingresos_insumos.model import IngresoProductoDetalle
+        from modules.gestion_almacen_inusmos.insumo_stock.model import InsumoStock
+        from modules.insumo.model import Insumo
+        from modules.productos_terminados.model import ProductoTerminado
+        
+        # KPI merma diaria: costo de merma y ventas del día
+        ventas_dia = self._ventas_por_metodo(fecha, fecha)
+        mermas_dia = self._mermas_por_tipo(fecha, fecha)
+        merma_diaria = select(
+            select(func.coalesce(func.sum(ventas_dia.c.total_ventas), 0)).scalar_subquery().label('total_ventas'),
+            select(func.coalesce(func.sum(mermas_dia.c.costo_total), 0)).scalar_subquery().label('costo_merma')
+        )
+        
+        # KPI productos vencidos: lotes perecibles vencidos con stock
+        productos_vencidos_hoy = select(
+            func.count(IngresoProductoDetalle.id_ingreso_detalle).label('lotes_vencidos'),
+            func.coalesce(func.sum(IngresoProductoDetalle.cantidad_restante), 0).label('kg_vencidos')
+        ).join(
+            Insumo, IngresoProductoDetalle.id_insumo == Insumo.id_insumo
+        ).where(
+            IngresoProductoDetalle.cantidad_restante > 0,
+            IngresoProductoDetalle.fecha_vencimiento <= fecha,
+            Insumo.perecible == True
+        )
+        
+        # KPI stock crítico: insumos bajo el mínimo (resumen insumo_stock)
+        stock = func.coalesce(InsumoStock.stock_actual, 0)
+        stock_critico = select(
+            func.count().filter(stock == 0).label('insumos_sin_stock'),
+            func.count().filter(stock != 0).label('insumos_bajo_minimo')
+        ).select_from(Insumo).outerjoin(
+            InsumoStock, Insumo.id_insumo == InsumoStock.id_insumo
+        ).where(
+            Insumo.anulado == False,
+            stock < Insumo.stock_minimo
+        )
+        
+        # KPI rotación: promedio de consumo/stock de los ítems con stock y consumo, anualizado
+        dias_periodo = (fecha - fecha_inicio_rotacion).days + 1
+        ventas = self._ventas_por_producto(fecha_inicio_rotacion, fecha)
+        movimientos = self._movimientos_por_insumo(fecha_inicio_rotacion, fecha)
+        rotaciones = union_all(
+            select(
+                (ventas.c.cantidad_vendida / ProductoTerminado.stock_actual).label('rotacion')
+            ).join(
+                ventas, ProductoTerminado.id_producto == ventas.c.id_producto
+            ).where(
+                ProductoTerminado.anulado == False,
+                ProductoTerminado.stock_actual > 0,
+                ventas.c.cantidad_vendida > 0
+            ),
+            select(
+                (movimientos.c.cantidad_salida / InsumoStock.stock_actual).label('rotacion')
+            ).select_from(Insumo).join(
+                InsumoStock, Insumo.id_insumo == InsumoStock.id_insumo
+            ).join(
+                movimientos, Insumo.id_insumo == movimientos.c.id_insumo
+            ).where(
+                Insumo.anulado == False,
+                InsumoStock.stock_actual > 0,
+                movimientos.c.cantidad_salida > 0
+            )
+        ).subquery()
+        rotacion_inventario = select(
+            (func.coalesce(func.avg(rotaciones.c.rotacion), 0) * 365 / max(dias_periodo, 1)).label('rotacion_promedio')
+        )
+        
+        return {
+            'merma_diaria': merma_diaria,
+            'productos_vencidos_hoy': productos_vencidos_hoy,
+            'stock_critico': stock_critico,
+            'rotacion_inventario': rotacion_inventario
+        }
+    
+    def obtener_datos_kpis(
+        self,
+        fecha: date,
+        fecha_inicio_rotacion: date,
+        kpis: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Calcula los datos de los KPIs en una sola consulta: cada KPI es un CTE
+        de una fila y la consulta final los combina.
+        
+        Args:
+            kpis: Subconjunto de KPIS_DASHBOARD a calcular (por defecto todos).
+        
+        Returns:
+            Diccionario con total_ventas, costo_merma, lotes_vencidos, kg_vencidos,
+            insumos_sin_stock, insumos_bajo_minimo y rotacion_promedio
+            (solo las claves de los KPIs pedidos).
+        """
+        consultas = self._consultas_kpis(fecha, fecha_inicio_rotacion)
+        ctes = [consultas[nombre].cte(nombre) for nombre in (kpis or KPIS_DASHBOARD)]
+        
+        consulta = select(*[columna for cte in ctes for columna in cte.c]).select_from(ctes[0])
+        for cte in ctes[1:]:
+            consulta = consulta.join(cte, true())
+        
+        fila = self.db.execute(consulta).one()._mapping
+        
+        return {
+            clave: int(valor or 0) if clave in ('lotes_vencidos', 'insumos_sin_stock', 'insumos_bajo_minimo')
+            else Decimal(str(valor or 0))
+            for clave, valor in fila.items()
+        }
+    
     def obtener_consumo_insumos_periodo(
         self,
         fecha_inicio: date,
         fecha_fin: date
     ) -> List[Dict[str, Any]]:
         """Obtiene el consumo de insumos en un período."""
-        from modules.gestion_almacen_inusmos.movimiento_insumos.model import MovimientoInsumo
         from modules.insumo.model import Insumo
         
+        movimientos = self._movimientos_por_insumo(fecha_inicio, fecha_fin)
+        
         resultado = self.db.query(
             Insumo.id_insumo,
             Insumo.codigo,
             Insumo.nombre,
             Insumo.unidad_medida,
-            func.coalesce(func.sum(
-                case((MovimientoInsumo.tipo_movimiento == 'SALIDA', MovimientoInsumo.cantidad), else_=0)
-            ), 0).label('consumo_total')
+            func.coalesce(movimientos.c.cantidad_salida, 0).label('consumo_total')
         ).outerjoin(
-            MovimientoInsumo, and_(
-                Insumo.id_insumo == MovimientoInsumo.id_insumo,
-                MovimientoInsumo.anulado == False,
-                func.date(MovimientoInsumo.fecha_movimiento) >= fecha_inicio,
-                func.date(MovimientoInsumo.fecha_movimiento) <= fecha_fin
-            )
+            movimientos, Insumo.id_insumo == movimientos.c.id_insumo
         ).filter(
             Insumo.anulado == False
-        ).group_by(
-            Insumo.id_insumo,
-            Insumo.codigo,
-            Insumo.nombre,
-            Insumo.unidad_medida
         ).all()
         
         return [
@@ -282,8 +508,8 @@ class ReportesRepository(ReportesRepositoryInterface):
         ]
     
     def obtener_stock_actual_insumos(self) -> List[Dict[str, Any]]:
-        """Obtiene el stock actual de todos los insumos."""
-        from modules.gestion_almacen_inusmos.ingresos_insumos.model import IngresoProductoDetalle
+        """Obtiene el stock actual (resumen insumo_stock) de todos los insumos."""
+        from modules.gestion_almacen_inusmos.insumo_stock.model import InsumoStock
         from modules.insumo.model import Insumo
         
         resultado = self.db.query(
@@ -292,17 +518,11 @@ class ReportesRepository(ReportesRepositoryInterface):
             Insumo.nombre,
             Insumo.unidad_medida,
             Insumo.stock_minimo,
-            func.coalesce(func.sum(IngresoProductoDetalle.cantidad_restante), 0).label('stock_actual')
+            func.coalesce(InsumoStock.stock_actual, 0).label('stock_actual')
         ).outerjoin(
-            IngresoProductoDetalle, Insumo.id_insumo == IngresoProductoDetalle.id_insumo
+            InsumoStock, Insumo.id_insumo == InsumoStock.id_insumo
         ).filter(
             Insumo.anulado == False
-        ).group_by(
-            Insumo.id_insumo,
-            Insumo.codigo,
-            Insumo.nombre,
-            Insumo.unidad_medida,
-            Insumo.stock_minimo
         ).all()
         
         return [
@@ -325,30 +545,21 @@ class ReportesRepository(ReportesRepositoryInterface):
         fecha_fin: date
     ) -> Decimal:
         """Calcula la tasa de merma del período."""
-        from modules.calidad_desperdicio_merma.model import CalidadDesperdicioMerma
-        from modules.gestion_almacen_inusmos.movimiento_insumos.model import MovimientoInsumo
+        mermas = self._mermas_por_tipo(fecha_inicio, fecha_fin)
+        movimientos = self._movimientos_por_insumo(fecha_inicio, fecha_fin)
         
         # Total de mermas del período
-        mermas = self.db.query(
-            func.coalesce(func.sum(CalidadDesperdicioMerma.cantidad), 0).label('total_merma')
-        ).filter(
-            CalidadDesperdicioMerma.anulado == False,
-            func.date(CalidadDesperdicioMerma.fecha_caso) >= fecha_inicio,
-            func.date(CalidadDesperdicioMerma.fecha_caso) <= fecha_fin
-        ).first()
+        total_merma = self.db.query(
+            func.coalesce(func.sum(mermas.c.cantidad_total), 0)
+        ).scalar()
         
         # Total de movimientos (entradas) del período
-        movimientos = self.db.query(
-            func.coalesce(func.sum(MovimientoInsumo.cantidad), 0).label('total_mov')
-        ).filter(
-            MovimientoInsumo.anulado == False,
-            MovimientoInsumo.tipo_movimiento == 'ENTRADA',
-            func.date(MovimientoInsumo.fecha_movimiento) >= fecha_inicio,
-            func.date(MovimientoInsumo.fecha_movimiento) <= fecha_fin
-        ).first()
+        total_mov = self.db.query(
+            func.coalesce(func.sum(movimientos.c.cantidad_entrada), 0)
+        ).scalar()
         
-        total_merma = Decimal(str(mermas.total_merma or 0))
-        total_mov = Decimal(str(movimientos.total_mov or 1))  # Evitar división por cero
+        total_merma = Decimal(str(total_merma or 0))
+        total_mov = Decimal(str(total_mov or 1))  # Evitar división por cero
         
         if total_mov == 0:
             return Decimal('0')
@@ -361,19 +572,14 @@ class ReportesRepository(ReportesRepositoryInterface):
         fecha_fin: date
     ) -> Decimal:
         """Calcula la rotación de inventario del período."""
-        from modules.gestion_almacen_productos.ventas.model import Venta, VentaDetalle
         from modules.productos_terminados.model import ProductoTerminado
         
+        ventas = self._ventas_por_producto(fecha_inicio, fecha_fin)
+        
         # Costo de ventas (aproximado como el subtotal de las ventas)
         costo_ventas = self.db.query(
-            func.coalesce(func.sum(VentaDetalle.subtotal), 0).label('costo')
-        ).join(
-            Venta, VentaDetalle.id_venta == Venta.id_venta
-        ).filter(
-            Venta.anulado == False,
-            func.date(Venta.fecha_venta) >= fecha_inicio,
-            func.date(Venta.fecha_venta) <= fecha_fin
-        ).first()
+            func.coalesce(func.sum(ventas.c.monto_total), 0)
+        ).scalar()
         
         # Inventario promedio (stock actual * precio)
         inventario = self.db.query(
@@ -382,7 +588,7 @@ class ReportesRepository(ReportesRepositoryInterface):
             ProductoTerminado.anulado == False
         ).first()
         
-        costo = Decimal(str(costo_ventas.costo or 0))
+        costo = Decimal(str(costo_ventas or 0))
         valor_inv = Decimal(str(inventario.valor or 1))  # Evitar división por cero
         
         if valor_inv == 0:
@@ -397,7 +603,7 @@ class ReportesRepository(ReportesRepositoryInterface):
     def obtener_valor_inventario_actual(self) -> Decimal:
         """Obtiene el valor total del inventario actual."""
         from modules.productos_terminados.model import ProductoTerminado
-        from modules.gestion_almacen_inusmos.ingresos_insumos.model import IngresoProductoDetalle
+        from modules.gestion_almacen_inusmos.insumo_stock.model import InsumoStock
         
         # Valor de productos terminados
         valor_productos = self.db.query(
@@ -406,11 +612,9 @@ class ReportesRepository(ReportesRepositoryInterface):
             ProductoTerminado.anulado == False
         ).first()
         
-        # Valor de insumos (stock restante * precio unitario del lote)
+        # Valor de insumos (resumen insumo_stock: stock restante * precio unitario del lote)
         valor_insumos = self.db.query(
-            func.coalesce(func.sum(IngresoProductoDetalle.cantidad_restante * IngresoProductoDetalle.precio_unitario), 0).label('valor')
-        ).filter(
-            IngresoProductoDetalle.cantidad_restante > 0
+            func.coalesce(func.sum(InsumoStock.valor_stock), 0).label('valor')
         ).first()
         
         total_productos = Decimal(str(valor_productos.valor or 0))
@@ -425,25 +629,12 @@ class ReportesRepository(ReportesRepositoryInterface):
         limite: int = 50
     ) -> List[Dict[str, Any]]:
         """Obtiene la rotación de cada producto en el período."""
-        from modules.gestion_almacen_productos.ventas.model import Venta, VentaDetalle
         from modules.productos_terminados.model import ProductoTerminado
         
         dias_periodo = (fecha_fin - fecha_inicio).days + 1
         
-        # Subquery para ventas del período
-        subquery = self.db.query(
-            VentaDetalle.id_producto,
-            func.sum(VentaDetalle.cantidad).label('vendido'),
-            func.sum(VentaDetalle.subtotal).label('valor_vendido')
-        ).join(
-            Venta, VentaDetalle.id_venta == Venta.id_venta
-        ).filter(
-            Venta.anulado == False,
-            func.date(Venta.fecha_venta) >= fecha_inicio,
-            func.date(Venta.fecha_venta) <= fecha_fin
-        ).group_by(
-            VentaDetalle.id_producto
-        ).subquery()
+        # Ventas del período por producto
+        ventas = self._ventas_por_producto(fecha_inicio, fecha_fin)
         
         # Query principal
         resultado = self.db.query(
@@ -452,10 +643,10 @@ class ReportesRepository(ReportesRepositoryInterface):
             ProductoTerminado.nombre,
             ProductoTerminado.stock_actual,
             ProductoTerminado.precio_venta,
-            func.coalesce(subquery.c.vendido, 0).label('cantidad_vendida'),
-            func.coalesce(subquery.c.valor_vendido, 0).label('valor_vendido')
+            func.coalesce(ventas.c.cantidad_vendida, 0).label('cantidad_vendida'),
+            func.coalesce(ventas.c.monto_total, 0).label('valor_vendido')
         ).outerjoin(
-            subquery, ProductoTerminado.id_producto == subquery.c.id_producto
+            ventas, ProductoTerminado.id_producto == ventas.c.id_producto
         ).filter(
             ProductoTerminado.anulado == False
         ).order_by(
@@ -493,20 +684,13 @@ class ReportesRepository(ReportesRepositoryInterface):
         dias: int = 30
     ) -> List[Dict[str, Any]]:
         """Obtiene productos sin movimiento en los últimos X días."""
-        from modules.gestion_almacen_productos.ventas.model import Venta, VentaDetalle
         from modules.productos_terminados.model import ProductoTerminado
         
-        fecha_limite = date.today() - timedelta(days=dias)
+        hoy = hoy_negocio()
+        fecha_limite = hoy - timedelta(days=dias)
         
         # Subquery para productos con ventas recientes
-        productos_con_venta = self.db.query(
-            VentaDetalle.id_producto
-        ).join(
-            Venta, VentaDetalle.id_venta == Venta.id_venta
-        ).filter(
-            Venta.anulado == False,
-            func.date(Venta.fecha_venta) >= fecha_limite
-        ).distinct().subquery()
+        productos_con_venta = self._ventas_por_producto(fecha_limite, hoy)
         
         # Productos sin ventas recientes
         resultado = self.db.query(
@@ -543,27 +727,23 @@ class ReportesRepository(ReportesRepositoryInterface):
         fecha_inicio: date,
         fecha_fin: date,
         limit: int = 100,
-        offset: int = 0
+        offset: int = 0,
+        despues_de: Optional[int] = None,
+        con_total: bool = True
     ) -> Dict[str, Any]:
-        """Obtiene datos de rotación para productos terminados."""
-        from modules.gestion_almacen_productos.ventas.model import Venta, VentaDetalle
+        """
+        Obtiene datos de rotación para productos terminados, ordenados por id.
+
+        Con `despues_de` (cursor: último id de la página anterior) la página
+        empieza en ese id por la clave primaria y `offset` se ignora. Con
+        `con_total=False` no se cuenta la tabla y `total` es None.
+        """
         from modules.productos_terminados.model import ProductoTerminado
         
         dias_periodo = (fecha_fin - fecha_inicio).days + 1
         
-        # Subquery para ventas del período
-        subquery = self.db.query(
-            VentaDetalle.id_producto,
-            func.sum(VentaDetalle.cantidad).label('vendido')
-        ).join(
-            Venta, VentaDetalle.id_venta == Venta.id_venta
-        ).filter(
-            Venta.anulado == False,
-            func.date(Venta.fecha_venta) >= fecha_inicio,
-            func.date(Venta.fecha_venta) <= fecha_fin
-        ).group_by(
-            VentaDetalle.id_producto
-        ).subquery()
+        # Ventas del período por producto
+        ventas = self._ventas_por_producto(fecha_inicio, fecha_fin)
         
         # Query principal
         query = self.db.query(
@@ -572,15 +752,28 @@ class ReportesRepository(ReportesRepositoryInterface):
             ProductoTerminado.nombre,
             ProductoTerminado.unidad_medida,
             ProductoTerminado.stock_actual,
-            func.coalesce(subquery.c.vendido, 0).label('consumo_periodo')
+            func.coalesce(ventas.c.cantidad_vendida, 0).label('consumo_periodo')
         ).outerjoin(
-            subquery, ProductoTerminado.id_producto == subquery.c.id_producto
+            ventas, ProductoTerminado.id_producto == ventas.c.id_producto
         ).filter(
             ProductoTerminado.anulado == False
         )
         
-        total = query.count()
-        resultados = query.offset(offset).limit(limit).all()
+        # El outer join con el agregado es 1 a 1: basta contar la tabla base,
+        # sin calcular el consumo del período de todas las filas
+        total = self.db.query(func.count(ProductoTerminado.id_producto)).filter(
+            ProductoTerminado.anulado == False
+        ).scalar() if con_total else None
+        
+        if despues_de is not None:
+            query = query.filter(ProductoTerminado.id_producto > despues_de)
+            # El cursor ya ubica la página: OFFSET saltaría filas después del cursor
+            offset = 0
+        
+        # Una fila extra indica si hay página siguiente
+        resultados = query.order_by(ProductoTerminado.id_producto).offset(offset).limit(limit + 1).all()
+        siguiente = resultados[limit - 1].id_producto if len(resultados) > limit else None
+        resultados = resultados[:limit]
         
         return {
             'items': [
@@ -596,7 +789,8 @@ class ReportesRepository(ReportesRepositoryInterface):
                 }
                 for r in resultados
             ],
-            'total': total
+            'total': total,
+            'siguiente': siguiente
         }
     
     def obtener_rotacion_insumos(
@@ -604,54 +798,56 @@ class ReportesRepository(ReportesRepositoryInterface):
         fecha_inicio: date,
         fecha_fin: date,
         limit: int = 100,
-        offset: int = 0
+        offset: int = 0,
+        despues_de: Optional[int] = None,
+        con_total: bool = True
     ) -> Dict[str, Any]:
-        """Obtiene datos de rotación para insumos."""
-        from modules.gestion_almacen_inusmos.movimiento_insumos.model import MovimientoInsumo
-        from modules.gestion_almacen_inusmos.ingresos_insumos.model import IngresoProductoDetalle
+        """
+        Obtiene datos de rotación para insumos, ordenados por id.
+
+        Con `despues_de` (cursor: último id de la página anterior) la página
+        empieza en ese id por la clave primaria y `offset` se ignora. Con
+        `con_total=False` no se cuenta la tabla y `total` es None.
+        """
+        from modules.gestion_almacen_inusmos.insumo_stock.model import InsumoStock
         from modules.insumo.model import Insumo
         
         dias_periodo = (fecha_fin - fecha_inicio).days + 1
         
-        # Subquery para consumo (salidas) del período
-        subquery_consumo = self.db.query(
-            MovimientoInsumo.id_insumo,
-            func.sum(MovimientoInsumo.cantidad).label('consumido')
-        ).filter(
-            MovimientoInsumo.anulado == False,
-            MovimientoInsumo.tipo_movimiento == 'SALIDA',
-            func.date(MovimientoInsumo.fecha_movimiento) >= fecha_inicio,
-            func.date(MovimientoInsumo.fecha_movimiento) <= fecha_fin
-        ).group_by(
-            MovimientoInsumo.id_insumo
-        ).subquery()
-        
-        # Subquery para stock actual
-        subquery_stock = self.db.query(
-            IngresoProductoDetalle.id_insumo,
-            func.sum(IngresoProductoDetalle.cantidad_restante).label('stock')
-        ).group_by(
-            IngresoProductoDetalle.id_insumo
-        ).subquery()
+        # Consumo (salidas) del período por insumo
+        movimientos = self._movimientos_por_insumo(fecha_inicio, fecha_fin)
         
-        # Query principal
+        # Query principal (stock actual desde el resumen insumo_stock)
         query = self.db.query(
             Insumo.id_insumo,
             Insumo.codigo,
             Insumo.nombre,
             Insumo.unidad_medida,
-            func.coalesce(subquery_stock.c.stock, 0).label('stock_actual'),
-            func.coalesce(subquery_consumo.c.consumido, 0).label('consumo_periodo')
+            func.coalesce(InsumoStock.stock_actual, 0).label('stock_actual'),
+            func.coalesce(movimientos.c.cantidad_salida, 0).label('consumo_periodo')
         ).outerjoin(
-            subquery_stock, Insumo.id_insumo == subquery_stock.c.id_insumo
+            InsumoStock, Insumo.id_insumo == InsumoStock.id_insumo
         ).outerjoin(
-            subquery_consumo, Insumo.id_insumo == subquery_consumo.c.id_insumo
+            movimientos, Insumo.id_insumo == movimientos.c.id_insumo
         ).filter(
             Insumo.anulado == False
         )
         
-        total = query.count()
-        resultados = query.offset(offset).limit(limit).all()
+        # El outer join con el agregado es 1 a 1: basta contar la tabla base,
+        # sin calcular el consumo del período de todas las filas
+        total = self.db.query(func.count(Insumo.id_insumo)).filter(
+            Insumo.anulado == False
+        ).scalar() if con_total else None
+        
+        if despues_de is not None:
+            query = query.filter(Insumo.id_insumo > despues_de)
+            # El cursor ya ubica la página: OFFSET saltaría filas después del cursor
+            offset = 0
+        
+        # Una fila extra indica si hay página siguiente
+        resultados = query.order_by(Insumo.id_insumo).offset(offset).limit(limit + 1).all()
+        siguiente = resultados[limit - 1].id_insumo if len(resultados) > limit else None
+        resultados = resultados[:limit]
         
         return {
             'items': [
@@ -667,5 +863,163 @@ class ReportesRepository(ReportesRepositoryInterface):
                 }
                 for r in resultados
             ],
-            'total': total
+            'total': total,
+            'siguiente': siguiente
         }
+    
+    # ==================== EXPORTACIÓN ====================
+    
+    def _iterar(self, consulta) -> Iterator[Dict[str, Any]]:
+        """
+        Ejecuta la consulta con cursor del lado del servidor y entrega las filas
+        por lotes de TAMANO_LOTE_EXPORT: la memoria no depende del total de filas.
+        """
+        resultado = self.db.execute(
+            consulta,
+            execution_options={'stream_results': True, 'yield_per': TAMANO_LOTE_EXPORT}
+        ).mappings()
+        try:
+            for fila in resultado:
+                yield fila
+        finally:
+            resultado.close()
+    
+    def iterar_abc(self, fecha_inicio: date, fecha_fin: date) -> Iterator[Dict[str, Any]]:
+        """
+        Filas del análisis ABC del período, ordenadas por monto descendente.
+        Porcentajes y clasificación se calculan en SQL (funciones de ventana).
+        """
+        from modules.productos_terminados.model import ProductoTerminado
+        
+        ventas = self._ventas_por_producto(fecha_inicio, fecha_fin)
+        total = func.sum(ventas.c.monto_total).over()
+        acumulado = func.sum(ventas.c.monto_total).over(
+            order_by=(desc(ventas.c.monto_total), ventas.c.id_producto),
+            rows=(None, 0)
+        )
+        base = select(
+            ventas.c.id_producto,
+            ProductoTerminado.codigo_producto.label('codigo'),
+            ProductoTerminado.nombre,
+            ventas.c.cantidad_vendida,
+            ventas.c.monto_total,
+            ventas.c.num_ventas,
+            (ventas.c.monto_total * 100 / func.nullif(total, 0)).label('porcentaje_ventas'),
+            (acumulado * 100 / func.nullif(total, 0)).label('porcentaje_acumulado')
+        ).join(
+            ProductoTerminado, ProductoTerminado.id_producto == ventas.c.id_producto
+        ).subquery()
+        
+        porcentaje_acumulado = func.coalesce(base.c.porcentaje_acumulado, 0)
+        consulta = select(
+            base.c.id_producto,
+            base.c.codigo,
+            base.c.nombre,
+            base.c.cantidad_vendida,
+            base.c.monto_total,
+            base.c.num_ventas,
+            func.round(func.coalesce(base.c.porcentaje_ventas, 0), 2).label('porcentaje_ventas'),
+            func.round(porcentaje_acumulado, 2).label('porcentaje_acumulado'),
+            case(
+                (porcentaje_acumulado <= 70, 'A'),
+                (porcentaje_acumulado <= 90, 'B'),
+                else_='C'
+            ).label('clasificacion')
+        ).order_by(
+            desc(base.c.monto_total), base.c.id_producto
+        )
+        
+        return self._iterar(consulta)
+    
+    def iterar_rotacion(self, fecha_inicio: date, fecha_fin: date) -> Iterator[Dict[str, Any]]:
+        """
+        Filas de rotación de productos terminados e insumos del período con
+        días de stock, rotación anualizada y clasificación calculados en SQL.
+        """
+        from modules.gestion_almacen_inusmos.insumo_stock.model import InsumoStock
+        from modules.insumo.model import Insumo
+        from modules.productos_terminados.model import ProductoTerminado
+        
+        dias_periodo = max((fecha_fin - fecha_inicio).days + 1, 1)
+        ventas = self._ventas_por_producto(fecha_inicio, fecha_fin)
+        movimientos = self._movimientos_por_insumo(fecha_inicio, fecha_fin)
+        
+        items = union_all(
+            select(
+                literal('producto_terminado').label('tipo'),
+                ProductoTerminado.id_producto.label('id'),
+                ProductoTerminado.codigo_producto.label('codigo'),
+                ProductoTerminado.nombre,
+                cast(ProductoTerminado.unidad_medida, String).label('unidad_medida'),
+                func.coalesce(ProductoTerminado.stock_actual, 0).label('stock_actual'),
+                func.coalesce(ventas.c.cantidad_vendida, 0).label('consumo_periodo')
+            ).outerjoin(
+                ventas, ProductoTerminado.id_producto == ventas.c.id_producto
+            ).where(
+                ProductoTerminado.anulado == False
+            ),
+            select(
+                literal('insumo').label('tipo'),
+                Insumo.id_insumo.label('id'),
+                Insumo.codigo,
+                Insumo.nombre,
+                cast(Insumo.unidad_medida, String).label('unidad_medida'),
+                func.coalesce(InsumoStock.stock_actual, 0).label('stock_actual'),
+                func.coalesce(movimientos.c.cantidad_salida, 0).label('consumo_periodo')
+            ).select_from(Insumo).outerjoin(
+                InsumoStock, Insumo.id_insumo == InsumoStock.id_insumo
+            ).outerjoin(
+                movimientos, Insumo.id_insumo == movimientos.c.id_insumo
+            ).where(
+                Insumo.anulado == False
+            )
+        ).subquery()
+        
+        con_consumo = and_(items.c.stock_actual > 0, items.c.consumo_periodo > 0)
+        rotacion_anual = case(
+            (con_consumo, items.c.consumo_periodo / items.c.stock_actual * 365 / dias_periodo),
+            else_=0
+        )
+        consulta = select(
+            items.c.tipo,
+            items.c.id,
+            items.c.codigo,
+            items.c.nombre,
+            items.c.unidad_medida,
+            items.c.stock_actual,
+            items.c.consumo_periodo,
+            func.round(case(
+                (items.c.consumo_periodo > 0, items.c.stock_actual * dias_periodo / items.c.consumo_periodo),
+                else_=999
+            ), 1).label('dias_stock'),
+            func.round(rotacion_anual, 2).label('rotacion_anualizada'),
+            case(
+                (rotacion_anual >= 12, 'alta'),
+                (rotacion_anual >= 6, 'media'),
+                else_='baja'
+            ).label('clasificacion')
+        ).order_by(
+            items.c.tipo, items.c.id
+        )
+        
+        return self._iterar(consulta)
+    
+    def iterar_ventas(self, fecha_inicio: date, fecha_fin: date) -> Iterator[Dict[str, Any]]:
+        """Ventas del período (incluidas las anuladas, con su marca), por fecha."""
+        from modules.gestion_almacen_productos.ventas.model import Venta
+        
+        consulta = select(
+            Venta.id_venta,
+            Venta.numero_venta,
+            Venta.fecha_venta,
+            Venta.metodo_pago,
+            Venta.total,
+            Venta.anulado,
+            Venta.id_user
+        ).where(
+            filtro_periodo(Venta.fecha_venta, fecha_inicio, fecha_fin)
+        ).order_by(
+            Venta.fecha_venta, Venta.id_venta
+        )
+        
+        return self._iterar(consulta)
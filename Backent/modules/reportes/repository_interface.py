@@ -43,6 +43,16 @@ class ReportesRepositoryInterface(ABC):
 
     # ==================== KPIs ====================
 
+    @abstractmethod
+    def obtener_datos_kpis(
+        self,
+        fecha: date,
+        fecha_inicio_rotacion: date,
+        kpis: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Calcula los datos de los KPIs del dashboard en una sola consulta."""
+        pass
+
     @abstractmethod
     def obtener_tasa_merma_periodo(
         self,
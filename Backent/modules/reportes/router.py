@@ -1,15 +1,23 @@
 """
 Router para el módulo de Reportes.
 Endpoints para análisis ABC, reporte diario, KPIs y rotación de inventario.
+
+ABC, reporte diario y KPIs se sirven desde la caché de reportes (cache.py).
+Los endpoints de consulta son async y leen con get_read_db_ejecutor: de la
+réplica de lectura si está configurada y al día (database.py), por el
+threadpool en DB_MODO=sync o por asyncpg en DB_MODO=async.
+Los endpoints /export entregan los reportes de períodos largos en streaming (export.py).
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from datetime import date
+from fastapi.responses import StreamingResponse
+from datetime import date, timedelta
 from typing import Optional
 from loguru import logger
 
-from database import get_db
+from database import EjecutorDB, get_read_db_ejecutor
+from .cache import cache_reportes
+from .export import FORMATOS_EXPORT, exportar_reporte
 from .service import ReportesService
 from .schemas import (
     ReporteABCResponse,
@@ -21,11 +29,6 @@ from .schemas import (
 router = APIRouter()
 
 
-def get_reportes_service(db: Session = Depends(get_db)) -> ReportesService:
-    """Dependency injection para el servicio de reportes."""
-    return ReportesService(db)
-
-
 # ==================== ANÁLISIS ABC ====================
 
 @router.get(
@@ -45,14 +48,14 @@ def get_reportes_service(db: Session = Depends(get_db)) -> ReportesService:
     - `fecha_fin`: Fecha de fin del período (YYYY-MM-DD)
     """
 )
-def obtener_reporte_abc(
+async def obtener_reporte_abc(
     fecha_inicio: date = Query(..., description="Fecha de inicio del período"),
     fecha_fin: date = Query(..., description="Fecha de fin del período"),
     categoria: Optional[str] = Query(
         default=None,
         description="Filtrar por categoría de producto"
     ),
-    service: ReportesService = Depends(get_reportes_service)
+    db: EjecutorDB = Depends(get_read_db_ejecutor)
 ):
     """Genera análisis ABC de productos por ventas."""
     try:
@@ -62,10 +65,17 @@ def obtener_reporte_abc(
                 detail="fecha_fin debe ser mayor o igual a fecha_inicio"
             )
         
-        return service.generar_reporte_abc(
-            fecha_inicio=fecha_inicio,
-            fecha_fin=fecha_fin,
-            categoria=categoria
+        return await cache_reportes.obtener_async(
+            "abc",
+            {"fecha_inicio": fecha_inicio, "fecha_fin": fecha_fin, "categoria": categoria},
+            fecha_inicio,
+            fecha_fin,
+            lambda: db(lambda s: ReportesService(s).generar_reporte_abc(
+                fecha_inicio=fecha_inicio,
+                fecha_fin=fecha_fin,
+                categoria=categoria
+            )),
+            historico=True
         )
     except HTTPException:
         raise
@@ -92,13 +102,16 @@ def obtener_reporte_abc(
     - `fecha`: Fecha del reporte (YYYY-MM-DD)
     """
 )
-def obtener_reporte_diario(
+async def obtener_reporte_diario(
     fecha: date = Query(..., description="Fecha del reporte"),
-    service: ReportesService = Depends(get_reportes_service)
+    db: EjecutorDB = Depends(get_read_db_ejecutor)
 ):
     """Genera reporte diario consolidado."""
     try:
-        return service.generar_reporte_diario(fecha=fecha)
+        return await cache_reportes.obtener_async(
+            "diario", {"fecha": fecha}, fecha, fecha,
+            lambda: db(lambda s: ReportesService(s).generar_reporte_diario(fecha=fecha))
+        )
     except Exception as e:
         logger.error(f"Error al generar reporte diario: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -123,15 +136,25 @@ def obtener_reporte_diario(
     
     **Parámetro obligatorio:**
     - `fecha`: Fecha para calcular KPIs (YYYY-MM-DD)
+    
+    **Parámetro opcional:**
+    - `perfilar`: Consulta cada KPI por separado y devuelve su tiempo en `tiempos_ms`
+      (por defecto todos los KPIs se calculan en una sola consulta)
     """
 )
-def obtener_kpis(
+async def obtener_kpis(
     fecha: date = Query(..., description="Fecha para calcular KPIs"),
-    service: ReportesService = Depends(get_reportes_service)
+    perfilar: bool = Query(False, description="Medir el tiempo de cada KPI por separado"),
+    db: EjecutorDB = Depends(get_read_db_ejecutor)
 ):
     """Obtiene dashboard de KPIs."""
     try:
-        return service.obtener_kpis(fecha=fecha)
+        if perfilar:
+            return await db(lambda s: ReportesService(s).obtener_kpis(fecha=fecha, perfilar=True))
+        return await cache_reportes.obtener_async(
+            "kpis", {"fecha": fecha}, fecha - timedelta(days=30), fecha,
+            lambda: db(lambda s: ReportesService(s).obtener_kpis(fecha=fecha))
+        )
     except Exception as e:
         logger.error(f"Error al obtener KPIs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -159,15 +182,22 @@ def obtener_kpis(
     
     **Paginación:**
     - `limit`: Máximo de registros por tipo (default: 100)
-    - `offset`: Desplazamiento para paginación (default: 0)
+    - `after_producto` / `after_insumo`: Cursores `siguiente_producto` /
+      `siguiente_insumo` de la página anterior; cada tipo avanza por su clave primaria
+    - `offset`: Desplazamiento para paginación (default: 0; preferir los cursores,
+      no se combina con ellos)
+    - `con_total`: Contar el total también fuera de la primera página (default: false)
     """
 )
-def obtener_reporte_rotacion(
+async def obtener_reporte_rotacion(
     fecha_inicio: date = Query(..., description="Fecha de inicio del período"),
     fecha_fin: date = Query(..., description="Fecha de fin del período"),
     limit: int = Query(default=100, ge=1, le=500, description="Límite de registros"),
     offset: int = Query(default=0, ge=0, description="Desplazamiento"),
-    service: ReportesService = Depends(get_reportes_service)
+    after_producto: Optional[int] = Query(default=None, description="Cursor de productos (siguiente_producto)"),
+    after_insumo: Optional[int] = Query(default=None, description="Cursor de insumos (siguiente_insumo)"),
+    con_total: bool = Query(default=False, description="Incluir el total en páginas posteriores a la primera"),
+    db: EjecutorDB = Depends(get_read_db_ejecutor)
 ):
     """Genera análisis de rotación de inventario."""
     try:
@@ -177,14 +207,82 @@ def obtener_reporte_rotacion(
                 detail="fecha_fin debe ser mayor o igual a fecha_inicio"
             )
         
-        return service.generar_reporte_rotacion(
+        if offset > 0 and (after_producto is not None or after_insumo is not None):
+            raise HTTPException(
+                status_code=400,
+                detail="offset no se puede combinar con after_producto / after_insumo"
+            )
+        
+        return await db(lambda s: ReportesService(s).generar_reporte_rotacion(
             fecha_inicio=fecha_inicio,
             fecha_fin=fecha_fin,
             limit=limit,
-            offset=offset
-        )
+            offset=offset,
+            after_producto=after_producto,
+            after_insumo=after_insumo,
+            con_total=con_total
+        ))
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error al generar reporte de rotación: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ==================== EXPORTACIÓN (STREAMING) ====================
+
+def _respuesta_export(reporte: str, formato: str, fecha_inicio: date, fecha_fin: date) -> StreamingResponse:
+    """Valida el período y arma el StreamingResponse del reporte exportado."""
+    if fecha_fin < fecha_inicio:
+        raise HTTPException(
+            status_code=400,
+            detail="fecha_fin debe ser mayor o igual a fecha_inicio"
+        )
+    
+    nombre_archivo = f"{reporte}_{fecha_inicio.isoformat()}_{fecha_fin.isoformat()}.{formato}"
+    return StreamingResponse(
+        exportar_reporte(reporte, formato, fecha_inicio, fecha_fin),
+        media_type=FORMATOS_EXPORT[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre_archivo}"'}
+    )
+
+
+DESCRIPCION_EXPORT = """
+    Exporta el reporte del período en streaming: las filas se leen con cursor
+    del servidor y se envían por lotes, por lo que la memoria no depende de la
+    longitud del período.
+    
+    **Parámetros:**
+    - `fecha_inicio`, `fecha_fin`: Período (YYYY-MM-DD)
+    - `format`: `csv` (por defecto) o `ndjson` (un objeto JSON por línea)
+    """
+
+
+@router.get("/abc/export", summary="Exportar análisis ABC (CSV/NDJSON)", description=DESCRIPCION_EXPORT)
+def exportar_reporte_abc(
+    fecha_inicio: date = Query(..., description="Fecha de inicio del período"),
+    fecha_fin: date = Query(..., description="Fecha de fin del período"),
+    formato: str = Query("csv", alias="format", pattern="^(csv|ndjson)$", description="csv o ndjson")
+):
+    """Exporta el análisis ABC del período."""
+    return _respuesta_export("abc", formato, fecha_inicio, fecha_fin)
+
+
+@router.get("/rotacion/export", summary="Exportar rotación de inventario (CSV/NDJSON)", description=DESCRIPCION_EXPORT)
+def exportar_reporte_rotacion(
+    fecha_inicio: date = Query(..., description="Fecha de inicio del período"),
+    fecha_fin: date = Query(..., description="Fecha de fin del período"),
+    formato: str = Query("csv", alias="format", pattern="^(csv|ndjson)$", description="csv o ndjson")
+):
+    """Exporta la rotación de productos terminados e insumos del período."""
+    return _respuesta_export("rotacion", formato, fecha_inicio, fecha_fin)
+
+
+@router.get("/ventas/export", summary="Exportar ventas del período (CSV/NDJSON)", description=DESCRIPCION_EXPORT)
+def exportar_ventas(
+    fecha_inicio: date = Query(..., description="Fecha de inicio del período"),
+    fecha_fin: date = Query(..., description="Fecha de fin del período"),
+    formato: str = Query("csv", alias="format", pattern="^(csv|ndjson)$", description="csv o ndjson")
+):
+    """Exporta las ventas del período (incluye las anuladas, marcadas)."""
+    return _respuesta_export("ventas", formato, fecha_inicio, fecha_fin)
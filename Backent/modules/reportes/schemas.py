@@ -4,7 +4,7 @@ Respuestas JSON directas para análisis ABC, reporte diario, KPIs y rotación.
 """
 
 from pydantic import BaseModel, ConfigDict, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import date, datetime
 from decimal import Decimal
 
@@ -135,6 +135,9 @@ class KPIsResponse(BaseModel):
     kpis_cumplidos: int
     kpis_totales: int
     porcentaje_cumplimiento: Decimal
+    
+    # Tiempos de cálculo en milisegundos (consulta, total y, con perfilar=true, uno por KPI)
+    tiempos_ms: Dict[str, float] = Field(default_factory=dict)
 
 
 # ==================== ROTACIÓN DE INVENTARIO ====================
@@ -175,7 +178,10 @@ class RotacionResponse(BaseModel):
     insumos: List[ItemRotacion]
     productos_terminados: List[ItemRotacion]
     
-    # Paginación
+    # Paginación (offset o cursor por tipo: último id de la página);
+    # total solo en la primera página o con con_total
     limit: int
     offset: int
-    total: int
+    total: Optional[int] = None
+    siguiente_producto: Optional[int] = None
+    siguiente_insumo: Optional[int] = None
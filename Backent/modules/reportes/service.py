@@ -3,13 +3,14 @@ Service para el módulo de Reportes.
 Lógica de negocio para análisis ABC, reporte diario, KPIs y rotación.
 """
 
+import time
 from sqlalchemy.orm import Session
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 from typing import List, Optional
 from loguru import logger
 
-from .repository import ReportesRepository
+from .repository import KPIS_DASHBOARD, ReportesRepository
 from .schemas import (
     ReporteABCResponse, ProductoABC,
     ReporteDiarioResponse, ResumenVentasDiario, ResumenMermasDiario,
@@ -212,16 +213,31 @@ class ReportesService(ReportesServiceInterface):
     
     # ==================== KPIs ====================
     
-    def obtener_kpis(self, fecha: date) -> KPIsResponse:
-        """Obtiene todos los KPIs del sistema."""
+    def obtener_kpis(self, fecha: date, perfilar: bool = False) -> KPIsResponse:
+        """
+        Obtiene todos los KPIs del sistema.
         
-        # KPI 1: % Merma diaria
-        mermas_data = self.repository.obtener_resumen_mermas_dia(fecha)
-        ventas_data = self.repository.obtener_resumen_ventas_dia(fecha)
+        Los datos de los KPIs se calculan en una sola consulta (un CTE por KPI).
+        Con perfilar=True cada KPI se consulta por separado para medir su tiempo.
+        """
+        inicio = time.perf_counter()
+        fecha_inicio_rotacion = fecha - timedelta(days=30)
+        tiempos = {}
+        
+        if perfilar:
+            datos = {}
+            for nombre in KPIS_DASHBOARD:
+                t0 = time.perf_counter()
+                datos.update(self.repository.obtener_datos_kpis(fecha, fecha_inicio_rotacion, [nombre]))
+                tiempos[nombre] = round((time.perf_counter() - t0) * 1000, 2)
+        else:
+            datos = self.repository.obtener_datos_kpis(fecha, fecha_inicio_rotacion)
+            tiempos['consulta'] = round((time.perf_counter() - inicio) * 1000, 2)
         
+        # KPI 1: % Merma diaria
         porcentaje_merma = (
-            (mermas_data['costo_total'] / ventas_data['total_ventas'] * 100)
-            if ventas_data['total_ventas'] > 0 else Decimal('0')
+            (datos['costo_merma'] / datos['total_ventas'] * 100)
+            if datos['total_ventas'] > 0 else Decimal('0')
         )
         
         kpi_merma = KPIValue(
@@ -230,19 +246,17 @@ class ReportesService(ReportesServiceInterface):
             unidad="%",
             meta=Decimal('3.0'),
             cumple_meta=porcentaje_merma < Decimal('3.0'),
-            detalle=f"Costo merma: S/ {mermas_data['costo_total']:.2f}"
+            detalle=f"Costo merma: S/ {datos['costo_merma']:.2f}"
         )
         
         # KPI 2: Productos vencidos hoy
-        vencidos_data = self.repository.contar_lotes_vencidos_hoy(fecha)
-        
         kpi_vencidos = KPIValue(
             nombre="Productos Vencidos Hoy",
-            valor=Decimal(str(vencidos_data['cantidad_lotes'])),
+            valor=Decimal(str(datos['lotes_vencidos'])),
             unidad="lotes",
             meta=Decimal('0'),
-            cumple_meta=vencidos_data['cantidad_lotes'] == 0,
-            detalle=f"{vencidos_data['cantidad_kg']:.2f} kg en riesgo"
+            cumple_meta=datos['lotes_vencidos'] == 0,
+            detalle=f"{datos['kg_vencidos']:.2f} kg en riesgo"
         )
         
         # KPI 3: Cumplimiento FEFO (asumido como 100% si usa el módulo de producción)
@@ -257,8 +271,7 @@ class ReportesService(ReportesServiceInterface):
         )
         
         # KPI 4: Stock crítico
-        stock_critico_data = self.alertas_service.obtener_stock_critico()
-        total_criticos = stock_critico_data.total_sin_stock + stock_critico_data.total_bajo_minimo
+        total_criticos = datos['insumos_sin_stock'] + datos['insumos_bajo_minimo']
         
         kpi_stock = KPIValue(
             nombre="Stock Crítico",
@@ -266,12 +279,11 @@ class ReportesService(ReportesServiceInterface):
             unidad="insumos",
             meta=Decimal('3'),
             cumple_meta=total_criticos < 3,
-            detalle=f"Sin stock: {stock_critico_data.total_sin_stock}, Bajo mínimo: {stock_critico_data.total_bajo_minimo}"
+            detalle=f"Sin stock: {datos['insumos_sin_stock']}, Bajo mínimo: {datos['insumos_bajo_minimo']}"
         )
         
         # KPI 5: Rotación de inventario (últimos 30 días anualizado)
-        fecha_inicio = fecha - timedelta(days=30)
-        rotacion = self._calcular_rotacion_promedio(fecha_inicio, fecha)
+        rotacion = datos['rotacion_promedio']
         
         kpi_rotacion = KPIValue(
             nombre="Rotación Inventario",
@@ -286,6 +298,9 @@ class ReportesService(ReportesServiceInterface):
         kpis = [kpi_merma, kpi_vencidos, kpi_fefo, kpi_stock, kpi_rotacion]
         kpis_cumplidos = sum(1 for kpi in kpis if kpi.cumple_meta)
         
+        tiempos['total'] = round((time.perf_counter() - inicio) * 1000, 2)
+        logger.debug(f"KPIs {fecha} calculados en {tiempos}")
+        
         return KPIsResponse(
             fecha=fecha,
             merma_diaria=kpi_merma,
@@ -295,44 +310,21 @@ class ReportesService(ReportesServiceInterface):
             rotacion_inventario=kpi_rotacion,
             kpis_cumplidos=kpis_cumplidos,
             kpis_totales=len(kpis),
-            porcentaje_cumplimiento=round(Decimal(kpis_cumplidos) / Decimal(len(kpis)) * 100, 2)
+            porcentaje_cumplimiento=round(Decimal(kpis_cumplidos) / Decimal(len(kpis)) * 100, 2),
+            tiempos_ms=tiempos
         )
     
     def _calcular_rotacion_promedio(self, fecha_inicio: date, fecha_fin: date) -> Decimal:
-        """Calcula la rotación promedio anualizada."""
+        """
+        Calcula la rotación promedio anualizada (promedio en SQL de consumo/stock
+        de productos e insumos con stock y consumo en el período).
+        """
         dias_periodo = (fecha_fin - fecha_inicio).days + 1
         if dias_periodo <= 0:
             return Decimal('0')
         
-        # Obtener datos de rotación
-        rotacion_productos = self.repository.obtener_rotacion_productos_terminados(
-            fecha_inicio, fecha_fin, limit=1000, offset=0
-        )
-        rotacion_insumos = self.repository.obtener_rotacion_insumos(
-            fecha_inicio, fecha_fin, limit=1000, offset=0
-        )
-        
-        # Calcular rotación promedio
-        all_items = rotacion_productos['items'] + rotacion_insumos['items']
-        
-        if not all_items:
-            return Decimal('0')
-        
-        rotaciones = []
-        for item in all_items:
-            stock = item['stock_actual']
-            consumo = item['consumo_periodo']
-            
-            if stock > 0 and consumo > 0:
-                # Rotación = Consumo / Stock promedio (asumiendo stock actual como promedio)
-                rotacion_periodo = consumo / stock
-                rotacion_anual = rotacion_periodo * (Decimal('365') / Decimal(str(dias_periodo)))
-                rotaciones.append(rotacion_anual)
-        
-        if not rotaciones:
-            return Decimal('0')
-        
-        return sum(rotaciones) / Decimal(str(len(rotaciones)))
+        datos = self.repository.obtener_datos_kpis(fecha_fin, fecha_inicio, ['rotacion_inventario'])
+        return datos['rotacion_promedio']
     
     # ==================== ROTACIÓN DE INVENTARIO ====================
     
@@ -341,18 +333,32 @@ class ReportesService(ReportesServiceInterface):
         fecha_inicio: date,
         fecha_fin: date,
         limit: int = 100,
-        offset: int = 0
+        offset: int = 0,
+        after_producto: Optional[int] = None,
+        after_insumo: Optional[int] = None,
+        con_total: bool = False
     ) -> RotacionResponse:
-        """Genera reporte de rotación de inventario."""
+        """
+        Genera reporte de rotación de inventario.
+
+        Productos e insumos se paginan por separado: `after_producto` /
+        `after_insumo` son los cursores `siguiente_producto` / `siguiente_insumo`
+        de la página anterior (último id devuelto).
+
+        El total solo se cuenta en la primera página o con `con_total`: las
+        páginas siguientes no repiten el COUNT de productos e insumos.
+        """
         
         dias_periodo = (fecha_fin - fecha_inicio).days + 1
+        primera_pagina = offset == 0 and after_producto is None and after_insumo is None
+        contar = con_total or primera_pagina
         
         # Obtener datos
         rotacion_productos = self.repository.obtener_rotacion_productos_terminados(
-            fecha_inicio, fecha_fin, limit, offset
+            fecha_inicio, fecha_fin, limit, offset, after_producto, contar
         )
         rotacion_insumos = self.repository.obtener_rotacion_insumos(
-            fecha_inicio, fecha_fin, limit, offset
+            fecha_inicio, fecha_fin, limit, offset, after_insumo, contar
         )
         
         # Procesar productos terminados
@@ -389,7 +395,9 @@ class ReportesService(ReportesServiceInterface):
             productos_terminados=productos,
             limit=limit,
             offset=offset,
-            total=rotacion_productos['total'] + rotacion_insumos['total']
+            total=rotacion_productos['total'] + rotacion_insumos['total'] if contar else None,
+            siguiente_producto=rotacion_productos.get('siguiente'),
+            siguiente_insumo=rotacion_insumos.get('siguiente')
         )
     
     def _procesar_items_rotacion(
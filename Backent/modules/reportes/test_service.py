@@ -72,6 +72,20 @@ def mock_resumen_mermas():
     }
 
 
+@pytest.fixture
+def mock_datos_kpis():
+    """Mock de los datos de KPIs calculados en una sola consulta."""
+    return {
+        'total_ventas': Decimal('1000.00'),
+        'costo_merma': Decimal('25.00'),
+        'lotes_vencidos': 0,
+        'kg_vencidos': Decimal('0'),
+        'insumos_sin_stock': 0,
+        'insumos_bajo_minimo': 2,
+        'rotacion_promedio': Decimal('15')
+    }
+
+
 @pytest.fixture
 def mock_resumen_produccion():
     """Mock de resumen de producción diario."""
@@ -289,33 +303,16 @@ class TestReportesService:
 
     # ==================== KPIs ====================
 
-    def test_obtener_kpis_todos_los_indicadores(
-        self, 
-        mock_resumen_ventas, 
-        mock_resumen_mermas
-    ):
+    def test_obtener_kpis_todos_los_indicadores(self, mock_datos_kpis):
         """
         Test: Obtener todos los KPIs del sistema.
         
         Resultado esperado:
         - Retorna 5 KPIs principales
+        - Los datos se obtienen en una sola consulta
         """
-        # Arrange
-        mock_stock_critico = MagicMock()
-        mock_stock_critico.total_sin_stock = 0
-        mock_stock_critico.total_bajo_minimo = 2
-        
-        with patch.object(self.service.repository, 'obtener_resumen_ventas_dia') as mock_ventas, \
-             patch.object(self.service.repository, 'obtener_resumen_mermas_dia') as mock_mermas, \
-             patch.object(self.service.repository, 'contar_lotes_vencidos_hoy') as mock_vencidos, \
-             patch.object(self.service.alertas_service, 'obtener_stock_critico') as mock_stock, \
-             patch.object(self.service, '_calcular_rotacion_promedio') as mock_rotacion:
-            
-            mock_ventas.return_value = mock_resumen_ventas
-            mock_mermas.return_value = mock_resumen_mermas
-            mock_vencidos.return_value = {'cantidad_lotes': 0, 'cantidad_kg': Decimal('0')}
-            mock_stock.return_value = mock_stock_critico
-            mock_rotacion.return_value = Decimal('15')
+        with patch.object(self.service.repository, 'obtener_datos_kpis') as mock_datos:
+            mock_datos.return_value = mock_datos_kpis
             
             # Act
             resultado = self.service.obtener_kpis(fecha=date.today())
@@ -326,89 +323,69 @@ class TestReportesService:
             assert resultado.merma_diaria is not None
             assert resultado.productos_vencidos_hoy is not None
             assert resultado.cumplimiento_fefo is not None
-            assert resultado.stock_critico is not None
-            assert resultado.rotacion_inventario is not None
+            assert resultado.stock_critico.valor == Decimal('2')
+            assert resultado.rotacion_inventario.valor == Decimal('15.00')
             assert resultado.kpis_totales == 5
+            mock_datos.assert_called_once_with(date.today(), date.today() - timedelta(days=30))
+            assert set(resultado.tiempos_ms) == {'consulta', 'total'}
 
-    def test_obtener_kpis_calcula_porcentaje_cumplimiento(
-        self, 
-        mock_resumen_ventas, 
-        mock_resumen_mermas
-    ):
+    def test_obtener_kpis_calcula_porcentaje_cumplimiento(self, mock_datos_kpis):
         """
         Test: Calcular porcentaje de KPIs cumplidos.
         
         Resultado esperado:
         - porcentaje_cumplimiento = (kpis_cumplidos / kpis_totales) * 100
         """
-        # Arrange
-        mock_stock_critico = MagicMock()
-        mock_stock_critico.total_sin_stock = 0
-        mock_stock_critico.total_bajo_minimo = 0
-        
-        with patch.object(self.service.repository, 'obtener_resumen_ventas_dia') as mock_ventas, \
-             patch.object(self.service.repository, 'obtener_resumen_mermas_dia') as mock_mermas, \
-             patch.object(self.service.repository, 'contar_lotes_vencidos_hoy') as mock_vencidos, \
-             patch.object(self.service.alertas_service, 'obtener_stock_critico') as mock_stock, \
-             patch.object(self.service, '_calcular_rotacion_promedio') as mock_rotacion:
-            
-            mock_ventas.return_value = mock_resumen_ventas
-            mock_mermas.return_value = mock_resumen_mermas
-            mock_vencidos.return_value = {'cantidad_lotes': 0, 'cantidad_kg': Decimal('0')}
-            mock_stock.return_value = mock_stock_critico
-            mock_rotacion.return_value = Decimal('15')  # Cumple meta de 12
+        with patch.object(self.service.repository, 'obtener_datos_kpis') as mock_datos:
+            mock_datos.return_value = mock_datos_kpis
             
             # Act
             resultado = self.service.obtener_kpis(fecha=date.today())
             
             # Assert
-            assert resultado.kpis_cumplidos <= resultado.kpis_totales
-            assert resultado.porcentaje_cumplimiento >= 0
-            assert resultado.porcentaje_cumplimiento <= 100
+            # Merma 2.5% < 3, 0 vencidos, FEFO, 2 críticos < 3, rotación 15 >= 12
+            assert resultado.kpis_cumplidos == 5
+            assert resultado.porcentaje_cumplimiento == Decimal('100.00')
 
-    def test_obtener_kpis_merma_no_cumple_meta(self):
+    def test_obtener_kpis_merma_no_cumple_meta(self, mock_datos_kpis):
         """
         Test: KPI de merma no cumple meta cuando supera 3%.
         
         Resultado esperado:
         - cumple_meta = False cuando porcentaje > 3%
         """
-        # Arrange
-        resumen_ventas = {
-            'total_ventas': Decimal('100.00'),
-            'cantidad_transacciones': 5,
-            'ticket_promedio': Decimal('20'),
-            'ventas_por_metodo': {}
-        }
-        resumen_mermas = {
-            'cantidad_casos': 5,
-            'cantidad_total_kg': Decimal('5'),
-            'costo_total': Decimal('10.00'),  # 10% de merma
-            'desglose_por_tipo': {}
-        }
+        mock_datos_kpis.update(total_ventas=Decimal('100.00'), costo_merma=Decimal('10.00'))  # 10% de merma
         
-        mock_stock_critico = MagicMock()
-        mock_stock_critico.total_sin_stock = 0
-        mock_stock_critico.total_bajo_minimo = 0
-        
-        with patch.object(self.service.repository, 'obtener_resumen_ventas_dia') as mock_ventas, \
-             patch.object(self.service.repository, 'obtener_resumen_mermas_dia') as mock_mermas, \
-             patch.object(self.service.repository, 'contar_lotes_vencidos_hoy') as mock_vencidos, \
-             patch.object(self.service.alertas_service, 'obtener_stock_critico') as mock_stock, \
-             patch.object(self.service, '_calcular_rotacion_promedio') as mock_rotacion:
-            
-            mock_ventas.return_value = resumen_ventas
-            mock_mermas.return_value = resumen_mermas
-            mock_vencidos.return_value = {'cantidad_lotes': 0, 'cantidad_kg': Decimal('0')}
-            mock_stock.return_value = mock_stock_critico
-            mock_rotacion.return_value = Decimal('15')
+        with patch.object(self.service.repository, 'obtener_datos_kpis') as mock_datos:
+            mock_datos.return_value = mock_datos_kpis
             
             # Act
             resultado = self.service.obtener_kpis(fecha=date.today())
             
             # Assert
+            assert resultado.merma_diaria.valor == Decimal('10.00')
             assert resultado.merma_diaria.cumple_meta is False
 
+    def test_obtener_kpis_perfilar_mide_cada_kpi(self, mock_datos_kpis):
+        """
+        Test: Con perfilar=True cada KPI se consulta por separado.
+        
+        Resultado esperado:
+        - Una consulta por KPI y un tiempo por KPI en tiempos_ms
+        """
+        from modules.reportes.repository import KPIS_DASHBOARD
+        
+        with patch.object(self.service.repository, 'obtener_datos_kpis') as mock_datos:
+            mock_datos.return_value = mock_datos_kpis
+            
+            # Act
+            resultado = self.service.obtener_kpis(fecha=date.today(), perfilar=True)
+            
+            # Assert
+            assert mock_datos.call_count == len(KPIS_DASHBOARD)
+            assert [c.args[2] for c in mock_datos.call_args_list] == [[nombre] for nombre in KPIS_DASHBOARD]
+            assert set(resultado.tiempos_ms) == set(KPIS_DASHBOARD) | {'total'}
+
     # ==================== ROTACIÓN DE INVENTARIO ====================
 
     def test_generar_reporte_rotacion(self):
@@ -530,6 +507,48 @@ class TestReportesService:
             assert resultado.items_media_rotacion >= 0
             assert resultado.items_baja_rotacion >= 0
 
+    def test_generar_reporte_rotacion_total_solo_primera_pagina(self):
+        """
+        Test: El total se cuenta en la primera página y no al seguir un cursor.
+
+        Resultado esperado:
+        - Primera página: repositorio con con_total=True y total sumado
+        - Página con cursor: con_total=False y total None
+        - Página con cursor y con_total: vuelve a contar
+        """
+        with patch.object(self.service.repository, 'obtener_rotacion_productos_terminados') as mock_prod, \
+             patch.object(self.service.repository, 'obtener_rotacion_insumos') as mock_ins, \
+             patch.object(self.service, '_calcular_rotacion_promedio') as mock_prom:
+
+            mock_prod.return_value = {'items': [], 'total': 3, 'siguiente': 3}
+            mock_ins.return_value = {'items': [], 'total': 2, 'siguiente': None}
+            mock_prom.return_value = Decimal('10')
+            fecha_inicio = date.today() - timedelta(days=30)
+
+            # Act
+            primera = self.service.generar_reporte_rotacion(fecha_inicio, date.today())
+            assert mock_prod.call_args.args[-1] is True
+            assert mock_ins.call_args.args[-1] is True
+
+            mock_prod.return_value = {'items': [], 'total': None, 'siguiente': None}
+            mock_ins.return_value = {'items': [], 'total': None, 'siguiente': None}
+            siguiente = self.service.generar_reporte_rotacion(
+                fecha_inicio, date.today(), after_producto=3
+            )
+            assert mock_prod.call_args.args[-1] is False
+            assert mock_ins.call_args.args[-1] is False
+
+            mock_prod.return_value = {'items': [], 'total': 3, 'siguiente': None}
+            mock_ins.return_value = {'items': [], 'total': 2, 'siguiente': None}
+            self.service.generar_reporte_rotacion(
+                fecha_inicio, date.today(), after_producto=3, con_total=True
+            )
+
+            # Assert
+            assert primera.total == 5
+            assert siguiente.total is None
+            assert mock_prod.call_args.args[-1] is True
+
     def test_calcular_rotacion_promedio(self):
         """
         Test: Calcular rotación promedio anualizada.
@@ -537,27 +556,8 @@ class TestReportesService:
         Resultado esperado:
         - Rotación anualizada correcta
         """
-        # Arrange
-        rotacion_data = {
-            'items': [
-                {
-                    'id': 1,
-                    'codigo': 'PROD001',
-                    'nombre': 'Producto',
-                    'tipo': 'producto',
-                    'stock_actual': Decimal('50'),
-                    'unidad_medida': 'UNIDAD',
-                    'consumo_periodo': Decimal('100')
-                }
-            ],
-            'total': 1
-        }
-        
-        with patch.object(self.service.repository, 'obtener_rotacion_productos_terminados') as mock_prod, \
-             patch.object(self.service.repository, 'obtener_rotacion_insumos') as mock_ins:
-            
-            mock_prod.return_value = rotacion_data
-            mock_ins.return_value = {'items': [], 'total': 0}
+        with patch.object(self.service.repository, 'obtener_datos_kpis') as mock_datos:
+            mock_datos.return_value = {'rotacion_promedio': Decimal('24.5')}
             
             # Act
             resultado = self.service._calcular_rotacion_promedio(
@@ -566,7 +566,10 @@ class TestReportesService:
             )
             
             # Assert
-            assert resultado >= Decimal('0')
+            assert resultado == Decimal('24.5')
+            mock_datos.assert_called_once_with(
+                date.today(), date.today() - timedelta(days=30), ['rotacion_inventario']
+            )
 
     def test_calcular_rotacion_periodo_cero_dias(self):
         """
@@ -643,3 +646,295 @@ class TestReportesService:
         assert resultado[0].dias_stock == Decimal('999.0')
         assert resultado[0].rotacion_anualizada == Decimal('0')
         assert resultado[0].clasificacion == 'baja'
+
+
+# ==================== RANGO DE FECHAS ====================
+
+class TestRangoFechas:
+    """Tests para los filtros de fecha semiabiertos usados por los reportes."""
+
+    def test_rango_periodo_es_semiabierto(self):
+        """El fin del rango es la medianoche del día siguiente a fecha_fin."""
+        from utils.rango_fechas import rango_periodo
+
+        # Act
+        desde, hasta = rango_periodo(date(2025, 1, 30), date(2025, 1, 31))
+
+        # Assert
+        assert desde == datetime(2025, 1, 30)
+        assert hasta == datetime(2025, 2, 1)
+
+    def test_filtro_dia_no_transforma_la_columna(self):
+        """El filtro compara la columna directamente (sin DATE()), así usa su índice."""
+        from sqlalchemy.dialects import postgresql
+        from modules.gestion_almacen_productos.ventas.model import Venta
+        from utils.rango_fechas import filtro_dia
+
+        # Act
+        sql = str(filtro_dia(Venta.fecha_venta, date(2025, 11, 29)).compile(dialect=postgresql.dialect()))
+
+        # Assert
+        assert "date(" not in sql.lower()
+        assert "ventas.fecha_venta >=" in sql
+        assert "ventas.fecha_venta <" in sql
+
+    def test_filtro_dia_columna_con_zona_usa_zona_del_negocio(self):
+        """Para TIMESTAMP WITH TIME ZONE los límites son la medianoche en America/Lima."""
+        from modules.alertas.model import Notificacion
+        from utils.rango_fechas import filtro_dia, ZONA_HORARIA_NEGOCIO
+
+        # Act
+        condicion = filtro_dia(Notificacion.fecha_creacion, date(2025, 11, 29))
+        desde = condicion.clauses[0].right.value
+
+        # Assert
+        assert desde.tzinfo == ZONA_HORARIA_NEGOCIO
+        assert desde.utcoffset() == timedelta(hours=-5)
+
+
+# ==================== CACHÉ DE REPORTES ====================
+
+class TestCacheReportes:
+    """Tests para la caché de resultados de reportes."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        from modules.reportes.cache import CacheReportes
+        from utils.rango_fechas import hoy_negocio
+        self.cache = CacheReportes(ttl_segundos=60, max_entradas=10)
+        self.hoy = hoy_negocio()
+        self.ayer = self.hoy - timedelta(days=1)
+
+    @staticmethod
+    def _hits(reporte):
+        from prometheus_client import REGISTRY
+        return REGISTRY.get_sample_value('reportes_cache_hits_total', {'reporte': reporte}) or 0
+
+    def test_segunda_consulta_sale_de_la_cache(self):
+        """
+        Test: Misma consulta dos veces.
+        
+        Resultado esperado:
+        - Se calcula una sola vez y se cuenta un acierto
+        """
+        calcular = Mock(return_value={'total': 1})
+        hits_antes = self._hits('test_hit')
+
+        primero = self.cache.obtener('test_hit', {'fecha': self.hoy}, self.hoy, self.hoy, calcular)
+        segundo = self.cache.obtener('test_hit', {'fecha': self.hoy}, self.hoy, self.hoy, calcular)
+
+        assert primero is segundo
+        calcular.assert_called_once()
+        assert self._hits('test_hit') == hits_antes + 1
+
+    def test_parametros_distintos_no_comparten_entrada(self):
+        calcular = Mock(side_effect=[1, 2])
+
+        assert self.cache.obtener('abc', {'fecha': self.hoy}, self.hoy, self.hoy, calcular) == 1
+        assert self.cache.obtener('abc', {'fecha': self.ayer}, self.ayer, self.ayer, calcular) == 2
+
+    def test_periodo_historico_cerrado_no_expira(self):
+        """
+        Test: Con TTL vencido, solo los reportes históricos de períodos cerrados siguen vigentes.
+        """
+        self.cache.ttl_segundos = 0
+        calcular = Mock(return_value='ok')
+
+        for _ in range(2):
+            self.cache.obtener('abc', {'fin': self.ayer}, self.ayer, self.ayer, calcular, historico=True)
+            self.cache.obtener('abc', {'fin': self.hoy}, self.hoy, self.hoy, calcular, historico=True)
+            self.cache.obtener('diario', {'fin': self.ayer}, self.ayer, self.ayer, calcular)
+
+        # El cerrado se calcula una vez; el que incluye hoy y el no histórico, dos
+        assert calcular.call_count == 5
+
+    def test_invalidar_descarta_solo_periodos_con_la_fecha(self):
+        calcular = Mock(return_value='ok')
+        self.cache.obtener('kpis', {'f': self.hoy}, self.hoy - timedelta(days=30), self.hoy, calcular)
+        self.cache.obtener('abc', {'f': self.ayer}, self.ayer - timedelta(days=7), self.ayer, calcular)
+
+        descartadas = self.cache.invalidar([self.hoy])
+
+        assert descartadas == 1
+        self.cache.obtener('abc', {'f': self.ayer}, self.ayer - timedelta(days=7), self.ayer, calcular)
+        assert calcular.call_count == 2
+
+    def test_invalidacion_durante_el_calculo_no_guarda_el_resultado(self):
+        """
+        Test: Una escritura confirmada mientras se calculaba el reporte.
+        
+        Resultado esperado:
+        - El resultado se devuelve pero no se guarda (podría no incluir la escritura)
+        """
+        def calcular_con_escritura():
+            self.cache.invalidar([self.hoy])
+            return 'viejo'
+
+        assert self.cache.obtener('diario', {'f': self.hoy}, self.hoy, self.hoy, calcular_con_escritura) == 'viejo'
+        assert self.cache.obtener('diario', {'f': self.hoy}, self.hoy, self.hoy, lambda: 'nuevo') == 'nuevo'
+
+    def test_peticiones_simultaneas_calculan_una_vez(self):
+        """
+        Test: Single-flight.
+        
+        Resultado esperado:
+        - 8 peticiones simultáneas con la misma clave ejecutan un solo cálculo
+        """
+        import threading
+        import time as _time
+        from concurrent.futures import ThreadPoolExecutor
+
+        llamadas = []
+        inicio = threading.Barrier(8)
+
+        def calcular():
+            llamadas.append(1)
+            _time.sleep(0.05)
+            return 'ok'
+
+        def pedir(_):
+            inicio.wait()
+            return self.cache.obtener('kpis', {'f': self.hoy}, self.hoy, self.hoy, calcular)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            resultados = list(executor.map(pedir, range(8)))
+
+        assert resultados == ['ok'] * 8
+        assert len(llamadas) == 1
+
+    def test_error_en_el_calculo_no_bloquea_la_clave(self):
+        with pytest.raises(ValueError):
+            self.cache.obtener('abc', {'f': self.hoy}, self.hoy, self.hoy, Mock(side_effect=ValueError))
+
+        assert self.cache.obtener('abc', {'f': self.hoy}, self.hoy, self.hoy, lambda: 'ok') == 'ok'
+
+    def test_cache_deshabilitada_siempre_calcula(self):
+        self.cache.habilitada = False
+        calcular = Mock(return_value='ok')
+
+        self.cache.obtener('abc', {}, self.hoy, self.hoy, calcular)
+        self.cache.obtener('abc', {}, self.hoy, self.hoy, calcular)
+
+        assert calcular.call_count == 2
+
+    def test_async_peticiones_simultaneas_calculan_una_vez(self):
+        """
+        Test: Single-flight en obtener_async().
+
+        Resultado esperado:
+        - 8 corrutinas simultáneas con la misma clave ejecutan un solo cálculo
+        - La siguiente consulta sale de la caché
+        """
+        import asyncio
+
+        llamadas = []
+
+        async def calcular():
+            llamadas.append(1)
+            await asyncio.sleep(0.05)
+            return 'ok'
+
+        async def pedir():
+            return await self.cache.obtener_async('kpis_async', {'f': self.hoy}, self.hoy, self.hoy, calcular)
+
+        async def escenario():
+            resultados = await asyncio.gather(*(pedir() for _ in range(8)))
+            return resultados, await pedir()
+
+        resultados, despues = asyncio.run(escenario())
+
+        assert resultados == ['ok'] * 8
+        assert despues == 'ok'
+        assert len(llamadas) == 1
+
+    def test_async_error_en_el_calculo_no_bloquea_la_clave(self):
+        import asyncio
+
+        async def fallar():
+            raise ValueError
+
+        async def calcular():
+            return 'ok'
+
+        with pytest.raises(ValueError):
+            asyncio.run(self.cache.obtener_async('abc', {'f': self.hoy}, self.hoy, self.hoy, fallar))
+
+        assert asyncio.run(self.cache.obtener_async('abc', {'f': self.hoy}, self.hoy, self.hoy, calcular)) == 'ok'
+
+
+# ==================== EXPORTACIÓN EN STREAMING ====================
+
+class TestExportReportes:
+    """Tests para la codificación y el generador de exportación."""
+
+    def test_codificar_csv_encabezado_y_valores(self):
+        """
+        Test: CSV con encabezado, Decimal exacto, fechas ISO y None vacío.
+        """
+        from enums.unidad_medida import UnidadMedidaEnum
+        from modules.reportes.export import codificar_csv
+
+        filas = [
+            {'codigo': 'P1', 'monto': Decimal('10.50'), 'fecha': datetime(2025, 1, 2, 8, 30), 'unidad': UnidadMedidaEnum.KG},
+            {'codigo': 'P2', 'monto': None, 'fecha': None, 'unidad': None},
+        ]
+
+        contenido = "".join(codificar_csv(iter(filas), ('codigo', 'monto', 'fecha', 'unidad')))
+
+        assert contenido.splitlines() == [
+            'codigo,monto,fecha,unidad',
+            'P1,10.50,2025-01-02T08:30:00,KG',
+            'P2,,,',
+        ]
+
+    def test_codificar_ndjson_un_objeto_por_linea(self):
+        import json
+        from modules.reportes.export import codificar_ndjson
+
+        filas = [{'id': n, 'total': Decimal('2.5'), 'dia': date(2025, 1, n)} for n in range(1, 4)]
+
+        lineas = "".join(codificar_ndjson(iter(filas), ('id', 'total', 'dia'))).splitlines()
+
+        assert len(lineas) == 3
+        assert json.loads(lineas[0]) == {'id': 1, 'total': 2.5, 'dia': '2025-01-01'}
+
+    def test_codificar_entrega_por_lotes(self):
+        """
+        Test: Las filas se consumen lote a lote, no todas antes del primer bloque.
+        """
+        from modules.reportes.export import codificar_ndjson, TAMANO_LOTE_EXPORT
+
+        leidas = []
+
+        def filas():
+            for n in range(TAMANO_LOTE_EXPORT * 3):
+                leidas.append(n)
+                yield {'id': n}
+
+        bloques = codificar_ndjson(filas(), ('id',))
+        next(bloques)
+
+        assert len(leidas) == TAMANO_LOTE_EXPORT
+        assert len(list(bloques)) == 2
+
+    def test_exportar_reporte_usa_y_cierra_su_sesion(self):
+        """
+        Test: El generador abre su propia sesión y la cierra al terminar.
+        """
+        from modules.reportes.export import exportar_reporte
+
+        sesion = MagicMock()
+        filas = [{'id_venta': 1, 'numero_venta': 'V-1', 'fecha_venta': datetime(2025, 1, 1, 9, 0),
+                  'metodo_pago': 'efectivo', 'total': Decimal('5.00'), 'anulado': False, 'id_user': 1}]
+
+        with patch('modules.reportes.export.ReportesRepository') as mock_repo:
+            mock_repo.return_value.iterar_ventas.return_value = iter(filas)
+
+            contenido = "".join(exportar_reporte(
+                'ventas', 'csv', date(2025, 1, 1), date(2025, 1, 31), crear_sesion=lambda: sesion
+            ))
+
+        mock_repo.assert_called_once_with(sesion)
+        mock_repo.return_value.iterar_ventas.assert_called_once_with(date(2025, 1, 1), date(2025, 1, 31))
+        assert contenido.splitlines()[1] == '1,V-1,2025-01-01T09:00:00,efectivo,5.00,False,1'
+        sesion.close.assert_called_once()
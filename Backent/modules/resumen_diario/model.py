@@ -0,0 +1,72 @@
+from sqlalchemy import Column, BIGINT, INTEGER, VARCHAR, DATE, DECIMAL, TIMESTAMP, ForeignKey
+from sqlalchemy.sql import func
+from database import Base
+
+
+class ResumenDiaCierre(Base):
+    """
+    Modelo para la tabla resumen_dia_cierre.
+    Una fila por día con resúmenes calculados; sellado_en indica que el job
+    nocturno cerró el día y los reportes ya pueden leerlo de los resúmenes.
+    La fila también sirve de lock para recalcular el día.
+    """
+    __tablename__ = "resumen_dia_cierre"
+
+    fecha = Column(DATE, primary_key=True)
+    sellado_en = Column(TIMESTAMP, nullable=True)
+    fecha_actualizacion = Column(TIMESTAMP, nullable=False, server_default=func.now())
+
+
+class ResumenVentasProductoDia(Base):
+    """
+    Modelo para la tabla resumen_ventas_producto_dia.
+    Ventas no anuladas por día y producto.
+    """
+    __tablename__ = "resumen_ventas_producto_dia"
+
+    fecha = Column(DATE, primary_key=True)
+    id_producto = Column(BIGINT, ForeignKey('productos_terminados.id_producto'), primary_key=True)
+    cantidad_vendida = Column(DECIMAL(14, 4), nullable=False, server_default='0')
+    monto_total = Column(DECIMAL(14, 2), nullable=False, server_default='0')
+    num_ventas = Column(INTEGER, nullable=False, server_default='0')
+
+
+class ResumenVentasMetodoDia(Base):
+    """
+    Modelo para la tabla resumen_ventas_metodo_dia.
+    Ventas no anuladas por día y método de pago.
+    """
+    __tablename__ = "resumen_ventas_metodo_dia"
+
+    fecha = Column(DATE, primary_key=True)
+    metodo_pago = Column(VARCHAR(20), primary_key=True)
+    total_ventas = Column(DECIMAL(14, 2), nullable=False, server_default='0')
+    cantidad_transacciones = Column(INTEGER, nullable=False, server_default='0')
+
+
+class ResumenInsumosDia(Base):
+    """
+    Modelo para la tabla resumen_insumos_dia.
+    Movimientos de insumos no anulados por día e insumo.
+    """
+    __tablename__ = "resumen_insumos_dia"
+
+    fecha = Column(DATE, primary_key=True)
+    id_insumo = Column(BIGINT, ForeignKey('insumo.id_insumo'), primary_key=True)
+    cantidad_entrada = Column(DECIMAL(14, 4), nullable=False, server_default='0')
+    cantidad_salida = Column(DECIMAL(14, 4), nullable=False, server_default='0')
+    cantidad_total = Column(DECIMAL(14, 4), nullable=False, server_default='0')
+
+
+class ResumenMermasDia(Base):
+    """
+    Modelo para la tabla resumen_mermas_dia.
+    Mermas no anuladas por día y tipo.
+    """
+    __tablename__ = "resumen_mermas_dia"
+
+    fecha = Column(DATE, primary_key=True)
+    tipo = Column(VARCHAR(50), primary_key=True)
+    cantidad_casos = Column(INTEGER, nullable=False, server_default='0')
+    cantidad_total = Column(DECIMAL(14, 4), nullable=False, server_default='0')
+    costo_total = Column(DECIMAL(14, 2), nullable=False, server_default='0')
@@ -0,0 +1,141 @@
+from datetime import date
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from modules.resumen_diario.repository_interface import ResumenDiarioRepositoryInterface
+from utils.rango_fechas import rango_dia
+
+
+# Cálculo de cada resumen para un día, desde su tabla de origen.
+# :desde/:hasta es el rango semiabierto del día (usa el índice por fecha).
+SQL_RESUMENES: Dict[str, str] = {
+    "resumen_ventas_producto_dia": """
+        INSERT INTO resumen_ventas_producto_dia (
+            fecha, id_producto, cantidad_vendida, monto_total, num_ventas
+        )
+        SELECT :fecha, vd.id_producto, SUM(vd.cantidad), SUM(vd.subtotal), COUNT(DISTINCT v.id_venta)
+        FROM ventas v
+        INNER JOIN venta_detalles vd ON vd.id_venta = v.id_venta
+        WHERE v.anulado = false
+          AND v.fecha_venta >= :desde AND v.fecha_venta < :hasta
+        GROUP BY vd.id_producto
+    """,
+    "resumen_ventas_metodo_dia": """
+        INSERT INTO resumen_ventas_metodo_dia (
+            fecha, metodo_pago, total_ventas, cantidad_transacciones
+        )
+        SELECT :fecha, v.metodo_pago, SUM(v.total), COUNT(*)
+        FROM ventas v
+        WHERE v.anulado = false
+          AND v.fecha_venta >= :desde AND v.fecha_venta < :hasta
+        GROUP BY v.metodo_pago
+    """,
+    "resumen_insumos_dia": """
+        INSERT INTO resumen_insumos_dia (
+            fecha, id_insumo, cantidad_entrada, cantidad_salida, cantidad_total
+        )
+        SELECT
+            :fecha,
+            m.id_insumo,
+            COALESCE(SUM(m.cantidad) FILTER (WHERE m.tipo_movimiento = 'ENTRADA'), 0),
+            COALESCE(SUM(m.cantidad) FILTER (WHERE m.tipo_movimiento = 'SALIDA'), 0),
+            SUM(m.cantidad)
+        FROM movimiento_insumos m
+        WHERE m.anulado = false
+          AND m.fecha_movimiento >= :desde AND m.fecha_movimiento < :hasta
+        GROUP BY m.id_insumo
+    """,
+    "resumen_mermas_dia": """
+        INSERT INTO resumen_mermas_dia (
+            fecha, tipo, cantidad_casos, cantidad_total, costo_total
+        )
+        SELECT :fecha, c.tipo, COUNT(*), SUM(c.cantidad), COALESCE(SUM(c.costo_total), 0)
+        FROM calidad_desperdicio_merma c
+        WHERE c.anulado = false
+          AND c.fecha_caso >= :desde AND c.fecha_caso < :hasta
+        GROUP BY c.tipo
+    """,
+}
+
+
+class ResumenDiarioRepository(ResumenDiarioRepositoryInterface):
+    """
+    Repository de los resúmenes diarios (resumen_*_dia y resumen_dia_cierre).
+    Usa raw SQL: cada día se recalcula con un DELETE + INSERT ... SELECT por
+    resumen que solo lee las filas de ese día.
+    """
+
+    def asegurar_cierres(self, db: Session, fechas: List[date]) -> None:
+        """
+        Crea sin sellar las filas de cierre faltantes, para poder bloquearlas.
+        Si otra transacción las creó primero no hace nada (ON CONFLICT DO NOTHING).
+        """
+        query = text("""
+            INSERT INTO resumen_dia_cierre (fecha)
+            SELECT unnest(CAST(:fechas AS DATE[]))
+            ON CONFLICT (fecha) DO NOTHING
+        """)
+
+        db.execute(query, {"fechas": fechas})
+
+    def bloquear_cierres(self, db: Session, fechas: List[date]) -> None:
+        """
+        Bloquea las filas de cierre en orden de fecha.
+        Quien llega segundo espera aquí y recalcula viendo lo confirmado por el primero.
+        """
+        query = text("""
+            SELECT fecha
+            FROM resumen_dia_cierre
+            WHERE fecha = ANY(:fechas)
+            ORDER BY fecha
+            FOR UPDATE
+        """)
+
+        db.execute(query, {"fechas": fechas})
+
+    def recalcular_dia(self, db: Session, fecha: date) -> None:
+        """Reemplaza las filas del día en cada resumen por las recalculadas."""
+        desde, hasta = rango_dia(fecha)
+        params = {"fecha": fecha, "desde": desde, "hasta": hasta}
+
+        for tabla, sql_insert in SQL_RESUMENES.items():
+            db.execute(text(f"DELETE FROM {tabla} WHERE fecha = :fecha"), {"fecha": fecha})
+            db.execute(text(sql_insert), params)
+
+        db.execute(text("""
+            UPDATE resumen_dia_cierre
+            SET fecha_actualizacion = now()
+            WHERE fecha = :fecha
+        """), {"fecha": fecha})
+
+    def marcar_sellado(self, db: Session, fecha: date) -> None:
+        """Marca el día como sellado (los reportes pasan a leerlo de los resúmenes)."""
+        query = text("""
+            UPDATE resumen_dia_cierre
+            SET sellado_en = now()
+            WHERE fecha = :fecha
+        """)
+
+        db.execute(query, {"fecha": fecha})
+
+    def obtener_ultimo_dia_sellado(self, db: Session) -> Optional[date]:
+        """Último día sellado; el job sella en orden, así que los anteriores también lo están."""
+        query = text("""
+            SELECT MAX(fecha)
+            FROM resumen_dia_cierre
+            WHERE sellado_en IS NOT NULL
+        """)
+
+        return db.execute(query).scalar()
+
+    def obtener_primer_dia_con_datos(self, db: Session) -> Optional[date]:
+        """Primer día con ventas, movimientos de insumos o mermas (MIN por índice de fecha)."""
+        query = text("""
+            SELECT CAST(LEAST(
+                (SELECT MIN(fecha_venta) FROM ventas),
+                (SELECT MIN(fecha_movimiento) FROM movimiento_insumos),
+                (SELECT MIN(fecha_caso) FROM calidad_desperdicio_merma)
+            ) AS DATE)
+        """)
+
+        return db.execute(query).scalar()
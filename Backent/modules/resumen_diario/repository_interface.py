@@ -0,0 +1,38 @@
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import List, Optional
+from sqlalchemy.orm import Session
+
+
+class ResumenDiarioRepositoryInterface(ABC):
+    """Interfaz para el repositorio de resúmenes diarios de reportes."""
+
+    @abstractmethod
+    def asegurar_cierres(self, db: Session, fechas: List[date]) -> None:
+        """Crea (sin sellar) las filas de cierre que todavía no existen."""
+        pass
+
+    @abstractmethod
+    def bloquear_cierres(self, db: Session, fechas: List[date]) -> None:
+        """Bloquea las filas de cierre de los días (FOR UPDATE, en orden de fecha)."""
+        pass
+
+    @abstractmethod
+    def recalcular_dia(self, db: Session, fecha: date) -> None:
+        """Reemplaza los resúmenes de un día por los calculados desde las tablas de origen."""
+        pass
+
+    @abstractmethod
+    def marcar_sellado(self, db: Session, fecha: date) -> None:
+        """Marca el día como sellado."""
+        pass
+
+    @abstractmethod
+    def obtener_ultimo_dia_sellado(self, db: Session) -> Optional[date]:
+        """Último día sellado (los anteriores también lo están)."""
+        pass
+
+    @abstractmethod
+    def obtener_primer_dia_con_datos(self, db: Session) -> Optional[date]:
+        """Primer día con ventas, movimientos de insumos o mermas."""
+        pass
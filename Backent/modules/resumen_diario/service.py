@@ -0,0 +1,107 @@
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+from sqlalchemy.orm import Session
+from modules.resumen_diario.repository import ResumenDiarioRepository
+from utils.rango_fechas import hoy_negocio
+
+
+Tramo = Optional[Tuple[date, date]]
+
+
+class ResumenDiarioService:
+    """
+    Servicio de resúmenes diarios para reportes.
+
+    Los reportes por período (ABC, KPIs, rotación, reporte diario) leen los días
+    cerrados de las tablas resumen_*_dia (una fila por día y producto, insumo,
+    método de pago o tipo de merma) y solo agregan filas de origen para los días
+    todavía no sellados (normalmente solo "hoy").
+
+    - El job nocturno llama a sellar_pendientes(): calcula y sella cada día
+      pendiente hasta ayer, en orden.
+    - Las operaciones que modifican ventas, movimientos o mermas de un día
+      anterior (anulaciones, mermas con fecha pasada) llaman a
+      actualizar_dias() antes de su commit, así el resumen se confirma o se
+      revierte junto con el cambio. Las operaciones del día no tocan los resúmenes.
+    """
+
+    def __init__(self):
+        self.repository = ResumenDiarioRepository()
+
+    def actualizar_dias(self, db: Session, fechas: Iterable[date]) -> None:
+        """
+        Recalcula los resúmenes de los días anteriores a hoy indicados.
+
+        Bloquea primero la fila de cierre de cada día (la misma que usa el job
+        al sellar), así un cambio concurrente con el sellado nunca queda fuera
+        del resumen. Ignora hoy y fechas futuras.
+
+        IMPORTANTE: no hace commit; debe llamarse después de modificar los datos.
+        """
+        hoy = hoy_negocio()
+        dias = sorted({f for f in fechas if f is not None and f < hoy})
+        if not dias:
+            return
+
+        # Enviar a la BD los cambios pendientes del ORM antes de agregar con SQL
+        db.flush()
+
+        self.repository.asegurar_cierres(db, dias)
+        self.repository.bloquear_cierres(db, dias)
+        for dia in dias:
+            self.repository.recalcular_dia(db, dia)
+
+    def sellar_pendientes(self, db: Session, hasta: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Calcula y sella, en orden, los días siguientes al último sellado hasta
+        `hasta` (por defecto ayer). La primera vez empieza en el primer día con datos.
+
+        Hace commit por día: un día sellado queda confirmado aunque falle el siguiente.
+
+        Retorna:
+            - dias_sellados: cantidad de días sellados
+            - desde / hasta: rango sellado (None si no había días pendientes)
+        """
+        hasta = hasta or hoy_negocio() - timedelta(days=1)
+
+        ultimo = self.repository.obtener_ultimo_dia_sellado(db)
+        desde = ultimo + timedelta(days=1) if ultimo else self.repository.obtener_primer_dia_con_datos(db)
+
+        if desde is None or desde > hasta:
+            return {"dias_sellados": 0, "desde": None, "hasta": None}
+
+        dia = desde
+        dias_sellados = 0
+        while dia <= hasta:
+            try:
+                self.repository.asegurar_cierres(db, [dia])
+                self.repository.bloquear_cierres(db, [dia])
+                self.repository.recalcular_dia(db, dia)
+                self.repository.marcar_sellado(db, dia)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            dias_sellados += 1
+            dia += timedelta(days=1)
+
+        return {"dias_sellados": dias_sellados, "desde": desde, "hasta": hasta}
+
+    def ultimo_dia_sellado(self, db: Session) -> Optional[date]:
+        """Último día sellado: hasta ese día los reportes pueden leer los resúmenes."""
+        return self.repository.obtener_ultimo_dia_sellado(db)
+
+    @staticmethod
+    def partir_en(fecha_inicio: date, fecha_fin: date, ultimo_sellado: Optional[date]) -> Tuple[Tramo, Tramo]:
+        """
+        Divide el período [fecha_inicio, fecha_fin] en el tramo que se lee de los
+        resúmenes (hasta ultimo_sellado) y el que se agrega desde las tablas de origen.
+
+        Returns:
+            Tupla (tramo_resumen, tramo_origen); cada tramo es (inicio, fin) o None.
+        """
+        if ultimo_sellado is None or ultimo_sellado < fecha_inicio or fecha_inicio > fecha_fin:
+            return None, (fecha_inicio, fecha_fin)
+        if ultimo_sellado >= fecha_fin:
+            return (fecha_inicio, fecha_fin), None
+        return (fecha_inicio, ultimo_sellado), (ultimo_sellado + timedelta(days=1), fecha_fin)
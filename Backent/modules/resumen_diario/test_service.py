@@ -0,0 +1,141 @@
+"""
+Tests unitarios para ResumenDiarioService.
+
+Valida la división de períodos entre resúmenes y tablas de origen, el
+recálculo de días anteriores y el sellado secuencial del job nocturno.
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+from datetime import date
+
+from modules.resumen_diario.service import ResumenDiarioService
+
+
+@pytest.fixture
+def mock_db_session():
+    """Mock de la sesión de base de datos."""
+    return MagicMock()
+
+
+class TestPartirPeriodo:
+    """Tests para ResumenDiarioService.partir_en."""
+
+    def test_sin_dias_sellados_todo_desde_origen(self):
+        resumen, origen = ResumenDiarioService.partir_en(date(2025, 1, 1), date(2025, 1, 31), None)
+
+        assert resumen is None
+        assert origen == (date(2025, 1, 1), date(2025, 1, 31))
+
+    def test_periodo_cerrado_todo_desde_resumen(self):
+        resumen, origen = ResumenDiarioService.partir_en(date(2025, 1, 1), date(2025, 1, 31), date(2025, 2, 10))
+
+        assert resumen == (date(2025, 1, 1), date(2025, 1, 31))
+        assert origen is None
+
+    def test_periodo_que_incluye_hoy_se_parte(self):
+        resumen, origen = ResumenDiarioService.partir_en(date(2025, 1, 1), date(2025, 1, 31), date(2025, 1, 30))
+
+        assert resumen == (date(2025, 1, 1), date(2025, 1, 30))
+        assert origen == (date(2025, 1, 31), date(2025, 1, 31))
+
+    def test_periodo_posterior_al_ultimo_sellado(self):
+        resumen, origen = ResumenDiarioService.partir_en(date(2025, 2, 1), date(2025, 2, 1), date(2025, 1, 31))
+
+        assert resumen is None
+        assert origen == (date(2025, 2, 1), date(2025, 2, 1))
+
+
+class TestResumenDiarioService:
+    """Tests para actualizar_dias y sellar_pendientes."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Configura el servicio con el repositorio mockeado."""
+        self.service = ResumenDiarioService()
+        self.service.repository = MagicMock()
+        self.hoy = date(2025, 3, 10)
+        patcher = patch('modules.resumen_diario.service.hoy_negocio', return_value=self.hoy)
+        patcher.start()
+        yield
+        patcher.stop()
+
+    def test_actualizar_dias_ignora_hoy_y_futuro(self, mock_db_session):
+        """
+        Test: Los cambios del día no tocan los resúmenes.
+        """
+        self.service.actualizar_dias(mock_db_session, [self.hoy, date(2025, 3, 11), None])
+
+        self.service.repository.recalcular_dia.assert_not_called()
+        mock_db_session.flush.assert_not_called()
+
+    def test_actualizar_dias_bloquea_y_recalcula_sin_commit(self, mock_db_session):
+        """
+        Test: Un cambio sobre días anteriores recalcula cada día una sola vez.
+        
+        Resultado esperado:
+        - flush antes de agregar con SQL
+        - Bloquea las filas de cierre antes de recalcular
+        - No hace commit (lo hace quien modificó los datos)
+        """
+        orden = MagicMock()
+        mock_db_session.flush = orden.flush
+        self.service.repository.bloquear_cierres = orden.bloquear_cierres
+        self.service.repository.recalcular_dia = orden.recalcular_dia
+
+        self.service.actualizar_dias(
+            mock_db_session, [date(2025, 3, 5), date(2025, 3, 1), date(2025, 3, 5), self.hoy]
+        )
+
+        dias = [date(2025, 3, 1), date(2025, 3, 5)]
+        assert [c[0] for c in orden.mock_calls] == ['flush', 'bloquear_cierres', 'recalcular_dia', 'recalcular_dia']
+        self.service.repository.asegurar_cierres.assert_called_once_with(mock_db_session, dias)
+        orden.recalcular_dia.assert_any_call(mock_db_session, date(2025, 3, 1))
+        orden.recalcular_dia.assert_any_call(mock_db_session, date(2025, 3, 5))
+        mock_db_session.commit.assert_not_called()
+
+    def test_sellar_pendientes_desde_el_ultimo_sellado_hasta_ayer(self, mock_db_session):
+        """
+        Test: Se sellan en orden los días pendientes, con un commit por día.
+        """
+        self.service.repository.obtener_ultimo_dia_sellado.return_value = date(2025, 3, 6)
+
+        resultado = self.service.sellar_pendientes(mock_db_session)
+
+        assert resultado == {"dias_sellados": 3, "desde": date(2025, 3, 7), "hasta": date(2025, 3, 9)}
+        sellados = [c.args[1] for c in self.service.repository.marcar_sellado.call_args_list]
+        assert sellados == [date(2025, 3, 7), date(2025, 3, 8), date(2025, 3, 9)]
+        assert mock_db_session.commit.call_count == 3
+
+    def test_sellar_pendientes_primera_vez_desde_primer_dia_con_datos(self, mock_db_session):
+        self.service.repository.obtener_ultimo_dia_sellado.return_value = None
+        self.service.repository.obtener_primer_dia_con_datos.return_value = date(2025, 3, 8)
+
+        resultado = self.service.sellar_pendientes(mock_db_session)
+
+        assert resultado["dias_sellados"] == 2
+        assert resultado["desde"] == date(2025, 3, 8)
+
+    def test_sellar_pendientes_sin_datos(self, mock_db_session):
+        self.service.repository.obtener_ultimo_dia_sellado.return_value = None
+        self.service.repository.obtener_primer_dia_con_datos.return_value = None
+
+        resultado = self.service.sellar_pendientes(mock_db_session)
+
+        assert resultado == {"dias_sellados": 0, "desde": None, "hasta": None}
+        self.service.repository.recalcular_dia.assert_not_called()
+        mock_db_session.commit.assert_not_called()
+
+    def test_sellar_pendientes_error_hace_rollback(self, mock_db_session):
+        """
+        Test: Si falla un día se revierte ese día y se propaga el error;
+        los días ya sellados quedan confirmados.
+        """
+        self.service.repository.obtener_ultimo_dia_sellado.return_value = date(2025, 3, 7)
+        self.service.repository.recalcular_dia.side_effect = [None, Exception("DB Error")]
+
+        with pytest.raises(Exception):
+            self.service.sellar_pendientes(mock_db_session)
+
+        assert mock_db_session.commit.call_count == 1
+        mock_db_session.rollback.assert_called_once()
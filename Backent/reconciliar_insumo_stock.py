@@ -0,0 +1,38 @@
+"""
+Reconciliar el resumen insumo_stock con los lotes.
+
+Uso:
+    python reconciliar_insumo_stock.py               # reporta diferencias y reconstruye
+    python reconciliar_insumo_stock.py --solo-reporte  # solo reporta diferencias
+"""
+import argparse
+
+import main  # noqa: F401  (registra todos los modelos)
+from database import SessionLocal
+from modules.gestion_almacen_inusmos.insumo_stock.service import InsumoStockService
+
+parser = argparse.ArgumentParser(description="Reconcilia insumo_stock con ingresos_insumos_detalle")
+parser.add_argument("--solo-reporte", action="store_true", help="No corrige, solo muestra las diferencias")
+args = parser.parse_args()
+
+db = SessionLocal()
+
+try:
+    resultado = InsumoStockService().reconciliar(db, corregir=not args.solo_reporte)
+
+    print("=" * 60)
+    print(f"INSUMOS CON DIFERENCIAS: {resultado['total_diferencias']}")
+    print("=" * 60)
+    for d in resultado["diferencias"]:
+        print(
+            f"ID:{d['id_insumo']} | stock {d['stock_registrado']} -> {d['stock_calculado']}"
+            f" | valor {d['valor_registrado']} -> {d['valor_calculado']}"
+            f" | lotes {d['lotes_registrados']} -> {d['lotes_calculados']}"
+        )
+
+    if args.solo_reporte:
+        print("\nModo solo reporte: no se modificó insumo_stock")
+    else:
+        print(f"\nInsumos recalculados: {resultado['insumos_recalculados']}")
+finally:
+    db.close()
@@ -5,9 +5,9 @@ Este archivo configura:
 - Conexión a base de datos de prueba PostgreSQL (test_inventario)
 - Fixtures para TestClient con override de dependencias
 - Fixtures con datos base reutilizables (empresa, usuario admin, etc.)
+- Presupuesto de sentencias SQL por endpoint (tests/presupuesto_sql.py)
 """
 import pytest
-from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 import os
@@ -16,9 +16,11 @@ import sys
 # Agregar el directorio padre al path para importaciones
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database import Base, get_db
+from database import Base, get_db, get_read_db
 from main import app
+from modules.reportes.cache import cache_reportes
 from security.password_utils import get_password_hash
+from tests.presupuesto_sql import ClienteMedido, RegistroSQL
 
 # ============================================================
 # CONFIGURACIÓN DE BASE DE DATOS DE PRUEBA
@@ -39,6 +41,9 @@ TEST_DATABASE_URL = os.getenv(
 test_engine = create_engine(TEST_DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
+# Sentencias SQL de cada request del fixture `client`, por endpoint
+registro_sql = RegistroSQL(app, test_engine)
+
 
 # ============================================================
 # FIXTURES DE BASE DE DATOS Y CLIENTE
@@ -52,6 +57,8 @@ def db_session():
     """
     # Crear todas las tablas antes del test
     Base.metadata.create_all(bind=test_engine)
+    # La caché de reportes (semáforo incluido) es del proceso: no debe pasar de un test a otro
+    cache_reportes.limpiar()
     
     session = TestingSessionLocal()
     try:
@@ -67,6 +74,7 @@ def client(db_session):
     """
     Proporciona TestClient con la dependencia de BD sobrescrita.
     Usa la sesión de prueba en lugar de la sesión de producción.
+    Cada request queda medido en registro_sql.
     """
     def override_get_db():
         try:
@@ -75,14 +83,28 @@ def client(db_session):
             pass
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     
-    with TestClient(app) as test_client:
+    with ClienteMedido(app, registro_sql) as test_client:
         yield test_client
     
     # Limpiar overrides después del test
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def presupuesto_sql():
+    """
+    Registro de sentencias SQL de los requests de `client`.
+
+    Uso:
+        with presupuesto_sql.verificar():
+            client.post("/api/v1/ventas/registrar", json=...)
+        assert len(presupuesto_sql.ultima.sentencias) <= 8
+    """
+    return registro_sql
+
+
 # ============================================================
 # FIXTURES DE DATOS BASE REUTILIZABLES
 # ============================================================
@@ -226,3 +248,20 @@ def pytest_configure(config):
     config.addinivalue_line(
         "markers", "integration: marca tests como pruebas de integración"
     )
+
+
+# ============================================================
+# REPORTE DE SENTENCIAS SQL POR ENDPOINT
+# ============================================================
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--reporte-sql",
+        default=None,
+        help="Guarda el reporte de sentencias SQL por endpoint en este archivo JSON"
+    )
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """Imprime (y opcionalmente guarda) las sentencias SQL por endpoint de la sesión."""
+    registro_sql.escribir_reporte(terminalreporter, config.getoption("--reporte-sql"))
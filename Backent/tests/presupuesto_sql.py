@@ -0,0 +1,199 @@
+"""
+Presupuesto de sentencias SQL por endpoint para las pruebas de integración.
+
+Cada request hecho con el fixture `client` se mide sobre el engine de prueba
+(sentencias y tiempo SQL, con before/after_cursor_execute) y se agrupa por
+endpoint con su plantilla de ruta, p. ej. "POST /api/v1/ventas/{id_venta}/anular".
+
+- PRESUPUESTOS declara el máximo de sentencias por request de un endpoint.
+  Dentro de `with presupuesto_sql.verificar():` un request que lo supere hace
+  fallar el test, con las sentencias ejecutadas en el mensaje.
+- El presupuesto es el del régimen normal: lo que se paga una sola vez (el
+  primer número de una serie en el periodo, por ejemplo) se prepara antes
+  del bloque.
+- Al terminar la sesión se imprime el reporte por endpoint de todos los
+  requests de la suite; con --reporte-sql=ruta.json además se guarda.
+"""
+import contextlib
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+
+# Máximo de sentencias por request. Debe valer sin importar cuántos ítems
+# traiga el request o cuántas filas devuelva.
+PRESUPUESTOS: Dict[str, int] = {
+    # Productos (FOR UPDATE), número de venta, venta, detalles en lote,
+    # descuento de stock, números de movimiento y movimientos en lote
+    "POST /api/v1/ventas/registrar": 8,
+    # Productos con stock y su última producción en una sola consulta
+    "GET /api/v1/ventas/productos-disponibles": 1,
+    # Insumos, stock y precio promedio desde el resumen insumo_stock
+    "GET /api/v1/insumos/": 3,
+    # Configuración, resolver stock y lotes agotados, INSERT ... SELECT de
+    # vencimiento y de stock, y el email del resumen
+    "POST /api/v1/alertas/ejecutar-job": 6,
+    # Configuración de la empresa, más (solo si la caché no lo tiene) conteos,
+    # lotes por vencer y lista FEFO del semáforo del día
+    "GET /api/v1/alertas/semaforo": 4,
+    "GET /api/v1/alertas/semaforo/rojo": 4,
+    "GET /api/v1/alertas/semaforo/amarillo": 4,
+    "GET /api/v1/alertas/usar-hoy": 4,
+    # Plan de una sola receta: mismas sentencias que ejecutar-lote
+    "POST /api/v1/produccion/ejecutar": 20,
+    # Recetas, lotes FEFO y un INSERT/UPDATE por tabla para todo el plan
+    # (producciones, salidas, stock y entradas), más la reevaluación de alertas
+    "POST /api/v1/produccion/ejecutar-lote": 20,
+    # Promociones con su producto y los productos de sus combos en un JOIN
+    "GET /api/v1/promociones": 1,
+    "GET /api/v1/promociones/{promocion_id}": 1,
+}
+
+
+@dataclass
+class MedicionRequest:
+    """Sentencias y tiempo SQL de un request."""
+    sentencias: List[str] = field(default_factory=list)
+    tiempo_sql: float = 0.0
+
+
+@dataclass
+class ResumenEndpoint:
+    """Acumulado de los requests de un endpoint en la sesión de pruebas."""
+    requests: int = 0
+    sentencias_total: int = 0
+    sentencias_max: int = 0
+    tiempo_sql_total: float = 0.0
+    tiempo_sql_max: float = 0.0
+
+    def agregar(self, medicion: MedicionRequest) -> None:
+        self.requests += 1
+        self.sentencias_total += len(medicion.sentencias)
+        self.sentencias_max = max(self.sentencias_max, len(medicion.sentencias))
+        self.tiempo_sql_total += medicion.tiempo_sql
+        self.tiempo_sql_max = max(self.tiempo_sql_max, medicion.tiempo_sql)
+
+
+class RegistroSQL:
+    """
+    Mide los requests de un TestClient sobre `engine`.
+
+    Los requests del TestClient son secuenciales (aunque la app corra en otro
+    hilo), así que alcanza con una sola medición abierta a la vez.
+    """
+
+    def __init__(self, app: FastAPI, engine: Engine):
+        self.app = app
+        self.endpoints: Dict[str, ResumenEndpoint] = {}
+        self.ultima: Optional[MedicionRequest] = None
+        self._actual: Optional[MedicionRequest] = None
+        self._verificando = False
+        event.listen(engine, "before_cursor_execute", self._antes_de_ejecutar)
+        event.listen(engine, "after_cursor_execute", self._despues_de_ejecutar)
+
+    def _antes_de_ejecutar(self, conn, cursor, statement, parameters, context, executemany):
+        if self._actual is not None:
+            context._inicio_presupuesto = time.perf_counter()
+
+    def _despues_de_ejecutar(self, conn, cursor, statement, parameters, context, executemany):
+        inicio = getattr(context, "_inicio_presupuesto", None)
+        if self._actual is not None and inicio is not None:
+            self._actual.sentencias.append(statement)
+            self._actual.tiempo_sql += time.perf_counter() - inicio
+
+    def endpoint(self, metodo: str, url: str) -> str:
+        """"METODO /plantilla/de/ruta" del request, como en las métricas del middleware."""
+        metodo = metodo.upper()
+        scope = {"type": "http", "method": metodo, "path": httpx.URL(url).path, "root_path": ""}
+        for ruta in self.app.router.routes:
+            coincidencia, _ = ruta.matches(scope)
+            if coincidencia == Match.FULL:
+                return f"{metodo} {ruta.path}"
+        return f"{metodo} {scope['path']}"
+
+    @contextlib.contextmanager
+    def medir(self):
+        medicion = MedicionRequest()
+        self._actual = medicion
+        try:
+            yield medicion
+        finally:
+            self._actual = None
+
+    @contextlib.contextmanager
+    def verificar(self):
+        """Hace fallar los requests que superen el presupuesto de su endpoint."""
+        self._verificando = True
+        try:
+            yield self
+        finally:
+            self._verificando = False
+
+    def registrar(self, endpoint: str, medicion: MedicionRequest) -> None:
+        self.endpoints.setdefault(endpoint, ResumenEndpoint()).agregar(medicion)
+        self.ultima = medicion
+
+        presupuesto = PRESUPUESTOS.get(endpoint)
+        if self._verificando and presupuesto is not None and len(medicion.sentencias) > presupuesto:
+            detalle = "\n".join(f"  {n}. {' '.join(s.split())[:160]}" for n, s in enumerate(medicion.sentencias, 1))
+            raise AssertionError(
+                f"{endpoint} ejecutó {len(medicion.sentencias)} sentencias SQL "
+                f"(presupuesto: {presupuesto}):\n{detalle}"
+            )
+
+    def reporte(self) -> List[dict]:
+        """Una fila por endpoint, de más a menos sentencias por request."""
+        filas = [
+            {
+                "endpoint": endpoint,
+                "requests": resumen.requests,
+                "sentencias_max": resumen.sentencias_max,
+                "sentencias_promedio": round(resumen.sentencias_total / resumen.requests, 1),
+                "tiempo_sql_max_ms": round(resumen.tiempo_sql_max * 1000, 1),
+                "tiempo_sql_promedio_ms": round(resumen.tiempo_sql_total / resumen.requests * 1000, 1),
+                "presupuesto": PRESUPUESTOS.get(endpoint),
+            }
+            for endpoint, resumen in self.endpoints.items()
+        ]
+        return sorted(filas, key=lambda fila: (-fila["sentencias_max"], fila["endpoint"]))
+
+    def escribir_reporte(self, terminal, ruta: Optional[str] = None) -> None:
+        filas = self.reporte()
+        if not filas:
+            return
+
+        terminal.section("Sentencias SQL por endpoint")
+        terminal.write_line(f"{'sent. máx':>9} {'prom':>6} {'SQL máx ms':>10} {'presup.':>7}  endpoint")
+        for fila in filas:
+            presupuesto = fila["presupuesto"] if fila["presupuesto"] is not None else "-"
+            terminal.write_line(
+                f"{fila['sentencias_max']:>9} {fila['sentencias_promedio']:>6} "
+                f"{fila['tiempo_sql_max_ms']:>10} {presupuesto:>7}  {fila['endpoint']}"
+            )
+
+        if ruta:
+            with open(ruta, "w", encoding="utf-8") as archivo:
+                json.dump(filas, archivo, ensure_ascii=False, indent=2)
+            terminal.write_line(f"Reporte guardado en {ruta}")
+
+
+class ClienteMedido(TestClient):
+    """TestClient que registra las sentencias SQL de cada request en un RegistroSQL."""
+
+    def __init__(self, app: FastAPI, registro: RegistroSQL, **kwargs):
+        super().__init__(app, **kwargs)
+        self.registro = registro
+
+    def request(self, method, url, *args, **kwargs):
+        endpoint = self.registro.endpoint(method, str(url))
+        with self.registro.medir() as medicion:
+            respuesta = super().request(method, url, *args, **kwargs)
+        self.registro.registrar(endpoint, medicion)
+        return respuesta
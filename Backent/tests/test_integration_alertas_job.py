@@ -0,0 +1,281 @@
+"""
+Pruebas de integración del job de alertas diarias (jobs/alertas_job.py) y de
+la evaluación incremental al confirmar cada operación (modules/alertas/incremental.py).
+
+Cada fase del job es una sentencia por conjunto: INSERT ... SELECT con
+anti-join contra las alertas del día y ON CONFLICT DO NOTHING sobre
+uq_notificaciones_alerta_diaria.
+
+Tests:
+1. Un lote por tramo genera VENCIDO, USAR_HOY y VENCIMIENTO_PROXIMO con su semáforo
+2. Una segunda ejecución el mismo día no duplica alertas
+3. El índice único descarta la alerta aunque el anti-join no la vea
+4. Las alertas de stock se resuelven cuando el insumo vuelve al mínimo
+5. Las sentencias del job no crecen con la cantidad de lotes
+6. Todas las empresas activas: una empresa que falla no afecta a las demás
+7. Empresas en paralelo: la duración total es la de la más lenta, no la suma
+8. Al confirmar un ingreso se generan sus alertas, sin esperar al job
+9. Al anular el ingreso se resuelven las alertas de sus lotes
+10. Un rollback descarta la reevaluación pendiente
+"""
+import datetime
+import time
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from enums.semaforo_estado import SemaforoEstadoEnum
+from enums.tipo_alerta import TipoAlertaEnum
+import jobs.alertas_job as alertas_job
+from jobs.alertas_job import ejecutar_alertas_diarias, ejecutar_alertas_todas_las_empresas
+from modules.alertas.model import Notificacion
+from modules.empresa.model import Empresa
+from modules.gestion_almacen_inusmos.ingresos_insumos.model import IngresoProducto, IngresoProductoDetalle
+from modules.gestion_almacen_inusmos.ingresos_insumos.repository import IngresoProductoRepository
+from modules.gestion_almacen_inusmos.insumo_stock.service import InsumoStockService
+from modules.insumo.model import Insumo
+from tests.presupuesto_sql import PRESUPUESTOS
+from utils.rango_fechas import hoy_negocio
+
+
+def _lotes(db_session, usuario, proveedor, dias_para_vencer, stock_minimo=Decimal("0"), refrescar=False):
+    """
+    Un insumo perecible y un lote por cada valor de `dias_para_vencer`.
+    Con `refrescar` se confirman como una operación de ingreso (resumen de stock
+    y evaluación incremental de alertas).
+    """
+    insumo = Insumo(
+        codigo=f"ALJ-{len(dias_para_vencer)}",
+        nombre="Leche job",
+        unidad_medida="LT",
+        stock_minimo=stock_minimo,
+        perecible=True
+    )
+    db_session.add(insumo)
+    ahora = datetime.datetime.now()
+    ingreso = IngresoProducto(
+        numero_ingreso=f"ING-ALJ-{len(dias_para_vencer)}", numero_documento="F-1", tipo_documento="FACTURA",
+        fecha_ingreso=ahora, fecha_documento=ahora,
+        id_user=usuario.id_user, id_proveedor=proveedor.id_proveedor
+    )
+    db_session.add(ingreso)
+    db_session.flush()
+
+    hoy = datetime.datetime.combine(hoy_negocio(), datetime.time(12))
+    lotes = [
+        IngresoProductoDetalle(
+            id_ingreso=ingreso.id_ingreso, id_insumo=insumo.id_insumo,
+            cantidad_ingresada=Decimal("5"), precio_unitario=Decimal("1.00"),
+            subtotal=Decimal("5.00"), cantidad_restante=Decimal("5"),
+            fecha_vencimiento=hoy + datetime.timedelta(days=dias)
+        )
+        for dias in dias_para_vencer
+    ]
+    db_session.add_all(lotes)
+    if refrescar:
+        InsumoStockService().refrescar(db_session, [insumo.id_insumo])
+    db_session.commit()
+    return insumo, lotes
+
+
+def _empresa(db_session, n, estado=True, configuracion=None):
+    empresa = Empresa(
+        nombre_empresa=f"Sucursal {n}", ruc=f"2010000000{n}", direccion="Av. Test",
+        telefono="01-000000", email=f"sucursal{n}@test.com", estado=estado,
+        configuracion_alertas=configuracion
+    )
+    db_session.add(empresa)
+    db_session.commit()
+    return empresa
+
+
+def _alertas(db_session, tipo=None):
+    query = db_session.query(Notificacion).filter(Notificacion.activa == True)
+    if tipo is not None:
+        query = query.filter(Notificacion.tipo == tipo.value)
+    return query.all()
+
+
+@pytest.mark.integration
+class TestJobAlertasPorConjunto:
+    """Alertas de vencimiento y stock generadas con INSERT ... SELECT."""
+
+    def test_tramos_de_vencimiento(self, db_session, usuario_admin, proveedor_base):
+        _, lotes = _lotes(db_session, usuario_admin, proveedor_base, [-2, 1, 5, 30])
+
+        resultado = ejecutar_alertas_diarias(db_session)
+
+        assert resultado["alertas_vencimiento"] == 3
+        por_lote = {a.id_ingreso_detalle: a for a in _alertas(db_session)}
+        assert por_lote[lotes[0].id_ingreso_detalle].tipo == TipoAlertaEnum.VENCIDO.value
+        assert por_lote[lotes[1].id_ingreso_detalle].tipo == TipoAlertaEnum.USAR_HOY.value
+        assert por_lote[lotes[2].id_ingreso_detalle].tipo == TipoAlertaEnum.VENCIMIENTO_PROXIMO.value
+        assert por_lote[lotes[2].id_ingreso_detalle].semaforo == SemaforoEstadoEnum.AMARILLO.value
+        assert por_lote[lotes[0].id_ingreso_detalle].dias_restantes == -2
+        assert lotes[3].id_ingreso_detalle not in por_lote
+        assert all(a.fecha_alerta == hoy_negocio() for a in por_lote.values())
+        assert {"resolver", "vencimiento", "stock_critico", "commit", "total"} <= set(resultado["tiempos_ms"])
+
+    def test_segunda_ejecucion_no_duplica(self, db_session, usuario_admin, proveedor_base):
+        _lotes(db_session, usuario_admin, proveedor_base, [-1, 2])
+        db_session.add(Insumo(codigo="ALJ-STOCK", nombre="Azúcar job", unidad_medida="KG", stock_minimo=Decimal("10")))
+        db_session.commit()
+
+        primera = ejecutar_alertas_diarias(db_session)
+        segunda = ejecutar_alertas_diarias(db_session)
+
+        assert (primera["alertas_vencimiento"], primera["alertas_stock"]) == (2, 1)
+        assert (segunda["alertas_vencimiento"], segunda["alertas_stock"]) == (0, 0)
+        assert len(_alertas(db_session)) == 3
+
+    def test_indice_unico_descarta_alerta_del_dia(self, db_session):
+        """
+        Test: Alerta del día con fecha_creacion fuera del rango del anti-join
+        (por ejemplo, otra ejecución del job que se cruzó).
+
+        Resultado esperado:
+        - ON CONFLICT DO NOTHING la descarta
+        - Insertarla dos veces directamente viola uq_notificaciones_alerta_diaria
+        """
+        insumo = Insumo(codigo="ALJ-UQ", nombre="Harina job", unidad_medida="KG", stock_minimo=Decimal("10"))
+        db_session.add(insumo)
+        db_session.flush()
+        db_session.add(Notificacion(
+            tipo=TipoAlertaEnum.STOCK_CRITICO.value, titulo="previa", mensaje="previa",
+            id_insumo=insumo.id_insumo, fecha_alerta=hoy_negocio(),
+            fecha_creacion=datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=2)
+        ))
+        db_session.commit()
+
+        assert ejecutar_alertas_diarias(db_session)["alertas_stock"] == 0
+
+        db_session.add(Notificacion(
+            tipo=TipoAlertaEnum.STOCK_CRITICO.value, titulo="duplicada", mensaje="duplicada",
+            id_insumo=insumo.id_insumo, fecha_alerta=hoy_negocio()
+        ))
+        with pytest.raises(IntegrityError):
+            db_session.commit()
+        db_session.rollback()
+
+    def test_resuelve_alertas_de_stock_normalizado(self, db_session):
+        insumo = Insumo(codigo="ALJ-OK", nombre="Sal job", unidad_medida="KG", stock_minimo=Decimal("0"))
+        db_session.add(insumo)
+        db_session.flush()
+        db_session.add(Notificacion(
+            tipo=TipoAlertaEnum.STOCK_CRITICO.value, titulo="vieja", mensaje="vieja", id_insumo=insumo.id_insumo
+        ))
+        db_session.commit()
+
+        resultado = ejecutar_alertas_diarias(db_session)
+
+        assert resultado["alertas_resueltas"] == 1
+        assert _alertas(db_session, TipoAlertaEnum.STOCK_CRITICO) == []
+
+    def test_sentencias_no_crecen_con_los_lotes(self, client, db_session, usuario_admin, proveedor_base, presupuesto_sql):
+        _lotes(db_session, usuario_admin, proveedor_base, [1] * 5)
+        with presupuesto_sql.verificar():
+            assert client.post("/api/v1/alertas/ejecutar-job").status_code == 200
+            cinco_lotes = len(presupuesto_sql.ultima.sentencias)
+
+            _lotes(db_session, usuario_admin, proveedor_base, [2] * 50)
+            respuesta = client.post("/api/v1/alertas/ejecutar-job")
+            cincuenta_lotes = len(presupuesto_sql.ultima.sentencias)
+
+        assert respuesta.json()["alertas_vencimiento_creadas"] == 50
+        assert cincuenta_lotes == cinco_lotes <= PRESUPUESTOS["POST /api/v1/alertas/ejecutar-job"]
+
+
+@pytest.mark.integration
+class TestJobAlertasMultiempresa:
+    """Job de alertas de todas las empresas activas en un pool de hilos."""
+
+    def test_falla_de_una_empresa_no_afecta_a_las_demas(self, db_session):
+        """
+        Test: Empresa 1 válida, empresa 2 con configuración inválida, empresa 3 inactiva.
+
+        Resultado esperado:
+        - La empresa 1 confirma su alerta de stock y encola su email
+        - La empresa 2 queda en el resumen con su error
+        - La empresa 3 no se procesa
+        """
+        valida = _empresa(db_session, 1, configuracion={"email_alertas": "sucursal1@test.com"})
+        rota = _empresa(db_session, 2, configuracion={"dias_amarillo": "x"})
+        _empresa(db_session, 3, estado=False)
+        db_session.add(Insumo(codigo="ALJ-ME", nombre="Mantequilla job", unidad_medida="KG", stock_minimo=Decimal("5")))
+        db_session.commit()
+
+        resultado = ejecutar_alertas_todas_las_empresas(
+            crear_sesion=sessionmaker(bind=db_session.get_bind()), max_workers=2
+        )
+
+        por_empresa = {e["id_empresa"]: e for e in resultado["empresas"]}
+        assert set(por_empresa) == {valida.id_empresa, rota.id_empresa}
+        assert por_empresa[valida.id_empresa]["ok"] is True
+        assert por_empresa[valida.id_empresa]["alertas_stock"] == 1
+        assert por_empresa[valida.id_empresa]["emails_encolados"] == 1
+        assert por_empresa[rota.id_empresa]["ok"] is False
+        assert por_empresa[rota.id_empresa]["error"]
+        db_session.expire_all()
+        assert len(_alertas(db_session, TipoAlertaEnum.STOCK_CRITICO)) == 1
+
+    def test_duracion_total_es_la_de_la_empresa_mas_lenta(self, db_session, monkeypatch):
+        for n in range(4):
+            _empresa(db_session, n)
+
+        def empresa_lenta(db, id_empresa, resolver=True):
+            time.sleep(0.3)
+            return {"alertas_vencimiento": 0, "alertas_stock": 0, "emails_encolados": 0}
+
+        monkeypatch.setattr(alertas_job, "ejecutar_alertas_diarias", empresa_lenta)
+
+        resultado = ejecutar_alertas_todas_las_empresas(
+            crear_sesion=sessionmaker(bind=db_session.get_bind()), max_workers=4
+        )
+
+        assert all(e["ok"] for e in resultado["empresas"])
+        assert resultado["duracion_ms"] < 4 * 300 * 0.75
+
+
+@pytest.mark.integration
+class TestAlertasIncrementales:
+    """Alertas reevaluadas al confirmar las operaciones que modifican lotes."""
+
+    def test_ingreso_genera_alertas_al_confirmar(self, db_session, usuario_admin, proveedor_base):
+        """
+        Test: Ingreso de un lote que vence mañana de un insumo bajo su mínimo.
+
+        Resultado esperado:
+        - Al confirmar quedan la alerta USAR_HOY del lote y la de stock crítico
+        - El job del día no las duplica
+        """
+        insumo, lotes = _lotes(
+            db_session, usuario_admin, proveedor_base, [1], stock_minimo=Decimal("10"), refrescar=True
+        )
+
+        db_session.expire_all()
+        assert [a.id_ingreso_detalle for a in _alertas(db_session, TipoAlertaEnum.USAR_HOY)] == [lotes[0].id_ingreso_detalle]
+        assert [a.id_insumo for a in _alertas(db_session, TipoAlertaEnum.STOCK_CRITICO)] == [insumo.id_insumo]
+
+        resultado = ejecutar_alertas_diarias(db_session)
+        assert (resultado["alertas_vencimiento"], resultado["alertas_stock"]) == (0, 0)
+
+    def test_anular_ingreso_resuelve_alertas_de_sus_lotes(self, db_session, usuario_admin, proveedor_base):
+        _, lotes = _lotes(db_session, usuario_admin, proveedor_base, [-1, 2], refrescar=True)
+        db_session.expire_all()
+        assert len(_alertas(db_session)) == 2
+
+        assert IngresoProductoRepository().delete(db_session, lotes[0].id_ingreso) is True
+
+        db_session.expire_all()
+        assert _alertas(db_session) == []
+
+    def test_rollback_descarta_la_reevaluacion(self, db_session, usuario_admin, proveedor_base):
+        insumo, _ = _lotes(db_session, usuario_admin, proveedor_base, [1])
+
+        InsumoStockService().refrescar(db_session, [insumo.id_insumo])
+        db_session.rollback()
+        _empresa(db_session, 1)
+
+        assert _alertas(db_session) == []
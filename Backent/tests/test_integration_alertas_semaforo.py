@@ -0,0 +1,83 @@
+"""
+Pruebas de integración del semáforo del día cacheado (modules/alertas/router.py).
+
+/semaforo, /semaforo/rojo, /semaforo/amarillo y /usar-hoy comparten una
+entrada de caché por umbrales de la empresa y día del negocio.
+
+Tests:
+1. El primer widget calcula el semáforo; los otros tres solo leen la configuración
+2. Un ingreso confirmado invalida el semáforo cacheado
+"""
+import datetime
+from decimal import Decimal
+
+import pytest
+
+from modules.gestion_almacen_inusmos.ingresos_insumos.model import IngresoProducto, IngresoProductoDetalle
+from modules.gestion_almacen_inusmos.insumo_stock.service import InsumoStockService
+from modules.insumo.model import Insumo
+from tests.presupuesto_sql import PRESUPUESTOS
+from utils.rango_fechas import hoy_negocio
+
+WIDGETS = [
+    "/api/v1/alertas/semaforo",
+    "/api/v1/alertas/semaforo/rojo",
+    "/api/v1/alertas/semaforo/amarillo",
+    "/api/v1/alertas/usar-hoy",
+]
+
+
+def _ingreso(db_session, usuario, proveedor, n, dias_para_vencer):
+    """Ingreso confirmado (con resumen de stock) de un lote que vence en `dias_para_vencer` días."""
+    insumo = Insumo(codigo=f"SEM-{n}", nombre=f"Yogur {n}", unidad_medida="LT", stock_minimo=Decimal("0"), perecible=True)
+    db_session.add(insumo)
+    ahora = datetime.datetime.now()
+    ingreso = IngresoProducto(
+        numero_ingreso=f"ING-SEM-{n}", numero_documento="F-1", tipo_documento="FACTURA",
+        fecha_ingreso=ahora, fecha_documento=ahora,
+        id_user=usuario.id_user, id_proveedor=proveedor.id_proveedor
+    )
+    db_session.add(ingreso)
+    db_session.flush()
+    db_session.add(IngresoProductoDetalle(
+        id_ingreso=ingreso.id_ingreso, id_insumo=insumo.id_insumo,
+        cantidad_ingresada=Decimal("5"), precio_unitario=Decimal("2.00"),
+        subtotal=Decimal("10.00"), cantidad_restante=Decimal("5"),
+        fecha_vencimiento=datetime.datetime.combine(hoy_negocio(), datetime.time(12))
+        + datetime.timedelta(days=dias_para_vencer)
+    ))
+    InsumoStockService().refrescar(db_session, [insumo.id_insumo])
+    db_session.commit()
+
+
+@pytest.mark.integration
+class TestSemaforoDelDia:
+    """Un cálculo del semáforo compartido por los widgets del dashboard."""
+
+    def test_widgets_comparten_un_calculo(self, client, db_session, usuario_admin, proveedor_base, presupuesto_sql):
+        _ingreso(db_session, usuario_admin, proveedor_base, 1, 1)
+        _ingreso(db_session, usuario_admin, proveedor_base, 2, 5)
+
+        sentencias = []
+        with presupuesto_sql.verificar():
+            respuestas = {}
+            for url in WIDGETS:
+                respuesta = client.get(url)
+                assert respuesta.status_code == 200
+                respuestas[url] = respuesta.json()
+                sentencias.append(len(presupuesto_sql.ultima.sentencias))
+
+        assert sentencias[0] == PRESUPUESTOS["GET /api/v1/alertas/semaforo"]
+        assert sentencias[1:] == [1, 1, 1]
+        assert respuestas["/api/v1/alertas/semaforo"]["total_rojo"] == 1
+        assert [i["nombre"] for i in respuestas["/api/v1/alertas/semaforo/rojo"]] == ["Yogur 1"]
+        assert [i["nombre"] for i in respuestas["/api/v1/alertas/semaforo/amarillo"]] == ["Yogur 2"]
+        assert respuestas["/api/v1/alertas/usar-hoy"]["valor_estimado_en_riesgo"] == 10.0
+
+    def test_ingreso_invalida_el_semaforo(self, client, db_session, usuario_admin, proveedor_base):
+        assert client.get("/api/v1/alertas/semaforo").json()["total_rojo"] == 0
+
+        _ingreso(db_session, usuario_admin, proveedor_base, 1, 1)
+
+        assert client.get("/api/v1/alertas/semaforo").json()["total_rojo"] == 1
+        assert len(client.get("/api/v1/alertas/usar-hoy").json()["items"]) == 1
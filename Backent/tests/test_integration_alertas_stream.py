@@ -0,0 +1,119 @@
+"""
+Pruebas de integración del stream de alertas (modules/alertas/stream.py).
+
+El endpoint GET /api/v1/alertas/stream no termina, así que se prueba el canal
+que lo alimenta: una conexión suscrita recibe los eventos que publican las
+operaciones confirmadas.
+
+Tests:
+1. Un ingreso confirmado publica la alerta nueva y la diferencia del semáforo
+2. Marcar una notificación como leída publica el resumen actualizado
+3. Una conexión nueva reutiliza el estado guardado sin consultar
+"""
+import asyncio
+import datetime
+import json
+from decimal import Decimal
+
+import pytest
+
+from enums.tipo_alerta import TipoAlertaEnum
+from modules.alertas.model import Notificacion
+from modules.alertas.stream import canal_alertas, estado_alertas
+from modules.gestion_almacen_inusmos.ingresos_insumos.model import IngresoProducto, IngresoProductoDetalle
+from modules.gestion_almacen_inusmos.insumo_stock.service import InsumoStockService
+from modules.insumo.model import Insumo
+from utils.rango_fechas import hoy_negocio
+
+
+def _ingreso(db_session, usuario, proveedor, dias_para_vencer):
+    """Ingreso confirmado de un lote que vence en `dias_para_vencer` días."""
+    insumo = Insumo(codigo="STR-1", nombre="Crema stream", unidad_medida="LT", stock_minimo=Decimal("0"), perecible=True)
+    db_session.add(insumo)
+    ahora = datetime.datetime.now()
+    ingreso = IngresoProducto(
+        numero_ingreso="ING-STR-1", numero_documento="F-1", tipo_documento="FACTURA",
+        fecha_ingreso=ahora, fecha_documento=ahora,
+        id_user=usuario.id_user, id_proveedor=proveedor.id_proveedor
+    )
+    db_session.add(ingreso)
+    db_session.flush()
+    db_session.add(IngresoProductoDetalle(
+        id_ingreso=ingreso.id_ingreso, id_insumo=insumo.id_insumo,
+        cantidad_ingresada=Decimal("5"), precio_unitario=Decimal("1.00"),
+        subtotal=Decimal("5.00"), cantidad_restante=Decimal("5"),
+        fecha_vencimiento=datetime.datetime.combine(hoy_negocio(), datetime.time(12))
+        + datetime.timedelta(days=dias_para_vencer)
+    ))
+    InsumoStockService().refrescar(db_session, [insumo.id_insumo])
+    db_session.commit()
+
+
+async def _siguiente_evento(suscripcion):
+    mensaje = await asyncio.wait_for(suscripcion.cola.get(), timeout=5)
+    evento, datos = mensaje.strip().split("\n")
+    return evento.removeprefix("event: "), json.loads(datos.removeprefix("data: "))
+
+
+@pytest.mark.integration
+class TestStreamAlertas:
+    """Eventos publicados a las conexiones abiertas."""
+
+    def test_ingreso_publica_alerta_nueva(self, db_session, usuario_admin, proveedor_base):
+        async def escenario():
+            suscripcion = canal_alertas.suscribir(1)
+            try:
+                estado = await asyncio.to_thread(estado_alertas, db_session, 1)
+                await asyncio.to_thread(_ingreso, db_session, usuario_admin, proveedor_base, 1)
+                return estado, await _siguiente_evento(suscripcion)
+            finally:
+                canal_alertas.cancelar(suscripcion)
+
+        estado, (evento, datos) = asyncio.run(escenario())
+
+        assert estado["semaforo"]["ROJO"] == 0
+        assert evento == "alertas"
+        assert [n["tipo"] for n in datos["nuevas"]] == [TipoAlertaEnum.USAR_HOY.value]
+        assert datos["nuevas"][0]["nombre_insumo"] == "Crema stream"
+        assert datos["semaforo_diferencia"]["ROJO"] == 1
+        assert datos["resumen"]["total_no_leidas"] == 1
+
+    def test_marcar_leida_publica_resumen(self, client, db_session):
+        notificacion = Notificacion(tipo=TipoAlertaEnum.STOCK_CRITICO.value, titulo="t", mensaje="m")
+        db_session.add(notificacion)
+        db_session.commit()
+
+        async def escenario():
+            suscripcion = canal_alertas.suscribir(1)
+            try:
+                await asyncio.to_thread(estado_alertas, db_session, 1)
+                respuesta = await asyncio.to_thread(
+                    client.patch, f"/api/v1/alertas/notificaciones/{notificacion.id_notificacion}/leida"
+                )
+                return respuesta.status_code, await _siguiente_evento(suscripcion)
+            finally:
+                canal_alertas.cancelar(suscripcion)
+
+        status, (_, datos) = asyncio.run(escenario())
+
+        assert status == 200
+        assert datos["nuevas"] == [] and datos["resueltas"] == []
+        assert datos["resumen"]["total_no_leidas"] == 0
+
+    def test_conexion_nueva_reutiliza_estado(self, db_session, presupuesto_sql):
+        async def escenario():
+            primera = canal_alertas.suscribir(1)
+            segunda = canal_alertas.suscribir(1)
+            try:
+                inicial = await asyncio.to_thread(estado_alertas, db_session, 1)
+                with presupuesto_sql.medir() as medicion:
+                    repetido = await asyncio.to_thread(estado_alertas, db_session, 1)
+                return inicial, repetido, medicion
+            finally:
+                canal_alertas.cancelar(primera)
+                canal_alertas.cancelar(segunda)
+
+        inicial, repetido, medicion = asyncio.run(escenario())
+
+        assert repetido == inicial
+        assert medicion.sentencias == []
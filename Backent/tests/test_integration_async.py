@@ -0,0 +1,143 @@
+"""
+Pruebas de integración de la capa de base de datos async (DB_MODO).
+
+Tests:
+1. Los endpoints de lectura portados responden igual con el ejecutor sync y el async
+2. Prueba de carga: 200 clientes concurrentes atendidos sin errores en modo sync y
+   async; el throughput de cada modo se reporta, no se compara (depende de la máquina)
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import EjecutorDB, get_db_ejecutor, get_read_db_ejecutor
+from main import app
+from modules.reportes.cache import cache_reportes
+
+CLIENTES = 200
+PETICIONES_POR_CLIENTE = 5
+
+# Pool de cada modo por encima de los 40 hilos del threadpool: el límite de
+# concurrencia del modo sync debe ser el threadpool, no el pool de conexiones
+POOL = {"pool_size": 50, "max_overflow": 10}
+
+ENDPOINTS_LECTURA = [
+    "/api/v1/ventas/productos-disponibles",
+    "/api/v1/alertas/resumen",
+    "/api/v1/alertas/semaforo",
+    "/api/v1/insumos/",
+]
+
+
+def _ejecutor_sync(sesiones: sessionmaker):
+    """Como _get_ejecutor_sync, pero con una sesión propia por petición sobre la BD de prueba."""
+    def dependencia():
+        db = sesiones()
+        try:
+            yield EjecutorDB(db=db)
+        finally:
+            db.close()
+    return dependencia
+
+
+def _ejecutor_async(sesiones: async_sessionmaker):
+    async def dependencia():
+        async with sesiones() as db:
+            yield EjecutorDB(async_db=db)
+    return dependencia
+
+
+async def _con_modo(modo: str, db_session, escenario):
+    """
+    Ejecuta `escenario(cliente)` con get_db_ejecutor y get_read_db_ejecutor en
+    el modo indicado, sobre la BD de db_session. La caché de reportes se vacía
+    para que cada modo calcule sus propias respuestas.
+    """
+    cache_reportes.limpiar()
+    url = db_session.get_bind().url
+    if modo == "async":
+        url = url.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+        engine = create_async_engine(url, **POOL)
+        dependencia = _ejecutor_async(async_sessionmaker(engine, expire_on_commit=False))
+    else:
+        engine = create_engine(url.render_as_string(hide_password=False), **POOL)
+        dependencia = _ejecutor_sync(sessionmaker(bind=engine))
+    app.dependency_overrides[get_db_ejecutor] = dependencia
+    app.dependency_overrides[get_read_db_ejecutor] = dependencia
+
+    try:
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://test") as cliente:
+            return await escenario(cliente)
+    finally:
+        app.dependency_overrides.pop(get_db_ejecutor, None)
+        app.dependency_overrides.pop(get_read_db_ejecutor, None)
+        if modo == "async":
+            await engine.dispose()
+        else:
+            engine.dispose()
+
+
+async def _respuestas(cliente):
+    resultado = {}
+    for url in ENDPOINTS_LECTURA:
+        respuesta = await cliente.get(url)
+        assert respuesta.status_code == 200, f"{url}: {respuesta.text}"
+        resultado[url] = respuesta.json()
+    return resultado
+
+
+async def _throughput(cliente) -> tuple:
+    """
+    CLIENTES clientes concurrentes contra productos-disponibles.
+
+    Returns:
+        (peticiones respondidas con 200, peticiones por segundo)
+    """
+    async def un_cliente():
+        correctas = 0
+        for _ in range(PETICIONES_POR_CLIENTE):
+            respuesta = await cliente.get("/api/v1/ventas/productos-disponibles")
+            correctas += respuesta.status_code == 200
+        return correctas
+
+    inicio = time.perf_counter()
+    correctas = sum(await asyncio.gather(*(un_cliente() for _ in range(CLIENTES))))
+    return correctas, CLIENTES * PETICIONES_POR_CLIENTE / (time.perf_counter() - inicio)
+
+
+@pytest.mark.integration
+class TestDBModoAsync:
+    """Endpoints de lectura sobre el ejecutor sync (threadpool) y async (asyncpg)."""
+
+    def test_modos_sync_y_async_responden_igual(self, db_session, producto_con_stock):
+        db_session.commit()
+
+        sync = asyncio.run(_con_modo("sync", db_session, _respuestas))
+        modo_async = asyncio.run(_con_modo("async", db_session, _respuestas))
+
+        assert sync == modo_async
+        assert len(sync["/api/v1/ventas/productos-disponibles"]["data"]) == 1
+
+    def test_carga_200_clientes_concurrentes(self, db_session, producto_con_stock):
+        """
+        Test: CLIENTES clientes concurrentes, PETICIONES_POR_CLIENTE lecturas cada uno.
+
+        Resultado esperado:
+        - Ambos modos atienden todas las peticiones sin errores
+        - El throughput de cada modo queda en la salida (-s), sin compararlos:
+          con el pool por encima de 40, el sync queda acotado por el threadpool
+        """
+        db_session.commit()
+
+        correctas_sync, rps_sync = asyncio.run(_con_modo("sync", db_session, _throughput))
+        correctas_async, rps_async = asyncio.run(_con_modo("async", db_session, _throughput))
+
+        print(f"\n{CLIENTES} clientes: sync {rps_sync:.0f} req/s, async {rps_async:.0f} req/s")
+        assert correctas_sync == CLIENTES * PETICIONES_POR_CLIENTE
+        assert correctas_async == CLIENTES * PETICIONES_POR_CLIENTE
@@ -0,0 +1,94 @@
+"""
+Pruebas de integración de la exportación en streaming de reportes.
+
+Tests:
+1. El export de ventas entrega todas las filas del período (CSV y NDJSON)
+2. La memoria máxima del export no crece con la cantidad de filas
+"""
+import json
+import tracemalloc
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+# Registrar en Base.metadata las tablas que solo usa el SQL crudo
+from modules.gestion_almacen_productos.ventas.model import Venta, VentaDetalle  # noqa: F401
+from modules.resumen_diario.model import ResumenDiaCierre  # noqa: F401
+from modules.reportes.export import exportar_reporte
+from utils.rango_fechas import hoy_negocio
+
+
+def _insertar_ventas(db_session, id_user, desde, hasta, dias):
+    """Inserta ventas numeradas [desde, hasta) repartidas en los últimos `dias` días."""
+    db_session.execute(text("""
+        INSERT INTO ventas (numero_venta, fecha_venta, total, metodo_pago, id_user, anulado)
+        SELECT 'VEN-EXP-' || g,
+               date_trunc('day', now()) - (1 + g % :dias) * interval '1 day' + (g % 720) * interval '1 minute',
+               10, 'efectivo', :id_user, false
+        FROM generate_series(:desde, :hasta - 1) g
+    """), {"id_user": id_user, "desde": desde, "hasta": hasta, "dias": dias})
+    db_session.commit()
+
+
+def _exportar(db_session, formato, fecha_inicio, fecha_fin):
+    """Consume el export como lo haría StreamingResponse; retorna (bloques, filas, pico de memoria)."""
+    crear_sesion = sessionmaker(bind=db_session.get_bind())
+    bloques = filas = 0
+
+    tracemalloc.start()
+    try:
+        for bloque in exportar_reporte("ventas", formato, fecha_inicio, fecha_fin, crear_sesion=crear_sesion):
+            bloques += 1
+            filas += bloque.count("\n")
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return bloques, filas, pico
+
+
+@pytest.mark.integration
+class TestExportReportes:
+    """Pruebas del export en streaming contra PostgreSQL."""
+
+    def test_export_ventas_entrega_todas_las_filas(self, db_session, usuario_admin):
+        """
+        Dado: 2.500 ventas en los últimos 10 días
+        Cuando: Se exporta el período en CSV y en NDJSON
+        Entonces: CSV tiene encabezado + 2.500 filas y NDJSON 2.500 objetos, en varios bloques
+        """
+        _insertar_ventas(db_session, usuario_admin.id_user, 1, 2501, 10)
+        hoy = hoy_negocio()
+
+        bloques_csv, lineas_csv, _ = _exportar(db_session, "csv", hoy - timedelta(days=10), hoy)
+        bloques_nd, lineas_nd, _ = _exportar(db_session, "ndjson", hoy - timedelta(days=10), hoy)
+
+        assert lineas_csv == 2501
+        assert lineas_nd == 2500
+        assert bloques_nd == 3  # lotes de 1000
+
+        crear_sesion = sessionmaker(bind=db_session.get_bind())
+        primera = next(iter(exportar_reporte("ventas", "ndjson", hoy - timedelta(days=10), hoy, crear_sesion)))
+        venta = json.loads(primera.splitlines()[0])
+        assert venta["numero_venta"].startswith("VEN-EXP-")
+        assert venta["total"] == 10.0
+
+    def test_memoria_del_export_no_crece_con_el_periodo(self, db_session, usuario_admin):
+        """
+        Dado: 5.000 ventas en un mes
+        Cuando: Se agregan 95.000 ventas más y se exporta un año (20 veces más filas)
+        Entonces: El pico de memoria del export es prácticamente el mismo
+        """
+        hoy = hoy_negocio()
+        _insertar_ventas(db_session, usuario_admin.id_user, 1, 5001, 30)
+        _, filas_base, pico_base = _exportar(db_session, "csv", hoy - timedelta(days=30), hoy)
+
+        _insertar_ventas(db_session, usuario_admin.id_user, 5001, 100001, 365)
+        _, filas_x20, pico_x20 = _exportar(db_session, "csv", hoy - timedelta(days=366), hoy)
+
+        print(f"\nexport ventas: {filas_base} filas pico={pico_base} B, {filas_x20} filas pico={pico_x20} B")
+
+        assert filas_x20 == 100001
+        assert pico_x20 < pico_base * 2
@@ -0,0 +1,480 @@
+"""
+Prueba de regresión de planes de ejecución para las consultas frecuentes.
+
+Carga un volumen grande de lotes, movimientos, ventas y notificaciones, ejecuta los
+métodos reales de los repositorios capturando su SQL y corre EXPLAIN sobre
+cada sentencia. Falla si alguna consulta registrada recorre con Seq Scan
+una de las tablas grandes que vigila (señal de que perdió su índice).
+
+Para registrar una consulta nueva basta agregarla a CONSULTAS_CRITICAS.
+
+Incluye además benchmarks que verifican que el reporte diario lee las mismas
+filas aunque el histórico de ventas crezca 10 veces, que el dashboard de
+KPIs se calcula en una sola consulta y en menos de 100 ms con un año de datos
+y que una página profunda del kardex (paginación por cursor) lee las mismas
+filas que la primera.
+"""
+import contextlib
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event, text
+
+# Registrar en Base.metadata las tablas que solo usa el SQL crudo de ventas
+from modules.gestion_almacen_productos.ventas.model import Venta, VentaDetalle  # noqa: F401
+from modules.resumen_diario.model import ResumenDiaCierre  # noqa: F401
+from modules.alertas.model import TipoAlerta
+from modules.alertas.repository import AlertasRepository
+from modules.gestion_almacen_inusmos.ingresos_insumos.repository import IngresoProductoRepository
+from modules.gestion_almacen_inusmos.movimiento_insumos.repository import MovimientoInsumoRepository
+from modules.gestion_almacen_inusmos.produccion.repository import ProduccionRepository
+from modules.gestion_almacen_productos.ventas.repository import VentasRepository
+from modules.kardex.repository import KardexRepository
+from modules.kardex.schemas import FiltrosKardex
+from modules.reportes.repository import ReportesRepository
+from modules.reportes.service import ReportesService
+from modules.resumen_diario.service import ResumenDiarioService
+from utils.rango_fechas import hoy_negocio
+
+
+TOTAL_INSUMOS = 300
+TOTAL_INGRESOS = 3000
+TOTAL_FILAS = 60000
+DIAS_HISTORICO = 365
+
+
+# ============================================================
+# CONSULTAS REGISTRADAS
+# (nombre, tablas que no deben recorrerse completas, ejecución)
+# ============================================================
+
+CONSULTAS_CRITICAS = [
+    (
+        "produccion.get_lotes_fefo_insumos",
+        {"ingresos_insumos_detalle"},
+        lambda db, d: ProduccionRepository().get_lotes_fefo_insumos(db, [d["id_insumo"]]),
+    ),
+    (
+        "ingresos.get_lotes_fefo_con_proveedor",
+        {"ingresos_insumos_detalle"},
+        lambda db, d: IngresoProductoRepository().get_lotes_fefo_con_proveedor(db, d["id_insumo"]),
+    ),
+    (
+        "produccion.get_trazabilidad_produccion",
+        {"movimiento_insumos", "movimiento_productos_terminados", "ingresos_insumos_detalle"},
+        lambda db, d: ProduccionRepository().get_trazabilidad_produccion(db, d["id_produccion"]),
+    ),
+    (
+        "alertas.verificar_notificacion_existente",
+        {"notificaciones"},
+        lambda db, d: AlertasRepository(db).verificar_notificacion_existente(
+            d["id_insumo"], TipoAlerta.STOCK_CRITICO
+        ),
+    ),
+    (
+        "alertas.obtener_lista_usar_hoy",
+        {"ingresos_insumos_detalle"},
+        lambda db, d: AlertasRepository(db).obtener_lista_usar_hoy(dias_rojo=3),
+    ),
+    (
+        "ventas.get_ventas_del_dia",
+        {"ventas"},
+        lambda db, d: VentasRepository().get_ventas_del_dia(db, d["fecha_reporte"]),
+    ),
+    (
+        "reportes.obtener_resumen_ventas_dia",
+        {"ventas"},
+        lambda db, d: ReportesRepository(db).obtener_resumen_ventas_dia(d["fecha_reporte"]),
+    ),
+    (
+        "reportes.obtener_kg_totales_dia",
+        {"movimiento_insumos"},
+        lambda db, d: ReportesRepository(db).obtener_kg_totales_dia(d["fecha_reporte"]),
+    ),
+    (
+        "movimiento_insumos.get_pagina",
+        {"movimiento_insumos"},
+        lambda db, d: MovimientoInsumoRepository().get_pagina(db, d["cursor_kardex"], 50),
+    ),
+    (
+        "ventas.get_ventas_pagina",
+        {"ventas"},
+        lambda db, d: VentasRepository().get_ventas_pagina(db, d["cursor_ventas"], 51),
+    ),
+    (
+        "alertas.obtener_notificaciones_activas",
+        {"notificaciones"},
+        lambda db, d: AlertasRepository(db).obtener_notificaciones_activas(limit=51, cursor=d["cursor_notificaciones"]),
+    ),
+    (
+        "kardex.obtener_movimientos",
+        {"movimiento_insumos"},
+        lambda db, d: KardexRepository(db).obtener_movimientos(
+            "insumos", FiltrosKardex(id_item=d["id_insumo"]), None, 51
+        ),
+    ),
+]
+
+
+# ============================================================
+# UTILIDADES
+# ============================================================
+
+@contextlib.contextmanager
+def _capturar_selects(engine):
+    """Captura (sentencia, parámetros) de cada SELECT ejecutado en el engine."""
+    capturadas = []
+
+    def antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            capturadas.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", antes_de_ejecutar)
+    try:
+        yield capturadas
+    finally:
+        event.remove(engine, "before_cursor_execute", antes_de_ejecutar)
+
+
+def _nodos_plan(plan):
+    """Recorre todos los nodos de un plan de EXPLAIN (FORMAT JSON)."""
+    pendientes = [plan[0]["Plan"]]
+    while pendientes:
+        nodo = pendientes.pop()
+        yield nodo
+        pendientes.extend(nodo.get("Plans", []))
+
+
+def _tablas_con_seq_scan(db_session, statement, parameters):
+    """Corre EXPLAIN (FORMAT JSON) y retorna las tablas recorridas con Seq Scan."""
+    plan = db_session.connection().exec_driver_sql(
+        "EXPLAIN (FORMAT JSON) " + statement, parameters
+    ).scalar()
+
+    return {nodo["Relation Name"] for nodo in _nodos_plan(plan) if nodo["Node Type"] == "Seq Scan"}
+
+
+def _filas_leidas(db_session, statement, parameters, tabla):
+    """
+    Corre EXPLAIN ANALYZE y retorna (filas leídas de `tabla`, tiempo en ms).
+    Las filas leídas incluyen las descartadas por el filtro.
+    """
+    plan = db_session.connection().exec_driver_sql(
+        "EXPLAIN (ANALYZE, FORMAT JSON) " + statement, parameters
+    ).scalar()
+
+    filas = sum(
+        (nodo["Actual Rows"] + nodo.get("Rows Removed by Filter", 0)) * nodo["Actual Loops"]
+        for nodo in _nodos_plan(plan)
+        if nodo.get("Relation Name") == tabla
+    )
+    return filas, plan[0]["Execution Time"]
+
+
+def _insertar_ventas(db_session, id_user, desde, hasta, dias, dias_atras=0):
+    """
+    Inserta ventas numeradas [desde, hasta) repartidas en `dias` días,
+    empezando `dias_atras` días antes de hoy.
+    """
+    db_session.execute(text("""
+        INSERT INTO ventas (numero_venta, fecha_venta, total, metodo_pago, id_user, anulado)
+        SELECT 'VEN-IDX-' || g,
+               date_trunc('day', now()) - (:dias_atras + g % :dias) * interval '1 day' + (g % 720) * interval '1 minute',
+               10, CASE WHEN g % 3 = 0 THEN 'tarjeta' ELSE 'efectivo' END,
+               :id_user, g % 50 = 0
+        FROM generate_series(:desde, :hasta - 1) g
+    """), {"id_user": id_user, "desde": desde, "hasta": hasta, "dias": dias, "dias_atras": dias_atras})
+    db_session.commit()
+    db_session.execute(text("ANALYZE ventas"))
+
+
+# ============================================================
+# DATOS MASIVOS
+# ============================================================
+
+@pytest.fixture
+def datos_masivos(db_session, usuario_admin, proveedor_base, producto_con_stock):
+    """
+    Carga un volumen representativo: la mayoría de lotes agotados, muchos
+    movimientos por documento y pocas notificaciones activas.
+    """
+    from modules.insumo.model import Insumo
+    from modules.recetas.model import Receta
+    from modules.gestion_almacen_inusmos.produccion.model import Produccion
+
+    db_session.add_all([
+        Insumo(codigo=f"IDX{n:04d}", nombre=f"Insumo {n}", unidad_medida="KG", stock_minimo=Decimal("5"))
+        for n in range(TOTAL_INSUMOS)
+    ])
+    receta = Receta(
+        id_producto=producto_con_stock.id_producto,
+        codigo_receta="REC-IDX",
+        nombre_receta="Receta índices",
+        rendimiento_producto_terminado=Decimal("10")
+    )
+    db_session.add(receta)
+    db_session.flush()
+
+    produccion = Produccion(
+        numero_produccion="PROD-IDX-1",
+        id_receta=receta.id_receta,
+        cantidad_batch=Decimal("1"),
+        id_user=usuario_admin.id_user
+    )
+    db_session.add(produccion)
+    db_session.flush()
+
+    params = {
+        "id_user": usuario_admin.id_user,
+        "id_proveedor": proveedor_base.id_proveedor,
+        "id_producto": producto_con_stock.id_producto,
+        "insumos": TOTAL_INSUMOS,
+        "ingresos": TOTAL_INGRESOS,
+        "filas": TOTAL_FILAS,
+        "dias": DIAS_HISTORICO,
+    }
+
+    db_session.execute(text("""
+        INSERT INTO ingresos_insumos (
+            numero_ingreso, numero_documento, tipo_documento, fecha_registro, fecha_ingreso,
+            fecha_documento, id_user, id_proveedor, estado, monto_total, anulado
+        )
+        SELECT 'ING-IDX-' || g, 'F-' || g, 'FACTURA', now(), now(), now(),
+               :id_user, :id_proveedor, 'COMPLETADO', 0, false
+        FROM generate_series(1, :ingresos) g
+    """), params)
+
+    # 1 de cada 20 lotes conserva stock; el resto está agotado
+    db_session.execute(text("""
+        INSERT INTO ingresos_insumos_detalle (
+            id_ingreso, id_insumo, cantidad_ordenada, cantidad_ingresada, precio_unitario,
+            subtotal, fecha_vencimiento, cantidad_restante
+        )
+        SELECT
+            (SELECT min(id_ingreso) FROM ingresos_insumos) + g % :ingresos,
+            (SELECT min(id_insumo) FROM insumo) + g % :insumos,
+            10, 10, 2.5, 25,
+            now() + (g % 400) * interval '1 day',
+            CASE WHEN g % 20 = 0 THEN 10 ELSE 0 END
+        FROM generate_series(1, :filas) g
+    """), params)
+
+    db_session.execute(text("""
+        INSERT INTO movimiento_insumos (
+            numero_movimiento, id_insumo, id_lote, tipo_movimiento, motivo, cantidad,
+            fecha_movimiento, id_user, id_documento_origen, tipo_documento_origen, anulado
+        )
+        SELECT 'MOV-IDX-' || g, d.id_insumo, d.id_ingreso_detalle,
+               CASE WHEN g % 2 = 0 THEN 'SALIDA' ELSE 'ENTRADA' END, 'IDX', 1,
+               now() - (g % :dias) * interval '1 day', :id_user, g % 5000 + 1000,
+               CASE WHEN g % 2 = 0 THEN 'PRODUCCION' ELSE 'INGRESO' END, false
+        FROM generate_series(1, :filas) g
+        INNER JOIN ingresos_insumos_detalle d
+            ON d.id_ingreso_detalle = (SELECT min(id_ingreso_detalle) FROM ingresos_insumos_detalle) + g - 1
+    """), params)
+
+    db_session.execute(text("""
+        INSERT INTO movimiento_productos_terminados (
+            numero_movimiento, id_producto, tipo_movimiento, motivo, cantidad, precio_venta,
+            fecha_movimiento, id_user, id_documento_origen, tipo_documento_origen, anulado
+        )
+        SELECT 'MPT-IDX-' || g, :id_producto,
+               CASE WHEN g % 2 = 0 THEN 'ENTRADA' ELSE 'SALIDA' END, 'IDX', 1, 0,
+               now(), :id_user, g % 5000 + 1000,
+               CASE WHEN g % 2 = 0 THEN 'PRODUCCION' ELSE 'VENTA' END, false
+        FROM generate_series(1, :filas) g
+    """), params)
+
+    # 1 de cada 10 notificaciones sigue activa
+    db_session.execute(text("""
+        INSERT INTO notificaciones (tipo, titulo, mensaje, id_insumo, leida, activa, fecha_creacion)
+        SELECT
+            CASE WHEN g % 2 = 0 THEN 'STOCK_CRITICO' ELSE 'VENCIMIENTO_PROXIMO' END,
+            'Alerta ' || g, 'Mensaje', (SELECT min(id_insumo) FROM insumo) + g % :insumos,
+            false, g % 10 = 0, now() - (g % 90) * interval '1 day'
+        FROM generate_series(1, :filas) g
+    """), params)
+
+    db_session.commit()
+    _insertar_ventas(db_session, usuario_admin.id_user, 1, TOTAL_FILAS + 1, DIAS_HISTORICO)
+    for tabla in (
+        "insumo", "ingresos_insumos", "ingresos_insumos_detalle", "movimiento_insumos",
+        "movimiento_productos_terminados", "notificaciones"
+    ):
+        db_session.execute(text(f"ANALYZE {tabla}"))
+
+    def cursor(tabla, fecha, id_fila, posicion, filtro="true"):
+        """Cursor (fecha, id) de la fila `posicion` del listado: una página profunda."""
+        fila = db_session.execute(text(f"""
+            SELECT {fecha}, {id_fila} FROM {tabla} WHERE {filtro}
+            ORDER BY {fecha} DESC, {id_fila} DESC OFFSET :posicion LIMIT 1
+        """), {"posicion": posicion}).one()
+        return fila[0], fila[1]
+
+    return {
+        "id_insumo": db_session.execute(text("SELECT min(id_insumo) FROM insumo")).scalar() + 7,
+        "id_produccion": produccion.id_produccion,
+        "fecha_reporte": hoy_negocio() - timedelta(days=10),
+        "cursor_kardex": cursor("movimiento_insumos", "fecha_movimiento", "id_movimiento", 50000),
+        "cursor_ventas": cursor("ventas", "fecha_venta", "id_venta", 50000),
+        # 1 de cada 10 notificaciones está activa
+        "cursor_notificaciones": cursor("notificaciones", "fecha_creacion", "id_notificacion", 5000, "activa"),
+    }
+
+
+# ============================================================
+# TESTS
+# ============================================================
+
+@pytest.mark.integration
+class TestIndicesConsultasFrecuentes:
+    """Las consultas frecuentes deben resolverse con índices, no recorriendo tablas grandes."""
+
+    @pytest.mark.parametrize(
+        "nombre, tablas_vigiladas, ejecutar",
+        CONSULTAS_CRITICAS,
+        ids=[c[0] for c in CONSULTAS_CRITICAS]
+    )
+    def test_consulta_no_usa_seq_scan(self, db_session, datos_masivos, nombre, tablas_vigiladas, ejecutar):
+        """
+        Test: EXPLAIN de cada SELECT que ejecuta el método del repositorio.
+
+        Dado: Decenas de miles de lotes, movimientos y notificaciones
+        Cuando: Se ejecuta la consulta registrada
+        Entonces: Ninguna tabla vigilada aparece con Seq Scan en el plan
+        """
+        # Act
+        with _capturar_selects(db_session.get_bind()) as capturadas:
+            ejecutar(db_session, datos_masivos)
+
+        # Assert
+        assert capturadas, f"{nombre} no ejecutó ninguna consulta"
+        for statement, parameters in capturadas:
+            tablas = _tablas_con_seq_scan(db_session, statement, parameters) & tablas_vigiladas
+            assert not tablas, f"{nombre} recorre {sorted(tablas)} con Seq Scan:\n{statement}"
+
+
+@pytest.mark.integration
+class TestReportesNoCrecenConHistorico:
+    """Benchmark: el costo de un reporte diario depende del día, no del histórico."""
+
+    def test_reporte_diario_lee_las_mismas_filas_con_10x_historico(self, db_session, usuario_admin):
+        """
+        Test: Reporte de ventas de un día antes y después de multiplicar el histórico.
+
+        Dado: 20.000 ventas repartidas en los últimos 200 días
+        Cuando: Se agregan 180.000 ventas más en los 1800 días anteriores
+        Entonces: El reporte del día lee las mismas filas de `ventas` (solo las
+                  del día, vía índice) aunque la tabla sea 10 veces mayor
+        """
+        fecha_reporte = hoy_negocio() - timedelta(days=5)
+        repo = ReportesRepository(db_session)
+        id_user = usuario_admin.id_user
+
+        def medir():
+            with _capturar_selects(db_session.get_bind()) as capturadas:
+                inicio = time.perf_counter()
+                repo.obtener_resumen_ventas_dia(fecha_reporte)
+                total_ms = (time.perf_counter() - inicio) * 1000
+            statement, parameters = capturadas[0]
+            filas, ejecucion_ms = _filas_leidas(db_session, statement, parameters, "ventas")
+            return filas, ejecucion_ms, total_ms
+
+        _insertar_ventas(db_session, id_user, 1, 20001, 200)
+        filas_base, ejecucion_base, total_base = medir()
+
+        _insertar_ventas(db_session, id_user, 20001, 200001, 1800, dias_atras=200)
+        filas_x10, ejecucion_x10, total_x10 = medir()
+
+        print(
+            f"\nreportes.obtener_resumen_ventas_dia: "
+            f"base={filas_base} filas/{ejecucion_base:.2f} ms (total {total_base:.2f} ms), "
+            f"x10={filas_x10} filas/{ejecucion_x10:.2f} ms (total {total_x10:.2f} ms)"
+        )
+
+        # 100 ventas por día; con DATE(fecha_venta) se leían las 200.000
+        assert 0 < filas_base <= 100
+        assert filas_x10 == filas_base
+
+    def test_kpis_de_un_anio_en_una_consulta(self, db_session, datos_masivos):
+        """
+        Test: Dashboard de KPIs con un año de ventas y movimientos.
+
+        Dado: 60.000 ventas y movimientos repartidos en 365 días, días anteriores sellados
+        Cuando: Se calculan los KPIs de hoy
+        Entonces: Los datos salen de una sola consulta, coinciden con los calculados
+                  sin resúmenes y el cálculo toma menos de 100 ms
+        """
+        hoy = hoy_negocio()
+        sin_resumenes = ReportesService(db_session).obtener_kpis(hoy)
+
+        ResumenDiarioService().sellar_pendientes(db_session)
+        for tabla in ("resumen_dia_cierre", "resumen_ventas_producto_dia", "resumen_insumos_dia"):
+            db_session.execute(text(f"ANALYZE {tabla}"))
+
+        def medir():
+            with _capturar_selects(db_session.get_bind()) as capturadas:
+                inicio = time.perf_counter()
+                kpis = ReportesService(db_session).obtener_kpis(hoy)
+                total_ms = (time.perf_counter() - inicio) * 1000
+            return kpis, capturadas, total_ms
+
+        medir()  # calentar caché de la BD
+        kpis, capturadas, total_ms = min((medir() for _ in range(3)), key=lambda m: m[2])
+
+        print(f"\nreportes.obtener_kpis: {total_ms:.2f} ms, tiempos={kpis.tiempos_ms}")
+
+        # Último día sellado + la consulta de KPIs
+        assert len(capturadas) == 2
+        assert kpis.model_dump(exclude={"tiempos_ms"}) == sin_resumenes.model_dump(exclude={"tiempos_ms"})
+        assert total_ms < 100
+
+
+@pytest.mark.integration
+class TestPaginacionKeyset:
+    """Benchmark: con cursor, una página profunda cuesta lo mismo que la primera."""
+
+    def test_pagina_profunda_del_kardex_lee_las_mismas_filas(self, db_session, datos_masivos):
+        """
+        Test: Primera página del kardex de insumos contra una página cerca del final.
+
+        Dado: 60.000 movimientos de insumos
+        Cuando: Se pide la primera página y la que sigue a la fila 50.000
+        Entonces: Ambas leen solo limit + 1 filas de movimiento_insumos (con
+                  OFFSET la página profunda leía 50.000) y el total aproximado
+                  se acerca al real sin contar la tabla
+        """
+        repo = MovimientoInsumoRepository()
+
+        def medir(cursor):
+            with _capturar_selects(db_session.get_bind()) as capturadas:
+                pagina = repo.get_pagina(db_session, cursor, 50)
+            statement, parameters = capturadas[-1]
+            filas, ejecucion_ms = _filas_leidas(db_session, statement, parameters, "movimiento_insumos")
+            return pagina, filas, ejecucion_ms
+
+        primera, filas_primera, ms_primera = medir(None)
+        _, filas_profunda, ms_profunda = medir(datos_masivos["cursor_kardex"])
+        segunda, _, _ = medir(
+            (primera["items"][-1].fecha_movimiento, primera["items"][-1].id_movimiento)
+        )
+
+        print(
+            f"\nmovimiento_insumos.get_pagina: primera={filas_primera} filas/{ms_primera:.2f} ms, "
+            f"profunda={filas_profunda} filas/{ms_profunda:.2f} ms"
+        )
+
+        assert filas_primera == filas_profunda == 51
+        assert primera["hay_mas"] is True
+        assert primera["siguiente"] is not None
+        # La segunda página continúa exactamente donde terminó la primera
+        ids_primera = {m.id_movimiento for m in primera["items"]}
+        assert not ids_primera & {m.id_movimiento for m in segunda["items"]}
+        assert (segunda["items"][0].fecha_movimiento, segunda["items"][0].id_movimiento) < (
+            primera["items"][-1].fecha_movimiento, primera["items"][-1].id_movimiento
+        )
+
+        total = repo.get_pagina(db_session, None, 50, con_total=True)["total_aproximado"]
+        assert abs(total - TOTAL_FILAS) <= TOTAL_FILAS * 0.1
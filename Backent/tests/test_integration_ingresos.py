@@ -0,0 +1,219 @@
+"""
+Pruebas de integración del registro de ingresos de insumos.
+
+Un ingreso COMPLETADO crea sus detalles (lotes) y un movimiento de ENTRADA
+por lote. La cantidad de sentencias SQL no debe crecer con la cantidad de
+líneas: los detalles se insertan en lote, la verificación de duplicados es
+una sola consulta y los movimientos se insertan con un único INSERT.
+
+Tests:
+1. Un ingreso de 50 líneas ejecuta las mismas sentencias que uno de 5
+2. Completar un ingreso PENDIENTE no duplica entradas ya registradas
+3. Listar ingresos carga los detalles sin una consulta por ingreso
+4. Importar una guía de 10.000 líneas por CSV toma segundos y reporta errores por línea
+"""
+import contextlib
+import datetime
+import time
+import pytest
+from decimal import Decimal
+from sqlalchemy import event, func
+
+from enums.estado import EstadoEnum
+from modules.gestion_almacen_inusmos.ingresos_insumos.repository import IngresoProductoRepository
+from modules.gestion_almacen_inusmos.ingresos_insumos.schemas import (
+    IngresoProductoCreate, IngresoProductoDetalleCreate, IngresoProductoUpdate
+)
+from modules.gestion_almacen_inusmos.movimiento_insumos.model import MovimientoInsumo
+from modules.insumo.model import Insumo
+
+
+@contextlib.contextmanager
+def _contar_sentencias(engine):
+    """Cuenta las sentencias enviadas a la base de datos."""
+    sentencias = []
+
+    def antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    event.listen(engine, "before_cursor_execute", antes_de_ejecutar)
+    try:
+        yield sentencias
+    finally:
+        event.remove(engine, "before_cursor_execute", antes_de_ejecutar)
+
+
+@pytest.fixture
+def insumos_ingreso(db_session):
+    """50 insumos para armar ingresos de muchas líneas."""
+    insumos = [
+        Insumo(codigo=f"ING{n:03d}", nombre=f"Insumo ingreso {n}", unidad_medida="KG", stock_minimo=Decimal("1"))
+        for n in range(50)
+    ]
+    db_session.add_all(insumos)
+    db_session.commit()
+    return insumos
+
+
+def _ingreso(numero, insumos, usuario, proveedor, estado=EstadoEnum.COMPLETADO):
+    ahora = datetime.datetime.now()
+    return IngresoProductoCreate(
+        numero_ingreso=numero, numero_documento=f"F-{numero}", tipo_documento="FACTURA",
+        fecha_ingreso=ahora, fecha_documento=ahora, id_user=usuario.id_user,
+        id_proveedor=proveedor.id_proveedor, estado=estado,
+        detalles=[
+            IngresoProductoDetalleCreate(
+                id_insumo=insumo.id_insumo, cantidad_ingresada=Decimal("10"),
+                precio_unitario=Decimal("2.50"), subtotal=Decimal("25.00"),
+                fecha_vencimiento=ahora + datetime.timedelta(days=30)
+            )
+            for insumo in insumos
+        ]
+    )
+
+
+def _entradas(db_session, id_ingreso):
+    return db_session.query(func.count(MovimientoInsumo.id_movimiento)).filter(
+        MovimientoInsumo.id_documento_origen == id_ingreso,
+        MovimientoInsumo.tipo_documento_origen == "INGRESO"
+    ).scalar()
+
+
+@pytest.mark.integration
+class TestIngresoEnLote:
+    """Registrar un ingreso cuesta las mismas sentencias sin importar sus líneas."""
+
+    def test_sentencias_no_crecen_con_las_lineas(self, db_session, usuario_admin, proveedor_base, insumos_ingreso):
+        """
+        Test: Ingresos COMPLETADOS de 5 y de 50 líneas.
+
+        Dado: Un contador de movimientos ya inicializado (primer ingreso del mes)
+        Cuando: Se registran ingresos de 5 y de 50 líneas
+        Entonces: Ambos ejecutan la misma cantidad de sentencias y crean una ENTRADA por línea
+        """
+        repo = IngresoProductoRepository()
+        repo.create(db_session, _ingreso("ING-LOTE-0", insumos_ingreso[:1], usuario_admin, proveedor_base))
+
+        with _contar_sentencias(db_session.get_bind()) as sentencias_5:
+            chico = repo.create(db_session, _ingreso("ING-LOTE-5", insumos_ingreso[:5], usuario_admin, proveedor_base))
+        with _contar_sentencias(db_session.get_bind()) as sentencias_50:
+            grande = repo.create(db_session, _ingreso("ING-LOTE-50", insumos_ingreso, usuario_admin, proveedor_base))
+
+        print(f"\ningreso de 5 líneas: {len(sentencias_5)} sentencias; de 50 líneas: {len(sentencias_50)}")
+
+        assert len(sentencias_50) == len(sentencias_5)
+        assert len(grande.detalles) == 50
+        assert _entradas(db_session, chico.id_ingreso) == 5
+        assert _entradas(db_session, grande.id_ingreso) == 50
+
+    def test_completar_pendiente_no_duplica_entradas(self, db_session, usuario_admin, proveedor_base, insumos_ingreso):
+        """
+        Test: Un ingreso PENDIENTE pasa a COMPLETADO dos veces.
+
+        Dado: Un ingreso PENDIENTE de 3 líneas (sin movimientos)
+        Cuando: Se completa, se vuelve a PENDIENTE y se completa otra vez
+        Entonces: Cada lote tiene una sola ENTRADA
+        """
+        repo = IngresoProductoRepository()
+        ingreso = repo.create(
+            db_session,
+            _ingreso("ING-PEND-1", insumos_ingreso[:3], usuario_admin, proveedor_base, EstadoEnum.PENDIENTE)
+        )
+        assert _entradas(db_session, ingreso.id_ingreso) == 0
+
+        repo.update(db_session, ingreso.id_ingreso, IngresoProductoUpdate(estado=EstadoEnum.COMPLETADO))
+        repo.update(db_session, ingreso.id_ingreso, IngresoProductoUpdate(estado=EstadoEnum.PENDIENTE))
+        repo.update(db_session, ingreso.id_ingreso, IngresoProductoUpdate(estado=EstadoEnum.COMPLETADO))
+
+        assert _entradas(db_session, ingreso.id_ingreso) == 3
+
+    def test_listar_carga_detalles_en_una_consulta(self, db_session, usuario_admin, proveedor_base, insumos_ingreso):
+        """
+        Test: Listado de ingresos con sus detalles.
+
+        Dado: 10 ingresos de 5 líneas
+        Cuando: Se listan todos y se recorren sus detalles
+        Entonces: Se ejecutan 2 consultas (ingresos y detalles), no una por ingreso
+        """
+        repo = IngresoProductoRepository()
+        for n in range(10):
+            repo.create(db_session, _ingreso(f"ING-LIST-{n}", insumos_ingreso[:5], usuario_admin, proveedor_base))
+        db_session.expire_all()
+
+        with _contar_sentencias(db_session.get_bind()) as sentencias:
+            ingresos = repo.get_all(db_session)
+            lineas = sum(len(i.detalles) for i in ingresos)
+
+        assert lineas == 50
+        assert len(sentencias) == 2
+
+
+@pytest.mark.integration
+class TestImportacionIngreso:
+    """Importación masiva de la guía del proveedor (POST /importar)."""
+
+    def test_importar_csv_10000_lineas(self, client, db_session, usuario_admin, proveedor_base, insumos_ingreso):
+        """
+        Test: Guía de 10.000 líneas con un código desconocido.
+
+        Dado: 50 insumos y un CSV de 10.000 líneas, la 5.001 con un código inexistente
+        Cuando: Se importa en modo parcial
+        Entonces: Se crean 9.999 lotes con su ENTRADA en pocos segundos y el
+                  reporte indica la fila del error
+        """
+        lineas = [
+            f"{insumos_ingreso[n % 50].codigo};{n % 7 + 1};2,50;2027-01-{n % 28 + 1:02d}"
+            for n in range(10000)
+        ]
+        lineas[5000] = "NO-EXISTE;1;1;"
+        archivo = ("codigo;cantidad;precio;vencimiento\n" + "\n".join(lineas)).encode()
+
+        inicio = time.perf_counter()
+        response = client.post(
+            "/api/v1/ingresos_productos/importar",
+            params={
+                "formato": "csv", "parcial": True, "numero_ingreso": "ING-IMP-10K",
+                "numero_documento": "GR-10K", "tipo_documento": "GUIA_REMISION",
+                "fecha_documento": "2026-10-01T00:00:00", "id_user": usuario_admin.id_user,
+                "id_proveedor": proveedor_base.id_proveedor
+            },
+            content=archivo,
+            headers={"Content-Type": "text/csv"}
+        )
+        segundos = time.perf_counter() - inicio
+        print(f"\nimportación de 10.000 líneas: {segundos:.2f} s")
+
+        assert response.status_code == 200
+        resultado = response.json()["data"]
+        assert resultado["importado"] is True
+        assert resultado["lineas_importadas"] == 9999
+        assert resultado["errores"] == [
+            {"linea": 5002, "codigo_insumo": "NO-EXISTE", "mensaje": "Insumo 'NO-EXISTE' no existe o está anulado"}
+        ]
+        assert _entradas(db_session, resultado["id_ingreso"]) == 9999
+        assert segundos < 15
+
+    def test_importar_con_errores_no_crea_nada(self, client, db_session, usuario_admin, proveedor_base, insumos_ingreso):
+        """
+        Test: Guía con errores sin modo parcial.
+
+        Dado: Un CSV con una cantidad no numérica
+        Cuando: Se importa
+        Entonces: No se crea el ingreso ni sus movimientos
+        """
+        archivo = f"codigo_insumo,cantidad,precio_unitario\n{insumos_ingreso[0].codigo},10,2.5\n{insumos_ingreso[1].codigo},diez,2.5\n"
+
+        response = client.post(
+            "/api/v1/ingresos_productos/importar",
+            params={
+                "numero_ingreso": "ING-IMP-ERR", "numero_documento": "GR-ERR", "tipo_documento": "FACTURA",
+                "fecha_documento": "2026-10-01T00:00:00", "id_user": usuario_admin.id_user,
+                "id_proveedor": proveedor_base.id_proveedor
+            },
+            content=archivo.encode()
+        )
+
+        resultado = response.json()["data"]
+        assert resultado["importado"] is False
+        assert resultado["errores"][0]["linea"] == 3
+        assert db_session.query(func.count(MovimientoInsumo.id_movimiento)).scalar() == 0
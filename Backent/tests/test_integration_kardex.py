@@ -0,0 +1,187 @@
+"""
+Pruebas de integración del kardex (saldo acumulado calculado en SQL).
+
+El saldo de cada fila debe ser el mismo que resulta de sumar en orden todos
+los movimientos no anulados del ítem, sin importar en qué página cae la fila
+ni qué filtros de tipo o fecha se apliquen.
+
+Tests:
+1. El saldo se arrastra correctamente entre páginas
+2. Filtrar por tipo de movimiento no cambia el saldo de las filas
+3. El costo de cada movimiento de insumo es el precio de su lote
+4. El kardex de productos terminados calcula el saldo por producto
+"""
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from modules.gestion_almacen_inusmos.ingresos_insumos.model import IngresoProducto, IngresoProductoDetalle
+from modules.gestion_almacen_inusmos.movimiento_insumos.model import MovimientoInsumo
+from modules.gestion_almacen_productos.movimiento_productos_terminados.model import MovimientoProductoTerminado
+from modules.insumo.model import Insumo
+from modules.kardex.schemas import FiltrosKardex
+from modules.kardex.service import KardexService
+from enums.tipo_movimiento import TipoMovimientoEnum
+
+
+# (tipo, cantidad, anulado) en orden cronológico
+MOVIMIENTOS = [
+    ("ENTRADA", "10", False),
+    ("SALIDA", "3", False),
+    ("ENTRADA", "5", False),
+    ("SALIDA", "4", True),
+    ("SALIDA", "2", False),
+    ("ENTRADA", "8", False),
+    ("SALIDA", "6", False),
+]
+
+
+def _saldos_esperados():
+    """Saldo después de cada movimiento no anulado, en orden."""
+    saldo, saldos = Decimal("0"), []
+    for tipo, cantidad, anulado in MOVIMIENTOS:
+        if anulado:
+            continue
+        saldo += Decimal(cantidad) if tipo == "ENTRADA" else -Decimal(cantidad)
+        saldos.append(saldo)
+    return saldos
+
+
+def _recorrer(consultar, filtros, limit):
+    """Pide todas las páginas siguiendo el cursor `siguiente`."""
+    items, after = [], None
+    while True:
+        pagina = consultar(filtros, after=after, limit=limit)
+        items.extend(pagina.items)
+        if not pagina.hay_mas:
+            return items
+        after = pagina.siguiente
+
+
+@pytest.fixture
+def kardex_insumo(db_session, usuario_admin, proveedor_base):
+    """Un insumo con un lote a 2.50 y los MOVIMIENTOS, uno por hora (dos en la misma hora)."""
+    insumo = Insumo(codigo="KDX001", nombre="Harina kardex", unidad_medida="KG", stock_minimo=Decimal("1"))
+    otro = Insumo(codigo="KDX002", nombre="Azúcar kardex", unidad_medida="KG", stock_minimo=Decimal("1"))
+    db_session.add_all([insumo, otro])
+    db_session.flush()
+
+    inicio = datetime(2026, 10, 1, 8, 0)
+    ingreso = IngresoProducto(
+        numero_ingreso="ING-KDX-1", numero_documento="F-1", tipo_documento="FACTURA",
+        fecha_ingreso=inicio, fecha_documento=inicio,
+        id_user=usuario_admin.id_user, id_proveedor=proveedor_base.id_proveedor
+    )
+    db_session.add(ingreso)
+    db_session.flush()
+    lote = IngresoProductoDetalle(
+        id_ingreso=ingreso.id_ingreso, id_insumo=insumo.id_insumo,
+        cantidad_ingresada=Decimal("23"), precio_unitario=Decimal("2.50"),
+        subtotal=Decimal("57.50"), cantidad_restante=Decimal("2")
+    )
+    db_session.add(lote)
+    db_session.flush()
+
+    for n, (tipo, cantidad, anulado) in enumerate(MOVIMIENTOS):
+        # Los movimientos 3 y 4 comparten fecha: el desempate es el id
+        fecha = inicio + timedelta(hours=min(n, 3) if n <= 4 else n - 1)
+        db_session.add(MovimientoInsumo(
+            numero_movimiento=f"MOV-KDX-{n}", id_insumo=insumo.id_insumo, id_lote=lote.id_ingreso_detalle,
+            tipo_movimiento=tipo, motivo="Kardex", cantidad=Decimal(cantidad), fecha_movimiento=fecha,
+            id_user=usuario_admin.id_user, anulado=anulado
+        ))
+        db_session.flush()
+        # Movimientos de otro insumo intercalados: no deben afectar el saldo
+        db_session.add(MovimientoInsumo(
+            numero_movimiento=f"MOV-KDX-OTRO-{n}", id_insumo=otro.id_insumo,
+            tipo_movimiento="ENTRADA", motivo="Kardex", cantidad=Decimal("100"), fecha_movimiento=fecha,
+            id_user=usuario_admin.id_user, anulado=False
+        ))
+        db_session.flush()
+    db_session.commit()
+    return insumo
+
+
+@pytest.mark.integration
+class TestKardexSaldos:
+    """El saldo del kardex es el acumulado de todos los movimientos del ítem."""
+
+    @pytest.mark.parametrize("limit", [1, 2, 4, 50])
+    def test_saldo_se_arrastra_entre_paginas(self, db_session, kardex_insumo, limit):
+        """
+        Test: Recorrer el kardex de un insumo con distintos tamaños de página.
+
+        Dado: Movimientos alternados de entrada y salida, uno anulado y dos en la misma hora
+        Cuando: Se recorren todas las páginas siguiendo el cursor
+        Entonces: Los saldos son el acumulado cronológico, sin el movimiento anulado
+        """
+        service = KardexService(db_session)
+
+        items = _recorrer(service.obtener_kardex_insumos, FiltrosKardex(id_item=kardex_insumo.id_insumo), limit)
+
+        assert [m.saldo for m in items] == _saldos_esperados()
+        assert all(m.id_item == kardex_insumo.id_insumo for m in items)
+
+    def test_filtro_por_tipo_no_cambia_el_saldo(self, db_session, kardex_insumo):
+        """
+        Test: Kardex filtrado solo a salidas.
+
+        Dado: El mismo historial de movimientos
+        Cuando: Se filtra por tipo SALIDA
+        Entonces: Cada salida muestra el saldo que tiene en el kardex completo
+        """
+        service = KardexService(db_session)
+        completo = _recorrer(service.obtener_kardex_insumos, FiltrosKardex(id_item=kardex_insumo.id_insumo), 50)
+        saldo_por_movimiento = {m.id_movimiento: m.saldo for m in completo}
+
+        salidas = _recorrer(
+            service.obtener_kardex_insumos,
+            FiltrosKardex(id_item=kardex_insumo.id_insumo, tipo_movimiento=TipoMovimientoEnum.SALIDA),
+            1
+        )
+
+        assert len(salidas) == 3
+        assert all(m.tipo_movimiento == "SALIDA" and m.entrada == 0 for m in salidas)
+        assert all(m.saldo == saldo_por_movimiento[m.id_movimiento] for m in salidas)
+
+    def test_costo_del_lote(self, db_session, kardex_insumo):
+        """
+        Test: Costo valorizado de cada movimiento.
+
+        Dado: Todos los movimientos consumen o ingresan el mismo lote a 2.50
+        Cuando: Se consulta el kardex
+        Entonces: costo_total = cantidad × precio del lote
+        """
+        service = KardexService(db_session)
+
+        items = _recorrer(service.obtener_kardex_insumos, FiltrosKardex(id_item=kardex_insumo.id_insumo), 50)
+
+        assert all(m.costo_unitario == Decimal("2.50") for m in items)
+        assert all(m.costo_total == (m.entrada + m.salida) * Decimal("2.50") for m in items)
+
+    def test_kardex_productos(self, db_session, usuario_admin, producto_con_stock):
+        """
+        Test: Kardex de productos terminados.
+
+        Dado: Producción (ENTRADA) y ventas (SALIDA) de un producto
+        Cuando: Se consulta su kardex con páginas de 2
+        Entonces: El saldo es el acumulado por producto
+        """
+        inicio = datetime(2026, 10, 1, 8, 0)
+        for n, (tipo, cantidad) in enumerate([("ENTRADA", "20"), ("SALIDA", "3"), ("SALIDA", "5")]):
+            db_session.add(MovimientoProductoTerminado(
+                numero_movimiento=f"MPT-KDX-{n}", id_producto=producto_con_stock.id_producto,
+                tipo_movimiento=tipo, motivo="Kardex", cantidad=Decimal(cantidad),
+                precio_venta=Decimal("3.50"), fecha_movimiento=inicio + timedelta(hours=n),
+                id_user=usuario_admin.id_user, anulado=False
+            ))
+        db_session.commit()
+        service = KardexService(db_session)
+
+        items = _recorrer(
+            service.obtener_kardex_productos, FiltrosKardex(id_item=producto_con_stock.id_producto), 2
+        )
+
+        assert [m.saldo for m in items] == [Decimal("20"), Decimal("17"), Decimal("12")]
+        assert items[0].codigo_item == producto_con_stock.codigo_producto
+        assert items[0].id_lote is None
@@ -0,0 +1,282 @@
+"""
+Pruebas de integración del presupuesto de sentencias SQL por endpoint.
+
+Cada endpoint de tests/presupuesto_sql.py:PRESUPUESTOS se ejercita con pocos
+y con muchos ítems: la cantidad de sentencias no debe crecer con los ítems
+ni superar el presupuesto declarado.
+
+Tests:
+1. El endpoint se identifica por su plantilla de ruta
+2. registrar_venta: 1 ítem y 10 ítems ejecutan las mismas sentencias (≤ 8)
+3. productos-disponibles: 1 y 20 productos en una sola consulta
+4. Listado de insumos: 1 y 30 insumos con las mismas sentencias
+5. Producción: receta de 1 insumo y de 10 insumos con las mismas sentencias
+6. Plan de producción: 1 receta y 10 recetas con las mismas sentencias
+7. Promociones: listado y detalle en una consulta con 1 o muchos productos de combo
+"""
+import datetime
+from decimal import Decimal
+
+import pytest
+
+from modules.gestion_almacen_inusmos.ingresos_insumos.model import IngresoProducto, IngresoProductoDetalle
+from modules.gestion_almacen_inusmos.insumo_stock.service import InsumoStockService
+from modules.insumo.model import Insumo
+from modules.productos_terminados.model import ProductoTerminado
+from modules.promociones.model import EstadoPromocion, Promocion, PromocionCombo, TipoPromocion
+from modules.recetas.model import Receta, RecetaDetalle
+from tests.presupuesto_sql import PRESUPUESTOS
+
+
+def _productos(db_session, cantidad, desde=0):
+    productos = [
+        ProductoTerminado(
+            codigo_producto=f"PSQL{n:03d}",
+            nombre=f"Producto presupuesto {n}",
+            unidad_medida="UNIDAD",
+            stock_actual=Decimal("100.00"),
+            stock_minimo=Decimal("1.00"),
+            precio_venta=Decimal("2.50"),
+            anulado=False
+        )
+        for n in range(desde, desde + cantidad)
+    ]
+    db_session.add_all(productos)
+    db_session.commit()
+    return productos
+
+
+def _insumos(db_session, cantidad, desde=0):
+    insumos = [
+        Insumo(codigo=f"PSQL{n:03d}", nombre=f"Insumo presupuesto {n}", unidad_medida="KG", stock_minimo=Decimal("1"))
+        for n in range(desde, desde + cantidad)
+    ]
+    db_session.add_all(insumos)
+    db_session.commit()
+    return insumos
+
+
+def _insumos_con_lotes(db_session, usuario, proveedor, cantidad, desde=0):
+    """Insumos con dos lotes de 1 kg cada uno, ingresados y resumidos en insumo_stock."""
+    insumos = _insumos(db_session, cantidad, desde)
+    ahora = datetime.datetime.now()
+    ingreso = IngresoProducto(
+        numero_ingreso=f"ING-PSQL-{desde}", numero_documento="F-1", tipo_documento="FACTURA",
+        fecha_ingreso=ahora, fecha_documento=ahora,
+        id_user=usuario.id_user, id_proveedor=proveedor.id_proveedor
+    )
+    db_session.add(ingreso)
+    db_session.flush()
+    db_session.add_all([
+        IngresoProductoDetalle(
+            id_ingreso=ingreso.id_ingreso, id_insumo=insumo.id_insumo,
+            cantidad_ingresada=Decimal("1"), precio_unitario=Decimal("1.00"),
+            subtotal=Decimal("1.00"), cantidad_restante=Decimal("1"),
+            fecha_vencimiento=ahora + datetime.timedelta(days=30 + lote)
+        )
+        for insumo in insumos
+        for lote in range(2)
+    ])
+    InsumoStockService().refrescar(db_session, [insumo.id_insumo for insumo in insumos])
+    db_session.commit()
+    return insumos
+
+
+def _receta(db_session, producto, codigo, insumos):
+    """Receta activa de `producto` con 1 kg por batch de cada insumo."""
+    receta = Receta(
+        id_producto=producto.id_producto, codigo_receta=codigo, nombre_receta=f"Receta {codigo}",
+        rendimiento_producto_terminado=Decimal("10"), estado="ACTIVA", anulado=False
+    )
+    db_session.add(receta)
+    db_session.flush()
+    db_session.add_all([
+        RecetaDetalle(id_receta=receta.id_receta, id_insumo=insumo.id_insumo, cantidad=Decimal("1"))
+        for insumo in insumos
+    ])
+    db_session.commit()
+    return receta
+
+
+def _promocion(db_session, n, productos):
+    """Promoción COMBO activa con un producto de combo por cada producto."""
+    hoy = datetime.date.today()
+    promocion = Promocion(
+        codigo_promocion=f"PROMO-PSQL-{n}", titulo=f"Combo presupuesto {n}",
+        tipo_promocion=TipoPromocion.COMBO, estado=EstadoPromocion.ACTIVA,
+        fecha_inicio=hoy, fecha_fin=hoy + datetime.timedelta(days=7),
+        productos_combo=[PromocionCombo(id_producto=producto.id_producto, cantidad=1) for producto in productos]
+    )
+    db_session.add(promocion)
+    db_session.commit()
+    return promocion
+
+
+def _venta(productos):
+    return {
+        "items": [
+            {
+                "id_producto": producto.id_producto,
+                "cantidad": 1,
+                "precio_unitario": float(producto.precio_venta),
+                "descuento_porcentaje": 0
+            }
+            for producto in productos
+        ],
+        "metodo_pago": "efectivo"
+    }
+
+
+class TestEndpointPorPlantilla:
+    """Agrupación de los requests por endpoint."""
+
+    def test_endpoint_usa_plantilla_de_ruta(self, presupuesto_sql):
+        assert presupuesto_sql.endpoint("post", "/api/v1/ventas/registrar") == "POST /api/v1/ventas/registrar"
+        assert presupuesto_sql.endpoint("GET", "/api/v1/insumos/7?x=1") == "GET /api/v1/insumos/{insumo_id}"
+        assert presupuesto_sql.endpoint("GET", "/no/existe") == "GET /no/existe"
+
+
+@pytest.mark.integration
+class TestPresupuestoSQL:
+    """Sentencias por request acotadas, sin importar la cantidad de ítems."""
+
+    def test_registrar_venta_no_crece_con_los_items(self, client, db_session, usuario_admin, presupuesto_sql):
+        """
+        Test: Venta de 1 ítem y de 10 ítems.
+
+        Resultado esperado:
+        - Ambas dentro del presupuesto de POST /api/v1/ventas/registrar
+        - La de 10 ítems ejecuta las mismas sentencias que la de 1
+        """
+        productos = _productos(db_session, 10)
+
+        # Primera venta del periodo: crea los contadores de numeración (fuera del presupuesto)
+        assert client.post("/api/v1/ventas/registrar", json=_venta(productos[:1])).status_code == 201
+
+        with presupuesto_sql.verificar():
+            assert client.post("/api/v1/ventas/registrar", json=_venta(productos[:1])).status_code == 201
+            un_item = len(presupuesto_sql.ultima.sentencias)
+            assert client.post("/api/v1/ventas/registrar", json=_venta(productos)).status_code == 201
+            diez_items = len(presupuesto_sql.ultima.sentencias)
+
+        assert diez_items == un_item
+        assert diez_items <= PRESUPUESTOS["POST /api/v1/ventas/registrar"]
+
+    def test_productos_disponibles_una_consulta(self, client, db_session, presupuesto_sql):
+        _productos(db_session, 1)
+        with presupuesto_sql.verificar():
+            assert client.get("/api/v1/ventas/productos-disponibles").status_code == 200
+            un_producto = len(presupuesto_sql.ultima.sentencias)
+
+            _productos(db_session, 19, desde=1)
+            respuesta = client.get("/api/v1/ventas/productos-disponibles")
+            veinte_productos = len(presupuesto_sql.ultima.sentencias)
+
+        assert len(respuesta.json()["data"]) == 20
+        assert veinte_productos == un_producto == 1
+
+    def test_listado_de_insumos_no_crece_con_las_filas(self, client, db_session, presupuesto_sql):
+        _insumos(db_session, 1)
+        with presupuesto_sql.verificar():
+            assert client.get("/api/v1/insumos/").status_code == 200
+            un_insumo = len(presupuesto_sql.ultima.sentencias)
+
+            _insumos(db_session, 29, desde=1)
+            respuesta = client.get("/api/v1/insumos/")
+            treinta_insumos = len(presupuesto_sql.ultima.sentencias)
+
+        assert len(respuesta.json()["data"]) == 30
+        assert treinta_insumos == un_insumo
+
+    def test_ejecutar_produccion_no_crece_con_los_insumos(
+        self, client, db_session, usuario_admin, proveedor_base, producto_con_stock, presupuesto_sql
+    ):
+        """
+        Test: Producción de una receta de 1 insumo y de una de 10 insumos,
+        cada insumo repartido en dos lotes.
+
+        Resultado esperado:
+        - Ambas dentro del presupuesto de POST /api/v1/produccion/ejecutar
+        - La de 10 insumos (20 lotes) ejecuta las mismas sentencias que la de 1
+        """
+        inicial = _receta(db_session, producto_con_stock, "PSQL-R0", _insumos_con_lotes(db_session, usuario_admin, proveedor_base, 1))
+        pocos = _receta(db_session, producto_con_stock, "PSQL-R1", _insumos_con_lotes(db_session, usuario_admin, proveedor_base, 1, desde=1))
+        muchos = _receta(db_session, producto_con_stock, "PSQL-R2", _insumos_con_lotes(db_session, usuario_admin, proveedor_base, 10, desde=2))
+
+        def producir(receta):
+            return client.post("/api/v1/produccion/ejecutar", json={
+                "id_receta": receta.id_receta, "cantidad_batch": "1.5", "id_user": usuario_admin.id_user
+            })
+
+        # Primera producción del periodo: crea los contadores de numeración (fuera del presupuesto)
+        assert producir(inicial).status_code == 200
+
+        with presupuesto_sql.verificar():
+            assert producir(pocos).status_code == 200
+            un_insumo = len(presupuesto_sql.ultima.sentencias)
+            respuesta = producir(muchos)
+            diez_insumos = len(presupuesto_sql.ultima.sentencias)
+
+        assert respuesta.json()["data"]["total_movimientos_creados"] == 20
+        assert diez_insumos == un_insumo
+        assert diez_insumos <= PRESUPUESTOS["POST /api/v1/produccion/ejecutar"]
+
+    def test_ejecutar_plan_no_crece_con_las_recetas(
+        self, client, db_session, usuario_admin, proveedor_base, producto_con_stock, presupuesto_sql
+    ):
+        """
+        Test: Plan de producción de 1 receta y de 10 recetas.
+
+        Resultado esperado:
+        - Ambos dentro del presupuesto de POST /api/v1/produccion/ejecutar-lote
+        - El plan de 10 recetas ejecuta las mismas sentencias que el de 1
+        """
+        inicial = _receta(db_session, producto_con_stock, "PSQL-R0", _insumos_con_lotes(db_session, usuario_admin, proveedor_base, 1))
+        pocas = [_receta(db_session, producto_con_stock, "PSQL-R1", _insumos_con_lotes(db_session, usuario_admin, proveedor_base, 1, desde=1))]
+        muchas = [
+            _receta(db_session, producto_con_stock, f"PSQL-R{n + 2}", [insumo])
+            for n, insumo in enumerate(_insumos_con_lotes(db_session, usuario_admin, proveedor_base, 10, desde=2))
+        ]
+
+        def plan(recetas):
+            return client.post("/api/v1/produccion/ejecutar-lote", json={
+                "items": [{"id_receta": receta.id_receta, "cantidad_batch": "1.5"} for receta in recetas],
+                "id_user": usuario_admin.id_user
+            })
+
+        # Primera producción del periodo: crea los contadores de numeración (fuera del presupuesto)
+        assert client.post("/api/v1/produccion/ejecutar", json={
+            "id_receta": inicial.id_receta, "cantidad_batch": "1", "id_user": usuario_admin.id_user
+        }).status_code == 200
+
+        with presupuesto_sql.verificar():
+            assert plan(pocas).status_code == 200
+            una_receta = len(presupuesto_sql.ultima.sentencias)
+            respuesta = plan(muchas)
+            diez_recetas = len(presupuesto_sql.ultima.sentencias)
+
+        assert respuesta.json()["data"]["total_ejecutadas"] == 10
+        assert diez_recetas == una_receta
+        assert diez_recetas <= PRESUPUESTOS["POST /api/v1/produccion/ejecutar-lote"]
+
+    def test_promociones_una_consulta(self, client, db_session, presupuesto_sql):
+        productos = _productos(db_session, 10)
+        una = _promocion(db_session, 1, productos[:1])
+        with presupuesto_sql.verificar():
+            assert client.get("/api/v1/promociones").status_code == 200
+            listado_uno = len(presupuesto_sql.ultima.sentencias)
+            assert client.get(f"/api/v1/promociones/{una.id_promocion}").status_code == 200
+            detalle_uno = len(presupuesto_sql.ultima.sentencias)
+
+            combo = _promocion(db_session, 2, productos)
+            for n in range(3, 12):
+                _promocion(db_session, n, productos[:3])
+            listado = client.get("/api/v1/promociones")
+            listado_muchas = len(presupuesto_sql.ultima.sentencias)
+            detalle = client.get(f"/api/v1/promociones/{combo.id_promocion}")
+            detalle_combo = len(presupuesto_sql.ultima.sentencias)
+
+        assert len(listado.json()["data"]) == 11
+        assert len(detalle.json()["data"]["productos_combo"]) == 10
+        assert listado_muchas == listado_uno == 1
+        assert detalle_combo == detalle_uno == 1
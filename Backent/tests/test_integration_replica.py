@@ -0,0 +1,25 @@
+"""
+Pruebas de integración de la réplica de lectura.
+
+La BD de prueba hace de "réplica" (una instancia que no está en recovery,
+como una segunda instancia local): el control de retraso la considera al día.
+
+Tests:
+1. GuardiaReplica mide retraso 0 en una instancia que no es réplica
+"""
+import pytest
+from prometheus_client import REGISTRY
+
+from database import GuardiaReplica
+
+
+@pytest.mark.integration
+class TestReplicaLectura:
+    """Lecturas enrutadas a la réplica."""
+
+    def test_instancia_sin_recovery_es_utilizable(self, db_session):
+        guardia = GuardiaReplica(db_session.get_bind(), max_lag_segundos=1, intervalo_segundos=60)
+
+        assert guardia.utilizable() is True
+        assert REGISTRY.get_sample_value("db_replica_lag_segundos") == 0
+
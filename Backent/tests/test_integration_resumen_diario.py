@@ -0,0 +1,142 @@
+"""
+Pruebas de integración de los resúmenes diarios de reportes.
+
+Los reportes deben devolver lo mismo leyendo las tablas de origen o los
+resúmenes sellados, y un cambio sobre un día ya sellado (anulación,
+movimiento con fecha pasada) debe reflejarse en el resumen dentro de la
+misma transacción.
+
+Tests:
+1. Sellar los días anteriores no cambia el análisis ABC ni el reporte diario
+2. Anular una venta de un día sellado actualiza el resumen
+3. Un movimiento manual de insumo con fecha de un día sellado actualiza el resumen
+"""
+import pytest
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+# Registrar en Base.metadata las tablas que solo usa el SQL crudo
+from modules.gestion_almacen_productos.ventas.model import Venta, VentaDetalle
+from modules.calidad_desperdicio_merma.model import CalidadDesperdicioMerma  # noqa: F401
+from modules.resumen_diario.model import ResumenDiaCierre, ResumenVentasProductoDia
+from modules.resumen_diario.service import ResumenDiarioService
+from modules.reportes.repository import ReportesRepository
+from modules.gestion_almacen_inusmos.movimiento_insumos.schemas import MovimientoInsumoCreate
+from modules.gestion_almacen_inusmos.movimiento_insumos.service import MovimientoInsumoService
+from modules.insumo.model import Insumo
+from enums.tipo_movimiento import TipoMovimientoEnum
+from utils.rango_fechas import hoy_negocio
+
+
+def _registrar_venta(db_session, numero, fecha, id_user, id_producto, cantidad, metodo_pago="efectivo"):
+    """Inserta una venta de un solo ítem a 2.00 por unidad."""
+    subtotal = Decimal(cantidad) * Decimal("2.00")
+    venta = Venta(
+        numero_venta=numero, fecha_venta=fecha, total=subtotal,
+        metodo_pago=metodo_pago, id_user=id_user, anulado=False
+    )
+    db_session.add(venta)
+    db_session.flush()
+    db_session.add(VentaDetalle(
+        id_venta=venta.id_venta, id_producto=id_producto, cantidad=Decimal(cantidad),
+        precio_unitario=Decimal("2.00"), subtotal=subtotal
+    ))
+    return venta
+
+
+@pytest.fixture
+def ventas_historicas(db_session, usuario_admin, producto_con_stock, producto_terminado_base):
+    """Ventas en los últimos 5 días (incluido hoy) de dos productos."""
+    hoy = hoy_negocio()
+    ventas = []
+    for dias_atras in range(5):
+        fecha = datetime.combine(hoy - timedelta(days=dias_atras), time(10, 0))
+        ventas.append(_registrar_venta(
+            db_session, f"VEN-RES-A{dias_atras}", fecha, usuario_admin.id_user,
+            producto_con_stock.id_producto, 3
+        ))
+        ventas.append(_registrar_venta(
+            db_session, f"VEN-RES-B{dias_atras}", fecha, usuario_admin.id_user,
+            producto_terminado_base.id_producto, 1, metodo_pago="tarjeta"
+        ))
+    db_session.commit()
+    return ventas
+
+
+@pytest.mark.integration
+class TestResumenDiario:
+    """Pruebas de los resúmenes diarios leídos por los reportes."""
+
+    def test_sellar_no_cambia_los_reportes(self, db_session, ventas_historicas):
+        """
+        Dado: Ventas en los últimos 5 días
+        Cuando: El job sella los días anteriores a hoy
+        Entonces: El ABC del período y el reporte de ayer son iguales antes y después
+        """
+        hoy = hoy_negocio()
+        ayer = hoy - timedelta(days=1)
+        desde = hoy - timedelta(days=4)
+
+        abc_antes = ReportesRepository(db_session).obtener_ventas_por_producto(desde, hoy)
+        dia_antes = ReportesRepository(db_session).obtener_resumen_ventas_dia(ayer)
+
+        resultado = ResumenDiarioService().sellar_pendientes(db_session)
+
+        assert resultado == {"dias_sellados": 4, "desde": desde, "hasta": ayer}
+        assert db_session.query(ResumenDiaCierre).filter(ResumenDiaCierre.sellado_en.isnot(None)).count() == 4
+
+        repo = ReportesRepository(db_session)
+        assert repo.obtener_ventas_por_producto(desde, hoy) == abc_antes
+        assert repo.obtener_resumen_ventas_dia(ayer) == dia_antes
+        assert dia_antes["total_ventas"] == Decimal("8.00")
+        assert dia_antes["ventas_por_metodo"]["tarjeta"] == Decimal("2.00")
+
+        # Una segunda ejecución no tiene días pendientes
+        assert ResumenDiarioService().sellar_pendientes(db_session)["dias_sellados"] == 0
+
+    def test_anular_venta_de_dia_sellado_actualiza_resumen(self, db_session, ventas_historicas, producto_con_stock):
+        """
+        Dado: Días anteriores sellados
+        Cuando: Se anula una venta de ayer y se recalcula el día antes del commit
+        Entonces: El resumen y los reportes de ayer dejan de contarla
+        """
+        ayer = hoy_negocio() - timedelta(days=1)
+        ResumenDiarioService().sellar_pendientes(db_session)
+
+        venta = next(v for v in ventas_historicas if v.numero_venta == "VEN-RES-A1")
+        venta.anulado = True
+        ResumenDiarioService().actualizar_dias(db_session, [venta.fecha_venta.date()])
+        db_session.commit()
+
+        fila = db_session.get(ResumenVentasProductoDia, (ayer, producto_con_stock.id_producto))
+        assert fila is None
+
+        resumen = ReportesRepository(db_session).obtener_resumen_ventas_dia(ayer)
+        assert resumen["total_ventas"] == Decimal("2.00")
+        assert resumen["cantidad_transacciones"] == 1
+
+    def test_movimiento_manual_en_dia_sellado_actualiza_resumen(self, db_session, ventas_historicas, usuario_admin):
+        """
+        Dado: Días anteriores sellados
+        Cuando: Se registra un movimiento manual de salida de insumo con fecha de ayer
+        Entonces: El consumo de ayer lo cuenta (el resumen del día se recalcula)
+        """
+        ayer = hoy_negocio() - timedelta(days=1)
+        insumo = Insumo(codigo="RES-INS-1", nombre="Harina resumen", unidad_medida="KG", stock_minimo=Decimal("0"))
+        db_session.add(insumo)
+        db_session.commit()
+        ResumenDiarioService().sellar_pendientes(db_session)
+
+        MovimientoInsumoService().create(db_session, MovimientoInsumoCreate(
+            numero_movimiento="MOV-RES-1",
+            id_insumo=insumo.id_insumo,
+            tipo_movimiento=TipoMovimientoEnum.SALIDA,
+            motivo="AJUSTE_MANUAL",
+            cantidad=Decimal("4"),
+            fecha_movimiento=datetime.combine(ayer, time(9, 0)),
+            id_user=usuario_admin.id_user
+        ))
+
+        consumo = ReportesRepository(db_session).obtener_consumo_insumos_periodo(ayer, ayer)
+        fila = next(c for c in consumo if c["id_insumo"] == insumo.id_insumo)
+        assert fila["consumo_total"] == Decimal("4")
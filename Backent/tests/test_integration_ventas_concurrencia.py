@@ -0,0 +1,200 @@
+"""
+Pruebas de concurrencia para el registro y la anulación de ventas.
+
+Cada venta se ejecuta en su propio hilo y con su propia sesión de BD,
+igual que dos cajas atendiendo al mismo tiempo.
+
+Tests:
+1. N ventas paralelas del mismo producto nunca dejan el stock negativo
+2. Ventas con los mismos productos en orden inverso no producen deadlock
+3. Ventas y anulaciones simultáneas no producen deadlock ni repiten números
+"""
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+
+# Registrar en Base.metadata las tablas que solo usa el SQL crudo de ventas,
+# para que el fixture db_session las cree
+from modules.gestion_almacen_productos.ventas.model import Venta, VentaDetalle  # noqa: F401
+from modules.numeracion.model import ContadorDocumento  # noqa: F401
+from modules.gestion_almacen_productos.ventas.service import VentasService
+from modules.gestion_almacen_productos.ventas.schemas import RegistrarVentaRequest, VentaItemRequest
+
+
+def _ejecutar_en_paralelo(engine, tareas):
+    """
+    Ejecuta cada tarea(service, db) en un hilo con sesión propia.
+    Retorna la lista de códigos de estado (200 si la tarea terminó bien).
+    """
+    service = VentasService()
+    SesionHilo = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def ejecutar(tarea):
+        db = SesionHilo()
+        try:
+            tarea(service, db)
+            return 200
+        except HTTPException as e:
+            return e.status_code
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=len(tareas)) as executor:
+        return list(executor.map(ejecutar, tareas))
+
+
+def _vender_en_paralelo(engine, requests, id_user):
+    """
+    Ejecuta cada RegistrarVentaRequest en un hilo con sesión propia.
+    Retorna la lista de códigos de estado (201 si la venta se registró).
+    """
+    tareas = [
+        lambda service, db, request=request: service.registrar_venta(db, request, id_user)
+        for request in requests
+    ]
+    return [201 if codigo == 200 else codigo for codigo in _ejecutar_en_paralelo(engine, tareas)]
+
+
+def _request(*items):
+    return RegistrarVentaRequest(
+        items=[
+            VentaItemRequest(id_producto=id_producto, cantidad=cantidad, precio_unitario=Decimal("1.00"))
+            for id_producto, cantidad in items
+        ],
+        metodo_pago="efectivo"
+    )
+
+
+@pytest.mark.integration
+class TestVentasConcurrencia:
+    """Pruebas de concurrencia del descuento de stock en ventas."""
+
+    def test_ventas_paralelas_no_dejan_stock_negativo(self, db_session, producto_con_stock, usuario_admin):
+        """
+        Test: Vender en paralelo más de lo que hay en stock.
+
+        Dado: Un producto con 50 unidades
+        Cuando: 12 cajas venden 5 unidades al mismo tiempo
+        Entonces: Exactamente 10 ventas se registran, 2 fallan con 400 y el stock final es 0
+        """
+        from modules.productos_terminados.model import ProductoTerminado
+        from modules.gestion_almacen_productos.movimiento_productos_terminados.model import (
+            MovimientoProductoTerminado
+        )
+
+        # Arrange
+        id_producto = producto_con_stock.id_producto
+        requests = [_request((id_producto, Decimal("5"))) for _ in range(12)]
+
+        # Act
+        resultados = _vender_en_paralelo(db_session.get_bind(), requests, usuario_admin.id_user)
+
+        # Assert
+        assert resultados.count(201) == 10
+        assert resultados.count(400) == 2
+
+        db_session.expire_all()
+        producto = db_session.get(ProductoTerminado, id_producto)
+        assert producto.stock_actual == Decimal("0")
+
+        salidas = db_session.query(MovimientoProductoTerminado).filter(
+            MovimientoProductoTerminado.id_producto == id_producto,
+            MovimientoProductoTerminado.tipo_movimiento == "SALIDA"
+        ).count()
+        assert salidas == 10
+
+    def test_ventas_con_orden_inverso_no_producen_deadlock(
+        self, db_session, producto_con_stock, producto_terminado_base, usuario_admin
+    ):
+        """
+        Test: Tickets con los mismos productos en orden distinto.
+
+        Dado: Dos productos con stock suficiente
+        Cuando: La mitad de las ventas lista A luego B y la otra mitad B luego A
+        Entonces: Todas se registran (el bloqueo por id_producto evita deadlocks)
+        """
+        from modules.productos_terminados.model import ProductoTerminado
+
+        # Arrange
+        id_a = producto_con_stock.id_producto       # stock 50
+        id_b = producto_terminado_base.id_producto  # stock 100
+        requests = [
+            _request((id_a, Decimal("1")), (id_b, Decimal("1"))) if i % 2 == 0
+            else _request((id_b, Decimal("1")), (id_a, Decimal("1")))
+            for i in range(10)
+        ]
+
+        # Act
+        resultados = _vender_en_paralelo(db_session.get_bind(), requests, usuario_admin.id_user)
+
+        # Assert
+        assert resultados == [201] * 10
+
+        db_session.expire_all()
+        assert db_session.get(ProductoTerminado, id_a).stock_actual == Decimal("40")
+        assert db_session.get(ProductoTerminado, id_b).stock_actual == Decimal("90")
+
+    def test_ventas_y_anulaciones_simultaneas_no_producen_deadlock(
+        self, db_session, producto_con_stock, producto_terminado_base, usuario_admin
+    ):
+        """
+        Test: Anular ventas mientras otras cajas venden los mismos productos.
+
+        Dado: 5 ventas registradas de los productos A y B
+        Cuando: Se anulan las 5 mientras otras 5 ventas listan B luego A
+        Entonces: Todas terminan (la numeración no retiene bloqueos entre ventas
+                  y anulaciones), el stock cuadra y ningún movimiento repite número
+        """
+        from sqlalchemy import func
+        from modules.productos_terminados.model import ProductoTerminado
+        from modules.gestion_almacen_productos.movimiento_productos_terminados.model import (
+            MovimientoProductoTerminado
+        )
+
+        # Arrange
+        id_a = producto_con_stock.id_producto       # stock 50
+        id_b = producto_terminado_base.id_producto  # stock 100
+        id_user = usuario_admin.id_user
+        service = VentasService()
+        ids_venta = [
+            service.registrar_venta(
+                db_session, _request((id_a, Decimal("1")), (id_b, Decimal("1"))), id_user
+            ).id_venta
+            for _ in range(5)
+        ]
+
+        anulaciones = [
+            lambda service, db, id_venta=id_venta: service.anular_venta(db, id_venta, id_user)
+            for id_venta in ids_venta
+        ]
+        ventas = [
+            lambda service, db: service.registrar_venta(
+                db, _request((id_b, Decimal("1")), (id_a, Decimal("1"))), id_user
+            )
+            for _ in range(5)
+        ]
+        tareas = [tarea for par in zip(anulaciones, ventas) for tarea in par]
+
+        # Act
+        resultados = _ejecutar_en_paralelo(db_session.get_bind(), tareas)
+
+        # Assert
+        assert resultados == [200] * 10
+
+        db_session.expire_all()
+        assert db_session.get(ProductoTerminado, id_a).stock_actual == Decimal("45")
+        assert db_session.get(ProductoTerminado, id_b).stock_actual == Decimal("95")
+
+        compensaciones = db_session.query(MovimientoProductoTerminado).filter(
+            MovimientoProductoTerminado.motivo == "ANULACION_VENTA"
+        ).count()
+        assert compensaciones == 10
+
+        total, distintos = db_session.query(
+            func.count(MovimientoProductoTerminado.numero_movimiento),
+            func.count(func.distinct(MovimientoProductoTerminado.numero_movimiento))
+        ).one()
+        assert total == distintos == 30
@@ -0,0 +1,148 @@
+"""
+Instrumentación del pool de conexiones y de las sentencias SQL.
+
+Métricas Prometheus (etiqueta `engine`: sync | async | replica | async_replica):
+- db_pool_checkout_espera_segundos: tiempo esperando una conexión del pool
+  (incluye abrir una conexión nueva cuando el pool todavía no está lleno)
+- db_pool_timeouts_total: checkouts que agotaron DB_POOL_TIMEOUT
+- db_conexiones_activas: conexiones prestadas en este momento
+- db_sentencias_por_request / db_tiempo_sql_por_request_segundos: por endpoint
+- db_replica_lag_segundos / db_lecturas_total: retraso medido de la réplica y
+  a dónde fueron las sesiones de lectura (replica | primaria)
+
+Las sentencias y esperas se acumulan en EstadisticasSQL del request actual
+(context variable, igual que el request_id): DBTimingMiddleware la abre al
+recibir el request y la registra al terminar. Fuera de un request (jobs,
+scripts) no hay estadísticas abiertas y solo se registran las métricas del pool.
+"""
+
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+POOL_CHECKOUT_ESPERA = Histogram(
+    "db_pool_checkout_espera_segundos",
+    "Tiempo de espera para obtener una conexión del pool",
+    ["engine"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Checkouts que agotaron el tiempo de espera del pool",
+    ["engine"]
+)
+CONEXIONES_ACTIVAS = Gauge(
+    "db_conexiones_activas",
+    "Conexiones del pool prestadas en este momento",
+    ["engine"]
+)
+SENTENCIAS_POR_REQUEST = Histogram(
+    "db_sentencias_por_request",
+    "Sentencias SQL ejecutadas por request",
+    ["endpoint"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+TIEMPO_SQL_POR_REQUEST = Histogram(
+    "db_tiempo_sql_por_request_segundos",
+    "Tiempo total en sentencias SQL por request",
+    ["endpoint"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+REPLICA_LAG = Gauge(
+    "db_replica_lag_segundos",
+    "Retraso de la réplica de lectura en la última verificación (-1 si no respondió)"
+)
+LECTURAS = Counter(
+    "db_lecturas_total",
+    "Sesiones de lectura abiertas, por destino",
+    ["destino"]
+)
+
+
+@dataclass
+class EstadisticasSQL:
+    """Uso de la base de datos de un request."""
+    sentencias: int = 0
+    tiempo_sql: float = 0.0
+    espera_pool: float = 0.0
+
+
+estadisticas_sql_ctx: ContextVar[Optional[EstadisticasSQL]] = ContextVar("estadisticas_sql", default=None)
+
+
+def get_estadisticas_sql() -> Optional[EstadisticasSQL]:
+    """Estadísticas del request actual (None fuera de un request)."""
+    return estadisticas_sql_ctx.get()
+
+
+# ==================== POOL ====================
+
+class _MedirEsperaCheckout:
+    """Mide cuánto tarda el pool en entregar una conexión (espera en la cola incluida)."""
+
+    nombre_engine: str
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_TIMEOUTS.labels(engine=self.nombre_engine).inc()
+            raise
+        finally:
+            espera = time.perf_counter() - inicio
+            POOL_CHECKOUT_ESPERA.labels(engine=self.nombre_engine).observe(espera)
+            estadisticas = estadisticas_sql_ctx.get()
+            if estadisticas is not None:
+                estadisticas.espera_pool += espera
+
+
+class PoolInstrumentado(_MedirEsperaCheckout, QueuePool):
+    """QueuePool con la espera de checkout instrumentada (engine sync)."""
+    nombre_engine = "sync"
+
+
+class PoolAsyncInstrumentado(_MedirEsperaCheckout, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool con la espera de checkout instrumentada (engine async)."""
+    nombre_engine = "async"
+
+
+class PoolReplicaInstrumentado(PoolInstrumentado):
+    nombre_engine = "replica"
+
+
+class PoolAsyncReplicaInstrumentado(PoolAsyncInstrumentado):
+    nombre_engine = "async_replica"
+
+
+# ==================== SENTENCIAS ====================
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    # En el ExecutionContext de la sentencia: si falla, no queda nada pendiente en la conexión
+    context._inicio_sentencia = time.perf_counter()
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    estadisticas = estadisticas_sql_ctx.get()
+    if estadisticas is not None:
+        estadisticas.sentencias += 1
+        estadisticas.tiempo_sql += time.perf_counter() - context._inicio_sentencia
+
+
+def instrumentar_engine(engine: Engine, nombre: str) -> None:
+    """
+    Registra las sentencias del engine en las estadísticas del request y
+    publica las conexiones activas de su pool como `engine=nombre`. Para un
+    AsyncEngine, pasar engine.sync_engine.
+    """
+    event.listen(engine, "before_cursor_execute", _antes_de_ejecutar)
+    event.listen(engine, "after_cursor_execute", _despues_de_ejecutar)
+    CONEXIONES_ACTIVAS.labels(engine=nombre).set_function(lambda: engine.pool.checkedout())
@@ -0,0 +1,171 @@
+"""
+Paginación por cursor (keyset) para listados ordenados por fecha descendente.
+
+En lugar de `LIMIT n OFFSET k` (Postgres lee y descarta las k filas previas) y
+un `COUNT(*)` aparte, cada página continúa desde la última fila de la anterior:
+
+    WHERE (fecha, id) < (:fecha_cursor, :id_cursor)
+    ORDER BY fecha DESC, id DESC
+    LIMIT n + 1
+
+Con un índice sobre (fecha, id) la página 1000 cuesta lo mismo que la primera.
+La fila extra solo indica si hay una página siguiente.
+
+El cursor viaja como texto legible "<fecha ISO>,<id>" (ej. "2026-10-17T08:30:00,1542")
+en el parámetro `after`. El total es opcional y aproximado: se toma de la
+estimación del planificador (EXPLAIN), sin recorrer la tabla.
+"""
+
+import json
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import text, tuple_
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql import Select
+
+
+T = TypeVar("T")
+
+LIMITE_DEFECTO = 50
+LIMITE_MAXIMO = 500
+
+Cursor = Tuple[datetime, int]
+
+# "+hh:mm" de la zona horaria llega como espacio si el cliente no codificó la URL
+_ZONA_SIN_CODIFICAR = re.compile(r"(\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?) (\d{2}:?\d{2})$")
+
+
+class PaginaKeyset(BaseModel, Generic[T]):
+    """Una página de un listado paginado por cursor."""
+    items: List[T]
+    limit: int
+    siguiente: Optional[str] = None  # valor para `after` de la próxima página
+    hay_mas: bool = False
+    total_aproximado: Optional[int] = None
+
+
+def codificar_cursor(fecha: datetime, id_fila: int) -> str:
+    """Cursor de la fila (fecha, id): "<fecha ISO>,<id>"."""
+    return f"{fecha.isoformat()},{id_fila}"
+
+
+def decodificar_cursor(cursor: str) -> Cursor:
+    """
+    Convierte "<fecha ISO>,<id>" en (datetime, id).
+
+    Raises:
+        ValueError: si el cursor no tiene ese formato.
+    """
+    fecha, separador, id_fila = cursor.strip().rpartition(",")
+    if not separador:
+        raise ValueError(f"Cursor inválido: '{cursor}'. Formato esperado: <fecha ISO>,<id>")
+    try:
+        return datetime.fromisoformat(_ZONA_SIN_CODIFICAR.sub(r"\1+\2", fecha)), int(id_fila)
+    except ValueError:
+        raise ValueError(f"Cursor inválido: '{cursor}'. Formato esperado: <fecha ISO>,<id>")
+
+
+def leer_cursor(after: Optional[str]) -> Optional[Cursor]:
+    """decodificar_cursor() para parámetros de endpoints: un cursor inválido es un 400."""
+    if not after:
+        return None
+    try:
+        return decodificar_cursor(after)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def filtro_despues_de(columna_fecha, columna_id, cursor: Cursor):
+    """
+    Condición `(fecha, id) < (fecha_cursor, id_cursor)` para orden descendente.
+
+    Se escribe como comparación de filas (no como `fecha < x OR (fecha = x AND id < y)`)
+    para que Postgres la resuelva con un solo rango del índice (fecha, id).
+    """
+    return tuple_(columna_fecha, columna_id) < tuple_(*cursor)
+
+
+def cortar_pagina(
+    filas: Sequence[Any],
+    limit: int,
+    clave: Callable[[Any], Cursor]
+) -> Tuple[List[Any], Optional[str], bool]:
+    """
+    Separa la fila extra pedida con LIMIT n + 1.
+
+    Returns:
+        Tupla (items, siguiente, hay_mas); siguiente es el cursor de la última
+        fila de la página, o None si no hay más.
+    """
+    hay_mas = len(filas) > limit
+    items = list(filas[:limit])
+    siguiente = codificar_cursor(*clave(items[-1])) if hay_mas and items else None
+    return items, siguiente, hay_mas
+
+
+def total_aproximado(
+    db: Session,
+    consulta: Union[Query, Select, str],
+    params: Optional[Dict[str, Any]] = None
+) -> int:
+    """
+    Cantidad de filas estimada por el planificador para la consulta (sin ejecutarla).
+
+    Es exacta para tablas analizadas recientemente y sin filtros correlacionados;
+    alcanza para "página 3 de ~120" sin el costo de un COUNT(*) sobre todo el historial.
+
+    Args:
+        consulta: Query ORM, select() de Core o SQL de text() (con `params`).
+    """
+    if isinstance(consulta, str):
+        resultado = db.execute(text(f"EXPLAIN (FORMAT JSON) {consulta}"), params or {})
+    else:
+        sentencia = consulta.statement if isinstance(consulta, Query) else consulta
+        compilada = sentencia.compile(dialect=db.get_bind().dialect)
+        resultado = db.connection().exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compilada}", compilada.params
+        )
+
+    plan = resultado.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def paginar(
+    db: Session,
+    query: Query,
+    columna_fecha,
+    columna_id,
+    cursor: Optional[Cursor] = None,
+    limit: int = LIMITE_DEFECTO,
+    con_total: bool = False
+) -> Dict[str, Any]:
+    """
+    Aplica la paginación keyset a una Query ORM ya filtrada (sin ORDER BY ni LIMIT).
+
+    Returns:
+        Dict con items, limit, siguiente, hay_mas y total_aproximado
+        (None si no se pidió `con_total`), listo para PaginaKeyset.
+    """
+    total = total_aproximado(db, query) if con_total else None
+
+    if cursor is not None:
+        query = query.filter(filtro_despues_de(columna_fecha, columna_id, cursor))
+
+    filas = query.order_by(columna_fecha.desc(), columna_id.desc()).limit(limit + 1).all()
+    items, siguiente, hay_mas = cortar_pagina(
+        filas, limit, lambda fila: (getattr(fila, columna_fecha.key), getattr(fila, columna_id.key))
+    )
+
+    return {
+        "items": items,
+        "limit": limit,
+        "siguiente": siguiente,
+        "hay_mas": hay_mas,
+        "total_aproximado": total
+    }
@@ -0,0 +1,84 @@
+from datetime import date, datetime, time, timedelta
+from typing import Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_
+
+from config import settings
+
+
+# Zona horaria del negocio: la misma con la que corre el scheduler
+ZONA_HORARIA_NEGOCIO = ZoneInfo(settings.SCHEDULER_TIMEZONE)
+
+
+def ahora_negocio() -> datetime:
+    """
+    Hora actual del negocio (no la del servidor), sin tzinfo.
+
+    Es el reloj con el que se sellan las columnas TIMESTAMP sin zona, el mismo
+    que usan hoy_negocio/inicio_dia para cortar los días.
+    """
+    return datetime.now(ZONA_HORARIA_NEGOCIO).replace(tzinfo=None)
+
+
+def hoy_negocio() -> date:
+    """Fecha actual en la zona horaria del negocio (no la del servidor)."""
+    return ahora_negocio().date()
+
+
+def inicio_dia(fecha: date, con_zona: bool = False) -> datetime:
+    """
+    Primer instante del día `fecha`.
+
+    Las columnas TIMESTAMP sin zona guardan la hora local del negocio, así que
+    el límite va sin tzinfo; para TIMESTAMP WITH TIME ZONE se usa la medianoche
+    de la zona del negocio, que Postgres compara correctamente contra UTC.
+    """
+    inicio = datetime.combine(fecha, time.min)
+    return inicio.replace(tzinfo=ZONA_HORARIA_NEGOCIO) if con_zona else inicio
+
+
+def rango_periodo(
+    fecha_inicio: date,
+    fecha_fin: date,
+    con_zona: bool = False
+) -> Tuple[datetime, datetime]:
+    """
+    Convierte el período de días [fecha_inicio, fecha_fin] (ambos inclusive)
+    en el rango semiabierto de timestamps [inicio, fin).
+
+    Returns:
+        Tupla (desde, hasta) donde hasta es la medianoche del día siguiente a fecha_fin.
+    """
+    return inicio_dia(fecha_inicio, con_zona), inicio_dia(fecha_fin + timedelta(days=1), con_zona)
+
+
+def rango_dia(fecha: date, con_zona: bool = False) -> Tuple[datetime, datetime]:
+    """Rango semiabierto [00:00 de fecha, 00:00 del día siguiente)."""
+    return rango_periodo(fecha, fecha, con_zona)
+
+
+def _con_zona(columna) -> bool:
+    return bool(getattr(columna.type, "timezone", False))
+
+
+def filtro_periodo(columna, fecha_inicio: date, fecha_fin: date):
+    """
+    Condición sargable `columna >= desde AND columna < hasta` para un período de días.
+
+    A diferencia de `func.date(columna) BETWEEN ...`, compara la columna sin
+    transformarla, por lo que Postgres puede usar su índice y solo lee las
+    filas del período, sin importar el tamaño del histórico.
+    """
+    desde, hasta = rango_periodo(fecha_inicio, fecha_fin, _con_zona(columna))
+    return and_(columna >= desde, columna < hasta)
+
+
+def filtro_dia(columna, fecha: date):
+    """Condición sargable para las filas de un único día."""
+    return filtro_periodo(columna, fecha, fecha)
+
+
+def filtro_desde(columna, fecha: date):
+    """Condición sargable `columna >= inicio de fecha` (sin límite superior)."""
+    return columna >= inicio_dia(fecha, _con_zona(columna))
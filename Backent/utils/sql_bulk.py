@@ -0,0 +1,41 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+def construir_values(
+    filas: Sequence[Dict[str, Any]],
+    columnas: Sequence[str],
+    casts: Optional[Dict[str, str]] = None,
+    prefijo: str = "v"
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Construye una cláusula VALUES multi-fila con parámetros nombrados.
+
+    Permite escribir INSERT/UPDATE en lote con `text()` sin concatenar valores:
+    cada celda se convierte en un parámetro `:<prefijo>_<columna>_<n>`.
+
+    Args:
+        filas: Lista de diccionarios con los valores de cada fila.
+        columnas: Orden de las columnas dentro de cada tupla.
+        casts: Tipo SQL opcional por columna (ej. {"cantidad": "NUMERIC"}),
+            necesario cuando VALUES se usa como tabla derivada en un UPDATE ... FROM.
+        prefijo: Prefijo de los parámetros, para combinar varias cláusulas en una query.
+
+    Returns:
+        Tupla (sql, params) donde sql es "(...), (...)" listo para insertar tras VALUES.
+    """
+    casts = casts or {}
+    tuplas: List[str] = []
+    params: Dict[str, Any] = {}
+
+    for n, fila in enumerate(filas):
+        celdas = []
+        for columna in columnas:
+            nombre = f"{prefijo}_{columna}_{n}"
+            params[nombre] = fila[columna]
+            if columna in casts:
+                celdas.append(f"CAST(:{nombre} AS {casts[columna]})")
+            else:
+                celdas.append(f":{nombre}")
+        tuplas.append(f"({', '.join(celdas)})")
+
+    return ", ".join(tuplas), params